@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class GrcConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "grc"
+
+    def ready(self):
+        # Register the RBAC cache invalidation receivers
+        from .rbac import signals  # noqa: F401
+        # Register the user directory cache invalidation receivers
+        from . import user_directory  # noqa: F401
+        # Send notifications left in the outbox without waiting for the next enqueue
+        from .notification_outbox import start_in_process_dispatcher
+        start_in_process_dispatcher()
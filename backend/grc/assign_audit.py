@@ -4,15 +4,19 @@ from rest_framework import status
 from .models import Framework, Policy, SubPolicy, Users, Audit, AuditFinding, Compliance
 from django.http import JsonResponse
 from django.utils import timezone
-from django.db import connection
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view
 from django.http import JsonResponse
 from .audit_views import create_audit_version, get_audit_findings_json
 from datetime import datetime
 import json
+import time
 from .validation import validate_audit_data, ValidationError
 from .logging_service import send_log
+from .audit_summary import findings_changed
 
 @api_view(['GET'])
 def get_frameworks(request):
@@ -130,6 +134,65 @@ def get_users_audit(request):
         )
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+AUDIT_FINDINGS_INSERT_CHUNK_SIZE = getattr(settings, 'AUDIT_FINDINGS_INSERT_CHUNK_SIZE', 1000)
+
+AUDIT_FINDING_INSERT_COLUMNS = (
+    '`AuditId`', '`ComplianceId`', '`UserId`', '`Evidence`',
+    '`Check`', '`Comments`', '`MajorMinor`', '`AssignedDate`', '`ReviewRejected`'
+)
+
+
+def scope_compliance_ids(cursor, framework_id, policy_id=None, subpolicy_id=None):
+    """ComplianceIds of the permanent compliances in an audit's scope (subpolicy, policy or framework)"""
+    if policy_id and subpolicy_id:
+        cursor.execute("""
+            SELECT c.ComplianceId
+            FROM compliance c
+            WHERE c.SubPolicyId = %s
+            AND c.PermanentTemporary = 'Permanent'
+        """, [subpolicy_id])
+    elif policy_id:
+        cursor.execute("""
+            SELECT c.ComplianceId
+            FROM compliance c
+            INNER JOIN subpolicies sp ON c.SubPolicyId = sp.SubPolicyId
+            WHERE sp.PolicyId = %s
+            AND c.PermanentTemporary = 'Permanent'
+        """, [policy_id])
+    else:
+        cursor.execute("""
+            SELECT c.ComplianceId
+            FROM compliance c
+            INNER JOIN subpolicies sp ON c.SubPolicyId = sp.SubPolicyId
+            INNER JOIN policies p ON sp.PolicyId = p.PolicyId
+            WHERE p.FrameworkId = %s
+            AND c.PermanentTemporary = 'Permanent'
+        """, [framework_id])
+    return [row[0] for row in cursor.fetchall()]
+
+
+def materialize_audit_findings(audits, compliance_ids, chunk_size=AUDIT_FINDINGS_INSERT_CHUNK_SIZE):
+    """
+    Insert an empty finding per compliance for each audit, assigned to the audit's
+    auditor, using multi-row INSERTs of chunk_size rows. Returns the number of rows.
+    Run it inside a transaction so a failure leaves no partial finding set.
+    """
+    rows = [
+        [audit.AuditId, compliance_id, audit.Auditor_id, '', '0', '', None, audit.AssignedDate, 0]
+        for audit in audits
+        for compliance_id in compliance_ids
+    ]
+    placeholders = '(' + ', '.join(['%s'] * len(AUDIT_FINDING_INSERT_COLUMNS)) + ')'
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), chunk_size):
+            chunk = rows[offset:offset + chunk_size]
+            cursor.execute(
+                f"INSERT INTO audit_findings ({', '.join(AUDIT_FINDING_INSERT_COLUMNS)}) "
+                f"VALUES {', '.join([placeholders] * len(chunk))}",
+                [value for row in chunk for value in row]
+            )
+    return len(rows)
+
 @api_view(['POST'])
 def create_audit(request):
     """
@@ -169,161 +232,85 @@ def create_audit(request):
                 'details': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        created_audits = []
-        findings_created = 0
-        
-        # Create separate audit for each team member
-        for member_id in validated_data['team_members']:
-            print(f"Creating audit for team member {member_id}")
-            
-            # Extract all required fields from the validated data
-            audit_fields = {
-                'Title': validated_data['title'],
-                'Scope': validated_data['scope'],
-                'Objective': validated_data['objective'],
-                'BusinessUnit': validated_data['business_unit'],
-                'Role': validated_data['role'],
-                'Responsibility': validated_data['responsibility'],
-                'Assignee_id': member_id,
-                'Auditor_id': member_id,
-                'Reviewer_id': validated_data['reviewer'],
-                'FrameworkId_id': validated_data['framework_id'],
-                'PolicyId_id': validated_data['policy_id'],
-                'SubPolicyId_id': validated_data['subpolicy_id'],
-                'DueDate': validated_data['due_date'],
-                'Frequency': validated_data['frequency'],
-                'Status': 'Yet to Start',
-                'AuditType': validated_data['audit_type'],
-                'AssignedDate': timezone.now(),
-                'ReviewStatus': None,
-                'ReviewerComments': None,
-                'Evidence': '',
-                'Comments': '',
-                'Reports': data.get('reports', ''),
-                'ReviewStartDate': None,
-                'ReviewDate': None,
-                'CompletionDate': None,
-            }
+        started = time.perf_counter()
+        framework_id = validated_data['framework_id']
+        policy_id = validated_data['policy_id']
+        subpolicy_id = validated_data['subpolicy_id']
 
-            print(f"Audit fields for member {member_id}: {audit_fields}")
+        # The finding set is the same for every team member, so resolve it once
+        compliance_ids = []
+        if framework_id:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT FrameworkId, FrameworkName 
+                    FROM frameworks 
+                    WHERE FrameworkId = %s
+                """, [framework_id])
+                framework = cursor.fetchone()
 
-            try:
-                # Create the audit instance for this team member
-                audit = Audit.objects.create(**audit_fields)
-                print(f"Created audit {audit.AuditId} for member {member_id}")
-                created_audits.append(audit)
-                
-                # Log successful audit creation
-                send_log(
-                    module="Audit",
-                    actionType="CREATE_AUDIT_SUCCESS",
-                    description=f"Created audit {audit.AuditId} for member {member_id}",
-                    userId=user_id,
-                    userName=None,  # Could get username if needed
-                    entityType="Audit",
-                    entityId=str(audit.AuditId),
-                    additionalInfo={
-                        "audit_id": audit.AuditId,
-                        "assignee_id": member_id,
-                        "framework_id": validated_data['framework_id'],
-                        "policy_id": validated_data['policy_id'],
-                        "subpolicy_id": validated_data['subpolicy_id']
-                    }
-                )
+                if not framework:
+                    print(f"Framework {framework_id} not found")
+                    return Response({
+                        'error': f'Framework with ID {framework_id} not found'
+                    }, status=status.HTTP_404_NOT_FOUND)
 
-                # Get compliances based on selection level
-                findings_created += 1
-                
-                if audit_fields['FrameworkId_id']:
-                    with connection.cursor() as cursor:
-                        # First verify the framework exists
-                        cursor.execute("""
-                            SELECT FrameworkId, FrameworkName 
-                            FROM frameworks 
-                            WHERE FrameworkId = %s
-                        """, [audit_fields['FrameworkId_id']])
-                        framework = cursor.fetchone()
-                        
-                        if not framework:
-                            print(f"Framework {audit_fields['FrameworkId_id']} not found")
-                            return Response({
-                                'error': f'Framework with ID {audit_fields["FrameworkId_id"]} not found'
-                            }, status=status.HTTP_404_NOT_FOUND)
-                        
-                        print(f"Found framework: {framework}")
-                        
-                        # Get compliances based on selection level
-                        if audit_fields['PolicyId_id'] and audit_fields['SubPolicyId_id']:
-                            print(f"Getting compliances for subpolicy {audit_fields['SubPolicyId_id']}")
-                            cursor.execute("""
-                                SELECT c.* 
-                                FROM compliance c
-                                WHERE c.SubPolicyId = %s
-                                AND c.PermanentTemporary = 'Permanent'
-                            """, [audit_fields['SubPolicyId_id']])
-                            
-                        elif audit_fields['PolicyId_id']:
-                            print(f"Getting compliances for policy {audit_fields['PolicyId_id']}")
-                            cursor.execute("""
-                                SELECT c.* 
-                                FROM compliance c
-                                INNER JOIN subpolicies sp ON c.SubPolicyId = sp.SubPolicyId
-                                WHERE sp.PolicyId = %s
-                                AND c.PermanentTemporary = 'Permanent'
-                            """, [audit_fields['PolicyId_id']])
-                            
-                        else:
-                            print(f"Getting compliances for framework {audit_fields['FrameworkId_id']}")
-                            cursor.execute("""
-                                SELECT c.* 
-                                FROM compliance c
-                                INNER JOIN subpolicies sp ON c.SubPolicyId = sp.SubPolicyId
-                                INNER JOIN policies p ON sp.PolicyId = p.PolicyId
-                                WHERE p.FrameworkId = %s
-                                AND c.PermanentTemporary = 'Permanent'
-                            """, [audit_fields['FrameworkId_id']])
-                        
-                        compliances = cursor.fetchall()
-                        print(f"Found {len(compliances)} compliances")
-                        
-                        # Create audit findings for found compliances
-                        if compliances:
-                            for compliance in compliances:
-                                compliance_id = compliance[0]  # Assuming ComplianceId is the first column
-                                print(f"Creating finding for compliance {compliance_id}")
-                                
-                                cursor.execute("""
-                                    INSERT INTO audit_findings (
-                                        `AuditId`, `ComplianceId`, `UserId`, `Evidence`, 
-                                        `Check`, `Comments`, `MajorMinor`, `AssignedDate`, `ReviewRejected`
-                                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                """, [
-                                    audit.AuditId, compliance_id, audit.Auditor_id,
-                                    '', '0', '', None, audit.AssignedDate, 0  # Added default value 0 for ReviewRejected
-                                ])
-                                findings_created += 1
-                                print(f"Created finding {findings_created} for compliance {compliance_id}")
-                        else:
-                            print(f"No compliances found for audit {audit.AuditId}")
-            
-            except Exception as e:
-                send_log(
-                    module="Audit",
-                    actionType="CREATE_AUDIT_ERROR",
-                    description=f"Error creating audit for member {member_id}: {str(e)}",
-                    userId=user_id,
-                    entityType="Audit",
-                    logLevel="ERROR",
-                    additionalInfo={"member_id": member_id, "error": str(e)}
-                )
-                # If we hit an error creating findings, we should clean up the audit
-                if audit:
-                    try:
-                        audit.delete()
-                        print(f"Cleaned up audit {audit.AuditId} due to error")
-                    except Exception as cleanup_error:
-                        print(f"Error cleaning up audit: {str(cleanup_error)}")
-                raise
+                print(f"Found framework: {framework}")
+                compliance_ids = scope_compliance_ids(cursor, framework_id, policy_id, subpolicy_id)
+            print(f"Found {len(compliance_ids)} compliances")
+        scoped = time.perf_counter()
+
+        created_audits = []
+        findings_created = 0
+        member_id = None
+        try:
+            with transaction.atomic():
+                # Create separate audit for each team member
+                for member_id in validated_data['team_members']:
+                    audit = Audit.objects.create(
+                        Title=validated_data['title'],
+                        Scope=validated_data['scope'],
+                        Objective=validated_data['objective'],
+                        BusinessUnit=validated_data['business_unit'],
+                        Role=validated_data['role'],
+                        Responsibility=validated_data['responsibility'],
+                        Assignee_id=member_id,
+                        Auditor_id=member_id,
+                        Reviewer_id=validated_data['reviewer'],
+                        FrameworkId_id=framework_id,
+                        PolicyId_id=policy_id,
+                        SubPolicyId_id=subpolicy_id,
+                        DueDate=validated_data['due_date'],
+                        Frequency=validated_data['frequency'],
+                        Status='Yet to Start',
+                        AuditType=validated_data['audit_type'],
+                        AssignedDate=timezone.now(),
+                        ReviewStatus=None,
+                        ReviewerComments=None,
+                        Evidence='',
+                        Comments='',
+                        Reports=data.get('reports', ''),
+                        ReviewStartDate=None,
+                        ReviewDate=None,
+                        CompletionDate=None,
+                    )
+                    print(f"Created audit {audit.AuditId} for member {member_id}")
+                    created_audits.append(audit)
+                member_id = None
+
+                findings_created = materialize_audit_findings(created_audits, compliance_ids)
+        except Exception as e:
+            # The transaction rolled back every audit and finding of this request
+            send_log(
+                module="Audit",
+                actionType="CREATE_AUDIT_ERROR",
+                description=f"Error creating audits (member {member_id}): {str(e)}",
+                userId=user_id,
+                entityType="Audit",
+                logLevel="ERROR",
+                additionalInfo={"member_id": member_id, "error": str(e)}
+            )
+            raise
+        inserted = time.perf_counter()
 
         if not created_audits:
             send_log(
@@ -338,18 +325,44 @@ def create_audit(request):
                 'error': 'No audits were created successfully'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        print(f"Successfully created {len(created_audits)} audits with {findings_created} findings each")
+        findings_changed([audit.AuditId for audit in created_audits])
+        for audit in created_audits:
+            send_log(
+                module="Audit",
+                actionType="CREATE_AUDIT_SUCCESS",
+                description=f"Created audit {audit.AuditId} for member {audit.Assignee_id}",
+                userId=user_id,
+                userName=None,  # Could get username if needed
+                entityType="Audit",
+                entityId=str(audit.AuditId),
+                additionalInfo={
+                    "audit_id": audit.AuditId,
+                    "assignee_id": audit.Assignee_id,
+                    "framework_id": framework_id,
+                    "policy_id": policy_id,
+                    "subpolicy_id": subpolicy_id
+                }
+            )
+
+        timing_ms = {
+            'scope': round((scoped - started) * 1000, 1),
+            'insert': round((inserted - scoped) * 1000, 1),
+            'total': round((time.perf_counter() - started) * 1000, 1),
+        }
+        print(f"Successfully created {len(created_audits)} audits with {len(compliance_ids)} findings each "
+              f"({findings_created} findings in {timing_ms['insert']}ms)")
         
         # Log final success
         send_log(
             module="Audit",
             actionType="CREATE_AUDIT_COMPLETE",
-            description=f"Successfully created {len(created_audits)} audits with {findings_created} findings each",
+            description=f"Successfully created {len(created_audits)} audits with {len(compliance_ids)} findings each",
             userId=user_id,
             entityType="Audit",
             additionalInfo={
                 "audit_ids": [audit.AuditId for audit in created_audits],
-                "findings_created": findings_created
+                "findings_created": findings_created,
+                "timing_ms": timing_ms
             }
         )
         
@@ -357,7 +370,9 @@ def create_audit(request):
             'message': 'Audits created successfully',
             'audits_created': len(created_audits),
             'audit_ids': [audit.AuditId for audit in created_audits],
-            'findings_created_per_audit': findings_created,
+            'findings_created_per_audit': len(compliance_ids),
+            'findings_created': findings_created,
+            'timing_ms': timing_ms,
         }, status=status.HTTP_201_CREATED)
         
     except (ValueError, TypeError) as e:
@@ -627,6 +642,7 @@ def add_compliance_to_audit(request, audit_id):
             AssignedDate=assigned_date,  # Use the AssignedDate from the audit
             ReviewRejected=0  # Default value for ReviewRejected
         )
+        findings_changed([validated_audit_id])
         
         # Create a new audit version to include the new compliance
         user_id = request.session.get('user_id', audit.Auditor_id)
@@ -722,11 +738,12 @@ def add_compliance_to_audit(request, audit_id):
                     }
                 
                 # Create a new version with the updated data
-                from .views import get_next_version_number
+                from .audit_views import get_next_version_number
+                from .audit_version_head import record_version
                 next_version = get_next_version_number(audit_id, "A")
                 
                 print(f"Creating new version {next_version} with updated data")
-                with connection.cursor() as cursor:
+                with transaction.atomic(), connection.cursor() as cursor:
                     cursor.execute("""
                         INSERT INTO audit_version (AuditId, Version, ExtractedInfo, UserId, Date) 
                         VALUES (%s, %s, %s, %s, NOW())
@@ -736,6 +753,7 @@ def add_compliance_to_audit(request, audit_id):
                         json.dumps(existing_version_data),
                         user_id
                     ])
+                    record_version(audit_id, next_version, cursor)
                 
                 print(f"Created new audit version {next_version} with merged data")
                 new_version = next_version
@@ -816,6 +834,88 @@ def add_compliance_to_audit(request, audit_id):
         
         return response
 
+BULK_UPDATE_FINDINGS_BATCH_SIZE = getattr(settings, 'BULK_UPDATE_FINDINGS_BATCH_SIZE', 500)
+
+# Request key -> AuditFinding field written by bulk_update_findings
+FINDING_UPDATE_FIELDS = {
+    'check': 'Check',
+    'evidence': 'Evidence',
+    'comments': 'Comments',
+    'major_minor': 'MajorMinor',
+}
+FINDING_FIELD_CHOICES = {
+    'Check': {'0', '1', '2', '3'},
+    'MajorMinor': {'0', '1', '2', None},
+}
+
+
+def validate_finding_updates(findings):
+    """
+    Check every submitted row before anything is loaded or written.
+    Returns ({finding_id: row}, errors); errors is a list of {'index', 'finding_id', 'error'}.
+    """
+    updates = {}
+    errors = []
+    if not isinstance(findings, list):
+        return updates, [{'index': None, 'finding_id': None, 'error': 'findings must be a list'}]
+    for index, row in enumerate(findings):
+        finding_id = row.get('finding_id') if isinstance(row, dict) else None
+        try:
+            finding_id = int(finding_id)
+        except (TypeError, ValueError):
+            errors.append({'index': index, 'finding_id': finding_id, 'error': 'finding_id must be an integer'})
+            continue
+        if finding_id in updates:
+            errors.append({'index': index, 'finding_id': finding_id, 'error': 'Duplicate finding_id'})
+            continue
+        for key, field in FINDING_UPDATE_FIELDS.items():
+            if key in row and field in FINDING_FIELD_CHOICES and _finding_value(row[key]) not in FINDING_FIELD_CHOICES[field]:
+                errors.append({'index': index, 'finding_id': finding_id, 'error': f'Invalid {key}: {row[key]}'})
+        expected = row.get('expected')
+        if expected is not None and not isinstance(expected, dict):
+            errors.append({'index': index, 'finding_id': finding_id, 'error': 'expected must be an object'})
+        updates[finding_id] = row
+    return updates, errors
+
+
+def plan_finding_updates(findings_by_id, updates):
+    """
+    Apply the submitted values to the loaded findings.
+    A row may carry 'expected': {key: value the client loaded}; if the stored value
+    differs, the row is a conflict. Returns (changed findings, changed field names, conflicts).
+    """
+    changed_findings = []
+    changed_fields = set()
+    conflicts = []
+    for finding_id, row in updates.items():
+        finding = findings_by_id[finding_id]
+        stale = {
+            key: {'expected': value, 'current': getattr(finding, FINDING_UPDATE_FIELDS[key])}
+            for key, value in (row.get('expected') or {}).items()
+            if key in FINDING_UPDATE_FIELDS and _finding_value(value) != getattr(finding, FINDING_UPDATE_FIELDS[key])
+        }
+        if stale:
+            conflicts.append({'finding_id': finding_id, 'fields': stale})
+            continue
+
+        changed = False
+        for key, field in FINDING_UPDATE_FIELDS.items():
+            if key not in row:
+                continue
+            value = _finding_value(row[key])
+            if value != getattr(finding, field):
+                setattr(finding, field, value)
+                changed_fields.add(field)
+                changed = True
+        if changed:
+            changed_findings.append(finding)
+    return changed_findings, changed_fields, conflicts
+
+
+def _finding_value(value):
+    # Check and MajorMinor are stored as strings, clients often send numbers
+    return value if value is None or isinstance(value, str) else str(value)
+
 @api_view(['POST'])
 def bulk_update_findings(request):
     """
@@ -868,56 +968,79 @@ def bulk_update_findings(request):
                 'error': f'Audit with ID {audit_id} not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Update each finding
-        updated_findings = []
-        for finding_data in findings:
-            finding_id = finding_data.get('finding_id')
-            try:
-                finding = AuditFinding.objects.get(AuditFindingId=finding_id)
-                
-                # Update fields
-                finding.Check = finding_data.get('check', finding.Check)
-                finding.Evidence = finding_data.get('evidence', finding.Evidence)
-                finding.Comments = finding_data.get('comments', finding.Comments)
-                finding.MajorMinor = finding_data.get('major_minor', finding.MajorMinor)
-                
-                finding.save()
-                updated_findings.append(finding_id)
-                
-                # Log individual finding update
+        updates, errors = validate_finding_updates(findings)
+        if errors:
+            send_log(
+                module="Audit",
+                actionType="BULK_UPDATE_FINDINGS_VALIDATION_ERROR",
+                description=f"{len(errors)} invalid finding rows for audit ID {audit_id}",
+                userId=user_id,
+                entityType="AuditFinding",
+                entityId=str(audit_id),
+                logLevel="ERROR",
+                additionalInfo={"errors": errors[:50]}
+            )
+            return Response({
+                'error': 'Invalid findings',
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # One IN query for every target; the row locks last only for this block
+            targets = AuditFinding.objects.select_for_update().filter(
+                AuditId=audit_id, AuditFindingsId__in=list(updates)
+            ).only('AuditFindingsId', *FINDING_UPDATE_FIELDS.values())
+            findings_by_id = {finding.AuditFindingsId: finding for finding in targets}
+
+            missing = [finding_id for finding_id in updates if finding_id not in findings_by_id]
+            if missing:
                 send_log(
                     module="Audit",
-                    actionType="UPDATE_FINDING",
-                    description=f"Updated finding ID {finding_id} for audit ID {audit_id}",
+                    actionType="UPDATE_FINDING_NOT_FOUND",
+                    description=f"{len(missing)} findings not found in audit ID {audit_id}",
                     userId=user_id,
                     entityType="AuditFinding",
-                    entityId=str(finding_id),
-                    additionalInfo={
-                        "audit_id": audit_id,
-                        "check": finding.Check,
-                        "major_minor": finding.MajorMinor
-                    }
+                    entityId=str(audit_id),
+                    logLevel="ERROR",
+                    additionalInfo={"missing_finding_ids": missing[:50]}
                 )
-            except AuditFinding.DoesNotExist:
+                return Response({
+                    'error': f'Findings not found in audit {audit_id}',
+                    'missing_finding_ids': missing
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            changed_findings, changed_fields, conflicts = plan_finding_updates(findings_by_id, updates)
+            if conflicts:
+                # Someone else saved these rows since the client loaded them; write nothing
                 send_log(
                     module="Audit",
-                    actionType="UPDATE_FINDING_NOT_FOUND",
-                    description=f"Finding with ID {finding_id} not found",
+                    actionType="BULK_UPDATE_FINDINGS_CONFLICT",
+                    description=f"{len(conflicts)} findings of audit ID {audit_id} changed since they were loaded",
                     userId=user_id,
                     entityType="AuditFinding",
-                    entityId=str(finding_id),
-                    logLevel="ERROR"
+                    entityId=str(audit_id),
+                    logLevel="WARNING",
+                    additionalInfo={"conflicts": conflicts[:50]}
                 )
                 return Response({
-                    'error': f'Finding with ID {finding_id} not found'
-                }, status=status.HTTP_404_NOT_FOUND)
+                    'error': 'Some findings were modified by another user. Reload them and try again.',
+                    'conflicts': conflicts
+                }, status=status.HTTP_409_CONFLICT)
+
+            if changed_findings:
+                AuditFinding.objects.bulk_update(
+                    changed_findings, sorted(changed_fields), batch_size=BULK_UPDATE_FINDINGS_BATCH_SIZE
+                )
+        updated_findings = [finding.AuditFindingsId for finding in changed_findings]
 
         # Update audit status if needed
-        total_findings = AuditFinding.objects.filter(AuditId=audit_id).count()
-        completed_findings = AuditFinding.objects.filter(
-            AuditId=audit_id,
-            Check__in=['0', '1']  # Count both compliant and non-compliant as completed
-        ).count()
+        counts = AuditFinding.objects.filter(AuditId=audit_id).aggregate(
+            total=Count('AuditFindingsId'),
+            # Count both compliant and non-compliant as completed
+            completed=Count('AuditFindingsId', filter=Q(Check__in=['0', '1']))
+        )
+        total_findings = counts['total']
+        completed_findings = counts['completed']
 
         # Calculate completion percentage
         completion_percentage = (completed_findings / total_findings * 100) if total_findings > 0 else 0
@@ -928,7 +1051,10 @@ def bulk_update_findings(request):
             audit.Status = 'Completed'
         elif completion_percentage > 0:
             audit.Status = 'Work In Progress'
-        audit.save()
+        if old_status != audit.Status:
+            audit.save(update_fields=['Status'])
+        if updated_findings or old_status != audit.Status:
+            findings_changed([audit_id])
         
         # Log status change if it occurred
         if old_status != audit.Status:
@@ -955,7 +1081,10 @@ def bulk_update_findings(request):
             entityType="AuditFinding",
             entityId=str(audit_id),
             additionalInfo={
+                "submitted_findings_count": len(updates),
                 "updated_findings_count": len(updated_findings),
+                "updated_finding_ids": updated_findings[:200],
+                "changed_fields": sorted(changed_fields),
                 "completion_percentage": completion_percentage
             }
         )
@@ -963,6 +1092,7 @@ def bulk_update_findings(request):
         return Response({
             'message': 'Findings updated successfully',
             'updated_findings': updated_findings,
+            'unchanged_findings': len(updates) - len(updated_findings),
             'completion_percentage': completion_percentage,
             'audit_status': audit.Status
         }, status=status.HTTP_200_OK)
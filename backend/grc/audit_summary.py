@@ -0,0 +1,357 @@
+"""
+Per-audit findings summary and the audit list query
+
+audit_findings_summary keeps, for every audit, the number of findings, the
+checked ones (Check other than '0') and the completed ones (Check = '2'),
+plus the status derived from them:
+
+- 'Yet to Start'     - no findings
+- 'Completed'        - every finding completed
+- 'Work In progress' - anything else
+
+The audit list used to derive that status with a GROUP BY over all
+audit_findings on every request. Wherever findings are created or their Check
+changes, findings_changed refreshes the summary of the audit together with its
+KPI rollups (kpi_rollups.py). The summary is rebuilt from scratch with
+`python manage.py rebuild_audit_findings_summary`. Audits listed without a
+summary row get one on the spot.
+
+list_audits filters and sorts on indexed audit columns joined to the summary
+and pages with an opaque keyset cursor over (sort value, AuditId), so every
+page costs the same no matter how deep the reader goes.
+
+Settings:
+    AUDIT_LIST_PAGE_SIZE      - audits per page when no limit is given (default 50)
+    AUDIT_LIST_MAX_PAGE_SIZE  - largest accepted limit (default 200)
+"""
+
+import base64
+import json
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .kpi_rollups import refresh_audit_rollups
+from .models import Audit, AuditFindingsSummary
+
+AUDIT_LIST_PAGE_SIZE = getattr(settings, 'AUDIT_LIST_PAGE_SIZE', 50)
+AUDIT_LIST_MAX_PAGE_SIZE = getattr(settings, 'AUDIT_LIST_MAX_PAGE_SIZE', 200)
+
+SUMMARY_REBUILD_BATCH_SIZE = 1000
+
+FINDING_COUNTS_SQL = """
+    SELECT AuditId,
+           COUNT(*),
+           COALESCE(SUM(CASE WHEN `Check` <> '0' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN `Check` = '2' THEN 1 ELSE 0 END), 0)
+    FROM audit_findings
+    {where}
+    GROUP BY AuditId
+"""
+
+STATUS_SQL = "COALESCE(s.Status, 'Yet to Start')"
+
+# Escape character of the search LIKE patterns; '!' means the same in MySQL and SQLite
+LIKE_ESCAPE = '!'
+
+# Sortable columns; AuditId breaks ties so the keyset is unique
+AUDIT_LIST_SORTS = {
+    'audit_id': 'a.AuditId',
+    'duedate': 'a.DueDate',
+    'status': STATUS_SQL,
+}
+
+# Exact-match filters, comma separated values allowed
+AUDIT_LIST_FILTERS = {
+    'framework_id': 'a.FrameworkId',
+    'policy_id': 'a.PolicyId',
+    'subpolicy_id': 'a.SubPolicyId',
+    'auditor_id': 'a.auditor',
+    'reviewer_id': 'a.reviewer',
+    'audit_type': 'a.AuditType',
+    'status': STATUS_SQL,
+}
+
+AUDIT_TYPE_LABELS = {'I': 'Internal', 'E': 'External'}
+
+AUDIT_LIST_SQL = """
+    SELECT
+        a.AuditId as audit_id,
+        f.FrameworkName as framework,
+        p.PolicyName as policy,
+        sp.SubPolicyName as subpolicy,
+        auditor_user.UserName as auditor,
+        a.DueDate as duedate,
+        a.Frequency as frequency,
+        reviewer_user.UserName as reviewer,
+        a.AuditType as audit_type,
+        {status} as status,
+        s.AuditId as summary_audit_id,
+        COALESCE(s.TotalFindings, 0) as total_findings,
+        COALESCE(s.CheckedFindings, 0) as checked_findings,
+        COALESCE(s.CompletedFindings, 0) as completed_findings
+    FROM
+        audit a
+    LEFT JOIN
+        frameworks f ON a.FrameworkId = f.FrameworkId
+    LEFT JOIN
+        policies p ON a.PolicyId = p.PolicyId
+    LEFT JOIN
+        subpolicies sp ON a.SubPolicyId = sp.SubPolicyId
+    LEFT JOIN
+        users auditor_user ON a.auditor = auditor_user.UserId
+    LEFT JOIN
+        users reviewer_user ON a.reviewer = reviewer_user.UserId
+    LEFT JOIN
+        audit_findings_summary s ON a.AuditId = s.AuditId
+    {where}
+    ORDER BY {sort} {direction}, a.AuditId {direction}
+    {limit}
+"""
+
+
+class InvalidAuditListQuery(ValueError):
+    pass
+
+
+def findings_status(total, completed):
+    if not total:
+        return 'Yet to Start'
+    if completed == total:
+        return 'Completed'
+    return 'Work In progress'
+
+
+def count_findings(cursor, audit_ids=None):
+    """{audit_id: (total, checked, completed)} for audit_ids, or for every audit with findings"""
+    if audit_ids is None:
+        cursor.execute(FINDING_COUNTS_SQL.format(where=""))
+    else:
+        placeholders = ', '.join(['%s'] * len(audit_ids))
+        cursor.execute(FINDING_COUNTS_SQL.format(where=f"WHERE AuditId IN ({placeholders})"), list(audit_ids))
+    return {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+
+
+def refresh_findings_summaries(audit_ids):
+    """
+    Recompute the summary of each audit in audit_ids from its findings.
+    The audit rows are locked first, so concurrent refreshes of an audit run
+    one after the other and the last one to commit counts the latest findings.
+    Never raises - a failed refresh must not fail the request that triggered it;
+    the next refresh or a rebuild will correct the summary.
+    """
+    audit_ids = sorted({int(audit_id) for audit_id in audit_ids if audit_id is not None})
+    if not audit_ids:
+        return {}
+    try:
+        summaries = {}
+        with transaction.atomic():
+            # Locked in AuditId order so two refreshes of overlapping audits cannot deadlock
+            list(Audit.objects.select_for_update().filter(AuditId__in=audit_ids)
+                 .order_by('AuditId').values_list('AuditId', flat=True))
+            with connection.cursor() as cursor:
+                counts = count_findings(cursor, audit_ids)
+            for audit_id in audit_ids:
+                total, checked, completed = counts.get(audit_id, (0, 0, 0))
+                summary, _ = AuditFindingsSummary.objects.update_or_create(
+                    AuditId=audit_id,
+                    defaults={
+                        'TotalFindings': total,
+                        'CheckedFindings': checked,
+                        'CompletedFindings': completed,
+                        'Status': findings_status(total, completed),
+                    }
+                )
+                summaries[audit_id] = summary
+        return summaries
+    except Exception as e:
+        print(f"ERROR refreshing findings summary for audits {audit_ids}: {str(e)}")
+        return {}
+
+
+def refresh_findings_summary(audit_id):
+    return refresh_findings_summaries([audit_id]).get(int(audit_id))
+
+
+def findings_changed(audit_ids):
+    """
+    Refresh everything derived from the findings of audit_ids - the findings
+    summary and the KPI rollups. Never raises. Returns the refreshed summaries.
+    """
+    audit_ids = sorted({int(audit_id) for audit_id in audit_ids if audit_id is not None})
+    summaries = refresh_findings_summaries(audit_ids)
+    for audit_id in audit_ids:
+        refresh_audit_rollups(audit_id)
+    return summaries
+
+
+def rebuild_findings_summaries():
+    """Recompute the summary of every audit. Returns the number of summary rows."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        counts = count_findings(cursor)
+        cursor.execute("SELECT AuditId FROM audit")
+        audit_ids = [row[0] for row in cursor.fetchall()]
+
+        AuditFindingsSummary.objects.all().delete()
+        summaries = []
+        for audit_id in audit_ids:
+            total, checked, completed = counts.get(audit_id, (0, 0, 0))
+            summaries.append(AuditFindingsSummary(
+                AuditId=audit_id,
+                TotalFindings=total,
+                CheckedFindings=checked,
+                CompletedFindings=completed,
+                Status=findings_status(total, completed),
+            ))
+        AuditFindingsSummary.objects.bulk_create(summaries, batch_size=SUMMARY_REBUILD_BATCH_SIZE)
+    return len(summaries)
+
+
+def frequency_label(freq):
+    if freq is None:
+        return None
+    if freq == 0:
+        return 'Only Once'
+    if freq == 1:
+        return 'Daily'
+    if freq <= 60:
+        return 'Every 2 Months'
+    if freq <= 120:
+        return 'Every 4 Months'
+    if freq <= 182:
+        return 'Half Yearly'
+    if freq <= 365:
+        return 'Yearly'
+    return f'Every {freq} days'
+
+
+def encode_audit_cursor(sort_value, audit_id):
+    if hasattr(sort_value, 'isoformat'):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, audit_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_audit_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        sort_value, audit_id = json.loads(raw)
+        return sort_value, int(audit_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidAuditListQuery(f"Invalid cursor: {cursor}") from e
+
+
+def _split(value):
+    return [v.strip() for v in str(value).split(',') if v.strip()]
+
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError as e:
+        raise InvalidAuditListQuery(f"{name} must be a date (YYYY-MM-DD)") from e
+
+
+def like_pattern(text):
+    """LIKE pattern matching text anywhere, with its % and _ taken literally"""
+    escaped = (str(text).replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+               .replace('%', LIKE_ESCAPE + '%').replace('_', LIKE_ESCAPE + '_'))
+    return f"%{escaped}%"
+
+
+def build_audit_list_query(params, cursor=None, limit=None):
+    """SQL and parameters of one audit list page. Returns (sql, params, sort_key)."""
+    sort_key = params.get('sort') or 'audit_id'
+    if sort_key not in AUDIT_LIST_SORTS:
+        raise InvalidAuditListQuery(f"sort must be one of {', '.join(AUDIT_LIST_SORTS)}")
+    order = (params.get('order') or 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise InvalidAuditListQuery("order must be asc or desc")
+    sort = AUDIT_LIST_SORTS[sort_key]
+
+    conditions, values = [], []
+    for param, column in AUDIT_LIST_FILTERS.items():
+        selected = _split(params.get(param) or '')
+        if param == 'audit_type':
+            labels = {label.lower(): code for code, label in AUDIT_TYPE_LABELS.items()}
+            selected = [labels.get(v.lower(), v) for v in selected]
+        if selected:
+            conditions.append(f"{column} IN ({', '.join(['%s'] * len(selected))})")
+            values.extend(selected)
+
+    due_from = _parse_date(params, 'due_from')
+    due_to = _parse_date(params, 'due_to')
+    if due_from:
+        conditions.append("a.DueDate >= %s")
+        values.append(due_from)
+    if due_to:
+        conditions.append("a.DueDate <= %s")
+        values.append(due_to)
+    if params.get('search'):
+        pattern = like_pattern(params.get('search'))
+        like = f"LIKE %s ESCAPE '{LIKE_ESCAPE}'"
+        conditions.append(f"(a.Title {like} OR f.FrameworkName {like} OR p.PolicyName {like} OR sp.SubPolicyName {like})")
+        values.extend([pattern] * 4)
+
+    if cursor:
+        sort_value, audit_id = decode_audit_cursor(cursor)
+        op = '<' if order == 'desc' else '>'
+        conditions.append(f"({sort} {op} %s OR ({sort} = %s AND a.AuditId {op} %s))")
+        values.extend([sort_value, sort_value, audit_id])
+
+    limit_sql = ""
+    if limit is not None:
+        # One extra row tells whether there is a next page
+        limit_sql = "LIMIT %s"
+        values.append(limit + 1)
+
+    sql = AUDIT_LIST_SQL.format(
+        status=STATUS_SQL,
+        where=f"WHERE {' AND '.join(conditions)}" if conditions else "",
+        sort=sort,
+        direction=order.upper(),
+        limit=limit_sql,
+    )
+    return sql, values, sort_key
+
+
+def list_audits(params, cursor=None, limit=None):
+    """
+    Audits for the audit table, filtered and sorted by params. With a limit,
+    one page continuing after cursor. Returns (audits, next_cursor).
+    """
+    sql, values, sort_key = build_audit_list_query(params, cursor, limit)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, values)
+        columns = [col[0] for col in db_cursor.description]
+        audits = [dict(zip(columns, row)) for row in db_cursor.fetchall()]
+
+    next_cursor = None
+    if limit is not None and len(audits) > limit:
+        audits = audits[:limit]
+        last = audits[-1]
+        next_cursor = encode_audit_cursor(last[sort_key], last['audit_id'])
+
+    # Audits created by paths that do not maintain the summary yet
+    missing = [audit['audit_id'] for audit in audits if audit['summary_audit_id'] is None]
+    summaries = refresh_findings_summaries(missing) if missing else {}
+
+    for audit in audits:
+        audit.pop('summary_audit_id')
+        summary = summaries.get(audit['audit_id'])
+        if summary is not None:
+            audit['status'] = summary.Status
+            audit['total_findings'] = summary.TotalFindings
+            audit['checked_findings'] = summary.CheckedFindings
+            audit['completed_findings'] = summary.CompletedFindings
+
+        if audit.get('duedate'):
+            audit['duedate'] = audit['duedate'].strftime('%d/%m/%Y')
+        audit['frequency'] = frequency_label(audit.get('frequency'))
+        audit['audit_type'] = AUDIT_TYPE_LABELS.get(audit.get('audit_type'), audit.get('audit_type'))
+        audit['report'] = 'Download' if audit.get('status') == 'Completed' else 'Pending'
+    return audits, next_cursor
@@ -0,0 +1,118 @@
+"""
+Per-audit head of the audit_version table
+
+audit_version_head keeps, for every audit, the latest version overall, the
+latest auditor (A) and reviewer (R) version and the next A/R sequence
+numbers. Version writers reserve their number with next_version() and call
+record_version() in the same transaction as the insert. The latest version is
+then read by primary key instead of sorting audit_version by Date, and two
+concurrent saves can no longer be handed the same version number.
+
+A head row is built from audit_version the first time an audit is used, so
+audits versioned before the table existed need no data migration. Without a
+head row record_version() does nothing; the next lookup builds the row from
+audit_version, including that insert.
+"""
+
+import re
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import AuditVersionHead
+
+SERIES_FIELDS = {
+    'A': ('LatestAuditorVersion', 'NextAuditorNumber'),
+    'R': ('LatestReviewerVersion', 'NextReviewerNumber'),
+}
+# Leading number of versions like A12 and of de-duplicated ones like A12_101502
+VERSION_NUMBER_PATTERN = re.compile(r'([AR])(\d+)')
+
+
+def leading_version_number(version):
+    match = VERSION_NUMBER_PATTERN.match(version or '')
+    return int(match.group(2)) if match else None
+
+
+def _head_from_versions(audit_id):
+    """Head values derived from audit_version the way the old ORDER BY Date queries saw it"""
+    values = {'AuditId': audit_id}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT Version FROM audit_version WHERE AuditId = %s ORDER BY Date DESC, Version DESC",
+            [audit_id]
+        )
+        versions = [row[0] for row in cursor.fetchall()]
+
+    values['LatestVersion'] = versions[0] if versions else None
+    for prefix, (latest_field, next_field) in SERIES_FIELDS.items():
+        series = [version for version in versions if version.startswith(prefix)]
+        numbers = [n for n in (leading_version_number(version) for version in series) if n is not None]
+        values[latest_field] = series[0] if series else None
+        values[next_field] = max(numbers, default=0) + 1
+    return values
+
+
+def _locked_head(audit_id):
+    """The audit's head row, locked for the current transaction and created if missing"""
+    head = AuditVersionHead.objects.select_for_update().filter(AuditId=audit_id).first()
+    if head is not None:
+        return head
+    try:
+        with transaction.atomic():
+            AuditVersionHead.objects.create(**_head_from_versions(audit_id))
+    except IntegrityError:
+        # Created by a concurrent request
+        pass
+    return AuditVersionHead.objects.select_for_update().get(AuditId=audit_id)
+
+
+def get_head(audit_id):
+    head = AuditVersionHead.objects.filter(AuditId=audit_id).first()
+    if head is None:
+        with transaction.atomic():
+            head = _locked_head(audit_id)
+    return head
+
+
+def latest_version(audit_id, prefix=None):
+    """Name of the latest version of an audit (or of its A/R series), or None"""
+    head = get_head(int(audit_id))
+    if prefix is None:
+        return head.LatestVersion
+    return getattr(head, SERIES_FIELDS[prefix][0])
+
+
+def next_version(audit_id, prefix):
+    """Reserve the next version name of a series; every call returns a different one"""
+    latest_field, next_field = SERIES_FIELDS[prefix]
+    with transaction.atomic():
+        head = _locked_head(int(audit_id))
+        number = getattr(head, next_field)
+        setattr(head, next_field, number + 1)
+        head.save(update_fields=[next_field, 'UpdatedAt'])
+    return f"{prefix}{number}"
+
+
+def record_version(audit_id, version, cursor=None):
+    """
+    Make version the latest of its audit and series. Use the cursor of the insert so
+    the head changes in the same transaction, including raw START TRANSACTION blocks.
+    """
+    prefix = (version or '')[:1]
+    if prefix not in SERIES_FIELDS:
+        return
+    latest_field, next_field = SERIES_FIELDS[prefix]
+    # A version written with an explicit number must not be handed out again
+    number = leading_version_number(version) or 0
+    sql = (
+        f"UPDATE audit_version_head SET LatestVersion = %s, {latest_field} = %s, "
+        f"{next_field} = CASE WHEN {next_field} > %s THEN {next_field} ELSE %s END, UpdatedAt = %s "
+        f"WHERE AuditId = %s"
+    )
+    params = [version, version, number, number + 1, timezone.now(), int(audit_id)]
+    if cursor is None:
+        with connection.cursor() as own_cursor:
+            own_cursor.execute(sql, params)
+    else:
+        cursor.execute(sql, params)
@@ -0,0 +1,341 @@
+"""
+Delta-encoded storage of audit_version.ExtractedInfo
+
+The A1..An (auditor) and R1..Rn (reviewer) versions of an audit are
+near-identical copies of the findings JSON. Compaction rewrites older versions
+as a JSON patch (RFC 6902 add/remove/replace) against a full snapshot of the
+same series, stored in ExtractedInfo itself:
+
+    {"__delta__": {"base": "A11", "base_sha256": "...", "patch": [...]}}
+
+A version stays full when it is
+- a snapshot: version number 1, 1 + AUDIT_VERSION_SNAPSHOT_INTERVAL, ...
+  (A1, A11, A21, ... with the default interval)
+- the newest of its series by number, by Version string or by Date. Many
+  queries read "the latest A/R version" straight from the table, and saves
+  update that row in place
+- approved or rejected (reports read those by name)
+- younger than AUDIT_VERSION_COMPACT_MIN_AGE_SECONDS
+
+Writers keep inserting full JSON. Readers of arbitrary versions go through
+decode_extracted_info() / version_data(), which apply the patch to its
+snapshot. An UPDATE that writes full JSON into a delta row just makes it full
+again; rewriting a snapshot in place needs expand_dependents() first.
+
+Compaction runs in a background thread for audits that were just saved
+(schedule_compaction) and across all audits with
+`python manage.py compact_audit_versions`.
+
+Settings:
+    AUDIT_VERSION_SNAPSHOT_INTERVAL        - a full snapshot every N versions of a series (default 10)
+    AUDIT_VERSION_COMPACT_MIN_AGE_SECONDS  - versions younger than this stay full (default 3600)
+"""
+
+import copy
+import hashlib
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+AUDIT_VERSION_SNAPSHOT_INTERVAL = getattr(settings, 'AUDIT_VERSION_SNAPSHOT_INTERVAL', 10)
+AUDIT_VERSION_COMPACT_MIN_AGE_SECONDS = getattr(settings, 'AUDIT_VERSION_COMPACT_MIN_AGE_SECONDS', 3600)
+
+DELTA_KEY = '__delta__'
+VERSION_PATTERN = re.compile(r'([AR])(\d+)')
+
+
+class AuditVersionCorrupt(ValueError):
+    pass
+
+
+def canonical_sha256(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _same(a, b):
+    # json.dumps keeps True and 1 apart, unlike ==
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def make_patch(source, target, path=''):
+    """JSON patch turning source into target; objects are diffed key by key, anything else is replaced"""
+    if isinstance(source, dict) and isinstance(target, dict):
+        ops = [{'op': 'remove', 'path': f"{path}/{_escape(key)}"} for key in source if key not in target]
+        for key, value in target.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in source:
+                ops.append({'op': 'add', 'path': child, 'value': value})
+            elif not _same(source[key], value):
+                ops.extend(make_patch(source[key], value, child))
+        return ops
+    if _same(source, target):
+        return []
+    return [{'op': 'replace', 'path': path, 'value': target}]
+
+
+def apply_patch(document, patch):
+    document = copy.deepcopy(document)
+    for op in patch:
+        parts = [_unescape(token) for token in op['path'].split('/')[1:]]
+        if not parts:
+            document = copy.deepcopy(op.get('value'))
+            continue
+        parent = document
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+        key = int(parts[-1]) if isinstance(parent, list) else parts[-1]
+        if op['op'] == 'remove':
+            del parent[key]
+        elif op['op'] in ('add', 'replace'):
+            parent[key] = copy.deepcopy(op['value'])
+        else:
+            raise AuditVersionCorrupt(f"Unsupported patch operation: {op['op']}")
+    return document
+
+
+def parse_extracted_info(raw):
+    if raw is None or isinstance(raw, (dict, list)):
+        return raw
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode('utf-8')
+    return json.loads(raw) if raw else {}
+
+
+def is_delta(data):
+    return isinstance(data, dict) and DELTA_KEY in data
+
+
+def version_number(version):
+    match = VERSION_PATTERN.fullmatch(version or '')
+    return int(match.group(2)) if match else None
+
+
+def is_snapshot_number(number):
+    return (number - 1) % max(1, AUDIT_VERSION_SNAPSHOT_INTERVAL) == 0
+
+
+def _fetch_extracted_info(cursor, audit_id, version):
+    cursor.execute(
+        "SELECT ExtractedInfo FROM audit_version WHERE AuditId = %s AND Version = %s",
+        [audit_id, version]
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def decode_extracted_info(audit_id, raw, cursor=None):
+    """The full data of an ExtractedInfo value, applying its patch if it is a delta"""
+    data = parse_extracted_info(raw)
+    if not is_delta(data):
+        return data
+
+    delta = data[DELTA_KEY]
+    if cursor is None:
+        with connection.cursor() as own_cursor:
+            base_raw = _fetch_extracted_info(own_cursor, audit_id, delta['base'])
+    else:
+        base_raw = _fetch_extracted_info(cursor, audit_id, delta['base'])
+    base = parse_extracted_info(base_raw)
+    if base is None or is_delta(base):
+        raise AuditVersionCorrupt(f"Snapshot {delta['base']} of audit {audit_id} is missing")
+    if canonical_sha256(base) != delta['base_sha256']:
+        raise AuditVersionCorrupt(f"Snapshot {delta['base']} of audit {audit_id} changed after it was used as a base")
+    return apply_patch(base, delta['patch'])
+
+
+def extracted_info_length(audit_id, raw, cursor=None):
+    """JSON_LENGTH of the full data of an ExtractedInfo value; a delta is counted after applying its patch"""
+    data = decode_extracted_info(audit_id, raw, cursor)
+    if data is None:
+        return None
+    return len(data) if isinstance(data, (dict, list)) else 1
+
+
+def version_data(audit_id, version):
+    """Full ExtractedInfo of one version, or None if it does not exist"""
+    with connection.cursor() as cursor:
+        raw = _fetch_extracted_info(cursor, audit_id, version)
+        if raw is None:
+            return None
+        return decode_extracted_info(audit_id, raw, cursor)
+
+
+def expand_dependents(audit_id, version):
+    """Store full data again for every delta based on version, so version can be rewritten in place"""
+    expanded = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT Version, ExtractedInfo FROM audit_version WHERE AuditId = %s AND Version LIKE %s",
+            [audit_id, f"{(version or '')[:1]}%"]
+        )
+        for dependent, raw in cursor.fetchall():
+            data = parse_extracted_info(raw)
+            if is_delta(data) and data[DELTA_KEY].get('base') == version:
+                full = decode_extracted_info(audit_id, data, cursor)
+                cursor.execute(
+                    "UPDATE audit_version SET ExtractedInfo = %s WHERE AuditId = %s AND Version = %s",
+                    [json.dumps(full), audit_id, dependent]
+                )
+                expanded += 1
+    return expanded
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _raw_size(raw):
+    return len(raw) if isinstance(raw, (str, bytes, bytearray)) else len(json.dumps(raw))
+
+
+def compact_audit(audit_id, now=None):
+    """
+    Rewrite the compactable versions of one audit as deltas.
+    Returns {'audit_id', 'versions', 'compacted', 'bytes_before', 'bytes_after'}.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=AUDIT_VERSION_COMPACT_MIN_AGE_SECONDS)
+    stats = {'audit_id': audit_id, 'versions': 0, 'compacted': 0, 'bytes_before': 0, 'bytes_after': 0}
+    lock = " FOR UPDATE" if connection.features.has_select_for_update else ""
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT Version, ExtractedInfo, Date, ApprovedRejected FROM audit_version WHERE AuditId = %s" + lock,
+            [audit_id]
+        )
+        series = {}
+        for version, raw, date, approved_rejected in cursor.fetchall():
+            number = version_number(version)
+            if number is not None:
+                series.setdefault(version[0], []).append((number, version, raw, _as_datetime(date), approved_rejected))
+
+        for rows in series.values():
+            stats['versions'] += len(rows)
+            rows.sort()
+            dated = [row for row in rows if row[3] is not None]
+            newest = {rows[-1][1], max(row[1] for row in rows)}
+            if dated:
+                newest.add(max(dated, key=lambda row: row[3])[1])
+
+            base_version, base_data = None, None
+            for number, version, raw, date, approved_rejected in rows:
+                data = parse_extracted_info(raw)
+                if is_snapshot_number(number):
+                    # Only a full snapshot can be a base; a missing one starts a new run of full rows
+                    base_version, base_data = (version, data) if not is_delta(data) else (None, None)
+                    continue
+                if (base_version is None or is_delta(data) or version in newest or approved_rejected
+                        or date is None or date > cutoff or not isinstance(data, dict)):
+                    continue
+
+                encoded = json.dumps({DELTA_KEY: {
+                    'base': base_version,
+                    'base_sha256': canonical_sha256(base_data),
+                    'patch': make_patch(base_data, data),
+                }})
+                size = _raw_size(raw)
+                if len(encoded) >= size:
+                    continue
+                cursor.execute(
+                    "UPDATE audit_version SET ExtractedInfo = %s WHERE AuditId = %s AND Version = %s",
+                    [encoded, audit_id, version]
+                )
+                stats['compacted'] += 1
+                stats['bytes_before'] += size
+                stats['bytes_after'] += len(encoded)
+    return stats
+
+
+def compact_all(audit_ids=None, now=None):
+    """Compact every audit (or audit_ids). Returns totals plus the per-audit results that changed something."""
+    if audit_ids is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT AuditId FROM audit_version ORDER BY AuditId")
+            audit_ids = [row[0] for row in cursor.fetchall()]
+
+    totals = {'audits': 0, 'versions': 0, 'compacted': 0, 'bytes_before': 0, 'bytes_after': 0, 'errors': 0}
+    changed = []
+    for audit_id in audit_ids:
+        try:
+            result = compact_audit(audit_id, now=now)
+        except Exception as e:
+            print(f"ERROR compacting versions of audit {audit_id}: {str(e)}")
+            totals['errors'] += 1
+            continue
+        totals['audits'] += 1
+        for key in ('versions', 'compacted', 'bytes_before', 'bytes_after'):
+            totals[key] += result[key]
+        if result['compacted']:
+            changed.append(result)
+    return totals, changed
+
+
+class AuditVersionCompactor:
+    """Background thread compacting the audits handed to schedule()"""
+
+    def __init__(self):
+        self._pending = set()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, audit_id):
+        with self._condition:
+            self._pending.add(int(audit_id))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-version-compactor", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                audit_id = self._pending.pop()
+            try:
+                close_old_connections()
+                result = compact_audit(audit_id)
+                if result['compacted']:
+                    print(f"Compacted {result['compacted']} versions of audit {audit_id}: "
+                          f"{result['bytes_before']} -> {result['bytes_after']} bytes")
+            except Exception as e:
+                print(f"ERROR compacting versions of audit {audit_id}: {str(e)}")
+            finally:
+                close_old_connections()
+
+
+_compactor = None
+_compactor_lock = threading.Lock()
+
+
+def get_compactor():
+    global _compactor
+    with _compactor_lock:
+        if _compactor is None:
+            _compactor = AuditVersionCompactor()
+        return _compactor
+
+
+def schedule_compaction(audit_id):
+    """Compact an audit's older versions in the background; never raises"""
+    try:
+        get_compactor().schedule(audit_id)
+    except Exception as e:
+        print(f"ERROR scheduling version compaction for audit {audit_id}: {str(e)}")
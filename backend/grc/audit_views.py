@@ -14,6 +14,14 @@ from docx import Document
 from docx.shared import Inches, Pt
 import os
 from .notification_service import NotificationService
+from .kpi_rollups import refresh_audit_rollups
+from .audit_version_store import decode_extracted_info, expand_dependents, extracted_info_length, schedule_compaction
+from .audit_version_head import latest_version, next_version, record_version
+from .audit_summary import (
+    AUDIT_LIST_PAGE_SIZE, AUDIT_LIST_MAX_PAGE_SIZE, InvalidAuditListQuery, list_audits,
+    findings_changed
+)
+from django.db import transaction
 
 @api_view(['GET'])
 def get_frameworks(request):
@@ -104,97 +112,38 @@ def get_assign_data(request):
 @api_view(['GET'])
 def get_all_audits(request):
     """
-    Fetch all audits with related data for display in the audit table
+    Fetch audits with related data for display in the audit table.
+    Filters: framework_id, policy_id, subpolicy_id, auditor_id, reviewer_id,
+    audit_type, status (comma separated values), due_from/due_to and search.
+    Sorted by sort (audit_id, duedate, status) and order (asc/desc).
+    Pages are fetched with `limit` and the `next_cursor` of the previous page;
+    without limit/cursor the whole filtered list is returned.
     """
     try:
         print("DEBUG: get_all_audits was called")
-        # Using raw SQL for better performance and to join multiple tables
-        with connection.cursor() as cursor:
-            print("DEBUG: Executing SQL query for get_all_audits")
-            print("DEBUG: Dumping table schemas to verify column names")
+        params = request.query_params
+        paginate = 'limit' in params or 'cursor' in params
+        limit = None
+        if paginate:
             try:
-                cursor.execute("DESCRIBE audit")
-                audit_columns = cursor.fetchall()
-                print("DEBUG: Audit table columns:", audit_columns)
-            except Exception as e:
-                print("DEBUG: Error describing audit table:", str(e))
-                
-            cursor.execute("""
-                SELECT 
-                    a.AuditId as audit_id,
-                    f.FrameworkName as framework,
-                    p.PolicyName as policy,
-                    sp.SubPolicyName as subpolicy,
-                    auditor_user.UserName as auditor,
-                    a.DueDate as duedate,
-                    a.Frequency as frequency,
-                    reviewer_user.UserName as reviewer,
-                    a.AuditType as audit_type,
-                    CASE 
-                        WHEN COUNT(af.AuditId) = 0 THEN 'Yet to Start'
-                        WHEN COUNT(af.AuditId) > 0 AND SUM(CASE WHEN af.`Check` = '2' THEN 1 ELSE 0 END) = COUNT(af.AuditId) THEN 'Completed'
-                        ELSE 'Work In progress'
-                    END as status
-                FROM 
-                    audit a
-                LEFT JOIN 
-                    frameworks f ON a.FrameworkId = f.FrameworkId
-                LEFT JOIN 
-                    policies p ON a.PolicyId = p.PolicyId
-                LEFT JOIN 
-                    subpolicies sp ON a.SubPolicyId = sp.SubPolicyId
-                LEFT JOIN 
-                    users auditor_user ON a.auditor = auditor_user.UserId
-                LEFT JOIN 
-                    users reviewer_user ON a.reviewer = reviewer_user.UserId
-                LEFT JOIN 
-                    audit_findings af ON a.AuditId = af.AuditId
-                GROUP BY 
-                    a.AuditId, f.FrameworkName, p.PolicyName, sp.SubPolicyName, 
-                    auditor_user.UserName, a.DueDate, a.Frequency, reviewer_user.UserName, a.AuditType
-                ORDER BY 
-                    a.AuditId DESC
-            """)
-            print("DEBUG: SQL query executed successfully")
-            columns = [col[0] for col in cursor.description]
-            print(f"DEBUG: Result columns: {columns}")
-            audits = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            print(f"DEBUG: Fetched {len(audits)} audit records")
+                limit = int(params.get('limit', AUDIT_LIST_PAGE_SIZE))
+            except ValueError:
+                return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            limit = max(1, min(limit, AUDIT_LIST_MAX_PAGE_SIZE))
 
-        # Process frequency to display text instead of number
-        for audit in audits:
-            # Format date
-            if audit.get('duedate'):
-                audit['duedate'] = audit['duedate'].strftime('%d/%m/%Y')
-            
-            # Convert frequency number to text
-            freq = audit.get('frequency')
-            if freq is not None:
-                if freq == 0:
-                    audit['frequency'] = 'Only Once'
-                elif freq == 1:
-                    audit['frequency'] = 'Daily'
-                elif freq <= 60:
-                    audit['frequency'] = 'Every 2 Months'
-                elif freq <= 120:
-                    audit['frequency'] = 'Every 4 Months'
-                elif freq <= 182:
-                    audit['frequency'] = 'Half Yearly'
-                elif freq <= 365:
-                    audit['frequency'] = 'Yearly'
-                else:
-                    audit['frequency'] = f'Every {freq} days'
-            
-            # Convert audit type from I/E to Internal/External
-            if audit.get('audit_type') == 'I':
-                audit['audit_type'] = 'Internal'
-            elif audit.get('audit_type') == 'E':
-                audit['audit_type'] = 'External'
-            
-            # Add report field
-            audit['report'] = 'Download' if audit.get('status') == 'Completed' else 'Pending'
+        try:
+            audits, next_cursor = list_audits(params, cursor=params.get('cursor'), limit=limit)
+        except InvalidAuditListQuery as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        print(f"DEBUG: Fetched {len(audits)} audit records")
 
-        return Response(audits, status=status.HTTP_200_OK)
+        if not paginate:
+            return Response(audits, status=status.HTTP_200_OK)
+        return Response({
+            'results': audits,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+        }, status=status.HTTP_200_OK)
     except Exception as e:
         print(f"ERROR in get_all_audits: {str(e)}")
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -563,8 +512,7 @@ def create_audit_version(audit_id, user_id, custom_version=None):
         print(f"DEBUG: Creating audit version for audit_id: {audit_id}, user_id: {user_id}")
         
         # Always get the next version number instead of using fixed version
-        next_version = get_next_version_number(audit_id, "A")
-        version = next_version if custom_version is None else custom_version
+        version = get_next_version_number(audit_id, "A") if custom_version is None else custom_version
         
         print(f"DEBUG: Using version: {version}")
         
@@ -586,7 +534,7 @@ def create_audit_version(audit_id, user_id, custom_version=None):
         print(f"DEBUG: Formatted JSON structure for audit version:\n{json_data}")
         
         # Insert into the audit_version table
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             # Check the actual column names in the audit_version table
             cursor.execute("DESCRIBE audit_version")
             columns = [column[0] for column in cursor.fetchall()]
@@ -600,10 +548,11 @@ def create_audit_version(audit_id, user_id, custom_version=None):
             cursor.execute(
                 f"""
                 INSERT INTO audit_version (AuditId, Version, {data_column}, UserId, Date) 
-                VALUES (%s, %s, %s, %s, NOW())
+                VALUES (%s, %s, %s, %s, %s)
                 """,
-                [audit_id, version, json_data, user_id,timezone.now()]
+                [audit_id, version, json_data, user_id, timezone.now()]
             )
+            record_version(audit_id, version, cursor)
             
         print(f"DEBUG: Created new audit version {version} for audit {audit_id}")
         return version
@@ -727,8 +676,8 @@ def update_audit_status(request, audit_id):
                             (timezone.now() + timezone.timedelta(days=5)).strftime('%Y-%m-%d')  # Set review due date 5 days from now
                         ]
                     }
-                    notification_service.send_multi_channel_notification(notification_data)
-                    print(f"DEBUG: Sent 'audit ready for review' notification to {reviewer_email}")
+                    notification_service.queue_multi_channel_notification(notification_data)
+                    print(f"DEBUG: Queued 'audit ready for review' notification to {reviewer_email}")
             except Exception as e:
                 print(f"ERROR: Failed to send notification: {str(e)}")
                 # Don't fail the status update if notification fails
@@ -754,8 +703,8 @@ def update_audit_status(request, audit_id):
                             timezone.now().strftime('%Y-%m-%d')
                         ]
                     }
-                    notification_service.send_multi_channel_notification(notification_data)
-                    print(f"DEBUG: Sent 'audit under review' notification to {auditor.email}")
+                    notification_service.queue_multi_channel_notification(notification_data)
+                    print(f"DEBUG: Queued 'audit under review' notification to {auditor.email}")
             except Exception as e:
                 print(f"ERROR: Failed to send notification: {str(e)}")
                 # Don't fail the status update if notification fails
@@ -782,8 +731,8 @@ def update_audit_status(request, audit_id):
                             request.data.get('comment', 'Audit completed successfully')
                         ]
                     }
-                    notification_service.send_multi_channel_notification(notification_data)
-                    print(f"DEBUG: Sent 'audit completed' notification to {auditor.email}")
+                    notification_service.queue_multi_channel_notification(notification_data)
+                    print(f"DEBUG: Queued 'audit completed' notification to {auditor.email}")
             except Exception as e:
                 print(f"ERROR: Failed to send notification: {str(e)}")
                 # Don't fail the status update if notification fails
@@ -806,8 +755,8 @@ def update_audit_status(request, audit_id):
                             request.data.get('comment', 'Please review and address the issues noted.')
                         ]
                     }
-                    notification_service.send_multi_channel_notification(notification_data)
-                    print(f"DEBUG: Sent 'audit rejected' notification to {auditor.email}")
+                    notification_service.queue_multi_channel_notification(notification_data)
+                    print(f"DEBUG: Queued 'audit rejected' notification to {auditor.email}")
             except Exception as e:
                 print(f"ERROR: Failed to send notification: {str(e)}")
                 # Don't fail the status update if notification fails
@@ -830,14 +779,15 @@ def update_audit_status(request, audit_id):
                             timezone.now().strftime('%Y-%m-%d %H:%M:%S')
                         ]
                     }
-                    notification_service.send_multi_channel_notification(notification_data)
-                    print(f"DEBUG: Sent general status change notification to {auditor.email}")
+                    notification_service.queue_multi_channel_notification(notification_data)
+                    print(f"DEBUG: Queued general status change notification to {auditor.email}")
             except Exception as e:
                 print(f"ERROR: Failed to send notification: {str(e)}")
                 # Don't fail the status update if notification fails
         
         # Save the changes
         audit.save()
+        refresh_audit_rollups(audit_id)
         
         # Just update the status without creating a version
         # Version creation is now handled separately when explicitly saving
@@ -1312,9 +1262,11 @@ def create_new_version(audit_id, user_id, data, prefix):
                     query = f"INSERT INTO audit_version ({columns_str}) VALUES ({values_str})"
                     print(f"DEBUG: Inserting version {next_version} for audit {audit_id}")
                     transaction_cursor.execute(query, params)
+                    record_version(audit_id, next_version, transaction_cursor)
                     
                     # Commit transaction
                     transaction_cursor.execute("COMMIT")
+                    schedule_compaction(audit_id)
                     return next_version
                     
                 except Exception as e:
@@ -1479,6 +1431,7 @@ def update_audit_finding(request, compliance_id):
         
         # Save the changes
         finding.save()
+        findings_changed([audit_id])
         print(f"DEBUG: Successfully updated finding for compliance_id {compliance_id} with audit_id {audit_id}")
         
         # Return success response
@@ -2390,6 +2343,11 @@ def upload_evidence(request, compliance_id):
             
             cursor.execute(update_sql, update_values)
             print(f"DEBUG: Updated {cursor.rowcount} audit finding record(s) with S3 URL in Evidence column")
+            
+            if current_check == '0':
+                # The update covers every audit's finding for this compliance
+                cursor.execute("SELECT DISTINCT AuditId FROM audit_findings WHERE ComplianceId = %s", [compliance_id])
+                findings_changed([row[0] for row in cursor.fetchall()])
         
         print(f"DEBUG: Evidence '{file_name}' uploaded for compliance {compliance_id} via {'auto-save' if is_auto_save else 'manual save'}")
         
@@ -2482,31 +2440,10 @@ def submit_audit_findings(request, audit_id):
                 updated_findings += 1
         
         print(f"DEBUG: Updated {updated_findings} of {len(findings)} audit findings to 'Completed'")
+        findings_changed([audit_id])
         
         # Get the next version number
-        version = "A1"  # Default
-        
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT Version FROM audit_version 
-                WHERE AuditId = %s AND Version LIKE 'A%'
-                ORDER BY Version DESC
-                LIMIT 1
-            """, [audit_id])
-            
-            existing_version = cursor.fetchone()
-            if existing_version:
-                current_version = existing_version[0]
-                print(f"DEBUG: Found existing audit version: {current_version}")
-                
-                # Extract number part and increment it
-                try:
-                    version_num = int(current_version[1:])
-                    version = f"A{version_num + 1}"
-                    print(f"DEBUG: Incrementing from existing version {current_version} to {version}")
-                except ValueError:
-                    print(f"DEBUG: Could not increment version '{current_version}', using default A1")
-                    version = "A1"
+        version = get_next_version_number(audit_id, "A")
         
         # Get all findings in structured JSON format
         structured_json = get_audit_findings_json(audit_id, overall_comments)
@@ -2709,6 +2646,7 @@ def allocate_policy(request):
                     }, status=status.HTTP_400_BAD_REQUEST)
 
             print(f"DEBUG: Created {len(audit_findings)} audit findings")
+            findings_changed([audit.AuditId])
             
             # Send notifications to assigned users
             try:
@@ -2825,8 +2763,8 @@ def allocate_policy(request):
                                 due_date
                             ]
                         }
-                        notification_result = notification_service.send_multi_channel_notification(auditor_notification)
-                        print(f"DEBUG: Sent audit assignment notification to auditor {auditor_email}, result: {notification_result['success']}")
+                        notification_result = notification_service.queue_multi_channel_notification(auditor_notification)
+                        print(f"DEBUG: Queued audit assignment notification to auditor {auditor_email}, result: {notification_result['success']}")
                     
                     # 2. Notify the assignee if different from auditor
                     if assignee_id != auditor_id and assignee_email:
@@ -2841,8 +2779,8 @@ def allocate_policy(request):
                                 due_date
                             ]
                         }
-                        notification_result = notification_service.send_multi_channel_notification(assignee_notification)
-                        print(f"DEBUG: Sent audit assignment notification to assignee {assignee_email}, result: {notification_result['success']}")
+                        notification_result = notification_service.queue_multi_channel_notification(assignee_notification)
+                        print(f"DEBUG: Queued audit assignment notification to assignee {assignee_email}, result: {notification_result['success']}")
                     
                     # 3. Notify the reviewer if specified
                     if reviewer_id and reviewer_email:
@@ -2857,8 +2795,8 @@ def allocate_policy(request):
                                 due_date
                             ]
                         }
-                        notification_result = notification_service.send_multi_channel_notification(reviewer_notification)
-                        print(f"DEBUG: Sent audit assignment notification to reviewer {reviewer_email}, result: {notification_result['success']}")
+                        notification_result = notification_service.queue_multi_channel_notification(reviewer_notification)
+                        print(f"DEBUG: Queued audit assignment notification to reviewer {reviewer_email}, result: {notification_result['success']}")
                 
                 except Exception as e:
                     print(f"ERROR: Failed to get user details for notifications: {str(e)}")
@@ -3301,6 +3239,7 @@ def create_review_version(audit_id, user_id, compliance_reviews=None, overall_co
                         Date = %s
                     WHERE AuditId = %s AND Version = %s
                 """, [extracted_info_json, user_id, current_time, audit_id, version])
+                record_version(audit_id, version, cursor)
                 print(f"DEBUG: Updated existing review version {version} for audit {audit_id}")
             else:
                 # Insert a new record
@@ -3311,8 +3250,10 @@ def create_review_version(audit_id, user_id, compliance_reviews=None, overall_co
                     )
                     VALUES (%s, %s, %s, %s, NULL, NULL, %s)
                 """, [audit_id, version, extracted_info_json, user_id, current_time])
+                record_version(audit_id, version, cursor)
                 print(f"DEBUG: Created new review version {version} for audit {audit_id}")
-        
+        schedule_compaction(audit_id)
+
         # Also update the audit_findings table with the review data so it persists
         if compliance_reviews:
             try:
@@ -3371,6 +3312,7 @@ def create_review_version(audit_id, user_id, compliance_reviews=None, overall_co
                     ])
                     
                 print(f"DEBUG: Updated audit_findings table with review data")
+                findings_changed([audit_id])
                 
                 # If we have overall comments but no specific compliance reviews,
                 # make sure we still update the audit table with the comments
@@ -3519,7 +3461,7 @@ def get_audit_versions(request, audit_id):
                     av.ApproverId,
                     av.ApprovedRejected,
                     av.Date,
-                    JSON_LENGTH(av.ExtractedInfo) as FindingsCount,
+                    av.ExtractedInfo,
                     CASE 
                         WHEN av.Version LIKE 'A%' THEN 'Auditor'
                         WHEN av.Version LIKE 'R%' THEN 'Reviewer'
@@ -3537,6 +3479,9 @@ def get_audit_versions(request, audit_id):
             
             columns = [col[0] for col in cursor.description]
             versions = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            for version in versions:
+                # Delta rows only hold a patch, so count the findings of the decoded data
+                version['FindingsCount'] = extracted_info_length(audit_id, version.pop('ExtractedInfo'), cursor)
         
         # Format date for each version
         for version in versions:
@@ -3617,12 +3562,8 @@ def get_audit_version_details(request, audit_id, version):
         metadata = {}
         if version_data.get('ExtractedInfo'):
             try:
-                # If it's already a dictionary, use it directly
-                if isinstance(version_data['ExtractedInfo'], dict):
-                    all_data = version_data['ExtractedInfo']
-                # Otherwise, parse it as JSON
-                else:
-                    all_data = json.loads(version_data['ExtractedInfo'])
+                # Parse the JSON, rebuilding delta-encoded versions from their snapshot
+                all_data = decode_extracted_info(audit_id, version_data['ExtractedInfo'])
                 
                 # Extract metadata if it exists
                 if '__metadata__' in all_data:
@@ -3753,18 +3694,19 @@ def get_latest_version_data(audit_id):
     Helper to get the latest version data
     """
     try:
+        version = latest_version(audit_id)
+        if version is None:
+            return None
         with connection.cursor() as cursor:
             cursor.execute("""
                 SELECT ExtractedInfo 
                 FROM audit_version 
-                WHERE AuditId = %s 
-                ORDER BY Date DESC 
-                LIMIT 1
-            """, [audit_id])
+                WHERE AuditId = %s AND Version = %s
+            """, [audit_id, version])
             
             row = cursor.fetchone()
             if row:
-                return json.loads(row[0]) if isinstance(row[0], str) else row[0]
+                return decode_extracted_info(audit_id, row[0], cursor)
             return None
     except Exception as e:
         print(f"ERROR in get_latest_version_data: {str(e)}")
@@ -3927,6 +3869,7 @@ def save_review_progress(request, audit_id):
                                     compliance_id
                                 ])
                         print(f"DEBUG: Successfully updated audit_findings table with approved data from save_review_progress")
+                        findings_changed([audit_id])
                        
                         # Generate and upload report since all findings are accepted
                         try:
@@ -4026,7 +3969,7 @@ def check_audit_version(request, audit_id):
             
             # Check for auditor versions for this audit
             cursor.execute(
-                "SELECT Version, JSON_LENGTH(ExtractedInfo) as FindingsCount, Date, UserId, ApproverId, ApprovedRejected FROM audit_version WHERE AuditId = %s AND Version LIKE %s ORDER BY Version DESC",
+                "SELECT Version, ExtractedInfo, Date, UserId, ApproverId, ApprovedRejected FROM audit_version WHERE AuditId = %s AND Version LIKE %s ORDER BY Version DESC",
                 [audit_id, "A%"]
             )
             
@@ -4034,13 +3977,15 @@ def check_audit_version(request, audit_id):
             auditor_versions = []
             for row in cursor.fetchall():
                 version_data = dict(zip(columns, row))
+                # Delta rows only hold a patch, so count the findings of the decoded data
+                version_data['FindingsCount'] = extracted_info_length(audit_id, version_data.pop('ExtractedInfo'), cursor)
                 if version_data.get('Date'):
                     version_data['CreatedDate'] = version_data['Date'].strftime('%Y-%m-%d %H:%M:%S')
                 auditor_versions.append(version_data)
             
             # Check for reviewer versions for this audit
             cursor.execute(
-                "SELECT Version, JSON_LENGTH(ExtractedInfo) as FindingsCount, Date, UserId, ApproverId, ApprovedRejected FROM audit_version WHERE AuditId = %s AND Version LIKE %s ORDER BY Version DESC",
+                "SELECT Version, ExtractedInfo, Date, UserId, ApproverId, ApprovedRejected FROM audit_version WHERE AuditId = %s AND Version LIKE %s ORDER BY Version DESC",
                 [audit_id, "R%"]
             )
             
@@ -4048,6 +3993,8 @@ def check_audit_version(request, audit_id):
             reviewer_versions = []
             for row in cursor.fetchall():
                 version_data = dict(zip(columns, row))
+                # Delta rows only hold a patch, so count the findings of the decoded data
+                version_data['FindingsCount'] = extracted_info_length(audit_id, version_data.pop('ExtractedInfo'), cursor)
                 if version_data.get('Date'):
                     version_data['CreatedDate'] = version_data['Date'].strftime('%Y-%m-%d %H:%M:%S')
                 reviewer_versions.append(version_data)
@@ -4120,36 +4067,10 @@ def get_next_version_number(audit_id, prefix):
     Get the next version number for an audit
     """
     try:
-        with connection.cursor() as cursor:
-            # Get the latest version for this audit with the given prefix
-            cursor.execute(
-                """
-                SELECT Version FROM audit_version 
-                WHERE AuditId = %s AND Version LIKE %s
-                ORDER BY Date DESC
-                LIMIT 1
-                """,
-                [audit_id, f"{prefix}%"]
-            )
-            latest = cursor.fetchone()
-            
-            if latest:
-                # Extract the number part and increment
-                version = latest[0]
-                print(f"DEBUG: Latest version found: {version}")
-                
-                if len(version) > 1 and version[0] == prefix:
-                    try:
-                        number = int(version[1:])
-                        next_number = number + 1
-                        return f"{prefix}{next_number}"
-                    except ValueError:
-                        print(f"DEBUG: Could not parse number from version {version}, using {prefix}1")
-                        return f"{prefix}1"
-            
-            # No version found, start with 1
-            print(f"DEBUG: No previous version found, starting with {prefix}1")
-            return f"{prefix}1"
+        # Reserved from the audit's version head, so concurrent saves get different numbers
+        version = next_version(audit_id, prefix)
+        print(f"DEBUG: Next version reserved: {version}")
+        return version
     except Exception as e:
         print(f"ERROR: Exception in get_next_version_number: {str(e)}")
         # Fallback to a safe default
@@ -4344,11 +4265,8 @@ def update_audit_version_review_data(request, audit_id, version_id):
                 }, status=status.HTTP_404_NOT_FOUND)
             
             # Parse the existing JSON data
-            if isinstance(version_row[0], dict):
-                existing_data = version_row[0]
-            else:
-                existing_data = json.loads(version_row[0])
-            
+            existing_data = decode_extracted_info(audit_id, version_row[0], cursor)
+
             print(f"DEBUG: Loaded existing data for version {version_id}")
         
         # Get user ID from session or request
@@ -4425,6 +4343,9 @@ def update_audit_version_review_data(request, audit_id, version_id):
                 'version_id': version_id
             }, status=status.HTTP_200_OK)
         
+        # Versions stored as deltas against this one must not see it change
+        expand_dependents(audit_id, version_id)
+
         # Save the updated JSON back to the database
         with connection.cursor() as cursor:
             cursor.execute("""
@@ -4433,6 +4354,7 @@ def update_audit_version_review_data(request, audit_id, version_id):
                     Date = %s
                 WHERE AuditId = %s AND Version = %s
             """, [json.dumps(updated_data), timezone.now(), audit_id, version_id])
+            record_version(audit_id, version_id, cursor)
             
             print(f"DEBUG: Updated audit_version with {len(changes)} changes")
         
@@ -5087,6 +5009,7 @@ def save_review_json(request, audit_id):
                         "UPDATE audit_version SET ExtractedInfo = %s, UserId = %s, Date = %s WHERE AuditId = %s AND Version = %s",
                         [json_data, user_id, timezone.now(), audit_id, existing_version]
                     )
+                    record_version(audit_id, existing_version, cursor)
                     print(f"DEBUG: Updated existing review version {existing_version} for audit {audit_id}")
                 else:
                     # Insert new version
@@ -5095,6 +5018,7 @@ def save_review_json(request, audit_id):
                         "INSERT INTO audit_version (AuditId, Version, ExtractedInfo, UserId, Date) VALUES (%s, %s, %s, %s, %s)",
                         [audit_id, existing_version, json_data, user_id, timezone.now()]
                     )
+                    record_version(audit_id, existing_version, cursor)
                     print(f"DEBUG: Created new review version {existing_version} for audit {audit_id}")
             except Exception as e:
                 print(f"ERROR saving to audit_version table: {str(e)}")
@@ -5358,8 +5282,8 @@ def load_latest_review_version(request, audit_id):
             try:
                 # First try to get the latest auditor version (A-prefix)
                 cursor.execute(
-                    "SELECT Version, ExtractedInfo, Date FROM audit_version WHERE AuditId = %s AND Version LIKE 'A%' ORDER BY Date DESC LIMIT 1",
-                    [audit_id]
+                    "SELECT Version, ExtractedInfo, Date FROM audit_version WHERE AuditId = %s AND Version = %s",
+                    [audit_id, latest_version(audit_id, 'A')]
                 )
                 
                 version_row = cursor.fetchone()
@@ -5368,21 +5292,18 @@ def load_latest_review_version(request, audit_id):
                     print(f"DEBUG: Found latest auditor version: {review_version} from {version_row[2]}")
                     
                     # Parse the JSON data
-                    if isinstance(version_row[1], dict):
-                        latest_review_data = version_row[1]
-                    else:
-                        try:
-                            latest_review_data = json.loads(version_row[1]) if version_row[1] else {}
-                        except Exception as e:
-                            print(f"ERROR parsing JSON from latest auditor version: {str(e)}")
-                            latest_review_data = {}
+                    try:
+                        latest_review_data = decode_extracted_info(audit_id, version_row[1], cursor) or {}
+                    except Exception as e:
+                        print(f"ERROR parsing JSON from latest auditor version: {str(e)}")
+                        latest_review_data = {}
                         
                     print(f"DEBUG: Loaded auditor version with {len(latest_review_data) if latest_review_data else 0} findings")
                 else:
                     # If no auditor version found, try to get the latest reviewer version (R-prefix)
                     cursor.execute(
-                        "SELECT Version, ExtractedInfo, Date FROM audit_version WHERE AuditId = %s AND Version LIKE 'R%' ORDER BY Date DESC LIMIT 1",
-                        [audit_id]
+                        "SELECT Version, ExtractedInfo, Date FROM audit_version WHERE AuditId = %s AND Version = %s",
+                        [audit_id, latest_version(audit_id, 'R')]
                     )
                     
                     version_row = cursor.fetchone()
@@ -5391,14 +5312,11 @@ def load_latest_review_version(request, audit_id):
                         print(f"DEBUG: Found latest reviewer version: {review_version} from {version_row[2]}")
                         
                         # Parse the JSON data
-                        if isinstance(version_row[1], dict):
-                            latest_review_data = version_row[1]
-                        else:
-                            try:
-                                latest_review_data = json.loads(version_row[1]) if version_row[1] else {}
-                            except Exception as e:
-                                print(f"ERROR parsing JSON from latest reviewer version: {str(e)}")
-                                latest_review_data = {}
+                        try:
+                            latest_review_data = decode_extracted_info(audit_id, version_row[1], cursor) or {}
+                        except Exception as e:
+                            print(f"ERROR parsing JSON from latest reviewer version: {str(e)}")
+                            latest_review_data = {}
                             
                         print(f"DEBUG: Loaded reviewer version with {len(latest_review_data) if latest_review_data else 0} findings")
 
@@ -6017,6 +5935,7 @@ def save_audit_version(request, audit_id):
             processed_compliance_count += 1
             
         print(f"DEBUG: Successfully processed {processed_compliance_count} compliance items")
+        findings_changed([audit_id])
         
         # Now get the complete set of findings for the version
         version_data = get_audit_findings_json(audit_id, overall_comments)
@@ -6038,52 +5957,8 @@ def save_audit_version(request, audit_id):
         if json_size > max_print_size:
             print("... (JSON truncated due to size)")
         
-        # CRITICAL: Check for existing versions and determine the next version number
-        next_version = ''
-        with connection.cursor() as cursor:
-            # Check if there are any existing versions
-            cursor.execute(
-                """
-                SELECT Version FROM audit_version 
-                WHERE AuditId = %s AND Version LIKE 'A%' 
-                ORDER BY CAST(SUBSTRING(Version, 2) AS UNSIGNED) DESC, Version DESC
-                LIMIT 1
-                """,
-                [audit_id]
-            )
-            
-            row = cursor.fetchone()
-            
-            if row:
-                current_version = row[0]
-                print(f"DEBUG: Found existing version: {current_version}")
-                
-                # Extract the number part and increment
-                if current_version.startswith('A'):
-                    # Handle case where version might have non-numeric parts after the A prefix
-                    num_part = ''
-                    for c in current_version[1:]:
-                        if c.isdigit():
-                            num_part += c
-                        else:
-                            break
-                    
-                    if num_part:
-                        version_num = int(num_part)
-                        next_version = f"A{version_num + 1}"
-                        print(f"DEBUG: Incrementing from {current_version} to {next_version}")
-                    else:
-                        # Default to A2 if we couldn't parse the number
-                        next_version = "A2"
-                        print(f"DEBUG: Couldn't parse number from {current_version}, using {next_version}")
-                else:
-                    # If the version doesn't start with A, just start with A1
-                    next_version = "A1"
-                    print(f"DEBUG: Version {current_version} doesn't start with 'A', using {next_version}")
-            else:
-                # No existing versions, start with A1
-                next_version = "A1"
-                print(f"DEBUG: No existing versions found, starting with {next_version}")
+        # CRITICAL: Reserve the next version number from the audit's version head
+        next_version = get_next_version_number(audit_id, "A")
         
         # Force a transaction to ensure the version is created correctly
         with connection.cursor() as cursor:
@@ -6107,10 +5982,11 @@ def save_audit_version(request, audit_id):
                 cursor.execute(
                     """
                     INSERT INTO audit_version (AuditId, Version, ExtractedInfo, UserId, Date)
-                    VALUES (%s, %s, %s, %s, NOW())
+                    VALUES (%s, %s, %s, %s, %s)
                     """,
-                    [audit_id, next_version, json_data, user_id,timezone.now()]
+                    [audit_id, next_version, json_data, user_id, timezone.now()]
                 )
+                record_version(audit_id, next_version, cursor)
                 
                 # Check rows affected
                 rows_affected = cursor.rowcount
@@ -6119,6 +5995,7 @@ def save_audit_version(request, audit_id):
                 # Commit transaction
                 cursor.execute("COMMIT")
                 print(f"DEBUG: Successfully committed transaction for version {next_version}")
+                schedule_compaction(audit_id)
                 
                 # Verify the insert worked by querying it back
                 cursor.execute(
@@ -6937,10 +6814,11 @@ def debug_save_reviewer_comments(request, audit_id):
                 cursor.execute(
                     """
                     INSERT INTO audit_version (AuditId, Version, ExtractedInfo, UserId, Date)
-                    VALUES (%s, %s, %s, %s, NOW())
+                    VALUES (%s, %s, %s, %s, %s)
                     """,
-                    [audit_id, latest_version, json_data, user_id,timezone.now()]
+                    [audit_id, latest_version, json_data, user_id, timezone.now()]
                 )
+                record_version(audit_id, latest_version, cursor)
                 print(f"DEBUG: Created new reviewer version {latest_version}")
             else:
                 # Update existing version
@@ -6952,6 +6830,7 @@ def debug_save_reviewer_comments(request, audit_id):
                     """,
                     [json_data, user_id, audit_id, latest_version]
                 )
+                record_version(audit_id, latest_version, cursor)
                 print(f"DEBUG: Updated existing reviewer version {latest_version}")
         
         # Also update the audit_findings table with the same comments
@@ -6973,6 +6852,7 @@ def debug_save_reviewer_comments(request, audit_id):
                     [review_rejected, review_status, review_comments, audit_id, compliance_id]
                 )
                 print(f"DEBUG: Updated audit_findings table for compliance {compliance_id}")
+        findings_changed([audit_id])
         
         # Update the audit's overall review comments if provided
         if overall_comments:
@@ -7290,14 +7170,16 @@ def save_audit_json_version(request, audit_id):
                 cursor.execute(
                     """
                     INSERT INTO audit_version (AuditId, Version, ExtractedInfo, UserId, Date)
-                    VALUES (%s, %s, %s, %s, NOW())
+                    VALUES (%s, %s, %s, %s, %s)
                     """,
-                    [audit_id, next_version, json_data, user_id,timezone.now()]
+                    [audit_id, next_version, json_data, user_id, timezone.now()]
                 )
+                record_version(audit_id, next_version, cursor)
                 
                 # Commit transaction
                 cursor.execute("COMMIT")
                 print(f"DEBUG: Successfully committed transaction for version {next_version}")
+                schedule_compaction(audit_id)
                 
                 # Verify the insert worked
                 cursor.execute(
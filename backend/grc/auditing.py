@@ -3,6 +3,9 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
 from .models import Audit, AuditVersion
+from .audit_version_store import schedule_compaction
+from .audit_version_head import latest_version, next_version, record_version
+from .kpi_rollups import refresh_audit_rollups
 from django.db import connection
 import json
 from datetime import datetime, date
@@ -88,10 +91,8 @@ def get_audit_task_details(request, audit_id):
             cursor.execute("""
                 SELECT Version, ExtractedInfo, Date 
                 FROM audit_version 
-                WHERE AuditId = %s 
-                ORDER BY Date DESC, Version DESC 
-                LIMIT 1
-            """, [validated_audit_id])
+                WHERE AuditId = %s AND Version = %s
+            """, [validated_audit_id, latest_version(validated_audit_id)])
             
             version_row = cursor.fetchone()
             
@@ -463,6 +464,7 @@ def get_audit_task_details(request, audit_id):
                     datetime.now(),
                     'A'
                 ])
+                record_version(validated_audit_id, 'A1', cursor)
                 
                 print(f"Created initial A1 version for audit {validated_audit_id}")
             
@@ -543,10 +545,8 @@ def save_audit_version(request, audit_id):
             # First check for latest R version to get review data
             cursor.execute("""
                 SELECT Version, ExtractedInfo FROM audit_version 
-                WHERE AuditId = %s AND Version LIKE 'R%%' 
-                ORDER BY CAST(SUBSTRING(Version, 2) AS UNSIGNED) DESC 
-                LIMIT 1
-            """, [validated_audit_id])
+                WHERE AuditId = %s AND Version = %s
+            """, [validated_audit_id, latest_version(validated_audit_id, 'R')])
             
             r_version_result = cursor.fetchone()
             latest_review_data = {}
@@ -570,13 +570,11 @@ def save_audit_version(request, audit_id):
                 except Exception as e:
                     print(f"Warning: Could not extract review data from R version: {str(e)}")
 
-            # Get the current highest version number for this audit with 'A' prefix
+            # Get the latest version for this audit with 'A' prefix
             cursor.execute("""
                 SELECT Version, ExtractedInfo FROM audit_version 
-                WHERE AuditId = %s AND Version LIKE 'A%%' 
-                ORDER BY CAST(SUBSTRING(Version, 2) AS UNSIGNED) DESC 
-                LIMIT 1
-            """, [validated_audit_id])
+                WHERE AuditId = %s AND Version = %s
+            """, [validated_audit_id, latest_version(validated_audit_id, 'A')])
             
             result = cursor.fetchone()
             existing_metadata = {}
@@ -591,14 +589,9 @@ def save_audit_version(request, audit_id):
                         validated_data['overall_comments'] = existing_data.get('overall_comments', '')
                 except Exception as e:
                     print(f"Warning: Could not extract metadata from existing version: {str(e)}")
-                
-                # Extract number from version (e.g., 'A3' -> 3)
-                current_version_num = int(result[0][1:])
-                new_version_num = current_version_num + 1
-            else:
-                new_version_num = 1
             
-            new_version = f"A{new_version_num}"
+            # Reserved from the version head, so concurrent saves get different numbers
+            new_version = next_version(validated_audit_id, 'A')
             
             # Prepare the JSON data structure
             version_data = {}
@@ -718,8 +711,10 @@ def save_audit_version(request, audit_id):
                 datetime.now(),
                 'A'
             ])
+            record_version(validated_audit_id, new_version, cursor)
             
             print(f"Successfully saved audit version {new_version} for audit {validated_audit_id}")
+            schedule_compaction(validated_audit_id)
             
             response = JsonResponse({
                 'success': True,
@@ -808,6 +803,7 @@ def send_audit_for_review(request, audit_id):
                 }, status=404)
             
             print(f"Successfully updated audit {validated_audit_id} status to 'Under Review'")
+            refresh_audit_rollups(validated_audit_id)
             
             response = JsonResponse({
                 'success': True,
@@ -0,0 +1,157 @@
+"""
+Content-addressed local cache of files downloaded from S3
+
+Blobs are stored once per content at <S3_BLOB_CACHE_DIR>/<sha256[:2]>/<sha256>,
+however many file ids or URLs point at them. A ref file per key
+(refs/<sha1 of the key>.json) maps a file id or URL to the SHA-256 and file
+name of its content, so a repeated download is answered from disk without
+asking the S3 microservice.
+
+The cache is an LRU bounded by S3_BLOB_CACHE_MAX_BYTES: every hit touches the
+blob's mtime and adding a blob evicts the least recently used ones until the
+total fits. Refs are tiny; one whose blob has been evicted is ignored.
+
+Settings:
+    S3_BLOB_CACHE_DIR        - cache directory (default MEDIA_ROOT/s3_blob_cache)
+    S3_BLOB_CACHE_MAX_BYTES  - total size of cached blobs (default 2GB)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from django.conf import settings
+
+S3_BLOB_CACHE_DIR = getattr(settings, 'S3_BLOB_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 's3_blob_cache'))
+S3_BLOB_CACHE_MAX_BYTES = getattr(settings, 'S3_BLOB_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobCache:
+    def __init__(self, cache_dir=S3_BLOB_CACHE_DIR, max_bytes=S3_BLOB_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Computed on first insert
+
+    def blob_path(self, sha256):
+        return os.path.join(self.cache_dir, sha256[:2], sha256)
+
+    def _ref_path(self, key):
+        key_hash = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'refs', f"{key_hash}.json")
+
+    def _write_atomic(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    # Blobs
+
+    def get(self, sha256):
+        """Path of a cached blob, marked as recently used, or None"""
+        path = self.blob_path(sha256)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put_file(self, source_path, sha256=None):
+        """Copy a file into the cache. Returns its SHA-256."""
+        sha256 = sha256 or file_sha256(source_path)
+        if self.get(sha256):
+            return sha256
+        self._write_atomic(self.blob_path(sha256), lambda tmp_path: shutil.copyfile(source_path, tmp_path))
+        self._added(os.path.getsize(source_path))
+        return sha256
+
+    def copy_to(self, sha256, destination_path):
+        """Copy a cached blob to destination_path. Returns the path, or None if not cached."""
+        path = self.get(sha256)
+        if path is None:
+            return None
+        try:
+            shutil.copyfile(path, destination_path)
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            return None
+        return destination_path
+
+    def _blobs(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir() and len(entry.name) == 2:
+                for blob in os.scandir(entry.path):
+                    if blob.is_file() and not blob.name.endswith('.tmp'):
+                        yield blob
+
+    def _added(self, size):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(blob.stat().st_size for blob in self._blobs())
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Other processes share the directory, so recount before evicting
+        blobs = sorted(((blob.stat().st_mtime, blob.stat().st_size, blob.path) for blob in self._blobs()))
+        total = sum(size for _, size, _ in blobs)
+        for _, size, path in blobs:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+    # Refs
+
+    def ref(self, key):
+        """(sha256, file_name) recorded for a file id or URL whose blob is cached, or None"""
+        try:
+            with open(self._ref_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not self.get(entry['sha256']):
+            return None
+        return entry['sha256'], entry.get('file_name')
+
+    def set_ref(self, key, sha256, file_name=None):
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': str(key), 'sha256': sha256, 'file_name': file_name}, f)
+        self._write_atomic(self._ref_path(key), write)
+
+    def stats(self):
+        with self._lock:
+            return {'total_bytes': self._total_bytes, 'max_bytes': self.max_bytes}
+
+
+_blob_cache = None
+_blob_cache_lock = threading.Lock()
+
+
+def get_blob_cache():
+    """The process-wide blob cache"""
+    global _blob_cache
+    with _blob_cache_lock:
+        if _blob_cache is None:
+            _blob_cache = BlobCache()
+        return _blob_cache
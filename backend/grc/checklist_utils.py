@@ -2,6 +2,7 @@ from django.db import connection
 from django.utils import timezone
 import logging
 from .notification_service import NotificationService
+from .user_directory import resolve_users
 from .logging_service import send_log
 from datetime import timedelta
 
@@ -31,30 +32,29 @@ def update_lastchecklistitem_verified(audit_id):
         current_time = current_datetime.time()
 
         with connection.cursor() as cursor:
-            # Get audit and user details for notification
+            # Get audit users, then their details for notification in one directory lookup
             cursor.execute("""
-                SELECT 
-                    a.assignee,
-                    a.auditor,
-                    a.reviewer,
-                    u_assignee.Email as assignee_email,
-                    u_auditor.Email as auditor_email,
-                    u_reviewer.Email as reviewer_email,
-                    u_assignee.UserName as assignee_name,
-                    u_auditor.UserName as auditor_name,
-                    u_reviewer.UserName as reviewer_name
-                FROM 
-                    audit a
-                LEFT JOIN users u_assignee ON a.assignee = u_assignee.UserId
-                LEFT JOIN users u_auditor ON a.auditor = u_auditor.UserId
-                LEFT JOIN users u_reviewer ON a.reviewer = u_reviewer.UserId
-                WHERE 
-                    a.AuditId = %s
+                SELECT a.assignee, a.auditor, a.reviewer
+                FROM audit a
+                WHERE a.AuditId = %s
             """, [audit_id])
             
+            assignee_email = auditor_email = reviewer_email = None
+            assignee_name = auditor_name = reviewer_name = None
             user_row = cursor.fetchone()
             if user_row:
-                assignee_id, auditor_id, reviewer_id, assignee_email, auditor_email, reviewer_email, assignee_name, auditor_name, reviewer_name = user_row
+                assignee_id, auditor_id, reviewer_id = user_row
+                audit_users = resolve_users(user_row)
+                
+                assignee = audit_users.get(assignee_id)
+                auditor = audit_users.get(auditor_id)
+                reviewer = audit_users.get(reviewer_id)
+                if assignee:
+                    assignee_email, assignee_name = assignee.Email, assignee.UserName
+                if auditor:
+                    auditor_email, auditor_name = auditor.Email, auditor.UserName
+                if reviewer:
+                    reviewer_email, reviewer_name = reviewer.Email, reviewer.UserName
                 
                 # Log user details retrieved
                 send_log(
@@ -30,7 +30,18 @@ from .export_service import (
     export_to_csv,
     export_to_pdf,
     export_to_json,
-    export_to_xml
+    export_to_xml,
+    STREAMING_FORMATS,
+    export_data_streaming
+)
+from .export_streaming import iter_queryset_rows
+from .export_jobs import submit_export_job, is_async_request, parse_priority, get_export_job_status_url, export_job_owner
+from .export_cache import (
+    export_fingerprint,
+    queryset_watermark,
+    find_cached_export,
+    serve_cached_export,
+    store_cached_export
 )
 from django.http import HttpResponse
 from reportlab.lib import colors
@@ -54,10 +65,10 @@ from django.contrib.auth.hashers import make_password, check_password
 from .notification_service import NotificationService
 from django.contrib.auth.models import User
 from .models import Users
+# Audit logging goes through the buffered writer in logging_service
+from .logging_service import send_log
 
 
-LOGGING_SERVICE_URL = None
-
 # Django ORM type checking suppression for all model operations in this file
 # mypy: disable-error-code="attr-defined"
 
@@ -710,74 +721,6 @@ def register(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-def send_log(module, actionType, description=None, userId=None, userName=None,
-             userRole=None, entityType=None, logLevel='INFO', ipAddress=None,
-             additionalInfo=None, entityId=None):
-   
-    # Create log entry in database
-    try:
-        # Prepare data for GRCLog model
-        log_data = {
-            'Module': module,
-            'ActionType': actionType,
-            'Description': description,
-            'UserId': userId,
-            'UserName': userName,
-            'EntityType': entityType,
-            'EntityId': entityId,
-            'LogLevel': logLevel,
-            'IPAddress': ipAddress,
-            'AdditionalInfo': additionalInfo
-        }
-       
-        # Remove None values
-        log_data = {k: v for k, v in log_data.items() if v is not None}
-       
-        # Create and save the log entry
-        log_entry = GRCLog(**log_data)
-        log_entry.save()
-       
-        # Optionally still send to logging service if needed
-        try:
-            if LOGGING_SERVICE_URL:
-                # Format for external service (matches expected format in loggingservice.js)
-                api_log_data = {
-                    "module": module,
-                    "actionType": actionType,  # This is exactly what the service expects
-                    "description": description,
-                    "userId": userId,
-                    "userName": userName,
-                    "userRole": userRole,
-                    "entityType": entityType,
-                    "logLevel": logLevel,
-                    "ipAddress": ipAddress,
-                    "additionalInfo": additionalInfo
-                }
-                # Clean out None values
-                api_log_data = {k: v for k, v in api_log_data.items() if v is not None}
-               
-                response = requests.post(LOGGING_SERVICE_URL, json=api_log_data)
-                if response.status_code != 200:
-                    print(f"Failed to send log to service: {response.text}")
-        except Exception as e:
-            print(f"Error sending log to service: {str(e)}")
-           
-        return log_entry.LogId  # Return the ID of the created log
-    except Exception as e:
-        print(f"Error saving log to database: {str(e)}")
-        # Try to capture the error itself
-        try:
-            error_log = GRCLog(
-                Module=module,
-                ActionType='LOG_ERROR',
-                Description=f"Error logging {actionType} on {module}: {str(e)}",
-                LogLevel='ERROR'
-            )
-            error_log.save()
-        except:
-            pass  # If we can't even log the error, just continue
-        return None
- 
 @api_view(['GET'])
 def test_connection(request):
     return Response({"message": "Connection successful!"})
@@ -2230,7 +2173,7 @@ def deactivate_compliance(request, compliance_id):
                 }
                 
                 # Send the notification
-                result = notification_service.send_multi_channel_notification(notification_data)
+                result = notification_service.queue_multi_channel_notification(notification_data)
                 print(f"Deactivation request notification sent to {reviewer_email}: {result}")
             else:
                 print(f"No email found for reviewer ID {reviewer_id}")
@@ -3513,6 +3456,142 @@ def get_policy_compliances(request, policy_id):
             'message': str(e)
         }, status=500)
 
+# Columns read for compliance exports; related names are fetched in the same query
+COMPLIANCE_EXPORT_FIELDS = (
+    'ComplianceId',
+    'ComplianceItemDescription',
+    'Status',
+    'Criticality',
+    'MaturityLevel',
+    'ComplianceType',
+    'ManualAutomatic',
+    'CreatedByName',
+    'CreatedByDate',
+    'ComplianceVersion',
+    'Identifier',
+    'ActiveInactive',
+    'IsRisk',
+    'SubPolicy__SubPolicyName',
+    'SubPolicy__PolicyId__PolicyName',
+    'SubPolicy__PolicyId__FrameworkId__FrameworkName',
+)
+
+# Exported columns read from subpolicies/policies/frameworks, which have no UpdatedAt
+COMPLIANCE_EXPORT_RELATED_FIELDS = (
+    'SubPolicy',
+    'SubPolicy__SubPolicyName',
+    'SubPolicy__PolicyId__PolicyName',
+    'SubPolicy__PolicyId__FrameworkId__FrameworkName',
+)
+
+def get_compliance_export_queryset(item_type=None, item_id=None):
+    """Compliances selected by an export request's item filter"""
+    if item_type == 'framework' and item_id:
+        return Compliance.objects.filter(SubPolicy__PolicyId__FrameworkId=item_id)
+    elif item_type == 'policy' and item_id:
+        return Compliance.objects.filter(SubPolicy__PolicyId=item_id)
+    elif item_type == 'subpolicy' and item_id:
+        return Compliance.objects.filter(SubPolicy_id=item_id)
+    return Compliance.objects.all()
+
+def format_compliance_export_row(row):
+    """Map a COMPLIANCE_EXPORT_FIELDS values() row to the exported column names"""
+    return {
+        'Compliance ID': row['ComplianceId'],
+        'Description': row['ComplianceItemDescription'] or '',
+        'Status': row['Status'] or '',
+        'Criticality': row['Criticality'] or '',
+        'Maturity Level': row['MaturityLevel'] or '',
+        'Type': row['ComplianceType'] or '',
+        'Implementation': row['ManualAutomatic'] or '',
+        'Created By': row['CreatedByName'] or '',
+        'Created Date': row['CreatedByDate'].strftime('%Y-%m-%d') if row['CreatedByDate'] else '',
+        'Version': row['ComplianceVersion'] or '',
+        'Identifier': row['Identifier'] or '',
+        'Active/Inactive': row['ActiveInactive'] or '',
+        'Is Risk': 'Yes' if row['IsRisk'] else 'No',
+        'SubPolicy': row['SubPolicy__SubPolicyName'] or '',
+        'Policy': row['SubPolicy__PolicyId__PolicyName'] or '',
+        'Framework': row['SubPolicy__PolicyId__FrameworkId__FrameworkName'] or ''
+    }
+
+def iter_compliance_export_rows(queryset):
+    """Formatted export rows, fetched from the database in bounded chunks"""
+    for row in iter_queryset_rows(queryset, COMPLIANCE_EXPORT_FIELDS):
+        yield format_compliance_export_row(row)
+
+def get_compliance_export_cache_key(queryset, file_format, item_type=None, item_id=None):
+    """Export cache key of a compliance export; changes whenever a selected compliance changes"""
+    return export_fingerprint(
+        export_type='compliance',
+        file_format=file_format,
+        filters={'item_type': item_type, 'item_id': item_id},
+        columns=COMPLIANCE_EXPORT_FIELDS,
+        watermark=queryset_watermark(queryset, 'ComplianceId', 'UpdatedAt', COMPLIANCE_EXPORT_RELATED_FIELDS)
+    )
+
+def run_compliance_export(file_format, user_id, item_type=None, item_id=None, export_id=None,
+                          progress_callback=None, use_cache=True):
+    """
+    Export compliances for the item filter. Row-oriented formats (csv, jsonl,
+    json, xml) are streamed; xlsx/pdf/txt need the full dataset in memory.
+    progress_callback(processed_rows, total_rows=None) is called as rows are written.
+    An identical earlier export of unchanged data is reused unless use_cache is False.
+    """
+    queryset = get_compliance_export_queryset(item_type, item_id)
+    options = {'item_type': item_type, 'item_id': item_id}
+    
+    cache_key = get_compliance_export_cache_key(queryset, file_format, item_type, item_id)
+    if use_cache:
+        cached = find_cached_export(cache_key)
+        if cached:
+            print(f"Serving compliance export from cache (export {cached.id})")
+            return serve_cached_export(cached, export_id)
+    
+    total_rows = queryset.count()
+    if progress_callback:
+        progress_callback(0, total_rows)
+    
+    if file_format in STREAMING_FORMATS:
+        result = export_data_streaming(
+            rows=iter_compliance_export_rows(queryset),
+            file_format=file_format,
+            user_id=user_id,
+            options=options,
+            export_id=export_id,
+            total_rows=total_rows,
+            progress_callback=progress_callback
+        )
+    else:
+        compliances_data = list(iter_compliance_export_rows(queryset))
+        if progress_callback:
+            progress_callback(len(compliances_data))
+        
+        from .export_service import export_data
+        result = export_data(
+            data=compliances_data,
+            file_format=file_format,
+            user_id=user_id,
+            options=options,
+            export_id=export_id
+        )
+    
+    store_cached_export(result['export_id'], cache_key)
+    return result
+
+def run_compliance_export_job(task, progress):
+    """export_jobs handler for 'compliance' jobs"""
+    params = task.export_data or {}
+    return run_compliance_export(
+        file_format=task.file_type,
+        user_id=task.user_id,
+        item_type=params.get('item_type'),
+        item_id=params.get('item_id'),
+        export_id=task.id,
+        progress_callback=progress,
+        use_cache=params.get('use_cache', True)
+    )
+
 @api_view(['GET'])
 @csrf_exempt
 @permission_classes([AllowAny])
@@ -3522,6 +3601,29 @@ def export_compliances(request, export_format, item_type=None, item_id=None):
         # Get user ID from request
         user_id = request.user.id if request.user.is_authenticated else 1  # Default to system user
         
+        # refresh=true bypasses the export cache and regenerates the file
+        use_cache = str(request.GET.get('refresh', '')).lower() not in ('1', 'true', 'yes')
+        
+        # Large exports can run as a background job; poll export-jobs/<task_id>/
+        if is_async_request(request):
+            job_owner = export_job_owner(request)
+            if job_owner is None:
+                return Response({'error': 'Login required for background exports'}, status=status.HTTP_403_FORBIDDEN)
+            export_task = submit_export_job(
+                'compliance',
+                user_id=job_owner,
+                file_format=export_format,
+                params={'item_type': item_type, 'item_id': item_id, 'use_cache': use_cache},
+                priority=parse_priority(request.GET.get('priority', 'normal'))
+            )
+            return Response({
+                'success': True,
+                'message': 'Export queued',
+                'task_id': export_task.id,
+                'status': export_task.status,
+                'status_url': get_export_job_status_url(export_task.id)
+            }, status=status.HTTP_202_ACCEPTED)
+        
         # Create export task
         export_task = ExportTask.objects.create(
             export_data={
@@ -3547,59 +3649,13 @@ def export_compliances(request, export_format, item_type=None, item_id=None):
         
         # Process the export
         try:
-            # Fetch compliance data based on filters
-            compliances_data = []
-            
-            if item_type == 'framework' and item_id:
-                # Export all compliances for a specific framework
-                compliances = Compliance.objects.filter(
-                    SubPolicy__PolicyId__FrameworkId=item_id
-                ).select_related('SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework')
-            elif item_type == 'policy' and item_id:
-                # Export all compliances for a specific policy
-                compliances = Compliance.objects.filter(
-                    SubPolicy__PolicyId=item_id
-                ).select_related('SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework')
-            elif item_type == 'subpolicy' and item_id:
-                # Export all compliances for a specific subpolicy
-                compliances = Compliance.objects.filter(
-                    SubPolicy_id=item_id
-                ).select_related('SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework')
-            else:
-                # Export all compliances
-                compliances = Compliance.objects.all().select_related(
-                    'SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework'
-                )
-            
-            # Format compliance data for export
-            for compliance in compliances:
-                compliances_data.append({
-                    'Compliance ID': compliance.ComplianceId,
-                    'Description': compliance.ComplianceItemDescription or '',
-                    'Status': compliance.Status or '',
-                    'Criticality': compliance.Criticality or '',
-                    'Maturity Level': compliance.MaturityLevel or '',
-                    'Type': compliance.ComplianceType or '',
-                    'Implementation': compliance.ManualAutomatic or '',
-                    'Created By': compliance.CreatedByName or '',
-                    'Created Date': compliance.CreatedByDate.strftime('%Y-%m-%d') if compliance.CreatedByDate else '',
-                    'Version': compliance.ComplianceVersion or '',
-                    'Identifier': compliance.Identifier or '',
-                    'Active/Inactive': compliance.ActiveInactive or '',
-                    'Is Risk': 'Yes' if compliance.IsRisk else 'No',
-                    'SubPolicy': compliance.SubPolicy.SubPolicyName if compliance.SubPolicy else '',
-                    'Policy': compliance.SubPolicy.Policy.PolicyName if compliance.SubPolicy and compliance.SubPolicy.Policy else '',
-                    'Framework': compliance.SubPolicy.Policy.Framework.FrameworkName if compliance.SubPolicy and compliance.SubPolicy.Policy and compliance.SubPolicy.Policy.Framework else ''
-                })
-            
-            # Use the export_data function from export_service
-            from .export_service import export_data
-            result = export_data(
-                data=compliances_data,
+            result = run_compliance_export(
                 file_format=export_format,
                 user_id=str(user_id),
-                options={'item_type': item_type, 'item_id': item_id},
-                export_id=export_task.id
+                item_type=item_type,
+                item_id=item_id,
+                export_id=export_task.id,
+                use_cache=use_cache
             )
             
             # Task is already updated by export_data function
@@ -3636,7 +3692,8 @@ def export_compliances(request, export_format, item_type=None, item_id=None):
             'success': True,
             'message': 'Export completed successfully',
             'task_id': export_task.id,
-            'download_url': export_task.s3_url
+            'download_url': export_task.s3_url,
+            'cached': result.get('cached', False)
         })
         
     except Exception as e:
@@ -3656,58 +3713,11 @@ def process_export_task(task_id, item_type=None, item_id=None):
         
         # Process the export
         try:
-            # Fetch compliance data based on filters
-            compliances_data = []
-            
-            if item_type == 'framework' and item_id:
-                # Export all compliances for a specific framework
-                compliances = Compliance.objects.filter(
-                    SubPolicy__Policy__FrameworkId=item_id
-                ).select_related('SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework')
-            elif item_type == 'policy' and item_id:
-                # Export all compliances for a specific policy
-                compliances = Compliance.objects.filter(
-                    SubPolicy__PolicyId=item_id
-                ).select_related('SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework')
-            elif item_type == 'subpolicy' and item_id:
-                # Export all compliances for a specific subpolicy
-                compliances = Compliance.objects.filter(
-                    SubPolicy_id=item_id
-                ).select_related('SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework')
-            else:
-                # Export all compliances
-                compliances = Compliance.objects.all().select_related(
-                    'SubPolicy', 'SubPolicy__Policy', 'SubPolicy__Policy__Framework'
-                )
-            
-            # Format compliance data for export
-            for compliance in compliances:
-                compliances_data.append({
-                    'Compliance ID': compliance.ComplianceId,
-                    'Description': compliance.ComplianceItemDescription or '',
-                    'Status': compliance.Status or '',
-                    'Criticality': compliance.Criticality or '',
-                    'Maturity Level': compliance.MaturityLevel or '',
-                    'Type': compliance.ComplianceType or '',
-                    'Implementation': compliance.ManualAutomatic or '',
-                    'Created By': compliance.CreatedByName or '',
-                    'Created Date': compliance.CreatedByDate.strftime('%Y-%m-%d') if compliance.CreatedByDate else '',
-                    'Version': compliance.ComplianceVersion or '',
-                    'Identifier': compliance.Identifier or '',
-                    'Active/Inactive': compliance.ActiveInactive or '',
-                    'Is Risk': 'Yes' if compliance.IsRisk else 'No',
-                    'SubPolicy': compliance.SubPolicy.SubPolicyName if compliance.SubPolicy else '',
-                    'Policy': compliance.SubPolicy.Policy.PolicyName if compliance.SubPolicy and compliance.SubPolicy.Policy else '',
-                    'Framework': compliance.SubPolicy.Policy.Framework.FrameworkName if compliance.SubPolicy and compliance.SubPolicy.Policy and compliance.SubPolicy.Policy.Framework else ''
-                })
-            
-            # Use the export_data function from export_service
-            from .export_service import export_data
-            result = export_data(
-                data=compliances_data,
+            result = run_compliance_export(
                 file_format=task.file_type,
                 user_id=task.user_id,
-                options={'item_type': item_type, 'item_id': item_id},
+                item_type=item_type,
+                item_id=item_id,
                 export_id=task.id
             )
             
@@ -0,0 +1,179 @@
+"""
+Content-addressed cache of export artifacts
+
+An export is identified by a fingerprint of its type, filters, format, column
+list and a data-version watermark of the source rows (row count, max id, max
+updated timestamp). Exported columns read through foreign keys (subpolicy,
+policy and framework names) are covered by a digest of their distinct values,
+since those tables carry no updated timestamp. A completed export stores the fingerprint in
+ExportTask.cache_key together with expires_at; an identical request made
+before expiry is answered with the existing S3/local artifact instead of
+regenerating and re-uploading the file. Any insert, delete or save of a source
+row changes the watermark and therefore the key.
+
+Expired artifacts are removed by purge_expired_exports
+(`python manage.py purge_export_cache`).
+
+Settings:
+    EXPORT_CACHE_TTL_SECONDS  - lifetime of a cached artifact (default 86400)
+"""
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import ExportTask
+
+EXPORT_CACHE_TTL_SECONDS = getattr(settings, 'EXPORT_CACHE_TTL_SECONDS', 24 * 60 * 60)
+
+
+def queryset_watermark(queryset, pk_field, updated_field, related_fields=()):
+    """
+    Data version of the rows selected by queryset, from a single aggregate query.
+    related_fields are lookups into other tables that are exported as well;
+    their distinct values are folded into the watermark so renaming a related
+    row changes it too.
+    """
+    watermark = queryset.aggregate(
+        row_count=Count(pk_field),
+        max_id=Max(pk_field),
+        max_updated=Max(updated_field),
+    )
+    if related_fields:
+        related = queryset.order_by().values_list(*related_fields).distinct()
+        digest = hashlib.sha256()
+        for values in sorted(related, key=lambda values: json.dumps(values, default=str)):
+            digest.update(json.dumps(values, default=str).encode('utf-8'))
+        watermark['related'] = digest.hexdigest()
+    return watermark
+
+
+def export_fingerprint(export_type, file_format, filters, columns, watermark):
+    """Stable sha256 key of everything that determines an export's content"""
+    payload = json.dumps({
+        'type': export_type,
+        'format': file_format,
+        'filters': filters,
+        'columns': list(columns),
+        'watermark': watermark,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _artifact_available(task):
+    if not task.s3_url:
+        return False
+    if task.s3_url.startswith('file://'):
+        return os.path.exists(task.s3_url[len('file://'):])
+    return True
+
+
+def find_cached_export(cache_key):
+    """Newest unexpired completed export with this key, or None"""
+    candidates = ExportTask.objects.filter(
+        cache_key=cache_key,
+        status='completed',
+        expires_at__gt=timezone.now(),
+    ).order_by('-id')[:3]
+    for task in candidates:
+        if _artifact_available(task):
+            return task
+    return None
+
+
+def store_cached_export(export_id, cache_key, ttl_seconds=None):
+    """Make a completed export servable from the cache"""
+    ttl = EXPORT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    ExportTask.objects.filter(id=export_id, status='completed').update(
+        cache_key=cache_key,
+        expires_at=timezone.now() + timedelta(seconds=ttl),
+    )
+
+
+def serve_cached_export(cached, export_id=None):
+    """
+    Result dict in the export_data shape for a cache hit. If the caller already
+    created an export record, it is completed with the cached artifact.
+    """
+    metadata = dict(cached.metadata or {})
+    record_count = metadata.get('record_count', 0)
+
+    if export_id:
+        ExportTask.objects.filter(id=export_id).update(
+            status='completed',
+            error=None,
+            file_type=cached.file_type,
+            file_name=cached.file_name,
+            s3_url=cached.s3_url,
+            metadata={**metadata, 'cached_from': cached.id},
+            processed_rows=record_count,
+            total_rows=record_count,
+            # The copy shares the artifact, so it expires with it
+            expires_at=cached.expires_at,
+            completed_at=timezone.now(),
+        )
+
+    return {
+        'success': True,
+        'cached': True,
+        'export_id': export_id or cached.id,
+        'file_url': cached.s3_url,
+        'file_name': cached.file_name,
+        'metadata': {
+            'file_size': metadata.get('file_size'),
+            'format': cached.file_type,
+            'record_count': record_count,
+            'export_duration': 0,
+            'cached_from': cached.id,
+        }
+    }
+
+
+def _delete_artifact(task):
+    """Remove the S3 object and local copies of an export"""
+    s3_metadata = (task.metadata or {}).get('s3_metadata') or {}
+    bucket, key = s3_metadata.get('bucket'), s3_metadata.get('key')
+    if bucket and key and bucket != 'local':
+        from .export_service import s3_client
+        s3_client.delete_object(Bucket=bucket, Key=key)
+
+    local_paths = {os.path.join(os.path.expanduser("~"), "Downloads", task.file_name or '')}
+    if task.s3_url and task.s3_url.startswith('file://'):
+        local_paths.add(task.s3_url[len('file://'):])
+    for path in local_paths:
+        if task.file_name and os.path.isfile(path):
+            os.remove(path)
+
+
+def purge_expired_exports(now=None):
+    """
+    Delete the artifacts of expired cached exports and detach them from their
+    records. Returns the number of records purged.
+    """
+    now = now or timezone.now()
+    purged = 0
+
+    expired = ExportTask.objects.filter(expires_at__lte=now, s3_url__isnull=False)
+    for task in expired.iterator():
+        metadata = dict(task.metadata or {})
+        # Records served from the cache point at another record's artifact
+        if not metadata.get('cached_from'):
+            try:
+                _delete_artifact(task)
+            except Exception as e:
+                print(f"Could not delete artifact of export {task.id}: {str(e)}")
+                continue
+
+        metadata['purged_at'] = now.isoformat()
+        ExportTask.objects.filter(id=task.id).update(
+            s3_url=None, cache_key=None, metadata=metadata
+        )
+        purged += 1
+
+    print(f"Purged {purged} expired export artifacts")
+    return purged
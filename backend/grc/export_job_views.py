@@ -0,0 +1,115 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .models import ExportTask
+from .export_jobs import (
+    cancel_export_job,
+    retry_export_job,
+    get_export_job_status,
+    export_job_owner,
+    user_export_jobs,
+)
+from .utils import send_log, get_client_ip
+
+
+def _login_required():
+    return Response({'success': False, 'error': 'Login required'}, status=status.HTTP_403_FORBIDDEN)
+
+
+def _job_not_found():
+    return Response({'success': False, 'error': 'Export job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_export_jobs(request):
+    """
+    Background export jobs of the session user, newest first.
+    Optional query params: status, limit (default 50, max 200)
+    """
+    user_id = export_job_owner(request)
+    if user_id is None:
+        return _login_required()
+
+    jobs = user_export_jobs(user_id)
+    if request.GET.get('status'):
+        jobs = jobs.filter(status=request.GET['status'])
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), 200))
+    except ValueError:
+        limit = 50
+
+    return Response({
+        'success': True,
+        'jobs': [get_export_job_status(task) for task in jobs.order_by('-id')[:limit]]
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_job_status(request, task_id):
+    """Status and progress of one of the session user's background export jobs"""
+    user_id = export_job_owner(request)
+    if user_id is None:
+        return _login_required()
+
+    task = user_export_jobs(user_id).filter(id=task_id).first()
+    if task is None:
+        return _job_not_found()
+    return Response({'success': True, **get_export_job_status(task)})
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def cancel_export_job_view(request, task_id):
+    """Cancel a queued job, or ask a running job to stop at its next progress report"""
+    user_id = export_job_owner(request)
+    if user_id is None:
+        return _login_required()
+
+    task = cancel_export_job(task_id, user_id)
+    if task is None:
+        return _job_not_found()
+
+    send_log(
+        module="Export",
+        actionType="CANCEL_EXPORT_JOB",
+        description=f"Cancellation requested for export job {task_id}",
+        userId=user_id,
+        userName=getattr(request.user, 'username', 'Anonymous'),
+        entityType="ExportTask",
+        entityId=task_id,
+        ipAddress=get_client_ip(request)
+    )
+    return Response({'success': True, **get_export_job_status(task)})
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def retry_export_job_view(request, task_id):
+    """Re-queue a failed or cancelled export job"""
+    user_id = export_job_owner(request)
+    if user_id is None:
+        return _login_required()
+
+    try:
+        task = retry_export_job(task_id, user_id)
+    except ExportTask.DoesNotExist:
+        return _job_not_found()
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+    send_log(
+        module="Export",
+        actionType="RETRY_EXPORT_JOB",
+        description=f"Export job {task_id} re-queued (attempt {task.attempts + 1})",
+        userId=user_id,
+        userName=getattr(request.user, 'username', 'Anonymous'),
+        entityType="ExportTask",
+        entityId=task_id,
+        ipAddress=get_client_ip(request)
+    )
+    return Response({'success': True, **get_export_job_status(task)})
@@ -0,0 +1,343 @@
+"""
+Background export jobs backed by the exported_files (ExportTask) table.
+
+Export endpoints called with async=true enqueue an ExportTask with status
+'queued' and return immediately. Jobs are executed by a bounded pool of worker
+threads that claim queued rows from the database:
+
+- Highest priority first, then oldest first
+- At most EXPORT_MAX_JOBS_PER_USER jobs of one user run at the same time
+- A claim locks the user's active jobs (SELECT ... FOR UPDATE) while it checks
+  the per-user limit and moves the job to processing, so several processes
+  running `python manage.py run_export_worker` can share the queue
+
+Jobs belong to the session user that queued them; the job endpoints only show
+and act on the caller's own jobs.
+
+Progress is stored as processed_rows / total_rows on the task. A running job
+is cancelled cooperatively: cancel_export_job sets cancel_requested and the
+job stops at its next progress report. Failed or cancelled jobs can be retried
+up to EXPORT_MAX_ATTEMPTS times.
+
+Settings:
+    EXPORT_WORKER_COUNT       - worker threads per pool (default 2)
+    EXPORT_MAX_JOBS_PER_USER  - concurrent jobs per user (default 2)
+    EXPORT_MAX_ATTEMPTS       - runs allowed per job, including retries (default 3)
+    EXPORT_JOBS_IN_PROCESS    - also run a pool inside the web process (default False).
+                                Exports then compete with requests for the web workers,
+                                so only opt in where run_export_worker cannot be deployed
+"""
+
+import logging
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ExportTask
+
+logger = logging.getLogger(__name__)
+
+EXPORT_WORKER_COUNT = getattr(settings, 'EXPORT_WORKER_COUNT', 2)
+EXPORT_MAX_JOBS_PER_USER = getattr(settings, 'EXPORT_MAX_JOBS_PER_USER', 2)
+EXPORT_MAX_ATTEMPTS = getattr(settings, 'EXPORT_MAX_ATTEMPTS', 3)
+EXPORT_JOBS_IN_PROCESS = getattr(settings, 'EXPORT_JOBS_IN_PROCESS', False)
+
+# How long an idle worker waits before polling the table again
+POLL_INTERVAL_SECONDS = 2
+
+PRIORITIES = {
+    'low': -10,
+    'normal': 0,
+    'high': 10,
+}
+MIN_PRIORITY = PRIORITIES['low']
+MAX_PRIORITY = PRIORITIES['high']
+
+# Job type -> handler(task, progress) returning the export_data result dict
+EXPORT_JOB_HANDLERS = {
+    'compliance': 'grc.compliance_views.run_compliance_export_job',
+    'incidents': 'grc.incident_views.run_incident_export_job',
+    'policies': 'grc.routes.policy.run_policy_export_job',
+}
+
+ACTIVE_STATUSES = ('queued', 'processing')
+RETRYABLE_STATUSES = ('failed', 'cancelled')
+
+
+class ExportJobCancelled(Exception):
+    """Raised from a progress report when the job has been cancelled"""
+
+
+def parse_priority(value):
+    """Map 'low'/'normal'/'high' or an integer to a priority within MIN_PRIORITY..MAX_PRIORITY"""
+    if value in PRIORITIES:
+        return PRIORITIES[value]
+    try:
+        priority = int(value)
+    except (TypeError, ValueError):
+        return PRIORITIES['normal']
+    return min(max(priority, MIN_PRIORITY), MAX_PRIORITY)
+
+
+def export_job_owner(request):
+    """Id of the session user, as stored in ExportTask.user_id, or None when nobody is logged in"""
+    session = getattr(request, 'session', None)
+    user_id = session.get('user_id') if session is not None else None
+    return str(user_id) if user_id else None
+
+
+def user_export_jobs(user_id):
+    """Background export jobs of one user"""
+    return ExportTask.objects.filter(job_type__isnull=False, user_id=str(user_id))
+
+
+def is_async_request(request):
+    """True if the export request asked to run as a background job"""
+    value = request.GET.get('async')
+    if value is None and hasattr(request, 'data') and hasattr(request.data, 'get'):
+        value = request.data.get('async')
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def submit_export_job(job_type, user_id, file_format, params=None, priority=0):
+    """Queue an export job and return its ExportTask"""
+    if job_type not in EXPORT_JOB_HANDLERS:
+        raise ValueError(f"Unknown export job type: {job_type}")
+
+    task = ExportTask.objects.create(
+        export_data=params or {},
+        file_type=file_format,
+        user_id=str(user_id),
+        status='queued',
+        job_type=job_type,
+        priority=priority,
+    )
+    print(f"Queued {job_type} export job {task.id} for user {user_id} (priority {priority})")
+
+    if EXPORT_JOBS_IN_PROCESS:
+        get_export_pool().wake()
+    return task
+
+
+def cancel_export_job(task_id, user_id):
+    """
+    Cancel a queued job of user_id immediately, or ask a running one to stop.
+    Returns the updated task, or None if the user has no such job.
+    """
+    jobs = user_export_jobs(user_id)
+    if jobs.filter(id=task_id, status='queued').update(
+        status='cancelled', cancel_requested=True, completed_at=timezone.now()
+    ):
+        return jobs.get(id=task_id)
+
+    jobs.filter(id=task_id, status='processing').update(cancel_requested=True)
+    return jobs.filter(id=task_id).first()
+
+
+def retry_export_job(task_id, user_id):
+    """
+    Re-queue a failed or cancelled job of user_id.
+    Raises ExportTask.DoesNotExist if the user has no such job and ValueError
+    if it is not retryable or has no attempts left.
+    """
+    task = user_export_jobs(user_id).get(id=task_id)
+    if not task.job_type:
+        raise ValueError("Only background export jobs can be retried")
+    if task.status not in RETRYABLE_STATUSES:
+        raise ValueError(f"Job is {task.status}; only failed or cancelled jobs can be retried")
+    if task.attempts >= EXPORT_MAX_ATTEMPTS:
+        raise ValueError(f"Job has already been attempted {task.attempts} times")
+
+    ExportTask.objects.filter(id=task_id, status__in=RETRYABLE_STATUSES).update(
+        status='queued',
+        error=None,
+        processed_rows=0,
+        cancel_requested=False,
+        started_at=None,
+        completed_at=None,
+    )
+    if EXPORT_JOBS_IN_PROCESS:
+        get_export_pool().wake()
+    task.refresh_from_db()
+    return task
+
+
+def get_export_job_status_url(task_id):
+    """URL clients poll for the job's status"""
+    return reverse('export-job-status', args=[task_id])
+
+
+def get_export_job_status(task):
+    """Serializable status of an export job"""
+    percent = None
+    if task.total_rows:
+        percent = round(min(task.processed_rows / task.total_rows, 1) * 100, 1)
+    elif task.status == 'completed':
+        percent = 100
+
+    return {
+        'task_id': task.id,
+        'job_type': task.job_type,
+        'status': task.status,
+        'file_type': task.file_type,
+        'priority': task.priority,
+        'processed_rows': task.processed_rows,
+        'total_rows': task.total_rows,
+        'progress_percent': percent,
+        'attempts': task.attempts,
+        'max_attempts': EXPORT_MAX_ATTEMPTS,
+        'cancel_requested': task.cancel_requested,
+        'file_name': task.file_name,
+        'download_url': task.s3_url if task.status == 'completed' else None,
+        'error': task.error,
+        'created_at': task.created_at.isoformat() if task.created_at else None,
+        'started_at': task.started_at.isoformat() if task.started_at else None,
+        'completed_at': task.completed_at.isoformat() if task.completed_at else None,
+    }
+
+
+def _make_progress_reporter(task):
+    """Progress callback that records processed/total rows and honours cancellation"""
+    def progress(processed_rows, total_rows=None):
+        updates = {'processed_rows': processed_rows}
+        if total_rows is not None:
+            updates['total_rows'] = total_rows
+        ExportTask.objects.filter(id=task.id).update(**updates)
+
+        if ExportTask.objects.filter(id=task.id, cancel_requested=True).exists():
+            raise ExportJobCancelled(f"Export job {task.id} was cancelled")
+    return progress
+
+
+def run_export_job(task):
+    """Execute a claimed job and record its outcome"""
+    handler = import_string(EXPORT_JOB_HANDLERS[task.job_type])
+    progress = _make_progress_reporter(task)
+
+    try:
+        result = handler(task, progress)
+        # export_data / export_data_streaming mark the record completed
+        ExportTask.objects.filter(id=task.id).update(
+            processed_rows=result.get('metadata', {}).get('record_count') or F('processed_rows')
+        )
+        print(f"Export job {task.id} completed: {result.get('file_name')}")
+    except ExportJobCancelled:
+        print(f"Export job {task.id} cancelled")
+        ExportTask.objects.filter(id=task.id).update(
+            status='cancelled', error='Cancelled by user', completed_at=timezone.now()
+        )
+    except Exception as e:
+        logger.error(f"Export job {task.id} failed: {str(e)}\n{traceback.format_exc()}")
+        ExportTask.objects.filter(id=task.id).update(status='failed', error=str(e))
+
+
+class ExportWorkerPool:
+    """Fixed-size pool of threads that claim and run queued export jobs"""
+
+    def __init__(self, worker_count=EXPORT_WORKER_COUNT, max_jobs_per_user=EXPORT_MAX_JOBS_PER_USER):
+        self.worker_count = worker_count
+        self.max_jobs_per_user = max_jobs_per_user
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._started = False
+
+    def start(self):
+        with self._wakeup:
+            if self._started:
+                return
+            self._started = True
+        for index in range(self.worker_count):
+            thread = threading.Thread(
+                target=self._work, name=f"export-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+
+    def wake(self):
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def claim_next_job(self):
+        """Move the next eligible queued job to processing, respecting the per-user limit"""
+        candidates = ExportTask.objects.filter(
+            status='queued', job_type__isnull=False
+        ).order_by('-priority', 'id').values_list('id', 'user_id')[:50]
+        for task_id, user_id in candidates:
+            task = self._claim(task_id, user_id)
+            if task is not None:
+                return task
+        return None
+
+    def _claim(self, task_id, user_id):
+        """Claim one job unless its user is at the limit. Returns the task, or None."""
+        with transaction.atomic():
+            # Locking the user's active jobs serialises claims for that user, so the
+            # limit check and the claim see the same set of running jobs
+            active = dict(
+                ExportTask.objects.select_for_update().filter(
+                    user_id=user_id, status__in=ACTIVE_STATUSES
+                ).values_list('id', 'status')
+            )
+            if active.get(task_id) != 'queued':
+                return None
+            running = sum(1 for job_status in active.values() if job_status == 'processing')
+            if running >= self.max_jobs_per_user:
+                return None
+            ExportTask.objects.filter(id=task_id).update(
+                status='processing',
+                started_at=timezone.now(),
+                attempts=F('attempts') + 1,
+            )
+        return ExportTask.objects.get(id=task_id)
+
+    def _work(self):
+        while not self._stopping:
+            task = None
+            try:
+                close_old_connections()
+                task = self.claim_next_job()
+                if task:
+                    run_export_job(task)
+            except Exception as e:
+                logger.error(f"Export worker error: {str(e)}")
+            finally:
+                close_old_connections()
+
+            if task is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(POLL_INTERVAL_SECONDS)
+            else:
+                # A finished job may unblock another job of the same user
+                with self._wakeup:
+                    self._wakeup.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_export_pool():
+    """The process-wide worker pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExportWorkerPool()
+        return _pool
@@ -1,8 +1,11 @@
 import json
 import os
+import shutil
+import tempfile
 import uuid
 import datetime
 import boto3
+from boto3.s3.transfer import TransferConfig
 import mysql.connector
 from mysql.connector import pooling
 import pandas as pd
@@ -12,6 +15,8 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from botocore.exceptions import ClientError
 
+from .export_streaming import STREAMING_FORMATS, iter_export_chunks
+
 
 
 # Database connection pool
@@ -29,11 +34,15 @@ s3_client = boto3.client(
     's3',
     aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
     aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-    region_name=os.environ.get('AWS_REGION', 'us-east-1')
+    region_name=os.environ.get('AWS_REGION', 'us-east-1'),
+    endpoint_url=os.environ.get('S3_ENDPOINT_URL')  # e.g. a local MinIO instance; None means AWS
 )
 
 BUCKET_NAME = os.environ.get('S3_BUCKET', 'orcashoimages')
 
+# S3 multipart part size of streamed exports; the row encoding lives in export_streaming
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
 # Ensure S3 bucket exists
 def ensure_bucket_exists():
     """Create the S3 bucket if it doesn't exist"""
@@ -355,13 +364,196 @@ def get_content_type(file_type):
         'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
         'csv': 'text/csv',
         'json': 'application/json',
+        'jsonl': 'application/x-ndjson',
         'xml': 'application/xml',
         'txt': 'text/plain'
     }
     
     return content_types.get(file_type, 'application/octet-stream')
 
-def export_data(data=None, file_format='xlsx', user_id='user123', options=None):
+def attach_export_record(export_id, file_type, file_name, metadata):
+    """Fill in file details on an export record created by the caller (e.g. an ExportTask)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(
+            """
+            UPDATE exported_files
+            SET file_type = %s, file_name = %s, metadata = %s, updated_at = %s
+            WHERE id = %s
+            """,
+            (file_type, file_name, json.dumps(metadata), datetime.datetime.now(), export_id)
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def upload_file_to_s3(local_path, file_name, content_type):
+    """Upload a file from disk to S3 in MULTIPART_CHUNK_SIZE parts"""
+    key = f"exports/{file_name}"
+    transfer_config = TransferConfig(
+        multipart_threshold=MULTIPART_CHUNK_SIZE,
+        multipart_chunksize=MULTIPART_CHUNK_SIZE
+    )
+    s3_client.upload_file(
+        local_path,
+        BUCKET_NAME,
+        key,
+        ExtraArgs={'ContentType': content_type},
+        Config=transfer_config
+    )
+    
+    return {
+        'url': f"https://{BUCKET_NAME}.s3.amazonaws.com/{key}",
+        'bucket': BUCKET_NAME,
+        'key': key,
+        'region': os.environ.get('AWS_REGION', 'us-east-1')
+    }
+
+def export_data_streaming(rows, file_format='csv', user_id='user123', options=None,
+                          export_id=None, total_rows=None, progress_callback=None):
+    """
+    Export an iterable of row dicts without materializing it.
+
+    Rows are encoded chunk by chunk into a temporary file, which is then
+    uploaded to S3 with a multipart upload and removed; memory use is bounded
+    by one chunk. Only if the upload fails is the file kept, under ~/Downloads,
+    like export_data's local fallback. The export record keeps only the export
+    options, not the rows.
+    
+    Args:
+        rows: Iterable of dicts, e.g. from iter_queryset_rows
+        file_format: One of STREAMING_FORMATS
+        user_id: ID of the user requesting the export
+        options: Additional export options (filters, columns, ...)
+        export_id: Existing exported_files record to update instead of creating one
+        total_rows: Expected row count, stored in the metadata when known
+        progress_callback: Called with the number of rows written after each chunk
+        
+    Returns:
+        Dictionary with export results, same shape as export_data
+    """
+    if options is None:
+        options = {}
+    
+    if file_format not in STREAMING_FORMATS:
+        raise ValueError(f"Unsupported streaming export format: {file_format}")
+    
+    timestamp = datetime.datetime.now().timestamp()
+    file_name = f"export_{user_id}_{int(timestamp)}.{file_format}"
+    local_path = None
+    temp_path = None
+    metadata = {
+        'streaming': True,
+        'record_count': total_rows,
+        'filters': options.get('filters', {}),
+        'columns': options.get('columns', [])
+    }
+    
+    try:
+        if export_id:
+            attach_export_record(export_id, file_format, file_name, metadata)
+        else:
+            export_id = save_export_record({
+                'export_data': {'streaming': True, 'options': options},
+                'file_type': file_format,
+                'user_id': user_id,
+                'file_name': file_name,
+                'status': 'pending',
+                'metadata': metadata
+            })
+        
+        update_export_status(export_id, 'processing')
+        
+        print(f"Streaming export {export_id} to {file_format} format...")
+        start_time = datetime.datetime.now()
+        
+        fd, temp_path = tempfile.mkstemp(prefix='export_', suffix=f'.{file_format}')
+        
+        record_count = 0
+        
+        def counted_rows():
+            nonlocal record_count
+            for row in rows:
+                record_count += 1
+                yield row
+        
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in iter_export_chunks(counted_rows(), file_format):
+                f.write(chunk)
+                if progress_callback:
+                    progress_callback(record_count)
+        
+        file_size = os.path.getsize(temp_path)
+        print(f"Streamed {record_count} rows to {temp_path} ({file_size} bytes)")
+        
+        try:
+            s3_result = upload_file_to_s3(temp_path, file_name, get_content_type(file_format))
+            print(f"File uploaded successfully to S3: {s3_result['url']}")
+        except Exception as s3_error:
+            print(f"S3 upload failed: {str(s3_error)}")
+            downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
+            os.makedirs(downloads_path, exist_ok=True)
+            local_path = os.path.join(downloads_path, file_name)
+            shutil.move(temp_path, local_path)
+            print(f"File saved locally instead at: {local_path}")
+            s3_result = {
+                'url': f"file://{local_path}",
+                'bucket': 'local',
+                'key': local_path,
+                'region': 'local'
+            }
+        update_export_url(export_id, s3_result['url'])
+        
+        duration = (datetime.datetime.now() - start_time).total_seconds() * 1000
+        update_export_metadata(export_id, {
+            'record_count': record_count,
+            'file_size': file_size,
+            'export_duration': duration,
+            's3_metadata': {
+                'bucket': s3_result['bucket'],
+                'key': s3_result['key'],
+                'region': s3_result['region'],
+                'upload_time': datetime.datetime.now().isoformat()
+            }
+        })
+        
+        update_export_status(export_id, 'completed')
+        
+        return {
+            'success': True,
+            'export_id': export_id,
+            'file_url': s3_result['url'],
+            'file_name': file_name,
+            'local_path': local_path,
+            'metadata': {
+                'file_size': file_size,
+                'format': file_format,
+                'record_count': record_count,
+                'export_duration': duration
+            }
+        }
+        
+    except Exception as e:
+        print(f"Streaming export error: {str(e)}")
+        if export_id:
+            update_export_status(export_id, 'failed', str(e))
+            update_export_metadata(export_id, {
+                'error': {
+                    'message': str(e),
+                    'timestamp': datetime.datetime.now().isoformat(),
+                    'local_path': local_path
+                }
+            })
+        raise
+    finally:
+        # Uploaded or failed; a file kept as the local fallback was moved away already
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def export_data(data=None, file_format='xlsx', user_id='user123', options=None, export_id=None):
     """
     Export data to the specified format and save to S3
     
@@ -370,6 +562,7 @@ def export_data(data=None, file_format='xlsx', user_id='user123', options=None):
         file_format: Format to export (xlsx, pdf, csv, json, xml, txt)
         user_id: ID of the user requesting the export
         options: Additional export options
+        export_id: Existing exported_files record to update instead of creating one
         
     Returns:
         Dictionary with export results
@@ -380,7 +573,6 @@ def export_data(data=None, file_format='xlsx', user_id='user123', options=None):
     if options is None:
         options = {}
     
-    export_id = None
     timestamp = datetime.datetime.now().timestamp()
     file_name = f"export_{user_id}_{int(timestamp)}.{file_format}"
     local_path = None
@@ -399,19 +591,24 @@ def export_data(data=None, file_format='xlsx', user_id='user123', options=None):
         if file_format not in export_functions:
             raise ValueError(f"Unsupported export format: {file_format}")
         
-        # Create export record
-        export_id = save_export_record({
-            'export_data': data,
-            'file_type': file_format,
-            'user_id': user_id,
-            'file_name': file_name,
-            'status': 'pending',
-            'metadata': {
-                'record_count': len(data) if isinstance(data, list) else 1,
-                'filters': options.get('filters', {}),
-                'columns': options.get('columns', [])
-            }
-        })
+        metadata = {
+            'record_count': len(data) if isinstance(data, list) else 1,
+            'filters': options.get('filters', {}),
+            'columns': options.get('columns', [])
+        }
+        
+        # Create export record, or fill in the one the caller created
+        if export_id:
+            attach_export_record(export_id, file_format, file_name, metadata)
+        else:
+            export_id = save_export_record({
+                'export_data': data,
+                'file_type': file_format,
+                'user_id': user_id,
+                'file_name': file_name,
+                'status': 'pending',
+                'metadata': metadata
+            })
         
         # Update status to processing
         update_export_status(export_id, 'processing')
@@ -0,0 +1,112 @@
+"""
+Row-by-row encoding of streamed exports
+
+iter_queryset_rows pages a queryset with keyset pagination and
+iter_export_chunks encodes the rows into csv, jsonl, json or xml bytes chunks,
+so export_service.export_data_streaming never holds more than one chunk.
+Kept apart from export_service, which opens its database pool and S3 client
+at import.
+
+Settings (environment):
+    EXPORT_STREAM_FETCH_SIZE  - rows fetched per database round trip (default 2000)
+"""
+
+import csv
+import datetime
+import json
+import os
+from io import StringIO
+
+import xmltodict
+
+# Formats that can be written row by row, rows fetched per database round
+# trip, and rows encoded per output chunk
+STREAMING_FORMATS = ('csv', 'jsonl', 'json', 'xml')
+STREAM_FETCH_SIZE = int(os.environ.get('EXPORT_STREAM_FETCH_SIZE', 2000))
+STREAM_ROWS_PER_CHUNK = 1000
+
+
+def iter_queryset_rows(queryset, fields, chunk_size=None):
+    """
+    Yield queryset rows as dicts of `fields`, STREAM_FETCH_SIZE rows per query.
+
+    Uses keyset pagination on the primary key, so only one chunk is held in
+    memory regardless of the driver's cursor buffering.
+    """
+    chunk_size = chunk_size or STREAM_FETCH_SIZE
+    pk_name = queryset.model._meta.pk.name
+    fields = list(fields)
+    if pk_name not in fields:
+        fields.append(pk_name)
+    
+    last_pk = None
+    while True:
+        chunk_qs = queryset.order_by(pk_name)
+        if last_pk is not None:
+            chunk_qs = chunk_qs.filter(**{f"{pk_name}__gt": last_pk})
+        chunk = list(chunk_qs.values(*fields)[:chunk_size])
+        if not chunk:
+            return
+        for row in chunk:
+            yield row
+        last_pk = chunk[-1][pk_name]
+        if len(chunk) < chunk_size:
+            return
+
+def _stream_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+def iter_export_chunks(rows, file_format, rows_per_chunk=STREAM_ROWS_PER_CHUNK):
+    """
+    Encode an iterable of row dicts into `file_format`, yielding bytes chunks
+    of rows_per_chunk rows. Output matches the in-memory exporters
+    (CSV header from the first row's keys, JSON array, <export><item> XML);
+    'jsonl' writes one JSON object per line.
+    """
+    if file_format not in STREAMING_FORMATS:
+        raise ValueError(f"Format does not support streaming: {file_format}")
+    
+    buffer = StringIO()
+    csv_writer = None
+    row_count = 0
+    
+    if file_format == 'json':
+        buffer.write('[')
+    elif file_format == 'xml':
+        buffer.write('<?xml version="1.0" encoding="utf-8"?>\n<export>')
+    
+    for row in rows:
+        if file_format == 'csv':
+            if csv_writer is None:
+                csv_writer = csv.DictWriter(buffer, fieldnames=list(row.keys()), extrasaction='ignore', lineterminator='\n')
+                csv_writer.writeheader()
+            csv_writer.writerow({key: _stream_value(value) for key, value in row.items()})
+        elif file_format == 'jsonl':
+            buffer.write(json.dumps(row, default=str))
+            buffer.write('\n')
+        elif file_format == 'json':
+            buffer.write(',\n  ' if row_count else '\n  ')
+            buffer.write(json.dumps(row, default=str))
+        elif file_format == 'xml':
+            item = {key: _stream_value(value) for key, value in row.items()}
+            buffer.write('\n')
+            buffer.write(xmltodict.unparse({'item': item}, full_document=False, pretty=True))
+        
+        row_count += 1
+        if row_count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if file_format == 'json':
+        buffer.write('\n]' if row_count else ']')
+    elif file_format == 'xml':
+        buffer.write('\n</export>')
+    
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode('utf-8')
@@ -0,0 +1,52 @@
+"""
+Filters and rows of the incident exports
+
+incident_export_filters turns an export request into the filters stored on a
+background export job, and get_incident_export_rows reads the incidents those
+filters select. Kept apart from incident_views, which opens its database
+connection at import.
+"""
+
+from .models import Incident
+
+# Request field -> Incident lookup accepted as a background export filter
+INCIDENT_EXPORT_FILTERS = {
+    'incident_ids': 'IncidentId__in',
+    'status': 'Status',
+    'origin': 'Origin',
+    'risk_priority': 'RiskPriority',
+}
+
+
+def get_incident_export_rows(filters=None):
+    """Incidents with the exported fields, newest first, narrowed by INCIDENT_EXPORT_FILTERS"""
+    filters = filters or {}
+    incidents = Incident.objects.all()
+    for field, lookup in INCIDENT_EXPORT_FILTERS.items():
+        # incident_ids applies even when empty: an empty selection exports no rows
+        if filters.get(field) or (field == 'incident_ids' and field in filters):
+            incidents = incidents.filter(**{lookup: filters[field]})
+    return list(incidents.values(
+        'IncidentId', 'IncidentTitle', 'Date', 'RiskPriority', 'Origin', 'Status'
+    ).order_by('-Date'))
+
+
+def incident_export_filters(request_data, provided_data=None):
+    """
+    The filter fields of an export request. Rows sent by the client only
+    contribute their IncidentIds; the job reads the rows themselves again.
+    """
+    filters = {}
+    for field in ('status', 'origin', 'risk_priority'):
+        value = request_data.get(field)
+        if value not in (None, ''):
+            filters[field] = str(value)
+
+    ids = request_data.get('incident_ids')
+    if ids is None and isinstance(provided_data, list):
+        ids = [row.get('IncidentId') for row in provided_data if isinstance(row, dict)]
+    if ids is not None:
+        if not isinstance(ids, (list, tuple)):
+            ids = [ids]
+        filters['incident_ids'] = sorted({int(i) for i in ids if str(i).isdigit()})
+    return filters
@@ -0,0 +1,342 @@
+"""
+Shared, cached and batched LLM inference for incident analysis
+
+slm_service.analyze_security_incident and
+incident_slm.analyze_incident_comprehensive describe their prompt, response
+parser and deterministic fallback as an AnalysisKind and run it through
+IncidentInferenceService, which
+
+- builds one chain per kind from the configured LLM backend (llm_backend) for
+  the life of the process and asks Ollama to keep the model loaded
+  (INCIDENT_ANALYSIS_KEEP_ALIVE)
+- caches parsed results in a process-local LRU backed by JSON files on disk,
+  keyed by kind, prompt version and the normalized incident text, so every
+  worker process reuses a result once it exists
+- runs queued analyses on a background thread, several at a time through
+  chain.batch, and writes each result into the empty fields of the incident
+  it was requested for
+
+submit() never waits for the model: it answers from the cache or returns the
+kind's fallback analysis together with a key that lookup() resolves once the
+model result is ready. A queued key is marked pending in the disk cache, so
+lookup() reports it as pending in every worker process, not only the one
+running it.
+
+Settings:
+    INCIDENT_ANALYSIS_CACHE_DIR          - result files (default MEDIA_ROOT/incident_analysis_cache)
+    INCIDENT_ANALYSIS_CACHE_TTL_SECONDS  - result lifetime (default 7 days)
+    INCIDENT_ANALYSIS_CACHE_MAX_ENTRIES  - in-memory results per process (default 512)
+    INCIDENT_ANALYSIS_BATCH_SIZE         - analyses sent to the model together (default 4)
+    INCIDENT_ANALYSIS_KEEP_ALIVE         - how long Ollama keeps the model loaded (default '30m')
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .llm_backend import get_llm_backend
+from .rbac.cache import RBACPermissionCache
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_ANALYSIS_MODEL = "llama3.2:3b"
+INCIDENT_ANALYSIS_CACHE_DIR = getattr(
+    settings, 'INCIDENT_ANALYSIS_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'incident_analysis_cache')
+)
+INCIDENT_ANALYSIS_CACHE_TTL_SECONDS = getattr(settings, 'INCIDENT_ANALYSIS_CACHE_TTL_SECONDS', 7 * 24 * 60 * 60)
+INCIDENT_ANALYSIS_CACHE_MAX_ENTRIES = getattr(settings, 'INCIDENT_ANALYSIS_CACHE_MAX_ENTRIES', 512)
+INCIDENT_ANALYSIS_BATCH_SIZE = getattr(settings, 'INCIDENT_ANALYSIS_BATCH_SIZE', 4)
+INCIDENT_ANALYSIS_KEEP_ALIVE = getattr(settings, 'INCIDENT_ANALYSIS_KEEP_ALIVE', '30m')
+
+# Failed analyses are retried by the next submit after this long
+FAILURE_RETRY_SECONDS = 300
+# A pending marker older than this belongs to a process that died before finishing
+PENDING_EXPIRY_SECONDS = 900
+
+ANALYSIS_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class AnalysisKind:
+    """
+    One kind of incident analysis.
+
+    prompt          - PromptTemplate text; its variables are the keys of `inputs`
+    parse           - parse(response, inputs) -> dict, raises ValueError on an unusable response
+    fallback        - fallback(inputs) -> deterministic analysis dict
+    incident_fields - optional incident_fields(result) -> {Incident field: value} filled in
+                      on the requesting incident where still empty
+    version         - bump when the prompt or parser changes to stop reusing cached results
+    """
+
+    def __init__(self, name, prompt, parse, fallback, incident_fields=None, temperature=0.7, version='1'):
+        self.name = name
+        self.prompt = prompt
+        self.parse = parse
+        self.fallback = fallback
+        self.incident_fields = incident_fields
+        self.temperature = temperature
+        self.version = version
+
+
+def normalize_incident_text(text):
+    return ' '.join(str(text or '').split()).lower()
+
+
+def analysis_cache_key(kind, inputs):
+    normalized = {name: normalize_incident_text(value) for name, value in sorted(inputs.items())}
+    payload = json.dumps([kind.name, kind.version, INCIDENT_ANALYSIS_MODEL, normalized])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_analysis_key(key):
+    return isinstance(key, str) and ANALYSIS_KEY_RE.match(key) is not None
+
+
+def fill_incident_fields(incident_id, values):
+    """Write values into the fields of an incident that are still empty. Returns the fields written."""
+    from .models import Incident
+
+    current = Incident.objects.filter(IncidentId=incident_id).values(*values.keys()).first()
+    if current is None:
+        return []
+    updates = {
+        field: value for field, value in values.items()
+        if value not in (None, '', []) and current.get(field) in (None, '', [])
+    }
+    if updates:
+        Incident.objects.filter(IncidentId=incident_id).update(**updates)
+    return list(updates)
+
+
+class IncidentInferenceService:
+    def __init__(self, cache_dir=INCIDENT_ANALYSIS_CACHE_DIR, batch_size=INCIDENT_ANALYSIS_BATCH_SIZE,
+                 ttl_seconds=INCIDENT_ANALYSIS_CACHE_TTL_SECONDS, backend=None):
+        self.cache_dir = cache_dir
+        self.backend = backend or get_llm_backend()
+        self.batch_size = max(1, batch_size)
+        self.ttl_seconds = ttl_seconds
+        self.memory = RBACPermissionCache(max_entries=INCIDENT_ANALYSIS_CACHE_MAX_ENTRIES, ttl_seconds=ttl_seconds)
+        self._chains = {}
+        self._chain_lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._wakeup = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    # Model client
+
+    def chain(self, kind):
+        """The shared chain of a kind, created on first use"""
+        with self._chain_lock:
+            if kind.name not in self._chains:
+                self._chains[kind.name] = self.backend.chain(
+                    kind.name, kind.prompt, INCIDENT_ANALYSIS_MODEL,
+                    temperature=kind.temperature, keep_alive=INCIDENT_ANALYSIS_KEEP_ALIVE,
+                )
+            return self._chains[kind.name]
+
+    # Result cache
+
+    def _path(self, key):
+        if not is_analysis_key(key):
+            raise ValueError(f"Invalid analysis key: {key!r}")
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        age = time.time() - entry.get('created_at', 0)
+        if entry.get('status') == 'failed':
+            return entry if age < FAILURE_RETRY_SECONDS else None
+        if entry.get('status') == 'pending':
+            return entry if age < PENDING_EXPIRY_SECONDS else None
+        return entry if age < self.ttl_seconds else None
+
+    def _write_disk(self, key, entry):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def lookup(self, key):
+        """('completed', result), ('failed', None), ('pending', None) or (None, None) if unknown"""
+        if not is_analysis_key(key):
+            return None, None
+        result = self.memory.get(key)
+        if result is not None:
+            return 'completed', result
+        entry = self._read_disk(key)
+        if entry is not None:
+            if entry.get('status') in ('failed', 'pending'):
+                return entry['status'], None
+            self.memory.set(key, entry['result'])
+            return 'completed', entry['result']
+        with self._wakeup:
+            if key in self._pending:
+                return 'pending', None
+        return None, None
+
+    def store(self, key, kind, result):
+        self.memory.set(key, result)
+        try:
+            self._write_disk(key, {'kind': kind.name, 'status': 'completed', 'created_at': time.time(), 'result': result})
+        except OSError as e:
+            logger.error(f"Could not cache incident analysis {key}: {str(e)}")
+
+    def _store_failure(self, key, kind, error):
+        try:
+            self._write_disk(key, {'kind': kind.name, 'status': 'failed', 'created_at': time.time(), 'error': error})
+        except OSError:
+            pass
+
+    def _store_pending(self, key, kind):
+        try:
+            self._write_disk(key, {'kind': kind.name, 'status': 'pending', 'created_at': time.time()})
+        except OSError as e:
+            logger.error(f"Could not mark incident analysis {key} pending: {str(e)}")
+
+    # Analysis
+
+    def analyze(self, kind, inputs):
+        """Model result for inputs, from the cache or a synchronous model call; fallback on failure"""
+        key = analysis_cache_key(kind, inputs)
+        status, result = self.lookup(key)
+        if status == 'completed':
+            return result
+        try:
+            response = self.chain(kind).invoke(inputs)["text"]
+            result = kind.parse(response, inputs)
+        except Exception as e:
+            logger.error(f"{kind.name} analysis failed: {str(e)}")
+            return kind.fallback(inputs)
+        self.store(key, kind, result)
+        return result
+
+    def submit(self, kind, inputs, incident_id=None):
+        """
+        Answer from the cache, or queue a model run and answer with the fallback.
+        Returns (result, status, key) with status 'completed' or 'pending'.
+        """
+        key = analysis_cache_key(kind, inputs)
+        status, result = self.lookup(key)
+        if status == 'completed':
+            if incident_id and kind.incident_fields:
+                fill_incident_fields(incident_id, kind.incident_fields(result))
+            return result, 'completed', key
+
+        with self._wakeup:
+            queued_here = key in self._pending
+        if not queued_here and status != 'pending':
+            # Written before the job is queued so it cannot overwrite the finished result
+            self._store_pending(key, kind)
+        with self._wakeup:
+            job = self._pending.get(key)
+            if job is None:
+                job = self._pending[key] = {'kind': kind, 'inputs': inputs, 'incident_ids': set()}
+            if incident_id:
+                job['incident_ids'].add(incident_id)
+            self._wakeup.notify_all()
+        self.start()
+        return kind.fallback(inputs), 'pending', key
+
+    def _take_batch(self):
+        """Up to batch_size queued jobs of the kind queued first"""
+        with self._wakeup:
+            if not self._pending:
+                return []
+            first_kind = next(iter(self._pending.values()))['kind']
+            keys = [key for key, job in self._pending.items() if job['kind'] is first_kind][:self.batch_size]
+            # Jobs stay in _pending while they run so lookups report them as pending
+            return [(key, self._pending[key]) for key in keys]
+
+    def _finish(self, key):
+        with self._wakeup:
+            self._pending.pop(key, None)
+
+    def run_batch(self, batch):
+        """Run one batch of (key, job) through the model. Returns the number of jobs processed."""
+        if not batch:
+            return 0
+        kind = batch[0][1]['kind']
+        inputs = [job['inputs'] for _, job in batch]
+        try:
+            responses = self.chain(kind).batch(
+                inputs, config={'max_concurrency': self.batch_size}, return_exceptions=True
+            )
+        except Exception as e:
+            responses = [e] * len(batch)
+
+        for (key, job), response in zip(batch, responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                result = kind.parse(response["text"], job['inputs'])
+            except Exception as e:
+                logger.error(f"{kind.name} analysis {key[:12]} failed: {str(e)}")
+                self._store_failure(key, kind, str(e))
+                self._finish(key)
+                continue
+
+            self.store(key, kind, result)
+            self._finish(key)
+            if kind.incident_fields:
+                for incident_id in job['incident_ids']:
+                    try:
+                        written = fill_incident_fields(incident_id, kind.incident_fields(result))
+                        logger.info(f"Incident {incident_id}: {kind.name} analysis filled {written}")
+                    except Exception as e:
+                        logger.error(f"Could not update incident {incident_id}: {str(e)}")
+        return len(batch)
+
+    # Background thread
+
+    def start(self):
+        with self._wakeup:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._work, name="incident-inference", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+
+    def _work(self):
+        while not self._stopping:
+            with self._wakeup:
+                while not self._pending and not self._stopping:
+                    self._wakeup.wait()
+            try:
+                close_old_connections()
+                self.run_batch(self._take_batch())
+            except Exception as e:
+                logger.error(f"Incident inference error: {str(e)}")
+            finally:
+                close_old_connections()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_inference_service():
+    """The process-wide inference service, created on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = IncidentInferenceService()
+        return _service
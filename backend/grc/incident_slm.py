@@ -1,37 +1,17 @@
 import json
 import re
-try:
-    from langchain_ollama import OllamaLLM
-    from langchain.prompts import PromptTemplate
-    from langchain.chains import LLMChain
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
-    print("Warning: langchain_ollama not available, falling back to mock analysis")
 import random
 import traceback
 
-def analyze_incident_comprehensive(incident_title, incident_description):
-    """
-    Comprehensive incident analysis for GRC banking system.
-    
-    Args:
-        incident_title (str): Title of the incident
-        incident_description (str): Detailed description of the incident
-    
-    Returns:
-        dict: JSON object containing comprehensive incident analysis
-    """
-    try:
-        # Check if Ollama is available
-        if not OLLAMA_AVAILABLE:
-            print("Ollama not available, using fallback analysis")
-            return generate_comprehensive_fallback_analysis(incident_title, incident_description)
-            
-        # Initialize the local SLM model
-        llm = OllamaLLM(model="llama3.2:3b", temperature=0.7)
-       
-        prompt_template = PromptTemplate.from_template("""
+from .incident_inference import AnalysisKind, get_inference_service
+from .llm_backend import llm_backend_available
+from .slm_service import _extract_json_text
+
+LLM_AVAILABLE = llm_backend_available()
+if not LLM_AVAILABLE:
+    print("Warning: LLM backend not available, falling back to mock analysis")
+
+COMPREHENSIVE_ANALYSIS_PROMPT = """
         You are a senior cybersecurity analyst and risk management expert specializing in banking GRC (Governance, Risk, and Compliance) systems. 
         
         Analyze the following security incident and provide a comprehensive assessment in JSON format with these specific fields:
@@ -97,91 +77,128 @@ def analyze_incident_comprehensive(incident_title, incident_description):
         Incident Description: {description}
 
         Respond ONLY with a valid JSON object containing all the fields above. No additional text or formatting.
-        """)
-       
-        chain = LLMChain(llm=llm, prompt=prompt_template)
-       
-        # Process the incident
+        """
+
+
+def parse_comprehensive_analysis(response, inputs):
+    """Analysis dict from a model response; raises ValueError if it is unusable"""
+    print(f"Raw AI response: {response}")
+    json_text = _extract_json_text(response)
+    
+    # Fix common JSON formatting issues from AI responses
+    # Fix numbered lists in arrays (e.g., "1. text" -> "text")
+    json_text = re.sub(r'(\d+)\.\s*"([^"]*)"', r'"\2"', json_text)
+
+    # Fix trailing commas before closing brackets/braces
+    json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
+
+    # Fix object values that should be strings but aren't quoted
+    json_text = re.sub(r':\s*([A-Za-z][^,}\]]*?)([,}\]])', r': "\1"\2', json_text)
+
+    # Handle costOfIncident object - convert to string if it's an object
+    if '"costOfIncident":' in json_text and '{' in json_text.split('"costOfIncident":')[1].split(',')[0]:
+        # Extract the cost object and convert to a simple string
+        cost_match = re.search(r'"costOfIncident":\s*{[^}]*}', json_text)
+        if cost_match:
+            json_text = json_text.replace(cost_match.group(0), '"costOfIncident": "$50,000 - $250,000"')
+
+    # Handle initialImpactAssessment object - convert to string if it's an object
+    if '"initialImpactAssessment":' in json_text and '{' in json_text.split('"initialImpactAssessment":')[1].split(',')[0]:
+        # Extract the impact object and convert to a simple string
+        impact_match = re.search(r'"initialImpactAssessment":\s*{[^}]*}', json_text)
+        if impact_match:
+            json_text = json_text.replace(impact_match.group(0), '"initialImpactAssessment": "Incident requires immediate assessment and containment measures."')
+
+    print(f"Cleaned JSON text: {json_text}")
+    # json.JSONDecodeError is a ValueError
+    incident_analysis = json.loads(json_text)
+    
+    # Validate that we have the required fields
+    required_fields = ['riskPriority', 'criticality', 'costOfIncident', 'possibleDamage', 
+                     'systemsInvolved', 'initialImpactAssessment', 'mitigationSteps', 
+                     'comments', 'violatedPolicies', 'procedureControlFailures', 'lessonsLearned']
+    missing_fields = [field for field in required_fields if field not in incident_analysis]
+    if missing_fields:
+        raise ValueError(f"Missing required fields in AI response: {missing_fields}")
+    
+    print(f"Successfully parsed comprehensive incident analysis: {incident_analysis}")
+    return incident_analysis
+
+
+def _as_text(value):
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value)
+    return value
+
+
+def comprehensive_analysis_incident_fields(result):
+    """Incident fields filled in from a comprehensive analysis"""
+    systems = result.get('systemsInvolved')
+    return {
+        'RiskPriority': str(result.get('riskPriority') or '')[:20],
+        'Criticality': str(result.get('criticality') or '')[:20],
+        'CostOfIncident': str(result.get('costOfIncident') or '')[:45],
+        'PossibleDamage': _as_text(result.get('possibleDamage')),
+        'SystemsAssetsInvolved': ", ".join(str(s) for s in systems) if isinstance(systems, list) else systems,
+        'InitialImpactAssessment': _as_text(result.get('initialImpactAssessment')),
+        'Mitigation': result.get('mitigationSteps') or None,
+        'Comments': _as_text(result.get('comments')),
+        'RelevantPoliciesProceduresViolated': _as_text(result.get('violatedPolicies')),
+        'ControlFailures': _as_text(result.get('procedureControlFailures')),
+        'LessonsLearned': _as_text(result.get('lessonsLearned')),
+    }
+
+
+COMPREHENSIVE_ANALYSIS = AnalysisKind(
+    'comprehensive',
+    COMPREHENSIVE_ANALYSIS_PROMPT,
+    parse=parse_comprehensive_analysis,
+    fallback=lambda inputs: generate_comprehensive_fallback_analysis(inputs['title'], inputs['description']),
+    incident_fields=comprehensive_analysis_incident_fields,
+)
+
+
+def analyze_incident_comprehensive(incident_title, incident_description):
+    """
+    Comprehensive incident analysis for GRC banking system.
+    
+    Args:
+        incident_title (str): Title of the incident
+        incident_description (str): Detailed description of the incident
+    
+    Returns:
+        dict: JSON object containing comprehensive incident analysis
+    """
+    try:
+        # Check if the LLM backend is available
+        if not LLM_AVAILABLE:
+            print("LLM backend not available, using fallback analysis")
+            return generate_comprehensive_fallback_analysis(incident_title, incident_description)
+        
         print(f"Analyzing incident: {incident_title}")
         print(f"Description: {incident_description}")
-        response = chain.invoke({"title": incident_title, "description": incident_description})["text"]
-        print(f"Raw AI response: {response}")
-       
-        # Clean and parse the JSON from the response
-        try:
-            # Remove any extra text before or after the JSON
-            json_text = response.strip()
-            
-            # Handle different response formats
-            if json_text.startswith("```json") and json_text.endswith("```"):
-                json_text = json_text[7:-3].strip()
-            elif json_text.startswith("```") and json_text.endswith("```"):
-                json_text = json_text[3:-3].strip()
-            elif "```json" in json_text:
-                # Extract JSON from markdown code block
-                start_idx = json_text.find("```json") + 7
-                end_idx = json_text.find("```", start_idx)
-                if end_idx != -1:
-                    json_text = json_text[start_idx:end_idx].strip()
-            elif "{" in json_text and "}" in json_text:
-                # Extract JSON object from response
-                start_idx = json_text.find("{")
-                end_idx = json_text.rfind("}") + 1
-                json_text = json_text[start_idx:end_idx]
-            
-            # Fix common JSON formatting issues from AI responses
-            # Fix numbered lists in arrays (e.g., "1. text" -> "text")
-            json_text = re.sub(r'(\d+)\.\s*"([^"]*)"', r'"\2"', json_text)
-            
-            # Fix trailing commas before closing brackets/braces
-            json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
-            
-            # Fix object values that should be strings but aren't quoted
-            json_text = re.sub(r':\s*([A-Za-z][^,}\]]*?)([,}\]])', r': "\1"\2', json_text)
-            
-            # Handle costOfIncident object - convert to string if it's an object
-            if '"costOfIncident":' in json_text and '{' in json_text.split('"costOfIncident":')[1].split(',')[0]:
-                # Extract the cost object and convert to a simple string
-                cost_match = re.search(r'"costOfIncident":\s*{[^}]*}', json_text)
-                if cost_match:
-                    json_text = json_text.replace(cost_match.group(0), '"costOfIncident": "$50,000 - $250,000"')
-            
-            # Handle initialImpactAssessment object - convert to string if it's an object
-            if '"initialImpactAssessment":' in json_text and '{' in json_text.split('"initialImpactAssessment":')[1].split(',')[0]:
-                # Extract the impact object and convert to a simple string
-                impact_match = re.search(r'"initialImpactAssessment":\s*{[^}]*}', json_text)
-                if impact_match:
-                    json_text = json_text.replace(impact_match.group(0), '"initialImpactAssessment": "Incident requires immediate assessment and containment measures."')
-            
-            print(f"Cleaned JSON text: {json_text}")
-            incident_analysis = json.loads(json_text)
-            
-            # Validate that we have the required fields
-            required_fields = ['riskPriority', 'criticality', 'costOfIncident', 'possibleDamage', 
-                             'systemsInvolved', 'initialImpactAssessment', 'mitigationSteps', 
-                             'comments', 'violatedPolicies', 'procedureControlFailures', 'lessonsLearned']
-            missing_fields = [field for field in required_fields if field not in incident_analysis]
-            
-            if missing_fields:
-                print(f"Missing required fields in AI response: {missing_fields}")
-                print("Falling back to generated analysis")
-                return generate_comprehensive_fallback_analysis(incident_title, incident_description)
-            
-            print(f"Successfully parsed comprehensive incident analysis: {incident_analysis}")
-            return incident_analysis
-            
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Failed to parse JSON from: {json_text}")
-            # If JSON parsing fails, fall back to the generated response
-            return generate_comprehensive_fallback_analysis(incident_title, incident_description)
-            
+        return get_inference_service().analyze(
+            COMPREHENSIVE_ANALYSIS, {"title": incident_title, "description": incident_description}
+        )
     except Exception as e:
-        print(f"Error using Ollama model: {e}")
+        print(f"Error using LLM model: {e}")
         traceback.print_exc()
         # Fall back to a generated response if the model fails
         return generate_comprehensive_fallback_analysis(incident_title, incident_description)
 
+
+def request_comprehensive_analysis(incident_title, incident_description, incident_id=None):
+    """
+    Comprehensive analysis without waiting for the model. The model result is
+    written into the empty fields of incident_id when it arrives.
+    Returns (analysis, status, key); status is 'completed', 'pending' or 'fallback'.
+    """
+    if not LLM_AVAILABLE:
+        return generate_comprehensive_fallback_analysis(incident_title, incident_description), 'fallback', None
+    return get_inference_service().submit(
+        COMPREHENSIVE_ANALYSIS, {"title": incident_title, "description": incident_description}, incident_id
+    )
+
 def generate_comprehensive_fallback_analysis(incident_title, incident_description):
     """Generate a comprehensive fallback analysis when the AI model is unavailable."""
     # Extract some keywords from the incident for basic categorization
@@ -39,94 +39,17 @@ import tempfile
 import os
 from datetime import date, time
 from .s3_functions import S3Client
+from .upload_scanning import (
+    basic_scan, clamav_scan, quarantine_upload, get_scan_pipeline, get_verdict, verdicts_for_hash, can_view_scan_verdict,
+    UPLOAD_SCAN_WAIT_SECONDS,
+)
 from .validation import SecureValidator, ValidationError, IncidentValidator, QuestionnaireValidator
 from contextlib import contextmanager
 import logging
-import requests
-
-# Logging Configuration
-LOGGING_SERVICE_URL = None  # Disabled external logging service
-
-def send_log(module, actionType, description=None, userId=None, userName=None,
-             userRole=None, entityType=None, logLevel='INFO', ipAddress=None,
-             additionalInfo=None, entityId=None):
-   
-    # Debug print to console
-    print(f"[DEBUG LOGGING] send_log called: module={module}, actionType={actionType}, userId={userId}")
-   
-    # Create log entry in database
-    try:
-        # Prepare data for GRCLog model
-        log_data = {
-            'Module': module,
-            'ActionType': actionType,
-            'Description': description,
-            'UserId': str(userId) if userId is not None else None,
-            'UserName': userName,
-            'EntityType': entityType,
-            'EntityId': str(entityId) if entityId is not None else None,
-            'LogLevel': logLevel,
-            'IPAddress': ipAddress,
-            'AdditionalInfo': additionalInfo
-        }
-       
-        # Remove None values
-        log_data = {k: v for k, v in log_data.items() if v is not None}
-        
-        print(f"[DEBUG LOGGING] Prepared log_data: {log_data}")
-       
-        # Create and save the log entry
-        log_entry = GRCLog(**log_data)
-        print(f"[DEBUG LOGGING] Created GRCLog instance: {log_entry}")
-        
-        log_entry.save()
-        print(f"[DEBUG LOGGING] Successfully saved log with ID: {log_entry.LogId}")
-       
-        # Optionally still send to logging service if needed
-        try:
-            if LOGGING_SERVICE_URL:
-                # Format for external service (matches expected format in loggingservice.js)
-                api_log_data = {
-                    "module": module,
-                    "actionType": actionType,  # This is exactly what the service expects
-                    "description": description,
-                    "userId": userId,
-                    "userName": userName,
-                    "userRole": userRole,
-                    "entityType": entityType,
-                    "logLevel": logLevel,
-                    "ipAddress": ipAddress,
-                    "additionalInfo": additionalInfo
-                }
-                # Clean out None values
-                api_log_data = {k: v for k, v in api_log_data.items() if v is not None}
-               
-                response = requests.post(LOGGING_SERVICE_URL, json=api_log_data)
-                if response.status_code != 200:
-                    print(f"Failed to send log to service: {response.text}")
-        except Exception as e:
-            print(f"Error sending log to service: {str(e)}")
-           
-        return log_entry.LogId  # Return the ID of the created log
-    except Exception as e:
-        print(f"[ERROR LOGGING] Error saving log to database: {str(e)}")
-        print(f"[ERROR LOGGING] Exception type: {type(e)}")
-        import traceback
-        print(f"[ERROR LOGGING] Traceback: {traceback.format_exc()}")
-        
-        # Try to capture the error itself
-        try:
-            error_log = GRCLog(
-                Module=module,
-                ActionType='LOG_ERROR',
-                Description=f"Error logging {actionType} on {module}: {str(e)}",
-                LogLevel='ERROR'
-            )
-            error_log.save()
-            print(f"[ERROR LOGGING] Saved error log with ID: {error_log.LogId}")
-        except Exception as error_save_exception:
-            print(f"[ERROR LOGGING] Could not even save error log: {str(error_save_exception)}")
-        return None
+
+
+# Audit logging goes through the buffered writer in logging_service
+from .logging_service import send_log
 
 def get_client_ip(request):
     """Helper function to get client IP address"""
@@ -145,6 +68,7 @@ def get_client_ip(request):
 
 # Add these imports at the top of your incident_views.py file
 from rest_framework.permissions import IsAuthenticated
+from grc.rbac.utils import RBACUtils
 from grc.rbac.permissions import (
     # Incident permissions
     IncidentCreatePermission,
@@ -1869,7 +1793,7 @@ def update_incident_status(request, incident_id):
                                 'System'
                             ]
                         }
-                        notification_service.send_multi_channel_notification(escalation_notification)
+                        notification_service.queue_multi_channel_notification(escalation_notification)
             
             # Incident rejection notification
             elif new_status == 'Rejected':
@@ -1887,7 +1811,7 @@ def update_incident_status(request, incident_id):
                                 f"Rejected from {rejection_source}" if rejection_source else "No reason provided"
                             ]
                         }
-                        notification_service.send_multi_channel_notification(rejection_notification)
+                        notification_service.queue_multi_channel_notification(rejection_notification)
                     
         except Exception as e:
             print(f"Error sending status update notifications: {str(e)}")
@@ -2296,7 +2220,8 @@ def assign_incident(request, incident_id):
             notification_service = NotificationService()
             print(f"DEBUG: Starting notification process for incident {incident_id}")
             
-            # Get user details for notifications
+            # Get user details for notifications (one directory query for both users)
+            notification_service.resolve_users([incident.AssignerId, incident.ReviewerId])
             assigner_name = notification_service.get_user_name(incident.AssignerId) if incident.AssignerId else data.get('assigner_name', 'Unknown')
             reviewer_name = notification_service.get_user_name(incident.ReviewerId) if incident.ReviewerId else data.get('reviewer_name', 'Unknown')
             
@@ -2315,8 +2240,8 @@ def assign_incident(request, incident_id):
                             incident.MitigationDueDate.strftime('%Y-%m-%d') if incident.MitigationDueDate else 'Not set'
                         ]
                     }
-                    print(f"DEBUG: Sending assignee notification: {assignee_notification}")
-                    result = notification_service.send_multi_channel_notification(assignee_notification)
+                    print(f"DEBUG: Queueing assignee notification: {assignee_notification}")
+                    result = notification_service.queue_multi_channel_notification(assignee_notification)
                     print(f"DEBUG: Assignee notification result: {result}")
                 else:
                     print(f"DEBUG: No email found for assignee {incident.AssignerId}")
@@ -2336,8 +2261,8 @@ def assign_incident(request, incident_id):
                             assigner_name
                         ]
                     }
-                    print(f"DEBUG: Sending reviewer notification: {reviewer_notification}")
-                    result = notification_service.send_multi_channel_notification(reviewer_notification)
+                    print(f"DEBUG: Queueing reviewer notification: {reviewer_notification}")
+                    result = notification_service.queue_multi_channel_notification(reviewer_notification)
                     print(f"DEBUG: Reviewer notification result: {result}")
                 else:
                     print(f"DEBUG: No email found for reviewer {incident.ReviewerId}")
@@ -4029,6 +3954,28 @@ from rest_framework.response import Response
 from .models import Incident
 from .serializers import IncidentSerializer
 from .export_service import export_data
+from .export_jobs import submit_export_job, is_async_request, parse_priority, get_export_job_status_url, export_job_owner
+from .incident_export import get_incident_export_rows, incident_export_filters
+
+def run_incident_export_job(task, progress):
+    """export_jobs handler for 'incidents' jobs"""
+    params = task.export_data or {}
+    incidents_data = get_incident_export_rows(params.get('filters'))
+    progress(0, len(incidents_data))
+    
+    export_options = dict(params.get('options') or {})
+    export_options['exported_at'] = timezone.now().isoformat()
+    export_options['record_count'] = len(incidents_data)
+    export_options['export_type'] = 'incidents'
+    
+    result = export_data(
+        data=incidents_data,
+        file_format=task.file_type,
+        user_id=task.user_id,
+        options=export_options,
+        export_id=task.id
+    )
+    return result
 
 @csrf_exempt
 @api_view(['POST'])
@@ -4094,20 +4041,15 @@ def export_incidents(request):
         export_options = validated_data.get('options', {})
         
         # Get incidents data from request or fetch from database
+        provided_data = None
         if 'data' in request.data and request.data['data']:
             # Use data provided in request (parse JSON string if needed)
-            incidents_data = request.data['data']
-            if isinstance(incidents_data, str):
+            provided_data = request.data['data']
+            if isinstance(provided_data, str):
                 try:
-                    incidents_data = json.loads(incidents_data)
+                    provided_data = json.loads(provided_data)
                 except json.JSONDecodeError:
                     return Response({'error': 'Invalid JSON format in data field'}, status=400)
-        else:
-            # Fetch all incidents from database with only necessary fields
-            incidents = Incident.objects.all().values(
-                'IncidentId', 'IncidentTitle', 'Date', 'RiskPriority', 'Origin', 'Status'
-            ).order_by('-Date')
-            incidents_data = list(incidents)
         
         # Parse export_options if it's a JSON string
         if isinstance(export_options, str):
@@ -4118,6 +4060,38 @@ def export_incidents(request):
         elif not isinstance(export_options, dict):
             export_options = {}
         
+        # Large exports can run as a background job; poll export-jobs/<task_id>/
+        if is_async_request(request):
+            job_owner = export_job_owner(request)
+            if job_owner is None:
+                return Response({'error': 'Login required for background exports'}, status=status.HTTP_403_FORBIDDEN)
+            export_task = submit_export_job(
+                'incidents',
+                user_id=job_owner,
+                file_format=file_format,
+                params={'filters': incident_export_filters(request.data, provided_data), 'options': export_options},
+                priority=parse_priority(request.data.get('priority', 'normal'))
+            )
+            send_log(
+                module="Incident",
+                actionType="EXPORT_INCIDENTS_QUEUED",
+                description=f"Queued incident export job {export_task.id} in {file_format} format",
+                userId=str(user_id) if user_id else None,
+                userName=request.data.get('userName', 'Unknown'),
+                entityType="Export",
+                entityId=export_task.id,
+                ipAddress=client_ip
+            )
+            return Response({
+                'success': True,
+                'message': 'Export queued',
+                'task_id': export_task.id,
+                'status': export_task.status,
+                'status_url': get_export_job_status_url(export_task.id)
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        incidents_data = provided_data if provided_data is not None else get_incident_export_rows()
+        
         # Log the export request
         print(f"Exporting {len(incidents_data)} incidents to {file_format} format for user {user_id}")
         
@@ -5442,7 +5416,8 @@ def complete_incident_review(request):
         try:
             notification_service = NotificationService()
             
-            # Get user email and name for notification
+            # Get user email and name for notification (one directory query for both users)
+            notification_service.resolve_users([incident.AssignerId, reviewer_id])
             assignee_email = notification_service.get_user_email(incident.AssignerId) if incident.AssignerId else None
             assignee_name = notification_service.get_user_name(incident.AssignerId) if incident.AssignerId else 'User'
             reviewer_name = notification_service.get_user_name(reviewer_id) if reviewer_id else 'Reviewer'
@@ -5464,8 +5439,8 @@ def complete_incident_review(request):
                             timezone.now().strftime('%Y-%m-%d %H:%M:%S')
                         ]
                     }
-                    notification_service.send_multi_channel_notification(approval_notification)
-                    print(f"DEBUG: Sent approval notification to {assignee_email}")
+                    notification_service.queue_multi_channel_notification(approval_notification)
+                    print(f"DEBUG: Queued approval notification to {assignee_email}")
                 else:
                     # Incident rejected notification
                     rejection_notification = {
@@ -5479,8 +5454,8 @@ def complete_incident_review(request):
                             'Please review and address the feedback provided'
                         ]
                     }
-                    notification_service.send_multi_channel_notification(rejection_notification)
-                    print(f"DEBUG: Sent rejection notification to {assignee_email}")
+                    notification_service.queue_multi_channel_notification(rejection_notification)
+                    print(f"DEBUG: Queued rejection notification to {assignee_email}")
             else:
                 print(f"DEBUG: No email found for assignee {incident.AssignerId}")
                     
@@ -6298,7 +6273,8 @@ def test_logging(request):
             userName="Test User",
             entityType="Test",
             entityId="123",
-            ipAddress=get_client_ip(request)
+            ipAddress=get_client_ip(request),
+            synchronous=True
         )
         
         print(f"[TEST] Log ID returned: {log_id}")
@@ -6423,7 +6399,7 @@ def test_notification(request):
 import hashlib
 import uuid
 import asyncio
-import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import mimetypes
 import shlex
 import html
@@ -6581,7 +6557,7 @@ class SecureFileUploadHandler:
     1. Authentication and authorization
     2. MIME type validation (whitelist)
     3. Secure file storage outside web root
-    4. Malware scanning (async)
+    4. Malware scanning (quarantine and scan pipeline, see upload_scanning.py)
     5. Execution prevention
     """
     
@@ -6787,100 +6763,20 @@ php_flag engine off
     
     def _scan_for_malware(self, file_path):
         """
-        Asynchronous malware scanning placeholder
-        In production, integrate with ClamAV, VirusTotal API, or similar
+        Synchronous basic malware scan of a file (see upload_scanning.basic_scan).
+        Uploads are scanned through the quarantine pipeline in upload_scanning.
         """
-        def scan_async():
-            try:
-                # Placeholder for actual malware scanning
-                # In production, integrate with:
-                # SECURE: Use shlex.quote() to prevent command injection
-                # - ClamAV: subprocess.run(['clamscan', shlex.quote(file_path)])
-                # - VirusTotal API
-                # - Windows Defender API
-                # - Custom ML-based detection
-                
-                print(f"[SECURITY] Scanning file for malware: {file_path}")
-                
-                # Check if file exists before scanning
-                file_path_obj = Path(file_path)
-                if not file_path_obj.exists():
-                    print(f"[SECURITY] File not found for scanning: {file_path}")
-                    return False
-                
-                # Simulate scan (replace with actual implementation)
-                import time
-                time.sleep(0.1)  # Reduced scan time for better performance
-                
-                # For now, perform basic checks
-                file_size = file_path_obj.stat().st_size
-                if file_size > self.MAX_FILE_SIZE:
-                    print(f"[SECURITY] File too large: {file_size} bytes")
-                    return False
-                
-                # Check for suspicious patterns in filename
-                suspicious_patterns = ['.exe', '.bat', '.cmd', '.scr', '.vbs', '.js']
-                filename = file_path_obj.name.lower()
-                for pattern in suspicious_patterns:
-                    if pattern in filename:
-                        print(f"[SECURITY] Suspicious pattern detected: {pattern}")
-                        return False
-                
-                print(f"[SECURITY] File scan completed successfully: {file_path}")
-                return True
-                
-            except Exception as e:
-                print(f"[SECURITY] Malware scan error: {e}")
-                print(f"[SECURITY] File path: {file_path}")
-                print(f"[SECURITY] File exists: {Path(file_path).exists()}")
-                return False
-        
-        # Run scan in background thread
-        thread = threading.Thread(target=scan_async)
-        thread.daemon = True
-        thread.start()
-        
-        # For this implementation, we'll return True immediately
-        # In production, you might want to quarantine files until scan completes
-        return True
+        clean, reason = basic_scan(file_path)
+        if not clean:
+            print(f"[SECURITY] Malware scan failed for {file_path}: {reason}")
+        return clean
     
     def _scan_with_clamav(self, file_path):
-        """
-        SECURE: Example ClamAV integration with proper shell argument quoting
-        Prevents command injection attacks
-        """
-        try:
-            import subprocess
-            # SECURE: Use shlex.quote() to safely quote the file path
-            safe_file_path = SecureOutputEncoder.quote_shell_arg(file_path)
-            
-            # Execute ClamAV scan with quoted arguments
-            result = subprocess.run(
-                ['clamscan', '--no-summary', safe_file_path],
-                capture_output=True,
-                text=True,
-                timeout=30,
-                check=False  # Don't raise exception on non-zero exit
-            )
-            
-            # ClamAV returns 0 for clean files, 1 for infected files
-            is_clean = result.returncode == 0
-            
-            if not is_clean:
-                print(f"[SECURITY] ClamAV detected threat in file: {file_path}")
-                print(f"[SECURITY] ClamAV output: {result.stdout}")
-            
-            return is_clean
-            
-        except subprocess.TimeoutExpired:
-            print(f"[SECURITY] ClamAV scan timeout for file: {file_path}")
-            return False  # Fail secure
-        except FileNotFoundError:
-            print("[SECURITY] ClamAV not found, falling back to basic scan")
-            return self._scan_for_malware(file_path)  # Fallback to basic scan
-        except Exception as e:
-            print(f"[SECURITY] ClamAV scan error: {e}")
-            return False  # Fail secure
+        """ClamAV scan of a file, falling back to the basic scan if ClamAV is not installed"""
+        clean, reason = clamav_scan(file_path)
+        if not clean:
+            print(f"[SECURITY] ClamAV scan failed for {file_path}: {reason}")
+        return clean
 
 @method_decorator(csrf_exempt, name='dispatch')
 class FileUploadView(View):
@@ -7039,33 +6935,69 @@ class FileUploadView(View):
                     'error': f'File size exceeds {handler.MAX_FILE_SIZE // (1024*1024)}MB limit'
                 }, status=400)
             
-            # 3. STORE FILE OUTSIDE WEB ROOT WITH RANDOM NAME
+            # 3. STORE FILE IN QUARANTINE WITH RANDOM NAME, HASHING IT ON THE WAY
             user_id = getattr(request.user, 'id', 1) if hasattr(request, 'user') else 1  # Default to user 1
             secure_filename = handler._generate_secure_filename(file_name, user_id)
-            secure_path = Path(handler.UPLOAD_DIR) / secure_filename
-            
-            # Write file to secure location
-            with open(secure_path, 'wb+') as f:
-                for chunk in file.chunks():
-                    f.write(chunk)
-            
-            # Set secure file permissions (read-only for owner, no execute)
-            secure_path.chmod(0o644)
+            quarantine_path, content_hash, stored_size = quarantine_upload(file, handler.QUARANTINE_DIR, secure_filename)
             
             # 4. VALIDATE MIME TYPE USING FILE SIGNATURE
-            mime_valid, mime_result = handler._validate_mime_type(str(secure_path), file_ext)
+            mime_valid, mime_result = handler._validate_mime_type(quarantine_path, file_ext)
             if not mime_valid:
                 # Remove invalid file
-                secure_path.unlink(missing_ok=True)
+                Path(quarantine_path).unlink(missing_ok=True)
                 # SECURE: Sanitize MIME validation error
                 safe_error = SecureOutputEncoder.sanitize_error_message(mime_result)
                 return JsonResponse({'success': False, 'error': safe_error}, status=400)
             
-            # 5. SCAN FOR MALWARE ASYNCHRONOUSLY
-            print(f"[SECURITY] Starting malware scan for: {secure_path}")
-            print(f"[SECURITY] File exists before scan: {secure_path.exists()}")
+            def upload_to_s3(promoted_path):
+                """Runs once the scan has passed and the file has left quarantine"""
+                try:
+                    s3_client = S3Client()
+                    upload_result = s3_client.upload_file(
+                        file_path=promoted_path,
+                        file_name=secure_filename,  # Use secure filename, not original
+                        user_id=str(user_id),
+                        incident_id=str(incident_id),
+                        mitigation_number=str(mitigation_number),
+                        original_filename=file_name,  # Store original name as metadata
+                        mime_type=mime_result,
+                        upload_timestamp=timezone.now().isoformat(),
+                        security_validated=True
+                    )
+                finally:
+                    # The local copy is not kept either way
+                    Path(promoted_path).unlink(missing_ok=True)
+                return {
+                    'file_url': upload_result['file']['url'],
+                    'file_id': upload_result['file']['id'],
+                }
             
-            if not handler._scan_for_malware(str(secure_path)):
+            # 5. SCAN FOR MALWARE; THE FILE LEAVES QUARANTINE ONLY IF IT PASSES
+            print(f"[SECURITY] Queueing malware scan for: {quarantine_path} (sha256 {content_hash})")
+            scan, scan_future = get_scan_pipeline().submit(
+                quarantine_path, content_hash, stored_size, file_name, handler.UPLOAD_DIR,
+                metadata={
+                    'incident_id': incident_id,
+                    'mitigation_number': mitigation_number,
+                    'user_id': user_id,
+                    'uploader_id': request.session.get('user_id'),
+                    'mime_type': mime_result,
+                },
+                on_clean=upload_to_s3,
+            )
+            try:
+                verdict = scan_future.result(timeout=UPLOAD_SCAN_WAIT_SECONDS)
+            except FutureTimeoutError:
+                # The scan and S3 upload continue in the background
+                return JsonResponse({
+                    'success': True,
+                    'scan_status': 'pending',
+                    'scan_id': scan.scan_id,
+                    'secure_filename': secure_filename,
+                    'mime_type': mime_result
+                }, status=202)
+            
+            if verdict['status'] != 'clean':
                 # Log security scan failure
                 send_log(
                     module="File",
@@ -7080,45 +7012,19 @@ class FileUploadView(View):
                         'filename': file.name,
                         'secure_filename': secure_filename,
                         'incident_id': incident_id,
-                        'scan_result': 'FAILED'
+                        'scan_id': scan.scan_id,
+                        'scan_result': verdict['status'].upper(),
+                        'scan_reason': verdict['reason']
                     }
                 )
-                
-                # Move to quarantine
-                try:
-                    quarantine_path = Path(handler.QUARANTINE_DIR) / secure_filename
-                    if secure_path.exists():
-                        secure_path.rename(quarantine_path)
-                        print(f"[SECURITY] File quarantined: {quarantine_path}")
-                    else:
-                        print(f"[SECURITY] File not found for quarantine: {secure_path}")
-                except Exception as e:
-                    print(f"[SECURITY] Error quarantining file: {e}")
-                    # Remove file if quarantine fails
-                    secure_path.unlink(missing_ok=True)
-                
                 return JsonResponse({
                     'success': False, 
-                    'error': 'File failed security scan and has been quarantined'
+                    'error': 'File failed security scan and has been quarantined',
+                    'scan_id': scan.scan_id
                 }, status=400)
             
-            # Upload to S3 with secure metadata
-            try:
-                s3_client = S3Client()
-                upload_result = s3_client.upload_file(
-                    file_path=str(secure_path),
-                    file_name=secure_filename,  # Use secure filename, not original
-                    user_id=str(user_id),
-                    incident_id=str(incident_id),
-                    mitigation_number=str(mitigation_number),
-                    original_filename=file_name,  # Store original name as metadata
-                    mime_type=mime_result,
-                    upload_timestamp=timezone.now().isoformat(),
-                    security_validated=True
-                )
-                
-                # Clean up local file after successful S3 upload
-                secure_path.unlink(missing_ok=True)
+            delivery = verdict['metadata'].get('delivery')
+            if delivery:
                 print(f"[SECURITY] File successfully uploaded to S3 and local file cleaned up")
                 
                 # Log successful upload
@@ -7137,46 +7043,47 @@ class FileUploadView(View):
                         'mitigation_number': mitigation_number,
                         'file_size': file.size,
                         'mime_type': mime_result,
-                        's3_url': upload_result['file']['url']
+                        'scan_id': scan.scan_id,
+                        'scanner': verdict['scanner'],
+                        's3_url': delivery['file_url']
                     }
                 )
                 
                 return JsonResponse({
                     'success': True,
-                    'file_url': upload_result['file']['url'],
-                    's3_url': upload_result['file']['url'],
-                    'file_id': upload_result['file']['id'],
+                    'file_url': delivery['file_url'],
+                    's3_url': delivery['file_url'],
+                    'file_id': delivery['file_id'],
                     'secure_filename': secure_filename,
-                    'mime_type': mime_result
+                    'mime_type': mime_result,
+                    'scan_id': scan.scan_id,
+                    'scan_status': verdict['status']
                 })
             
-            except Exception as e:
-                # Log S3 upload failure
-                send_log(
-                    module="File",
-                    actionType="UPLOAD_S3_FAILED",
-                    description=f"S3 upload failed for file: {file.name}",
-                    userId=user_id,
-                    userName=username,
-                    entityType="File",
-                    logLevel="ERROR",
-                    ipAddress=get_client_ip(request),
-                    additionalInfo={
-                        'filename': file.name,
-                        'error': str(e),
-                        'incident_id': incident_id
-                    }
-                )
-                
-                # Clean up on S3 upload failure
-                secure_path.unlink(missing_ok=True)
-                print(f"[SECURITY] S3 upload failed, local file cleaned up: {str(e)}")
-                # SECURE: Sanitize upload error message
-                safe_error = SecureOutputEncoder.sanitize_error_message(f'Upload failed: {str(e)}')
-                return JsonResponse({
-                    'success': False,
-                    'error': safe_error
-                }, status=500)
+            # Log S3 upload failure
+            upload_error = verdict['metadata'].get('delivery_error', 'unknown error')
+            send_log(
+                module="File",
+                actionType="UPLOAD_S3_FAILED",
+                description=f"S3 upload failed for file: {file.name}",
+                userId=user_id,
+                userName=username,
+                entityType="File",
+                logLevel="ERROR",
+                ipAddress=get_client_ip(request),
+                additionalInfo={
+                    'filename': file.name,
+                    'error': upload_error,
+                    'incident_id': incident_id
+                }
+            )
+            print(f"[SECURITY] S3 upload failed, local file cleaned up: {upload_error}")
+            # SECURE: Sanitize upload error message
+            safe_error = SecureOutputEncoder.sanitize_error_message(f'Upload failed: {upload_error}')
+            return JsonResponse({
+                'success': False,
+                'error': safe_error
+            }, status=500)
             
         except Exception as e:
             # Log general upload error
@@ -7199,6 +7106,38 @@ class FileUploadView(View):
                 'error': 'Upload failed due to security validation'
             }, status=500)
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_upload_scan_verdict(request, scan_id):
+    """Malware scan verdict of an uploaded file"""
+    user_id = RBACUtils.get_user_id_from_request(request)
+    if not user_id:
+        return JsonResponse({'error': 'Authentication required'}, status=403)
+    verdict = get_verdict(scan_id)
+    # Verdicts of other users' uploads are reported as missing
+    if verdict is None or not can_view_scan_verdict(
+        user_id, verdict, RBACUtils.has_permission(user_id, 'incident', 'view')
+    ):
+        return JsonResponse({'error': 'Scan not found'}, status=404)
+    return JsonResponse(verdict)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_upload_scan_verdicts(request):
+    """Malware scan verdicts of every upload with the given content hash (?sha256=)"""
+    sha256 = (request.GET.get('sha256') or '').strip().lower()
+    if not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        return JsonResponse({'error': 'A valid sha256 parameter is required'}, status=400)
+    user_id = RBACUtils.get_user_id_from_request(request)
+    if not user_id:
+        return JsonResponse({'error': 'Authentication required'}, status=403)
+    may_view_incidents = RBACUtils.has_permission(user_id, 'incident', 'view')
+    verdicts = [
+        verdict for verdict in verdicts_for_hash(sha256)
+        if can_view_scan_verdict(user_id, verdict, may_view_incidents)
+    ]
+    return JsonResponse({'sha256': sha256, 'verdicts': verdicts})
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_categories(request):
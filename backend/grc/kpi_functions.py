@@ -1,16 +1,20 @@
 from django.db.models import Count, Case, When, F, Value, FloatField, Avg, Func
 from django.db.models.functions import ExtractMonth, TruncMonth
-from .models import LastChecklistItemVerified, Audit
+from .models import LastChecklistItemVerified
 from django.db.models import Q
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from django.utils import timezone
 from django.db.models.expressions import RawSQL
 from .logging_service import send_log
+from .kpi_rollups import (
+    get_audit_totals, get_monthly_audit_rollups, get_non_compliant_totals,
+    get_non_compliant_counts_by_audit, get_monthly_close_rollups, month_start
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,79 +53,26 @@ def get_audit_completion_metrics(request):
             start_date = datetime(int(year), 1, 1)
             end_date = datetime(int(year), 12, 31)
 
-        # Get audit metrics
-        audits = Audit.objects.filter(AssignedDate__gte=start_date, AssignedDate__lte=end_date)
-        
-        total_audits = audits.count()
-        completed_audits = audits.filter(Status='Completed').count()
+        # Get audit metrics from the daily rollup
+        total_audits, completed_audits = get_audit_totals(start_date.date(), end_date.date())
         completion_percentage = (completed_audits / total_audits * 100) if total_audits > 0 else 0
 
-        # Get monthly breakdown for the entire year
-        year_start = datetime(int(year), 1, 1)
-        year_end = datetime(int(year), 12, 31)
-        
-        monthly_data_query = """
-            SELECT 
-                DATE_FORMAT(AssignedDate, '%%Y-%%m') AS month,
-                COUNT(*) AS planned,
-                SUM(CASE WHEN Status = 'Completed' THEN 1 ELSE 0 END) AS completed
-            FROM 
-                audit
-            WHERE 
-                AssignedDate BETWEEN %s AND %s
-            GROUP BY 
-                month
-            ORDER BY 
-                month
-        """
-        
-        from django.db import connection
-        with connection.cursor() as cursor:
-            cursor.execute(monthly_data_query, [year_start, year_end])
-            monthly_data = []
-            
-            for row in cursor.fetchall():
-                month_str, planned, completed = row
-                if month_str:
-                    year, month = map(int, month_str.split('-'))
-                    month_date = datetime(year, month, 1)
-                    month_name = month_date.strftime('%b')  # Short month name
-                    
-                    monthly_data.append({
-                        'month': month_name,
-                        'month_num': month,
-                        'year': year,
-                        'planned': planned,
-                        'completed': completed,
-                        'completion_percentage': round((completed / planned * 100), 2) if planned > 0 else 0
-                    })
-        
-        # Ensure all months are represented, even if no data
+        # Get monthly breakdown for the entire year, ensuring all months are represented
+        monthly_rollups = get_monthly_audit_rollups(date(int(year), 1, 1), date(int(year), 12, 1))
         all_months = []
         for month in range(1, 13):
-            month_date = datetime(int(year), month, 1)
-            month_name = month_date.strftime('%b')
-            
-            # Check if this month exists in the data
-            month_exists = False
-            for item in monthly_data:
-                if item['month_num'] == month and item['year'] == int(year):
-                    month_exists = True
-                    all_months.append(item)
-                    break
-            
-            if not month_exists:
-                all_months.append({
-                    'month': month_name,
-                    'month_num': month,
-                    'year': int(year),
-                    'planned': 0,
-                    'completed': 0,
-                    'completion_percentage': 0
-                })
-        
-        # Sort by month number
-        all_months.sort(key=lambda x: x['month_num'])
+            month_date = date(int(year), month, 1)
+            rollup = monthly_rollups.get(month_date, {})
+            planned = rollup.get('planned') or 0
+            completed = rollup.get('completed') or 0
+            all_months.append({
+                'month': month_date.strftime('%b'),  # Short month name
+                'month_num': month,
+                'year': int(year),
+                'planned': planned,
+                'completed': completed,
+                'completion_percentage': round((completed / planned * 100), 2) if planned > 0 else 0
+            })
         
         # Get highest planned month for scaling the chart
         max_planned = max([m['planned'] for m in all_months]) if all_months else 0
@@ -228,93 +179,51 @@ def get_audit_cycle_time(request):
         start_date = datetime(today.year - 1, today.month, 1)
         end_date = today
         
-        # Build the query condition
-        where_conditions = [
-            "CompletionDate IS NOT NULL",
-            "Status = 'Completed'"
-        ]
-        params = [start_date, end_date]
-        
-        # Add framework filter if provided
-        if framework_id:
-            where_conditions.append("FrameworkId = %s")
-            params.append(framework_id)
-        
-        # Get frameworks list for dropdown
+        # Get frameworks with completed audits for the dropdown
         frameworks_query = """
-            SELECT DISTINCT 
+            SELECT 
                 f.FrameworkId, 
                 f.FrameworkName
             FROM 
                 frameworks f
-            JOIN
-                audit a ON f.FrameworkId = a.FrameworkId
             WHERE
-                a.CompletionDate IS NOT NULL
+                f.FrameworkId IN (
+                    SELECT FrameworkId FROM audit_kpi_monthly_rollup WHERE CycleCount > 0
+                )
             ORDER BY
                 f.FrameworkName
         """
         
-        # Use raw SQL to calculate the date difference by month
-        monthly_query = f"""
-            SELECT 
-                DATE_FORMAT(AssignedDate, '%%Y-%%m') AS month,
-                AVG(DATEDIFF(CompletionDate, AssignedDate)) AS avg_cycle_days
-            FROM 
-                audit
-            WHERE 
-                AssignedDate BETWEEN %s AND %s
-                AND {" AND ".join(where_conditions)}
-            GROUP BY 
-                month
-            ORDER BY 
-                month
-        """
-        
         from django.db import connection
         
-        # Get frameworks for dropdown
         frameworks = []
         with connection.cursor() as cursor:
             cursor.execute(frameworks_query)
             for row in cursor.fetchall():
-                framework_id, framework_name = row
+                row_framework_id, framework_name = row
                 frameworks.append({
-                    'id': framework_id,
-                    'name': framework_name or f'Framework {framework_id}'
+                    'id': row_framework_id,
+                    'name': framework_name or f'Framework {row_framework_id}'
                 })
         
-        # Get monthly data
-        with connection.cursor() as cursor:
-            cursor.execute(monthly_query, params)
-            monthly_data = []
-            
-            for row in cursor.fetchall():
-                month_str, avg_days = row
-                # Parse YYYY-MM to a date object for better formatting
-                year, month = map(int, month_str.split('-'))
-                month_date = datetime(year, month, 1)
-                
-                monthly_data.append({
-                    'month': month_date.strftime('%b %Y'),  # Short month name and year
-                    'avg_cycle_days': round(float(avg_days), 1) if avg_days else 0
-                })
-        
-        # Calculate overall average with the same conditions
-        overall_avg_query = f"""
-            SELECT 
-                AVG(DATEDIFF(CompletionDate, AssignedDate)) AS overall_avg
-            FROM 
-                audit
-            WHERE 
-                AssignedDate BETWEEN %s AND %s
-                AND {" AND ".join(where_conditions)}
-        """
-        
-        with connection.cursor() as cursor:
-            cursor.execute(overall_avg_query, params)
-            result = cursor.fetchone()
-            overall_avg = round(float(result[0]), 1) if result and result[0] else 0
+        # Get monthly data from the monthly rollup
+        monthly_rollups = get_monthly_audit_rollups(start_date.date(), month_start(end_date.date()), framework_id)
+        monthly_data = []
+        cycle_days_total = 0
+        cycle_count = 0
+        
+        for month_date, rollup in monthly_rollups.items():
+            if not rollup['cycle_count']:
+                continue
+            cycle_days_total += rollup['cycle_days_total']
+            cycle_count += rollup['cycle_count']
+            monthly_data.append({
+                'month': month_date.strftime('%b %Y'),  # Short month name and year
+                'avg_cycle_days': round(rollup['cycle_days_total'] / rollup['cycle_count'], 1)
+            })
+        
+        # Overall average across the same months
+        overall_avg = round(cycle_days_total / cycle_count, 1) if cycle_count else 0
         
         # Target days (can be made configurable later)
         target_days = 30
@@ -374,33 +283,20 @@ def get_finding_rate(request):
             start_date = datetime(int(year), 1, 1)
             end_date = datetime(int(year), 12, 31)
         
-        # Calculate the average non-compliant findings per audit
-        # Join audit_findings to compliance on ComplianceId
-        # Filter findings where Check = '0' (non-compliant)
-        # Count non-compliant findings per audit
-        # Average counts across all audits
-        raw_query = """
-            SELECT 
-                AVG(non_compliant_count) AS avg_findings_per_audit
-            FROM (
-                SELECT 
-                    af.AuditId, 
-                    COUNT(*) AS non_compliant_count
-                FROM 
-                    audit_findings af
-                WHERE 
-                    af.Check = '0'
-                    AND af.AssignedDate BETWEEN %s AND %s
-                GROUP BY 
-                    af.AuditId
-            ) AS sub;
-        """
+        # Calculate the average non-compliant findings (Check = '0') per audit
+        # from the per-audit daily finding rollup
+        total_findings, audits_with_findings = get_non_compliant_totals(start_date.date(), end_date.date())
+        avg_findings = round(total_findings / audits_with_findings, 2) if audits_with_findings else 0
         
         # Get audits with the highest number of findings for the bar chart
+        top_counts = list(
+            get_non_compliant_counts_by_audit(start_date.date(), end_date.date())
+            .order_by('-finding_count')[:10]
+        )
+        
         top_audits_query = """
             SELECT 
                 a.AuditId, 
-                COUNT(*) AS finding_count,
                 f.FrameworkName,
                 f.FrameworkId,
                 p.PolicyName,
@@ -408,9 +304,7 @@ def get_finding_rate(request):
                 sp.SubPolicyName,
                 sp.SubPolicyId
             FROM 
-                audit_findings af
-            JOIN 
-                audit a ON af.AuditId = a.AuditId
+                audit a
             LEFT JOIN 
                 frameworks f ON a.FrameworkId = f.FrameworkId
             LEFT JOIN 
@@ -418,30 +312,26 @@ def get_finding_rate(request):
             LEFT JOIN
                 subpolicies sp ON a.SubPolicyId = sp.SubPolicyId
             WHERE 
-                af.`Check` = '0'
-                AND af.AssignedDate BETWEEN %s AND %s
-            GROUP BY 
-                af.AuditId, f.FrameworkName, p.PolicyName, sp.SubPolicyName
-            ORDER BY 
-                finding_count DESC
-            LIMIT 10;
+                a.AuditId IN ({placeholders})
         """
         
-        from django.db import connection
-        with connection.cursor() as cursor:
-            cursor.execute(raw_query, [start_date, end_date])
-            result = cursor.fetchone()
-            avg_findings = round(float(result[0]), 2) if result[0] else 0
-            
-            # Get top audits with highest findings
-            cursor.execute(top_audits_query, [start_date, end_date])
-            top_audits = []
+        top_audits = []
+        if top_counts:
+            from django.db import connection
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    top_audits_query.format(placeholders=', '.join(['%s'] * len(top_counts))),
+                    [row['AuditId'] for row in top_counts]
+                )
+                audit_details = {row[0]: row[1:] for row in cursor.fetchall()}
             
-            for row in cursor.fetchall():
-                audit_id, finding_count, framework_name, framework_id, policy_name, policy_id, subpolicy_name, subpolicy_id = row
+            for row in top_counts:
+                audit_id = row['AuditId']
+                framework_name, framework_id, policy_name, policy_id, subpolicy_name, subpolicy_id = \
+                    audit_details.get(audit_id, (None,) * 6)
                 top_audits.append({
                     'audit_id': audit_id,
-                    'finding_count': finding_count,
+                    'finding_count': row['finding_count'],
                     'framework': framework_name or 'Unknown',
                     'framework_id': framework_id,
                     'policy': policy_name or 'Unknown',
@@ -512,35 +402,19 @@ def get_time_to_close_findings(request):
             start_date = datetime(int(year), 1, 1)
             end_date = datetime(int(year), 12, 31)
         
-        # Calculate average close time
-        # For findings where Check = '2' (completed/closed), calculate days between ReviewDate and AssignedDate
-        avg_close_time_query = """
-            SELECT 
-                AVG(DATEDIFF(ReviewDate, AssignedDate)) AS avg_close_days
-            FROM 
-                audit_findings
-            WHERE 
-                `Check` = '2'  -- closed/completed
-                AND ReviewDate IS NOT NULL
-                AND ReviewDate BETWEEN %s AND %s;
-        """
+        # Average close time and monthly trend from the close rollup
+        # For findings where Check = '2' (completed/closed), days between ReviewDate and AssignedDate
+        monthly_close = get_monthly_close_rollups(start_date.date(), end_date.date())
+        closed_total = sum(bucket['closed'] for bucket in monthly_close.values())
+        close_days_total = sum(bucket['days_total'] for bucket in monthly_close.values())
+        avg_close_days = round(close_days_total / closed_total, 1) if closed_total else 0
         
-        # Get monthly trend
-        monthly_trend_query = """
-            SELECT 
-                DATE_FORMAT(ReviewDate, '%%Y-%%m') AS month,
-                AVG(DATEDIFF(ReviewDate, AssignedDate)) AS avg_close_days
-            FROM 
-                audit_findings
-            WHERE 
-                `Check` = '2'  -- closed/completed
-                AND ReviewDate IS NOT NULL
-                AND ReviewDate BETWEEN %s AND %s
-            GROUP BY 
-                month
-            ORDER BY 
-                month;
-        """
+        monthly_trend = []
+        for month_date, bucket in monthly_close.items():
+            monthly_trend.append({
+                'month': month_date.strftime('%b %Y'),
+                'avg_close_days': round(bucket['days_total'] / bucket['closed'], 1) if bucket['closed'] else 0
+            })
         
         # Get top 5 oldest open findings
         oldest_open_findings_query = """
@@ -564,31 +438,12 @@ def get_time_to_close_findings(request):
             WHERE 
                 af.`Check` != '2'  -- not closed/completed
             ORDER BY 
-                days_open DESC
+                af.AssignedDate ASC
             LIMIT 5;
         """
         
         from django.db import connection
         with connection.cursor() as cursor:
-            # Get average close time
-            cursor.execute(avg_close_time_query, [start_date, end_date])
-            result = cursor.fetchone()
-            avg_close_days = round(float(result[0]), 1) if result[0] else 0
-            
-            # Get monthly trend
-            cursor.execute(monthly_trend_query, [start_date, end_date])
-            monthly_trend = []
-            
-            for row in cursor.fetchall():
-                month_str, avg_days = row
-                year, month = map(int, month_str.split('-'))
-                month_date = datetime(year, month, 1)
-                
-                monthly_trend.append({
-                    'month': month_date.strftime('%b %Y'),
-                    'avg_close_days': round(float(avg_days), 1) if avg_days else 0
-                })
-            
             # Get top 5 oldest open findings
             cursor.execute(oldest_open_findings_query)
             oldest_findings = []
@@ -0,0 +1,254 @@
+"""
+Materialized rollups for the audit KPI endpoints in kpi_functions.py.
+
+The audit KPIs used to run DATE_FORMAT(...) GROUP BY queries over the full
+audit and audit_findings tables on every dashboard load. The tables below keep
+those aggregates pre-computed:
+
+- audit_kpi_daily_rollup / audit_kpi_monthly_rollup: planned, completed and
+  cycle-time totals per AssignedDate day/month and framework
+- audit_finding_kpi_daily_rollup: non-compliant findings per audit and day
+- audit_finding_close_daily_rollup: closed findings and close-time totals per
+  audit and ReviewDate day
+
+Rollups are refreshed incrementally per audit (refresh_audit_rollups) whenever
+an audit changes status, and through audit_summary.findings_changed whenever
+its findings are created, submitted or reviewed. Only the day,
+month and audit buckets touched by that audit are recomputed, so a refresh is a
+handful of indexed reads. rebuild_all_rollups does a full backfill and is
+exposed through `python manage.py rebuild_kpi_rollups`.
+"""
+
+from datetime import date, timedelta
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from .models import (
+    AuditKpiDailyRollup, AuditKpiMonthlyRollup,
+    AuditFindingKpiDailyRollup, AuditFindingCloseDailyRollup
+)
+
+logger = logging.getLogger(__name__)
+
+# Aggregate columns shared by the per-day refresh and the full rebuild
+AUDIT_ROLLUP_COLUMNS = """
+    COUNT(*),
+    COALESCE(SUM(CASE WHEN Status = 'Completed' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN Status = 'Completed' AND CompletionDate IS NOT NULL
+                      THEN DATEDIFF(CompletionDate, AssignedDate) ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN Status = 'Completed' AND CompletionDate IS NOT NULL
+                      THEN 1 ELSE 0 END), 0)
+"""
+
+FINDING_ROLLUP_SQL = """
+    INSERT INTO audit_finding_kpi_daily_rollup (Day, AuditId, NonCompliantCount)
+    SELECT DATE(AssignedDate), AuditId,
+           SUM(CASE WHEN `Check` = '0' THEN 1 ELSE 0 END)
+    FROM audit_findings
+    WHERE AssignedDate IS NOT NULL {where}
+    GROUP BY DATE(AssignedDate), AuditId
+"""
+
+FINDING_CLOSE_ROLLUP_SQL = """
+    INSERT INTO audit_finding_close_daily_rollup (Day, AuditId, ClosedCount, CloseDaysTotal)
+    SELECT DATE(ReviewDate), AuditId, COUNT(*),
+           COALESCE(SUM(DATEDIFF(ReviewDate, AssignedDate)), 0)
+    FROM audit_findings
+    WHERE `Check` = '2' AND ReviewDate IS NOT NULL {where}
+    GROUP BY DATE(ReviewDate), AuditId
+"""
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month_start(day):
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def _refresh_audit_day(day, framework_id):
+    """Recompute the daily audit rollup row for one (day, framework) bucket"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {AUDIT_ROLLUP_COLUMNS}
+            FROM audit
+            WHERE AssignedDate >= %s AND AssignedDate < %s AND FrameworkId = %s
+        """, [day, day + timedelta(days=1), framework_id])
+        planned, completed, cycle_days_total, cycle_count = cursor.fetchone()
+
+    if not planned:
+        AuditKpiDailyRollup.objects.filter(Day=day, FrameworkId=framework_id).delete()
+        return
+
+    AuditKpiDailyRollup.objects.update_or_create(
+        Day=day,
+        FrameworkId=framework_id,
+        defaults={
+            'PlannedCount': planned,
+            'CompletedCount': completed,
+            'CycleDaysTotal': cycle_days_total,
+            'CycleCount': cycle_count,
+        }
+    )
+
+
+def _refresh_audit_month(month, framework_id):
+    """Recompute the monthly audit rollup row from its daily rows"""
+    totals = AuditKpiDailyRollup.objects.filter(
+        Day__gte=month, Day__lt=next_month_start(month), FrameworkId=framework_id
+    ).aggregate(
+        planned=Sum('PlannedCount'),
+        completed=Sum('CompletedCount'),
+        cycle_days_total=Sum('CycleDaysTotal'),
+        cycle_count=Sum('CycleCount'),
+    )
+
+    if not totals['planned']:
+        AuditKpiMonthlyRollup.objects.filter(Month=month, FrameworkId=framework_id).delete()
+        return
+
+    AuditKpiMonthlyRollup.objects.update_or_create(
+        Month=month,
+        FrameworkId=framework_id,
+        defaults={
+            'PlannedCount': totals['planned'],
+            'CompletedCount': totals['completed'] or 0,
+            'CycleDaysTotal': totals['cycle_days_total'] or 0,
+            'CycleCount': totals['cycle_count'] or 0,
+        }
+    )
+
+
+def _refresh_finding_rollups(audit_id):
+    """Rebuild the finding rollup rows belonging to a single audit"""
+    AuditFindingKpiDailyRollup.objects.filter(AuditId=audit_id).delete()
+    AuditFindingCloseDailyRollup.objects.filter(AuditId=audit_id).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(FINDING_ROLLUP_SQL.format(where="AND AuditId = %s"), [audit_id])
+        cursor.execute(FINDING_CLOSE_ROLLUP_SQL.format(where="AND AuditId = %s"), [audit_id])
+
+
+def refresh_audit_rollups(audit_id):
+    """
+    Bring the KPI rollups up to date after an audit or its findings changed.
+    Never raises - a failed refresh must not fail the request that triggered it;
+    the next refresh or a full rebuild will correct the rollups.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT DATE(AssignedDate), FrameworkId
+                FROM audit
+                WHERE AuditId = %s
+            """, [audit_id])
+            row = cursor.fetchone()
+
+        if not row:
+            return False
+
+        day, framework_id = row
+        with transaction.atomic():
+            if day and framework_id:
+                _refresh_audit_day(day, framework_id)
+                _refresh_audit_month(month_start(day), framework_id)
+            _refresh_finding_rollups(audit_id)
+        return True
+    except Exception as e:
+        logger.error(f"Error refreshing KPI rollups for audit {audit_id}: {str(e)}")
+        return False
+
+
+def rebuild_all_rollups():
+    """Recompute every rollup table from the audit and audit_findings tables"""
+    with transaction.atomic():
+        AuditKpiDailyRollup.objects.all().delete()
+        AuditKpiMonthlyRollup.objects.all().delete()
+        AuditFindingKpiDailyRollup.objects.all().delete()
+        AuditFindingCloseDailyRollup.objects.all().delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO audit_kpi_daily_rollup
+                    (Day, FrameworkId, PlannedCount, CompletedCount, CycleDaysTotal, CycleCount, UpdatedAt)
+                SELECT DATE(AssignedDate), FrameworkId, {AUDIT_ROLLUP_COLUMNS}, NOW()
+                FROM audit
+                WHERE AssignedDate IS NOT NULL AND FrameworkId IS NOT NULL
+                GROUP BY DATE(AssignedDate), FrameworkId
+            """)
+            cursor.execute("""
+                INSERT INTO audit_kpi_monthly_rollup
+                    (Month, FrameworkId, PlannedCount, CompletedCount, CycleDaysTotal, CycleCount, UpdatedAt)
+                SELECT DATE_SUB(Day, INTERVAL DAYOFMONTH(Day) - 1 DAY) AS month_start, FrameworkId,
+                       SUM(PlannedCount), SUM(CompletedCount), SUM(CycleDaysTotal), SUM(CycleCount), NOW()
+                FROM audit_kpi_daily_rollup
+                GROUP BY month_start, FrameworkId
+            """)
+            cursor.execute(FINDING_ROLLUP_SQL.format(where=""))
+            cursor.execute(FINDING_CLOSE_ROLLUP_SQL.format(where=""))
+
+    return {
+        'audit_days': AuditKpiDailyRollup.objects.count(),
+        'audit_months': AuditKpiMonthlyRollup.objects.count(),
+        'finding_days': AuditFindingKpiDailyRollup.objects.count(),
+        'finding_close_days': AuditFindingCloseDailyRollup.objects.count(),
+    }
+
+
+def get_audit_totals(start_day, end_day):
+    """Planned and completed audit counts for an inclusive day range"""
+    totals = AuditKpiDailyRollup.objects.filter(
+        Day__gte=start_day, Day__lte=end_day
+    ).aggregate(planned=Sum('PlannedCount'), completed=Sum('CompletedCount'))
+    return totals['planned'] or 0, totals['completed'] or 0
+
+
+def get_monthly_audit_rollups(start_month, end_month, framework_id=None):
+    """
+    Monthly audit totals (summed across frameworks unless one is given),
+    keyed by the first day of each month in [start_month, end_month].
+    """
+    rows = AuditKpiMonthlyRollup.objects.filter(Month__gte=start_month, Month__lte=end_month)
+    if framework_id:
+        rows = rows.filter(FrameworkId=framework_id)
+    rows = rows.values('Month').annotate(
+        planned=Sum('PlannedCount'),
+        completed=Sum('CompletedCount'),
+        cycle_days_total=Sum('CycleDaysTotal'),
+        cycle_count=Sum('CycleCount'),
+    ).order_by('Month')
+    return {row['Month']: row for row in rows}
+
+
+def get_non_compliant_totals(start_day, end_day):
+    """Total non-compliant findings and the number of audits they belong to"""
+    totals = AuditFindingKpiDailyRollup.objects.filter(
+        Day__gte=start_day, Day__lte=end_day, NonCompliantCount__gt=0
+    ).aggregate(findings=Sum('NonCompliantCount'), audits=Count('AuditId', distinct=True))
+    return totals['findings'] or 0, totals['audits'] or 0
+
+
+def get_non_compliant_counts_by_audit(start_day, end_day):
+    """Non-compliant finding counts per audit for findings assigned in the day range"""
+    return (
+        AuditFindingKpiDailyRollup.objects
+        .filter(Day__gte=start_day, Day__lte=end_day)
+        .values('AuditId')
+        .annotate(finding_count=Sum('NonCompliantCount'))
+        .filter(finding_count__gt=0)
+    )
+
+
+def get_monthly_close_rollups(start_day, end_day):
+    """Closed-finding totals per month for findings reviewed in the day range"""
+    rows = AuditFindingCloseDailyRollup.objects.filter(Day__gte=start_day, Day__lte=end_day)
+    monthly = {}
+    for row in rows.values('Day').annotate(closed=Sum('ClosedCount'), days_total=Sum('CloseDaysTotal')):
+        bucket = monthly.setdefault(month_start(row['Day']), {'closed': 0, 'days_total': 0})
+        bucket['closed'] += row['closed']
+        bucket['days_total'] += row['days_total']
+    return dict(sorted(monthly.items()))
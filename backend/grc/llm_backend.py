@@ -0,0 +1,198 @@
+"""
+Pluggable LLM backends for the SLM services
+
+Incident analysis (slm_service, incident_slm via incident_inference) and
+policy extraction (routes/policy_text_extract) ask get_llm_backend() for a
+chain instead of building OllamaLLM themselves. A chain answers
+invoke(inputs) and batch(list_of_inputs, config, return_exceptions) with
+{'text': response} like a langchain LLMChain.
+
+Backends:
+    ollama  - LLMChain over OllamaLLM (default)
+    fake    - deterministic local stand-in, no model or langchain needed. Each
+              call sleeps GRC_FAKE_LLM_LATENCY_SECONDS plus up to
+              GRC_FAKE_LLM_JITTER_SECONDS, fails for a GRC_FAKE_LLM_FAILURE_RATE
+              share of prompts and returns the canned response of its chain.
+              Delay, failure and response depend only on the rendered prompt,
+              so a run can be repeated exactly.
+
+Settings:
+    GRC_LLM_BACKEND                - 'ollama' or 'fake' (default 'ollama')
+    GRC_FAKE_LLM_LATENCY_SECONDS   - base delay of a fake call (default 0)
+    GRC_FAKE_LLM_JITTER_SECONDS    - extra random delay of a fake call (default 0)
+    GRC_FAKE_LLM_FAILURE_RATE      - share of fake calls that raise FakeLLMError (default 0)
+    GRC_FAKE_LLM_RESPONSES         - {chain name: response text} overriding DEFAULT_FAKE_RESPONSES
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+GRC_LLM_BACKEND = getattr(settings, 'GRC_LLM_BACKEND', 'ollama')
+GRC_FAKE_LLM_LATENCY_SECONDS = getattr(settings, 'GRC_FAKE_LLM_LATENCY_SECONDS', 0.0)
+GRC_FAKE_LLM_JITTER_SECONDS = getattr(settings, 'GRC_FAKE_LLM_JITTER_SECONDS', 0.0)
+GRC_FAKE_LLM_FAILURE_RATE = getattr(settings, 'GRC_FAKE_LLM_FAILURE_RATE', 0.0)
+GRC_FAKE_LLM_RESPONSES = getattr(settings, 'GRC_FAKE_LLM_RESPONSES', {})
+
+# Well-formed answers to each chain's prompt, so the parsers succeed
+DEFAULT_FAKE_RESPONSES = {
+    'security': json.dumps({
+        "criticality": "Significant",
+        "possibleDamage": "Disruption of online banking and exposure of customer records",
+        "category": "Unauthorized Access",
+        "riskDescription": "If the compromised account is not disabled then customer data may be exfiltrated",
+        "riskLikelihood": 6,
+        "riskLikelihoodJustification": "Credential based attacks are common against banking staff",
+        "riskImpact": 7,
+        "riskImpactJustification": "Customer data exposure carries regulatory and reputational cost",
+        "riskExposureRating": "High Exposure",
+        "riskPriority": "P1",
+        "riskAppetite": "Exceeds Appetite",
+        "riskMitigation": ["Disable the affected account", "Reset related credentials", "Review access logs"],
+    }),
+    'comprehensive': json.dumps({
+        "riskPriority": "P1",
+        "criticality": "High",
+        "costOfIncident": "$50,000 - $250,000",
+        "possibleDamage": "Operational disruption and regulatory reporting obligations",
+        "systemsInvolved": ["Core Banking System", "Online Banking"],
+        "initialImpactAssessment": "Customer facing services degraded and access logs under review",
+        "mitigationSteps": ["Contain the affected hosts", "Rotate credentials", "Notify the compliance team"],
+        "comments": "Generated by the local stand-in model",
+        "violatedPolicies": ["Access Control Policy"],
+        "procedureControlFailures": ["Privileged access review"],
+        "lessonsLearned": ["Enforce multi factor authentication for administrators"],
+    }),
+    'policy_extraction': (
+        "Sub_policy_id:\nAC-2\n\n"
+        "sub_policy_name:\nAccount Management\n\n"
+        "control:\na. Define and document the types of accounts allowed.\nb. Review accounts at least annually.\n\n"
+        "related_controls:\nAC-3, AC-5\n\n"
+        "control_enhancements:\n\n"
+        "references:\nNIST SP 800-53\n"
+    ),
+}
+
+
+class FakeLLMError(RuntimeError):
+    pass
+
+
+class OllamaBackend:
+    name = 'ollama'
+
+    def available(self):
+        try:
+            import langchain_ollama  # noqa: F401
+            import langchain  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def chain(self, name, prompt, model, temperature=0.7, keep_alive=None):
+        from langchain_ollama import OllamaLLM
+        from langchain.prompts import PromptTemplate
+        from langchain.chains import LLMChain
+
+        llm_kwargs = {'model': model, 'temperature': temperature}
+        if keep_alive is not None:
+            llm_kwargs['keep_alive'] = keep_alive
+        return LLMChain(llm=OllamaLLM(**llm_kwargs), prompt=PromptTemplate.from_template(prompt))
+
+
+class FakeChain:
+    """LLMChain look-alike answered by a FakeLLMBackend"""
+
+    def __init__(self, backend, name, prompt):
+        self.backend = backend
+        self.name = name
+        self.prompt = prompt
+
+    def invoke(self, inputs):
+        # Formatting checks the inputs against the prompt variables like PromptTemplate does
+        rendered = self.prompt.format(**inputs)
+        return {**inputs, 'text': self.backend.respond(self.name, rendered)}
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        if not inputs:
+            return []
+        max_concurrency = (config or {}).get('max_concurrency') or len(inputs)
+
+        def run(item):
+            try:
+                return self.invoke(item)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fake-llm") as pool:
+            return list(pool.map(run, inputs))
+
+
+class FakeLLMBackend:
+    name = 'fake'
+
+    def __init__(self, latency_seconds=GRC_FAKE_LLM_LATENCY_SECONDS, jitter_seconds=GRC_FAKE_LLM_JITTER_SECONDS,
+                 failure_rate=GRC_FAKE_LLM_FAILURE_RATE, responses=None):
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.failure_rate = failure_rate
+        self.responses = {**DEFAULT_FAKE_RESPONSES, **GRC_FAKE_LLM_RESPONSES, **(responses or {})}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def available(self):
+        return True
+
+    def chain(self, name, prompt, model, temperature=0.7, keep_alive=None):
+        return FakeChain(self, name, prompt)
+
+    def respond(self, name, rendered_prompt):
+        seed = hashlib.sha256(f"{name}\n{rendered_prompt}".encode('utf-8')).hexdigest()
+        rng = random.Random(seed)
+        delay = self.latency_seconds + rng.uniform(0, self.jitter_seconds)
+        failed = rng.random() < self.failure_rate
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.failures += 1
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise FakeLLMError(f"Simulated failure of the {name} model call")
+        return self.responses.get(name, '{}')
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'failures': self.failures}
+
+
+LLM_BACKENDS = {
+    'ollama': OllamaBackend,
+    'fake': FakeLLMBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_llm_backend(name=None):
+    """The process-wide backend called name (default GRC_LLM_BACKEND)"""
+    name = name or GRC_LLM_BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            if name not in LLM_BACKENDS:
+                raise ValueError(f"Unknown LLM backend: {name}")
+            _backends[name] = LLM_BACKENDS[name]()
+        return _backends[name]
+
+
+def llm_backend_available():
+    return get_llm_backend().available()
@@ -0,0 +1,158 @@
+"""
+Load benchmark of the SLM pipelines
+
+Runs incident analysis and policy extraction end to end (prompt rendering,
+model call, JSON repair and parsing, fallback, result cache) under a number of
+concurrent callers and reports throughput, p50/p95 latency, errors and
+fallbacks - incident analysis never raises, it answers with the kind's
+deterministic fallback when the model call or parsing fails, so those requests
+are counted as fallbacks rather than errors. Each run uses
+its own empty result cache, so only repeated payloads (repeat_ratio) are
+served from it.
+
+With the fake backend (llm_backend.FakeLLMBackend) the numbers show what the
+pipeline itself costs and how it scales with concurrency for a given model
+latency; with the ollama backend they measure the real model on this host.
+`python manage.py benchmark_llm` is the command line front end.
+"""
+
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .incident_inference import IncidentInferenceService
+from .incident_slm import COMPREHENSIVE_ANALYSIS
+from .llm_backend import get_llm_backend
+from .routes.policy_text_extract import PolicyExtractionEngine, latency_summary
+from .slm_service import SECURITY_ANALYSIS
+
+SAMPLE_INCIDENTS = [
+    ("Phishing email campaign", "Several tellers received emails impersonating the CFO asking for wire transfer approvals."),
+    ("Ransomware on branch server", "Files on the branch file server were encrypted and a ransom note was left on the desktop."),
+    ("Unauthorized access to CBS", "A contractor account was used to query customer balances outside business hours."),
+    ("DDoS on online banking", "The online banking portal was unavailable for 40 minutes due to a traffic flood."),
+    ("Customer data exposed", "A misconfigured storage bucket exposed a CSV export of customer contact details."),
+]
+
+SAMPLE_POLICY_TEXT = (
+    "AC-{n} ACCOUNT MANAGEMENT\n"
+    "Control: The organization defines and documents the types of information system accounts allowed, "
+    "assigns account managers, establishes conditions for group and role membership, and reviews accounts "
+    "for compliance with account management requirements at least every {n} months.\n"
+    "Related controls: AC-3, AC-5, AC-6.\n"
+    "References: NIST SP 800-53 Rev. 4.\n"
+)
+
+
+def _payloads(count, repeat_ratio, make, seed):
+    """count payloads; repeat_ratio of them repeat an earlier one"""
+    rng = random.Random(seed)
+    payloads = []
+    for n in range(count):
+        if payloads and rng.random() < repeat_ratio:
+            payloads.append(rng.choice(payloads))
+        else:
+            payloads.append(make(n))
+    return payloads
+
+
+def incident_payloads(count, repeat_ratio=0.0, seed=0):
+    def make(n):
+        title, description = SAMPLE_INCIDENTS[n % len(SAMPLE_INCIDENTS)]
+        return {'title': f"{title} #{n}", 'description': description}
+    return _payloads(count, repeat_ratio, make, seed)
+
+
+def policy_payloads(count, repeat_ratio=0.0, seed=0):
+    return _payloads(count, repeat_ratio, lambda n: SAMPLE_POLICY_TEXT.format(n=n + 1), seed)
+
+
+def run_load(call, payloads, concurrency, fell_back=None):
+    """
+    Call call(payload) for every payload from `concurrency` threads.
+    fell_back(payload, result) tells whether a result is a fallback answer.
+    Returns wall time, throughput, latency summary, error and fallback counts.
+    """
+    def timed(payload):
+        started = time.perf_counter()
+        fallback = False
+        try:
+            result = call(payload)
+            error = None
+            fallback = bool(fell_back and fell_back(payload, result))
+        except Exception as e:
+            error = e
+        return time.perf_counter() - started, error, fallback
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="llm-bench") as pool:
+        outcomes = list(pool.map(timed, payloads))
+    wall = time.perf_counter() - started
+
+    latencies = [latency for latency, error, _ in outcomes if error is None]
+    return {
+        'requests': len(payloads),
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 3),
+        'throughput_per_second': round(len(payloads) / wall, 2) if wall > 0 else None,
+        'latency': latency_summary(latencies),
+        'errors': len(outcomes) - len(latencies),
+        'fallbacks': sum(1 for _, _, fallback in outcomes if fallback),
+    }
+
+
+def benchmark_incident_analysis(kind, requests, concurrency, backend, repeat_ratio=0.0):
+    cache_dir = tempfile.mkdtemp(prefix="incident-bench-")
+    try:
+        service = IncidentInferenceService(cache_dir=cache_dir, backend=backend)
+        if kind is SECURITY_ANALYSIS:
+            payloads = [
+                {'incident': f"Title: {p['title']}\n\nDescription: {p['description']}"}
+                for p in incident_payloads(requests, repeat_ratio)
+            ]
+        else:
+            payloads = incident_payloads(requests, repeat_ratio)
+        return run_load(lambda inputs: service.analyze(kind, inputs), payloads, concurrency,
+                        fell_back=lambda inputs, result: result == kind.fallback(inputs))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def benchmark_policy_extraction(requests, concurrency, backend, repeat_ratio=0.0):
+    cache_dir = tempfile.mkdtemp(prefix="policy-bench-")
+    try:
+        engine = PolicyExtractionEngine(concurrency=concurrency, cache_dir=cache_dir, backend=backend)
+        return run_load(engine.extract, policy_payloads(requests, repeat_ratio), concurrency)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+WORKLOADS = {
+    'incident_security': lambda *args, **kwargs: benchmark_incident_analysis(SECURITY_ANALYSIS, *args, **kwargs),
+    'incident_comprehensive': lambda *args, **kwargs: benchmark_incident_analysis(COMPREHENSIVE_ANALYSIS, *args, **kwargs),
+    'policy_extraction': benchmark_policy_extraction,
+}
+
+
+def run_benchmark(workloads=None, requests=50, concurrency_levels=(1, 4, 8), backend=None, repeat_ratio=0.0):
+    """
+    Benchmark each workload at each concurrency level.
+    Returns [{'workload', 'backend', 'concurrency', ...run_load results, 'model_calls', 'model_failures'}].
+    """
+    backend = backend or get_llm_backend()
+    results = []
+    for workload in workloads or list(WORKLOADS):
+        if workload not in WORKLOADS:
+            raise ValueError(f"Unknown workload: {workload}")
+        for concurrency in concurrency_levels:
+            before = backend.stats() if hasattr(backend, 'stats') else None
+            result = WORKLOADS[workload](requests, concurrency, backend, repeat_ratio=repeat_ratio)
+            row = {'workload': workload, 'backend': backend.name, **result}
+            if before is not None:
+                after = backend.stats()
+                row['model_calls'] = after['calls'] - before['calls']
+                row['model_failures'] = after['failures'] - before['failures']
+            results.append(row)
+    return results
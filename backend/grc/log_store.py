@@ -0,0 +1,250 @@
+"""
+Storage management and querying for the grc_logs audit trail
+
+On MySQL grc_logs is RANGE partitioned by month on TO_DAYS(Timestamp)
+(migration 0013), with partitions named pYYYYMM plus a catch-all pmax.
+Queries bounded by Timestamp only touch the partitions they need, and old
+months are removed by dropping their partition instead of deleting rows.
+
+archive_expired_logs writes every complete month older than the retention
+period to <GRC_LOG_ARCHIVE_DIR>/grc_logs_YYYY_MM.jsonl.gz and then drops the
+month's partition (or deletes its rows in batches where the table is not
+partitioned). ensure_future_partitions keeps GRC_LOG_PARTITION_MONTHS_AHEAD
+empty monthly partitions ahead of the current month. Both are run by
+`python manage.py manage_log_partitions`.
+
+The list API pages with an opaque keyset cursor over (Timestamp, LogId), so
+every page is an index range scan no matter how deep the reader goes.
+
+Settings:
+    GRC_LOG_RETENTION_DAYS           - days kept in the live table (default 365)
+    GRC_LOG_ARCHIVE_DIR              - directory of archived months (default BASE_DIR/log_archive)
+    GRC_LOG_PARTITION_MONTHS_AHEAD   - future partitions kept ready (default 3)
+"""
+
+import base64
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import GRCLog
+
+GRC_LOG_RETENTION_DAYS = getattr(settings, 'GRC_LOG_RETENTION_DAYS', 365)
+GRC_LOG_ARCHIVE_DIR = getattr(settings, 'GRC_LOG_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'log_archive'))
+GRC_LOG_PARTITION_MONTHS_AHEAD = getattr(settings, 'GRC_LOG_PARTITION_MONTHS_AHEAD', 3)
+
+LOG_PAGE_SIZE = 50
+LOG_MAX_PAGE_SIZE = 500
+ARCHIVE_CHUNK_SIZE = 5000
+
+# Query parameter -> GRCLog field, matched exactly (comma separated values allowed)
+LOG_EXACT_FILTERS = {
+    'module': 'Module',
+    'action_type': 'ActionType',
+    'entity_type': 'EntityType',
+    'log_level': 'LogLevel',
+    'user_id': 'UserId',
+    'entity_id': 'EntityId',
+}
+
+
+class InvalidLogCursor(ValueError):
+    pass
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def _table_is_partitioned(cursor):
+    if connection.vendor != 'mysql':
+        return False
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = 'grc_logs'
+          AND partition_name IS NOT NULL
+    """)
+    return cursor.fetchone()[0] > 0
+
+
+def list_partitions():
+    """Monthly partitions of grc_logs as [(name, month_start)], oldest first"""
+    with connection.cursor() as cursor:
+        if not _table_is_partitioned(cursor):
+            return []
+        cursor.execute("""
+            SELECT partition_name FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = 'grc_logs'
+            ORDER BY partition_ordinal_position
+        """)
+        partitions = []
+        for (name,) in cursor.fetchall():
+            if name and name != 'pmax':
+                partitions.append((name, datetime(int(name[1:5]), int(name[5:7]), 1)))
+        return partitions
+
+
+def ensure_future_partitions(months_ahead=GRC_LOG_PARTITION_MONTHS_AHEAD, now=None):
+    """Split pmax so that monthly partitions exist up to months_ahead. Returns the names added."""
+    partitions = list_partitions()
+    if not partitions:
+        return []
+
+    last_month = partitions[-1][1]
+    target = add_months(month_start(now or datetime.now()), months_ahead)
+    added = []
+    definitions = []
+    month = add_months(last_month, 1)
+    while month <= target:
+        upper = add_months(month, 1).strftime('%Y-%m-%d')
+        definitions.append(f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper}'))")
+        added.append(partition_name(month))
+        month = add_months(month, 1)
+
+    if definitions:
+        definitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE grc_logs REORGANIZE PARTITION pmax INTO ({', '.join(definitions)})")
+        print(f"Added grc_logs partitions: {', '.join(added)}")
+    return added
+
+
+def archive_path(month, archive_dir=None):
+    return os.path.join(archive_dir or GRC_LOG_ARCHIVE_DIR, f"grc_logs_{month.year:04d}_{month.month:02d}.jsonl.gz")
+
+
+def _month_rows(start, end):
+    """Rows logged in [start, end), read in LogId chunks; start=None means no lower bound"""
+    queryset = GRCLog.objects.filter(Timestamp__lt=end)
+    if start is not None:
+        queryset = queryset.filter(Timestamp__gte=start)
+    last_id = 0
+    while True:
+        chunk = list(
+            queryset.filter(LogId__gt=last_id).order_by('LogId').values()[:ARCHIVE_CHUNK_SIZE]
+        )
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1]['LogId']
+
+
+def archive_month(month, archive_dir=None):
+    """
+    Write one month of logs to a gzip JSON-lines file, then remove the month
+    from the live table. Returns the number of rows archived.
+    """
+    start, end = month_start(month), add_months(month_start(month), 1)
+    path = archive_path(start, archive_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    partitions = [name for name, _ in list_partitions()]
+    name = partition_name(start)
+    # The first partition also holds anything older than its month
+    rows_from = None if partitions and partitions[0] == name else start
+
+    # Write to a temporary name first so a crash never leaves a truncated archive
+    tmp_path = f"{path}.tmp"
+    archived = 0
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as archive:
+        for row in _month_rows(rows_from, end):
+            archive.write(json.dumps(row, default=str) + '\n')
+            archived += 1
+    if archived:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
+
+    if name in partitions:
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE grc_logs DROP PARTITION {name}")
+    else:
+        while True:
+            ids = list(
+                GRCLog.objects.filter(Timestamp__gte=start, Timestamp__lt=end)
+                .values_list('LogId', flat=True)[:ARCHIVE_CHUNK_SIZE]
+            )
+            if not ids:
+                break
+            GRCLog.objects.filter(LogId__in=ids).delete()
+
+    print(f"Archived {archived} logs from {start:%Y-%m} to {path}")
+    return archived
+
+
+def archive_expired_logs(retention_days=GRC_LOG_RETENTION_DAYS, archive_dir=None, now=None):
+    """Archive every complete month older than retention_days. Returns {month: rows}."""
+    cutoff = month_start((now or datetime.now()) - timedelta(days=retention_days))
+    oldest = GRCLog.objects.order_by('Timestamp').values_list('Timestamp', flat=True).first()
+    months = [month for _, month in list_partitions() if month < cutoff]
+    if oldest is not None:
+        month = month_start(oldest)
+        while month < cutoff:
+            if month not in months:
+                months.append(month)
+            month = add_months(month, 1)
+
+    return {
+        month.strftime('%Y-%m'): archive_month(month, archive_dir)
+        for month in sorted(months)
+    }
+
+
+def encode_log_cursor(log):
+    raw = f"{log.Timestamp.isoformat()}|{log.LogId}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_log_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        timestamp, log_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidLogCursor(f"Invalid cursor: {cursor}") from e
+
+
+def filter_logs(params):
+    """GRCLog queryset for the list API filters, newest first"""
+    queryset = GRCLog.objects.all()
+    for param, field in LOG_EXACT_FILTERS.items():
+        value = params.get(param)
+        if value:
+            values = [v.strip() for v in value.split(',') if v.strip()]
+            if len(values) == 1:
+                queryset = queryset.filter(**{field: values[0]})
+            elif values:
+                queryset = queryset.filter(**{f"{field}__in": values})
+
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if start_date:
+        queryset = queryset.filter(Timestamp__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(Timestamp__lte=end_date)
+    return queryset.order_by('-Timestamp', '-LogId')
+
+
+def paginate_logs(queryset, cursor=None, limit=LOG_PAGE_SIZE):
+    """One page of a filter_logs queryset, continuing after cursor. Returns (logs, next_cursor)."""
+    if cursor:
+        timestamp, log_id = decode_log_cursor(cursor)
+        queryset = queryset.filter(Q(Timestamp__lt=timestamp) | Q(Timestamp=timestamp, LogId__lt=log_id))
+
+    logs = list(queryset[:limit + 1])
+    next_cursor = encode_log_cursor(logs[limit - 1]) if len(logs) > limit else None
+    return logs[:limit], next_cursor
@@ -1,32 +1,208 @@
+"""
+Audit log writer behind send_log
+
+send_log builds a GRCLog row and hands it to AuditLogWriter, which keeps rows
+in a bounded in-memory buffer. A background flusher writes them with
+bulk_create once GRC_LOG_BATCH_SIZE rows are waiting or every
+GRC_LOG_FLUSH_INTERVAL_SECONDS, and the buffer is flushed at interpreter exit.
+The request thread never waits for the INSERT.
+
+When the buffer is full GRC_LOG_OVERFLOW_POLICY decides what happens:
+    drop_oldest  - discard the oldest buffered row (ring buffer, default)
+    drop_newest  - discard the new row
+    sync         - write the new row immediately in the calling thread
+
+Settings:
+    GRC_LOG_BUFFERED                - buffer writes (default True); False writes every row immediately
+    GRC_LOG_BUFFER_CAPACITY         - rows held in memory (default 10000)
+    GRC_LOG_BATCH_SIZE              - rows per bulk_create (default 200)
+    GRC_LOG_FLUSH_INTERVAL_SECONDS  - maximum delay before a row is written (default 1.0)
+    GRC_LOG_OVERFLOW_POLICY         - see above
+"""
+
+import atexit
+import os
+import threading
+from collections import deque
+
 import requests
+from django.conf import settings
+from django.db import close_old_connections
 from django.utils import timezone
 
 LOGGING_SERVICE_URL = None  # Disabled external logging service
 
+GRC_LOG_BUFFERED = getattr(settings, 'GRC_LOG_BUFFERED', True)
+GRC_LOG_BUFFER_CAPACITY = getattr(settings, 'GRC_LOG_BUFFER_CAPACITY', 10000)
+GRC_LOG_BATCH_SIZE = getattr(settings, 'GRC_LOG_BATCH_SIZE', 200)
+GRC_LOG_FLUSH_INTERVAL_SECONDS = getattr(settings, 'GRC_LOG_FLUSH_INTERVAL_SECONDS', 1.0)
+GRC_LOG_OVERFLOW_POLICY = getattr(settings, 'GRC_LOG_OVERFLOW_POLICY', 'drop_oldest')
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'sync')
+
+
+class AuditLogWriter:
+    """Bounded buffer of unsaved GRCLog rows with a background bulk_create flusher"""
+
+    def __init__(self, capacity=GRC_LOG_BUFFER_CAPACITY, batch_size=GRC_LOG_BATCH_SIZE,
+                 flush_interval=GRC_LOG_FLUSH_INTERVAL_SECONDS, overflow_policy=GRC_LOG_OVERFLOW_POLICY):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def submit(self, entry):
+        """Buffer an unsaved GRCLog; returns False if the row was dropped"""
+        write_now = False
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                if self.overflow_policy == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                if self.overflow_policy == 'sync':
+                    write_now = True
+                else:
+                    self._buffer.popleft()
+                    self.dropped += 1
+            if not write_now:
+                self._buffer.append(entry)
+                if len(self._buffer) >= self.batch_size:
+                    self._ready.notify()
+
+        if write_now:
+            self._write([entry])
+        else:
+            self._ensure_flusher()
+        return True
+
+    def _ensure_flusher(self):
+        # A forked worker inherits the buffer but not the thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="grc-log-flusher", daemon=True)
+            self._thread.start()
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(len(self._buffer), self.batch_size)
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _write(self, batch):
+        from .models import GRCLog
+        try:
+            GRCLog.objects.bulk_create(batch)
+            written, failed = len(batch), 0
+        except Exception as e:
+            print(f"Error saving {len(batch)} logs to database: {str(e)}")
+            # Save row by row so one bad row does not lose the batch
+            written, failed = 0, 0
+            for entry in batch:
+                try:
+                    entry.save()
+                    written += 1
+                except Exception as row_error:
+                    print(f"Error saving log to database: {str(row_error)}")
+                    failed += 1
+        with self._lock:
+            self.written += written
+            self.failed += failed
+            self.flushes += 1
+
+    def flush(self):
+        """Write everything buffered so far in the calling thread"""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def _run(self):
+        while not self._stopping:
+            with self._ready:
+                if len(self._buffer) < self.batch_size:
+                    self._ready.wait(self.flush_interval)
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                print(f"Log flusher error: {str(e)}")
+            finally:
+                close_old_connections()
+
+    def shutdown(self):
+        """Stop the flusher and write the remaining rows"""
+        with self._lock:
+            self._stopping = True
+            self._ready.notify_all()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'buffered': len(self._buffer),
+                'capacity': self.capacity,
+                'batch_size': self.batch_size,
+                'overflow_policy': self.overflow_policy,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'flushes': self.flushes,
+            }
+
+
+log_writer = AuditLogWriter()
+atexit.register(log_writer.shutdown)
+
+
 def send_log(module, actionType, description=None, userId=None, userName=None,
              userRole=None, entityType=None, logLevel='INFO', ipAddress=None,
-             additionalInfo=None, entityId=None):
+             additionalInfo=None, entityId=None, synchronous=False):
+    """
+    Record an audit log entry. Entries are buffered and written in batches;
+    pass synchronous=True to write immediately and get the new LogId back.
+    """
     from .models import GRCLog  # Lazy import to avoid circular import
     # Create log entry in database
     try:
         # Prepare data for GRCLog model
         log_data = {
+            'Timestamp': timezone.now(),
             'Module': module,
             'ActionType': actionType,
             'Description': description,
-            'UserId': userId,
+            'UserId': str(userId) if userId is not None else None,
             'UserName': userName,
             'EntityType': entityType,
-            'EntityId': entityId,
+            'EntityId': str(entityId) if entityId is not None else None,
             'LogLevel': logLevel,
             'IPAddress': ipAddress,
             'AdditionalInfo': additionalInfo
         }
         # Remove None values
         log_data = {k: v for k, v in log_data.items() if v is not None}
-        # Create and save the log entry
         log_entry = GRCLog(**log_data)
-        log_entry.save()
+
+        if synchronous or not GRC_LOG_BUFFERED:
+            log_entry.save()
+        else:
+            log_writer.submit(log_entry)
+
         # Optionally still send to logging service if needed
         try:
             if LOGGING_SERVICE_URL:
@@ -50,19 +226,18 @@ def send_log(module, actionType, description=None, userId=None, userName=None,
                     print(f"Failed to send log to service: {response.text}")
         except Exception as e:
             print(f"Error sending log to service: {str(e)}")
-        return log_entry.LogId  # Return the ID of the created log
+        return log_entry.LogId  # ID of the created log; None until a buffered entry is flushed
     except Exception as e:
         print(f"Error saving log to database: {str(e)}")
         # Try to capture the error itself
         try:
-            from .models import GRCLog
-            error_log = GRCLog(
+            log_writer.submit(GRCLog(
+                Timestamp=timezone.now(),
                 Module=module,
                 ActionType='LOG_ERROR',
                 Description=f"Error logging {actionType} on {module}: {str(e)}",
                 LogLevel='ERROR'
-            )
-            error_log.save()
+            ))
         except:
             pass  # If we can't even log the error, just continue
-        return None 
\ No newline at end of file
+        return None
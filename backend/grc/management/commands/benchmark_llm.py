@@ -0,0 +1,73 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from grc.llm_backend import FakeLLMBackend, get_llm_backend, LLM_BACKENDS, GRC_LLM_BACKEND
+from grc.llm_benchmark import run_benchmark, WORKLOADS
+
+class Command(BaseCommand):
+    help = 'Measures throughput and p50/p95 latency of incident analysis and policy extraction under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', choices=sorted(LLM_BACKENDS), default=GRC_LLM_BACKEND,
+                            help='LLM backend to benchmark')
+        parser.add_argument('--workload', action='append', choices=sorted(WORKLOADS),
+                            help='Workload to run; repeat for several (default all)')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Requests per workload and concurrency level')
+        parser.add_argument('--concurrency', default='1,4,8',
+                            help='Comma separated numbers of concurrent callers')
+        parser.add_argument('--repeat-ratio', type=float, default=0.0,
+                            help='Share of requests repeating an earlier payload (result cache hits)')
+        parser.add_argument('--latency', type=float, default=None,
+                            help='Fake backend: base seconds per model call')
+        parser.add_argument('--jitter', type=float, default=None,
+                            help='Fake backend: extra random seconds per model call')
+        parser.add_argument('--failure-rate', type=float, default=None,
+                            help='Fake backend: share of model calls that fail')
+        parser.add_argument('--json', dest='json_path',
+                            help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        try:
+            concurrency_levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError(f"Invalid --concurrency: {options['concurrency']}")
+
+        if options['backend'] == 'fake':
+            fake = FakeLLMBackend()
+            for option, attribute in (('latency', 'latency_seconds'), ('jitter', 'jitter_seconds'),
+                                      ('failure_rate', 'failure_rate')):
+                if options[option] is not None:
+                    setattr(fake, attribute, options[option])
+            backend = fake
+        else:
+            backend = get_llm_backend(options['backend'])
+            if not backend.available():
+                raise CommandError(f"LLM backend '{options['backend']}' is not available")
+
+        results = run_benchmark(
+            workloads=options['workload'],
+            requests=options['requests'],
+            concurrency_levels=concurrency_levels,
+            backend=backend,
+            repeat_ratio=options['repeat_ratio'],
+        )
+
+        self.stdout.write(
+            f"{'workload':<24}{'conc':>5}{'req/s':>9}{'p50':>8}{'p95':>8}{'max':>8}"
+            f"{'errors':>8}{'fallbk':>8}{'calls':>7}{'failed':>8}"
+        )
+        for row in results:
+            latency = row['latency']
+            self.stdout.write(
+                f"{row['workload']:<24}{row['concurrency']:>5}{row['throughput_per_second'] or 0:>9}"
+                f"{latency.get('p50', '-'):>8}{latency.get('p95', '-'):>8}{latency.get('max', '-'):>8}"
+                f"{row['errors']:>8}{row['fallbacks']:>8}"
+                f"{row.get('model_calls', '-'):>7}{row.get('model_failures', '-'):>8}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from grc.audit_version_store import compact_all
+import time
+
+class Command(BaseCommand):
+    help = 'Rewrites older audit_version rows as JSON-patch deltas against periodic full snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--audit', type=int, action='append', dest='audit_ids',
+                            help='Audit to compact; repeat for several (default all)')
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        totals, changed = compact_all(audit_ids=options['audit_ids'])
+        elapsed = time.time() - start_time
+
+        for result in changed:
+            self.stdout.write(
+                f"audit {result['audit_id']}: {result['compacted']} of {result['versions']} versions, "
+                f"{result['bytes_before']} -> {result['bytes_after']} bytes"
+            )
+        self.stdout.write(
+            f"{totals['audits']} audits, {totals['compacted']} versions compacted, "
+            f"{totals['bytes_before'] - totals['bytes_after']} bytes saved, {totals['errors']} errors"
+        )
+        self.stdout.write(self.style.SUCCESS(f'Audit versions compacted in {elapsed:.2f} seconds'))
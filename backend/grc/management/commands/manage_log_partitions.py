@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from grc.log_store import (
+    archive_expired_logs, ensure_future_partitions,
+    GRC_LOG_RETENTION_DAYS, GRC_LOG_ARCHIVE_DIR, GRC_LOG_PARTITION_MONTHS_AHEAD,
+)
+
+class Command(BaseCommand):
+    help = 'Archives grc_logs months past the retention period to gzip files and creates upcoming monthly partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=GRC_LOG_RETENTION_DAYS,
+                            help='Days of logs kept in the live table')
+        parser.add_argument('--archive-dir', default=GRC_LOG_ARCHIVE_DIR,
+                            help='Directory the archived months are written to')
+        parser.add_argument('--months-ahead', type=int, default=GRC_LOG_PARTITION_MONTHS_AHEAD,
+                            help='Future monthly partitions to keep ready')
+        parser.add_argument('--skip-archive', action='store_true',
+                            help='Only create upcoming partitions')
+
+    def handle(self, *args, **options):
+        if not options['skip_archive']:
+            archived = archive_expired_logs(options['retention_days'], options['archive_dir'])
+            total = sum(archived.values())
+            self.stdout.write(f"Archived {total} logs from {len(archived)} months")
+
+        added = ensure_future_partitions(options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(f"Partitions added: {', '.join(added) or 'none'}"))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from grc.export_cache import purge_expired_exports
+
+class Command(BaseCommand):
+    help = 'Deletes expired cached export artifacts from S3 and local storage'
+
+    def handle(self, *args, **kwargs):
+        purged = purge_expired_exports()
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired export artifacts'))
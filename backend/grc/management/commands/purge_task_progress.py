@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from grc.task_progress import purge_expired_task_progress
+
+class Command(BaseCommand):
+    help = 'Deletes expired ingestion task progress rows'
+
+    def handle(self, *args, **kwargs):
+        deleted = purge_expired_task_progress()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired task progress rows'))
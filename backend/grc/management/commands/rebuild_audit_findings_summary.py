@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from grc.audit_summary import rebuild_findings_summaries
+import time
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-audit findings summary used by the audit list from the audit_findings table'
+
+    def handle(self, *args, **kwargs):
+        start_time = time.time()
+        count = rebuild_findings_summaries()
+        elapsed = time.time() - start_time
+
+        self.stdout.write(f'audit_findings_summary: {count} rows')
+        self.stdout.write(self.style.SUCCESS(f'Findings summary rebuilt in {elapsed:.2f} seconds'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from grc.kpi_rollups import rebuild_all_rollups
+import time
+
+class Command(BaseCommand):
+    help = 'Rebuilds the audit KPI rollup tables from the audit and audit_findings tables'
+
+    def handle(self, *args, **kwargs):
+        start_time = time.time()
+        counts = rebuild_all_rollups()
+        elapsed = time.time() - start_time
+
+        for table, count in counts.items():
+            self.stdout.write(f'{table}: {count} rows')
+        self.stdout.write(self.style.SUCCESS(f'KPI rollups rebuilt in {elapsed:.2f} seconds'))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from grc.export_jobs import ExportWorkerPool, EXPORT_WORKER_COUNT, EXPORT_MAX_JOBS_PER_USER
+from grc.models import ExportTask
+
+class Command(BaseCommand):
+    help = 'Runs a pool of export workers that process queued background export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=EXPORT_WORKER_COUNT,
+                            help='Number of worker threads')
+        parser.add_argument('--max-jobs-per-user', type=int, default=EXPORT_MAX_JOBS_PER_USER,
+                            help='Jobs of one user that may run at the same time')
+        parser.add_argument('--fail-stale-minutes', type=int, default=None,
+                            help='Mark jobs stuck in processing for longer than this as failed before starting')
+
+    def handle(self, *args, **options):
+        if options['fail_stale_minutes'] is not None:
+            cutoff = timezone.now() - timedelta(minutes=options['fail_stale_minutes'])
+            stale = ExportTask.objects.filter(
+                status='processing', job_type__isnull=False, started_at__lt=cutoff
+            ).update(status='failed', error='Worker stopped while the job was running')
+            self.stdout.write(f'Marked {stale} stale export jobs as failed')
+
+        pool = ExportWorkerPool(
+            worker_count=options['workers'],
+            max_jobs_per_user=options['max_jobs_per_user'],
+        )
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(f"Export worker started with {options['workers']} threads"))
+
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping export workers after their current jobs...')
+            pool.stop()
+            pool.join()
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from grc.models import NotificationOutbox
+from grc.notification_outbox import NotificationDispatcher, NOTIFICATION_OUTBOX_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Sends queued notifications from the notification outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=NOTIFICATION_OUTBOX_BATCH_SIZE,
+                            help='Rows claimed per batch')
+        parser.add_argument('--requeue-stale-minutes', type=int, default=None,
+                            help='Return rows stuck in processing for longer than this to the queue before starting')
+
+    def handle(self, *args, **options):
+        if options['requeue_stale_minutes'] is not None:
+            cutoff = timezone.now() - timedelta(minutes=options['requeue_stale_minutes'])
+            stale = NotificationOutbox.objects.filter(
+                status='processing', next_attempt_at__lt=cutoff
+            ).update(status='pending', claim_token=None)
+            self.stdout.write(f'Requeued {stale} stale notifications')
+
+        dispatcher = NotificationDispatcher(batch_size=options['batch_size'])
+        dispatcher.start()
+        self.stdout.write(self.style.SUCCESS('Notification dispatcher started'))
+
+        try:
+            dispatcher.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping notification dispatcher after the current batch...')
+            dispatcher.stop()
+            dispatcher.join()
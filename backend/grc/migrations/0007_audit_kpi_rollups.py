@@ -0,0 +1,78 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0006_merge_0004_fix_report_fields_0005_merge_20250601_2321"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditKpiDailyRollup",
+            fields=[
+                ("Id", models.AutoField(primary_key=True, serialize=False)),
+                ("Day", models.DateField()),
+                ("FrameworkId", models.IntegerField()),
+                ("PlannedCount", models.IntegerField(default=0)),
+                ("CompletedCount", models.IntegerField(default=0)),
+                ("CycleDaysTotal", models.IntegerField(default=0)),
+                ("CycleCount", models.IntegerField(default=0)),
+                ("UpdatedAt", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "audit_kpi_daily_rollup",
+                "unique_together": {("Day", "FrameworkId")},
+            },
+        ),
+        migrations.CreateModel(
+            name="AuditKpiMonthlyRollup",
+            fields=[
+                ("Id", models.AutoField(primary_key=True, serialize=False)),
+                ("Month", models.DateField()),
+                ("FrameworkId", models.IntegerField()),
+                ("PlannedCount", models.IntegerField(default=0)),
+                ("CompletedCount", models.IntegerField(default=0)),
+                ("CycleDaysTotal", models.IntegerField(default=0)),
+                ("CycleCount", models.IntegerField(default=0)),
+                ("UpdatedAt", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "audit_kpi_monthly_rollup",
+                "unique_together": {("Month", "FrameworkId")},
+            },
+        ),
+        migrations.CreateModel(
+            name="AuditFindingKpiDailyRollup",
+            fields=[
+                ("Id", models.AutoField(primary_key=True, serialize=False)),
+                ("Day", models.DateField()),
+                ("AuditId", models.IntegerField()),
+                ("NonCompliantCount", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "audit_finding_kpi_daily_rollup",
+                "unique_together": {("Day", "AuditId")},
+                "indexes": [
+                    models.Index(fields=["AuditId"], name="audit_findi_AuditId_kpi_idx"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="AuditFindingCloseDailyRollup",
+            fields=[
+                ("Id", models.AutoField(primary_key=True, serialize=False)),
+                ("Day", models.DateField()),
+                ("AuditId", models.IntegerField()),
+                ("ClosedCount", models.IntegerField(default=0)),
+                ("CloseDaysTotal", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "audit_finding_close_daily_rollup",
+                "unique_together": {("Day", "AuditId")},
+                "indexes": [
+                    models.Index(fields=["AuditId"], name="audit_findi_AuditId_cls_idx"),
+                ],
+            },
+        ),
+    ]
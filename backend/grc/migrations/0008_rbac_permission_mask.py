@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+from grc.rbac.permission_set import permission_mask_sql
+
+
+def backfill_permission_mask(apps, schema_editor):
+    # Computed in the database: the historical RBAC model does not have the permission columns
+    quote_name = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote_name('rbac')} SET {quote_name('PermissionMask')} = {permission_mask_sql(quote_name)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0007_audit_kpi_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="rbac",
+            name="permission_mask",
+            field=models.BigIntegerField(db_column="PermissionMask", db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_permission_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0008_rbac_permission_mask"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="exporttask",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("queued", "Queued"),
+                    ("processing", "Processing"),
+                    ("completed", "Completed"),
+                    ("failed", "Failed"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="job_type",
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="priority",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="processed_rows",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="total_rows",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="attempts",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="cancel_requested",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="exporttask",
+            index=models.Index(fields=["status", "priority"], name="exported_fi_status_prio_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="exporttask",
+            index=models.Index(fields=["user_id", "status"], name="exported_fi_user_status_idx"),
+        ),
+    ]
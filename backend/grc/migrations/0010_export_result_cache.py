@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0009_export_job_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="compliance",
+            name="UpdatedAt",
+            field=models.DateTimeField(auto_now=True, blank=True, db_column="UpdatedAt", null=True),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="cache_key",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="exporttask",
+            name="expires_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
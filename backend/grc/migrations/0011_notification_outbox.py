@@ -0,0 +1,50 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0010_export_result_cache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationOutbox",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("notification_type", models.CharField(max_length=100)),
+                ("channel", models.CharField(max_length=20)),
+                ("recipient", models.CharField(max_length=255)),
+                ("email_type", models.CharField(blank=True, max_length=20, null=True)),
+                ("template_data", models.JSONField(blank=True, null=True)),
+                ("dedupe_key", models.CharField(db_index=True, max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("sent", "Sent"),
+                            ("coalesced", "Coalesced"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("next_attempt_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("claim_token", models.CharField(blank=True, db_index=True, max_length=32, null=True)),
+                ("last_error", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "notification_outbox",
+                "indexes": [
+                    models.Index(fields=["status", "next_attempt_at"], name="notif_outbox_status_due_idx"),
+                ],
+            },
+        ),
+    ]
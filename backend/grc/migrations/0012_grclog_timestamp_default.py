@@ -0,0 +1,17 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0011_notification_outbox"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="grclog",
+            name="Timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
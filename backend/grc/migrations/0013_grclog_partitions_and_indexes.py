@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from django.db import migrations, models
+
+
+def _add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_grc_logs(apps, schema_editor):
+    """
+    Range partition grc_logs by month (MySQL only). The partitioning column has
+    to be part of every unique key, so the primary key becomes (LogId, Timestamp);
+    LogId stays AUTO_INCREMENT and unique.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(Timestamp) FROM grc_logs")
+        oldest = cursor.fetchone()[0] or datetime.now()
+
+    month = datetime(oldest.year, oldest.month, 1)
+    last_month = _add_months(datetime.now().replace(day=1), 3)
+    partitions = []
+    while month <= last_month:
+        upper = _add_months(month, 1)
+        partitions.append(
+            f"PARTITION p{month.year:04d}{month.month:02d} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+        )
+        month = upper
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+    schema_editor.execute("ALTER TABLE grc_logs DROP PRIMARY KEY, ADD PRIMARY KEY (LogId, Timestamp)")
+    schema_editor.execute(
+        f"ALTER TABLE grc_logs PARTITION BY RANGE (TO_DAYS(Timestamp)) ({', '.join(partitions)})"
+    )
+
+
+def unpartition_grc_logs(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute("ALTER TABLE grc_logs REMOVE PARTITIONING")
+    schema_editor.execute("ALTER TABLE grc_logs DROP PRIMARY KEY, ADD PRIMARY KEY (LogId)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0012_grclog_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_grc_logs, unpartition_grc_logs),
+        migrations.AddIndex(
+            model_name="grclog",
+            index=models.Index(fields=["Timestamp", "LogId"], name="grc_logs_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="grclog",
+            index=models.Index(fields=["Module", "Timestamp"], name="grc_logs_module_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="grclog",
+            index=models.Index(fields=["ActionType", "Timestamp"], name="grc_logs_action_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="grclog",
+            index=models.Index(fields=["EntityType", "Timestamp"], name="grc_logs_entity_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="grclog",
+            index=models.Index(fields=["UserId", "Timestamp"], name="grc_logs_user_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="grclog",
+            index=models.Index(fields=["LogLevel", "Timestamp"], name="grc_logs_level_ts_idx"),
+        ),
+    ]
@@ -0,0 +1,42 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0013_grclog_partitions_and_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskProgress",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("task_id", models.CharField(max_length=255)),
+                ("kind", models.CharField(max_length=50)),
+                ("progress", models.IntegerField(default=0)),
+                ("message", models.TextField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("version", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "db_table": "task_progress",
+                "unique_together": {("task_id", "kind")},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0014_task_progress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FileScanVerdict",
+            fields=[
+                ("scan_id", models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ("sha256", models.CharField(max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("clean", "Clean"),
+                            ("infected", "Infected"),
+                            ("error", "Error"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("reason", models.TextField(blank=True, null=True)),
+                ("scanner", models.CharField(blank=True, max_length=50, null=True)),
+                ("original_filename", models.CharField(max_length=255)),
+                ("stored_filename", models.CharField(max_length=255)),
+                ("file_size", models.BigIntegerField(default=0)),
+                ("metadata", models.JSONField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("scanned_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "file_scan_verdicts",
+                "indexes": [
+                    models.Index(fields=["sha256", "status"], name="file_scan_sha_status_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0015_file_scan_verdicts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="s3file",
+            name="content_sha256",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0016_s3file_content_sha256"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditVersionHead",
+            fields=[
+                ("AuditId", models.IntegerField(primary_key=True, serialize=False)),
+                ("LatestVersion", models.CharField(blank=True, max_length=45, null=True)),
+                ("LatestAuditorVersion", models.CharField(blank=True, max_length=45, null=True)),
+                ("LatestReviewerVersion", models.CharField(blank=True, max_length=45, null=True)),
+                ("NextAuditorNumber", models.IntegerField(default=1)),
+                ("NextReviewerNumber", models.IntegerField(default=1)),
+                ("UpdatedAt", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "audit_version_head",
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+
+# The counting is inlined so the migration keeps working when grc.audit_summary changes
+BACKFILL_SQL = """
+    INSERT INTO audit_findings_summary
+        (AuditId, TotalFindings, CheckedFindings, CompletedFindings, Status, UpdatedAt)
+    SELECT a.AuditId,
+           COALESCE(f.total, 0),
+           COALESCE(f.checked, 0),
+           COALESCE(f.completed, 0),
+           CASE WHEN COALESCE(f.total, 0) = 0 THEN 'Yet to Start'
+                WHEN f.completed = f.total THEN 'Completed'
+                ELSE 'Work In progress' END,
+           CURRENT_TIMESTAMP
+    FROM audit a
+    LEFT JOIN (
+        SELECT AuditId,
+               COUNT(*) AS total,
+               SUM(CASE WHEN `Check` <> '0' THEN 1 ELSE 0 END) AS checked,
+               SUM(CASE WHEN `Check` = '2' THEN 1 ELSE 0 END) AS completed
+        FROM audit_findings
+        GROUP BY AuditId
+    ) f ON f.AuditId = a.AuditId
+"""
+
+
+def backfill_findings_summary(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(BACKFILL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grc", "0017_audit_version_head"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditFindingsSummary",
+            fields=[
+                ("AuditId", models.IntegerField(primary_key=True, serialize=False)),
+                ("TotalFindings", models.IntegerField(default=0)),
+                ("CheckedFindings", models.IntegerField(default=0)),
+                ("CompletedFindings", models.IntegerField(default=0)),
+                ("Status", models.CharField(db_index=True, default="Yet to Start", max_length=45)),
+                ("UpdatedAt", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "audit_findings_summary",
+            },
+        ),
+        migrations.RunPython(backfill_findings_summary, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 
 
 from django.contrib.auth.models import User
+from django.utils import timezone
 
  
 # Users model (Django built-in User model is used)
@@ -234,6 +235,8 @@ class Compliance(models.Model):
     ], null=True, blank=True)
     RiskCategory = models.CharField(max_length=45, null=True, blank=True)
     RiskBusinessImpact = models.CharField(max_length=45, null=True, blank=True)
+    # Data-version watermark for the export cache (export_cache.py)
+    UpdatedAt = models.DateTimeField(auto_now=True, null=True, blank=True, db_column='UpdatedAt')
     class Meta:
         db_table = 'compliance'
 
@@ -252,9 +255,11 @@ class ExportTask(models.Model):
         max_length=20,
         choices=[
             ('pending', 'Pending'),
+            ('queued', 'Queued'),
             ('processing', 'Processing'),
             ('completed', 'Completed'),
-            ('failed', 'Failed')
+            ('failed', 'Failed'),
+            ('cancelled', 'Cancelled')
         ],
         default='pending'
     )
@@ -264,8 +269,25 @@ class ExportTask(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    # Background job fields, used by export_jobs.py
+    job_type = models.CharField(max_length=50, null=True, blank=True)
+    priority = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    total_rows = models.IntegerField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+
+    # Export result cache fields, used by export_cache.py
+    cache_key = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
     class Meta:
         db_table = 'exported_files'
+        indexes = [
+            models.Index(fields=['status', 'priority'], name='exported_fi_status_prio_idx'),
+            models.Index(fields=['user_id', 'status'], name='exported_fi_user_status_idx'),
+        ]
 
 
 
@@ -434,6 +456,7 @@ class Workflow(models.Model):
 class AuditVersion(models.Model):
     AuditId = models.IntegerField()
     Version = models.CharField(max_length=45)
+    # Full findings JSON, or a {"__delta__": ...} patch written by audit_version_store compaction
     ExtractedInfo = models.JSONField()
     UserId = models.IntegerField()
     ApprovedRejected = models.CharField(max_length=45, null=True, blank=True)
@@ -446,7 +469,90 @@ class AuditVersion(models.Model):
 
     def __str__(self):
         return f"AuditVersion(AuditId={self.AuditId}, Version={self.Version})"
-    
+
+
+class AuditVersionHead(models.Model):
+    """Latest versions and next version numbers of an audit, maintained by audit_version_head.py"""
+    AuditId = models.IntegerField(primary_key=True)
+    LatestVersion = models.CharField(max_length=45, null=True, blank=True)
+    LatestAuditorVersion = models.CharField(max_length=45, null=True, blank=True)
+    LatestReviewerVersion = models.CharField(max_length=45, null=True, blank=True)
+    NextAuditorNumber = models.IntegerField(default=1)
+    NextReviewerNumber = models.IntegerField(default=1)
+    UpdatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'audit_version_head'
+
+
+class AuditFindingsSummary(models.Model):
+    """Finding counts and derived status of an audit, maintained by audit_summary.py"""
+    AuditId = models.IntegerField(primary_key=True)
+    TotalFindings = models.IntegerField(default=0)
+    CheckedFindings = models.IntegerField(default=0)  # Check other than '0' (Not Started)
+    CompletedFindings = models.IntegerField(default=0)  # Check = '2'
+    Status = models.CharField(max_length=45, default='Yet to Start', db_index=True)
+    UpdatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'audit_findings_summary'
+
+
+# KPI rollup models - pre-aggregated audit metrics maintained by kpi_rollups.py
+class AuditKpiDailyRollup(models.Model):
+    Id = models.AutoField(primary_key=True)
+    Day = models.DateField()  # Day of the audit's AssignedDate
+    FrameworkId = models.IntegerField()
+    PlannedCount = models.IntegerField(default=0)
+    CompletedCount = models.IntegerField(default=0)
+    CycleDaysTotal = models.IntegerField(default=0)  # Sum of DATEDIFF(CompletionDate, AssignedDate)
+    CycleCount = models.IntegerField(default=0)  # Completed audits with a CompletionDate
+    UpdatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'audit_kpi_daily_rollup'
+        unique_together = ('Day', 'FrameworkId')
+
+
+class AuditKpiMonthlyRollup(models.Model):
+    Id = models.AutoField(primary_key=True)
+    Month = models.DateField()  # First day of the month
+    FrameworkId = models.IntegerField()
+    PlannedCount = models.IntegerField(default=0)
+    CompletedCount = models.IntegerField(default=0)
+    CycleDaysTotal = models.IntegerField(default=0)
+    CycleCount = models.IntegerField(default=0)
+    UpdatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'audit_kpi_monthly_rollup'
+        unique_together = ('Month', 'FrameworkId')
+
+
+class AuditFindingKpiDailyRollup(models.Model):
+    Id = models.AutoField(primary_key=True)
+    Day = models.DateField()  # Day of the finding's AssignedDate
+    AuditId = models.IntegerField()
+    NonCompliantCount = models.IntegerField(default=0)  # Findings with Check = '0'
+
+    class Meta:
+        db_table = 'audit_finding_kpi_daily_rollup'
+        unique_together = ('Day', 'AuditId')
+        indexes = [models.Index(fields=['AuditId'], name='audit_findi_AuditId_kpi_idx')]
+
+
+class AuditFindingCloseDailyRollup(models.Model):
+    Id = models.AutoField(primary_key=True)
+    Day = models.DateField()  # Day of the finding's ReviewDate
+    AuditId = models.IntegerField()
+    ClosedCount = models.IntegerField(default=0)  # Findings with Check = '2'
+    CloseDaysTotal = models.IntegerField(default=0)  # Sum of DATEDIFF(ReviewDate, AssignedDate)
+
+    class Meta:
+        db_table = 'audit_finding_close_daily_rollup'
+        unique_together = ('Day', 'AuditId')
+        indexes = [models.Index(fields=['AuditId'], name='audit_findi_AuditId_cls_idx')]
+
 
 
 
@@ -463,6 +569,97 @@ class Notification(models.Model):
         db_table = 'notifications'
 
 
+class NotificationOutbox(models.Model):
+    """Queued notification for one channel, sent by notification_outbox.NotificationDispatcher"""
+    id = models.AutoField(primary_key=True)
+    notification_type = models.CharField(max_length=100)
+    channel = models.CharField(max_length=20)  # 'email' or 'whatsapp'
+    recipient = models.CharField(max_length=255)
+    email_type = models.CharField(max_length=20, null=True, blank=True)
+    template_data = models.JSONField(null=True, blank=True)
+    dedupe_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('pending', 'Pending'),
+            ('processing', 'Processing'),
+            ('sent', 'Sent'),
+            ('coalesced', 'Coalesced'),
+            ('failed', 'Failed')
+        ],
+        default='pending'
+    )
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, null=True, blank=True, db_index=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'notification_outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notif_outbox_status_due_idx'),
+        ]
+
+
+class TaskProgress(models.Model):
+    """Progress of a background ingestion task, shared by every worker process (see task_progress.py)"""
+    id = models.AutoField(primary_key=True)
+    task_id = models.CharField(max_length=255)
+    kind = models.CharField(max_length=50)  # 'framework' or 'policy_extraction'
+    progress = models.IntegerField(default=0)
+    message = models.TextField(null=True, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('running', 'Running'),
+            ('completed', 'Completed'),
+            ('failed', 'Failed')
+        ],
+        default='running'
+    )
+    # Incremented by every update, so pollers can wait for a newer state
+    version = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'task_progress'
+        unique_together = ('task_id', 'kind')
+
+
+
+class FileScanVerdict(models.Model):
+    """Malware scan of one uploaded file (see upload_scanning.py)"""
+    scan_id = models.CharField(max_length=32, primary_key=True)
+    sha256 = models.CharField(max_length=64)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('pending', 'Pending'),
+            ('clean', 'Clean'),
+            ('infected', 'Infected'),
+            ('error', 'Error')
+        ],
+        default='pending'
+    )
+    reason = models.TextField(null=True, blank=True)
+    scanner = models.CharField(max_length=50, null=True, blank=True)  # 'basic' or 'clamav'; also set on hash matches
+    original_filename = models.CharField(max_length=255)
+    stored_filename = models.CharField(max_length=255)
+    file_size = models.BigIntegerField(default=0)
+    metadata = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    scanned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'file_scan_verdicts'
+        indexes = [
+            models.Index(fields=['sha256', 'status'], name='file_scan_sha_status_idx'),
+        ]
+
 class S3File(models.Model):
     url = models.TextField()
     file_type = models.CharField(max_length=50, null=True, blank=True)
@@ -470,6 +667,8 @@ class S3File(models.Model):
     user_id = models.CharField(max_length=100, null=True, blank=True)
     metadata = models.JSONField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # SHA-256 of the uploaded content, used to skip re-uploading identical files
+    content_sha256 = models.CharField(max_length=64, null=True, blank=True, db_index=True)
 
     class Meta:
         db_table = 's3_files'
@@ -608,7 +807,8 @@ class RiskApproval(models.Model):
 
 class GRCLog(models.Model):
     LogId = models.AutoField(primary_key=True)
-    Timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when send_log is called; buffered rows are inserted later
+    Timestamp = models.DateTimeField(default=timezone.now)
     UserId = models.CharField(max_length=50, null=True)
     UserName = models.CharField(max_length=100, null=True)
     Module = models.CharField(max_length=100, null=True)
@@ -622,6 +822,16 @@ class GRCLog(models.Model):
 
     class Meta:
         db_table = 'grc_logs'
+        # Every filter of the log list API is an exact match followed by the
+        # newest-first (Timestamp, LogId) keyset ordering
+        indexes = [
+            models.Index(fields=['Timestamp', 'LogId'], name='grc_logs_ts_idx'),
+            models.Index(fields=['Module', 'Timestamp'], name='grc_logs_module_ts_idx'),
+            models.Index(fields=['ActionType', 'Timestamp'], name='grc_logs_action_ts_idx'),
+            models.Index(fields=['EntityType', 'Timestamp'], name='grc_logs_entity_ts_idx'),
+            models.Index(fields=['UserId', 'Timestamp'], name='grc_logs_user_ts_idx'),
+            models.Index(fields=['LogLevel', 'Timestamp'], name='grc_logs_level_ts_idx'),
+        ]
 
     def __str__(self):
         return f"Log {self.LogId}: {self.ActionType} on {self.Module}"
@@ -671,6 +881,35 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+
+from .rbac.permission_set import PermissionSet, compute_permission_mask, module_mask
+
+# Manager for common RBAC queries
+class RBACManager(models.Manager):
+    def get_users_by_permission(self, permission_field):
+        """Get all users who have a specific permission"""
+        filter_kwargs = {permission_field: True, 'is_active': 'Y'}
+        return self.filter(**filter_kwargs)
+
+    def get_users_by_role(self, role):
+        """Get all users with a specific role"""
+        return self.filter(role=role, is_active='Y')
+
+    def get_users_by_module_access(self, module):
+        """Get all users who have access to a specific module"""
+        mask = module_mask(module)
+        if not mask:
+            return self.none()
+        # Single predicate on the packed mask: (PermissionMask & module_mask) != 0
+        return self.alias(
+            module_permissions=models.F('permission_mask').bitand(mask)
+        ).filter(module_permissions__gt=0, is_active='Y')
+
+    def get_grc_administrators(self):
+        """Get all GRC Administrators"""
+        return self.filter(role='GRC Administrator', is_active='Y')
+
 
 class RBAC(models.Model):
     """
@@ -751,6 +990,11 @@ class RBAC(models.Model):
     updated_at = models.DateTimeField(auto_now=True, db_column='UpdatedAt')
     is_active = models.CharField(max_length=1, default='Y', choices=[('Y', 'Yes'), ('N', 'No')], db_column='IsActive')
 
+    # Packed copy of the permission columns above (see rbac/permission_set.py), maintained by save()
+    permission_mask = models.BigIntegerField(default=0, db_index=True, db_column='PermissionMask')
+
+    objects = RBACManager()
+
     class Meta:
         db_table = 'rbac'
         ordering = ['username', 'role']
@@ -765,64 +1009,38 @@ class RBAC(models.Model):
         # Auto-populate username from user if not provided
         if self.user and not self.username:
             self.username = self.user.username
+        self.permission_mask = compute_permission_mask(self)
+        self.__dict__.pop('permission_set', None)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'permission_mask' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['permission_mask']
         super().save(*args, **kwargs)
 
+    @cached_property
+    def permission_set(self):
+        """PermissionSet built from the permission columns of this record"""
+        return PermissionSet.from_record(self)
+
     # Module Access Checker Methods
     def has_compliance_access(self):
         """Check if user has any compliance module access"""
-        return any([
-            self.create_compliance,
-            self.edit_compliance,
-            self.approve_compliance,
-            self.view_all_compliance,
-            self.compliance_performance_analytics
-        ])
+        return self.permission_set.any_of('compliance')
 
     def has_policy_access(self):
         """Check if user has any policy module access"""
-        return any([
-            self.create_policy,
-            self.edit_policy,
-            self.approve_policy,
-            self.create_framework,
-            self.approve_framework,
-            self.view_all_policy,
-            self.policy_performance_analytics
-        ])
+        return self.permission_set.any_of('policy')
 
     def has_audit_access(self):
         """Check if user has any audit module access"""
-        return any([
-            self.assign_audit,
-            self.conduct_audit,
-            self.review_audit,
-            self.view_audit_reports,
-            self.audit_performance_analytics
-        ])
+        return self.permission_set.any_of('audit')
 
     def has_risk_access(self):
         """Check if user has any risk module access"""
-        return any([
-            self.create_risk,
-            self.edit_risk,
-            self.approve_risk,
-            self.assign_risk,
-            self.evaluate_assigned_risk,
-            self.view_all_risk,
-            self.risk_performance_analytics
-        ])
+        return self.permission_set.any_of('risk')
 
     def has_incident_access(self):
         """Check if user has any incident module access"""
-        return any([
-            self.create_incident,
-            self.edit_incident,
-            self.assign_incident,
-            self.evaluate_assigned_incident,
-            self.escalate_to_risk,
-            self.view_all_incident,
-            self.incident_performance_analytics
-        ])
+        return self.permission_set.any_of('incident')
 
     # Permission Checker Methods
     def can_create_in_module(self, module):
@@ -974,73 +1192,3 @@ class RBAC(models.Model):
                 'can_view_analytics': self.incident_performance_analytics,
             }
         }
-# Manager for common RBAC queries
-class RBACManager(models.Manager):
-    def get_users_by_permission(self, permission_field):
-        """Get all users who have a specific permission"""
-        filter_kwargs = {permission_field: True, 'is_active': 'Y'}
-        return self.filter(**filter_kwargs)
-
-    def get_users_by_role(self, role):
-        """Get all users with a specific role"""
-        return self.filter(role=role, is_active='Y')
-
-    def get_users_by_module_access(self, module):
-        """Get all users who have access to a specific module"""
-        if module.lower() == 'compliance':
-            return self.filter(
-                models.Q(create_compliance=True) |
-                models.Q(edit_compliance=True) |
-                models.Q(approve_compliance=True) |
-                models.Q(view_all_compliance=True) |
-                models.Q(compliance_performance_analytics=True),
-                is_active='Y'
-            )
-        elif module.lower() == 'policy':
-            return self.filter(
-                models.Q(create_policy=True) |
-                models.Q(edit_policy=True) |
-                models.Q(approve_policy=True) |
-                models.Q(create_framework=True) |
-                models.Q(approve_framework=True) |
-                models.Q(view_all_policy=True) |
-                models.Q(policy_performance_analytics=True),
-                is_active='Y'
-            )
-        elif module.lower() == 'audit':
-            return self.filter(
-                models.Q(assign_audit=True) |
-                models.Q(conduct_audit=True) |
-                models.Q(review_audit=True) |
-                models.Q(view_audit_reports=True) |
-                models.Q(audit_performance_analytics=True),
-                is_active='Y'
-            )
-        elif module.lower() == 'risk':
-            return self.filter(
-                models.Q(create_risk=True) |
-                models.Q(edit_risk=True) |
-                models.Q(approve_risk=True) |
-                models.Q(assign_risk=True) |
-                models.Q(evaluate_assigned_risk=True) |
-                models.Q(view_all_risk=True) |
-                models.Q(risk_performance_analytics=True),
-                is_active='Y'
-            )
-        elif module.lower() == 'incident':
-            return self.filter(
-                models.Q(create_incident=True) |
-                models.Q(edit_incident=True) |
-                models.Q(assign_incident=True) |
-                models.Q(evaluate_assigned_incident=True) |
-                models.Q(escalate_to_risk=True) |
-                models.Q(view_all_incident=True) |
-                models.Q(incident_performance_analytics=True),
-                is_active='Y'
-            )
-        return self.none()
-
-    def get_grc_administrators(self):
-        """Get all GRC Administrators"""
-        return self.filter(role='GRC Administrator', is_active='Y')
-
@@ -0,0 +1,325 @@
+"""
+Outbox-based notification dispatch
+
+Request handlers call NotificationService.queue_multi_channel_notification,
+which stores one NotificationOutbox row per channel and returns immediately.
+A dispatcher thread sends the queued rows in batches. With
+NOTIFICATION_OUTBOX_IN_PROCESS it is started when the web process starts
+(GrcConfig.ready), so rows left pending by a restart or waiting for a retry
+are sent without a new enqueue; otherwise run_notification_dispatcher runs it
+as a separate worker.
+
+- A batch is grouped by (channel, recipient), so one recipient's messages go
+  out back to back over the shared SMTP session
+- A notification identical to one queued or sent within
+  NOTIFICATION_COALESCE_SECONDS (same channel, recipient, type and template
+  data) is coalesced into it instead of being sent again
+- Failed sends are retried with exponential backoff, up to
+  NOTIFICATION_MAX_ATTEMPTS times
+- A claimed row is leased for NOTIFICATION_CLAIM_LEASE_SECONDS (its
+  next_attempt_at is moved to the end of the lease); a row still processing
+  after its lease - the dispatcher died between claim and result - is put back
+  to pending by the next claim
+
+Every send still goes through NotificationService.send_email/send_whatsapp,
+so results keep being recorded in the notifications table by log_notification.
+
+Settings:
+    NOTIFICATION_OUTBOX_BATCH_SIZE     - rows claimed per batch (default 50)
+    NOTIFICATION_COALESCE_SECONDS      - duplicate window (default 300)
+    NOTIFICATION_MAX_ATTEMPTS          - sends per row, including retries (default 5)
+    NOTIFICATION_RETRY_BASE_SECONDS    - first retry delay, doubled per attempt (default 30)
+    NOTIFICATION_CLAIM_LEASE_SECONDS   - time a claimed batch has to be sent before it is reclaimed (default 600)
+    NOTIFICATION_OUTBOX_IN_PROCESS     - run a dispatcher inside the web process (default True);
+                                         set to False when run_notification_dispatcher is deployed
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_OUTBOX_BATCH_SIZE = getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 50)
+NOTIFICATION_COALESCE_SECONDS = getattr(settings, 'NOTIFICATION_COALESCE_SECONDS', 300)
+NOTIFICATION_MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+NOTIFICATION_RETRY_BASE_SECONDS = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 30)
+NOTIFICATION_CLAIM_LEASE_SECONDS = getattr(settings, 'NOTIFICATION_CLAIM_LEASE_SECONDS', 600)
+NOTIFICATION_OUTBOX_IN_PROCESS = getattr(settings, 'NOTIFICATION_OUTBOX_IN_PROCESS', True)
+
+# How long an idle dispatcher waits before polling the table again
+POLL_INTERVAL_SECONDS = 5
+
+COALESCE_STATUSES = ('pending', 'processing', 'sent')
+
+# Management commands that serve requests and therefore run the in-process dispatcher
+SERVING_COMMANDS = ('runserver',)
+
+
+def notification_dedupe_key(channel, recipient, notification_type, template_data):
+    """sha256 of everything that determines the delivered message"""
+    payload = json.dumps(
+        [channel, recipient.strip().lower(), notification_type, template_data or []],
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def retry_delay_seconds(attempts):
+    """Backoff before the next try of a row that has failed `attempts` times"""
+    return NOTIFICATION_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+
+
+def enqueue_notification(notification_data):
+    """
+    Queue a notification in the send_multi_channel_notification format.
+    Returns a result dict in the same shape, with the queued row ids.
+    """
+    notification_type = notification_data.get('notification_type')
+    if not notification_type:
+        return {"success": False, "error": "Missing notification_type"}
+
+    template_data = notification_data.get('template_data', [])
+    channels = []
+    if notification_data.get('email') and notification_data.get('email_type'):
+        channels.append(('email', notification_data['email'], notification_data['email_type']))
+    if notification_data.get('whatsapp_number'):
+        channels.append(('whatsapp', notification_data['whatsapp_number'], None))
+
+    window_start = timezone.now() - timedelta(seconds=NOTIFICATION_COALESCE_SECONDS)
+    queued = []
+    coalesced = []
+    for channel, recipient, email_type in channels:
+        dedupe_key = notification_dedupe_key(channel, recipient, notification_type, template_data)
+        duplicate = NotificationOutbox.objects.filter(
+            dedupe_key=dedupe_key,
+            status__in=COALESCE_STATUSES,
+            created_at__gte=window_start,
+        ).values_list('id', flat=True).first()
+        if duplicate:
+            coalesced.append(duplicate)
+            continue
+
+        row = NotificationOutbox.objects.create(
+            notification_type=notification_type,
+            channel=channel,
+            recipient=recipient,
+            email_type=email_type,
+            template_data=template_data,
+            dedupe_key=dedupe_key,
+        )
+        queued.append(row.id)
+
+    if queued and NOTIFICATION_OUTBOX_IN_PROCESS:
+        # Rows written inside a request transaction are only visible after commit
+        transaction.on_commit(get_notification_dispatcher().wake)
+
+    return {
+        "success": True,
+        "queued": True,
+        "message": "Notifications queued",
+        "details": {
+            "queued": queued,
+            "coalesced": coalesced
+        }
+    }
+
+
+class NotificationDispatcher:
+    """Background thread that sends queued outbox rows in batches"""
+
+    def __init__(self, batch_size=NOTIFICATION_OUTBOX_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._service = None
+        self._wakeup = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def service(self):
+        if self._service is None:
+            from .notification_service import NotificationService
+            self._service = NotificationService()
+        return self._service
+
+    def start(self):
+        with self._wakeup:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._work, name="notification-dispatcher", daemon=True
+            )
+        self._thread.start()
+
+    def stop(self):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+
+    def wake(self):
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def release_expired_claims(self):
+        """Put rows whose claim lease ran out back to pending, or fail them when out of attempts"""
+        now = timezone.now()
+        expired = NotificationOutbox.objects.filter(status='processing', next_attempt_at__lte=now)
+        expired.filter(attempts__gte=NOTIFICATION_MAX_ATTEMPTS).update(
+            status='failed', claim_token=None, last_error='Claim lease expired'
+        )
+        released = expired.update(status='pending', claim_token=None)
+        if released:
+            logger.warning(f"Released {released} notification(s) left processing by a stopped dispatcher")
+        return released
+
+    def claim_batch(self):
+        """Claim up to batch_size due rows for this dispatcher, oldest first"""
+        self.release_expired_claims()
+        token = uuid.uuid4().hex
+        now = timezone.now()
+        due_ids = list(
+            NotificationOutbox.objects.filter(status='pending', next_attempt_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:self.batch_size]
+        )
+        if not due_ids:
+            return []
+
+        NotificationOutbox.objects.filter(id__in=due_ids, status='pending').update(
+            status='processing', claim_token=token, attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=NOTIFICATION_CLAIM_LEASE_SECONDS),
+        )
+        return list(NotificationOutbox.objects.filter(claim_token=token).order_by('id'))
+
+    def _send(self, row):
+        if row.channel == 'email':
+            return self.service.send_email(
+                row.recipient, row.email_type, row.notification_type, row.template_data or []
+            )
+        return self.service.send_whatsapp(
+            row.recipient, row.notification_type, row.template_data or []
+        )
+
+    def _record_result(self, row, result):
+        # Only while this dispatcher still holds the claim
+        claimed = NotificationOutbox.objects.filter(id=row.id, claim_token=row.claim_token)
+        if result.get('success'):
+            claimed.update(
+                status='sent', sent_at=timezone.now(), last_error=None
+            )
+        elif row.attempts >= NOTIFICATION_MAX_ATTEMPTS:
+            logger.error(f"Notification {row.id} to {row.recipient} failed after {row.attempts} attempts")
+            claimed.update(
+                status='failed', last_error=result.get('error')
+            )
+        else:
+            claimed.update(
+                status='pending',
+                last_error=result.get('error'),
+                next_attempt_at=timezone.now() + timedelta(seconds=retry_delay_seconds(row.attempts)),
+            )
+
+    def dispatch_batch(self):
+        """Send one claimed batch. Returns the number of rows processed."""
+        rows = self.claim_batch()
+
+        groups = OrderedDict()
+        for row in rows:
+            groups.setdefault((row.channel, row.recipient.lower()), []).append(row)
+
+        for (channel, recipient), group in groups.items():
+            sent_keys = set()
+            for row in group:
+                if row.dedupe_key in sent_keys:
+                    NotificationOutbox.objects.filter(id=row.id).update(status='coalesced')
+                    continue
+                try:
+                    result = self._send(row)
+                except Exception as e:
+                    logger.error(f"Notification {row.id} send error: {str(e)}\n{traceback.format_exc()}")
+                    result = {"success": False, "error": str(e)}
+                self._record_result(row, result)
+                if result.get('success'):
+                    sent_keys.add(row.dedupe_key)
+
+        return len(rows)
+
+    def _work(self):
+        while not self._stopping:
+            processed = 0
+            try:
+                close_old_connections()
+                processed = self.dispatch_batch()
+            except Exception as e:
+                logger.error(f"Notification dispatcher error: {str(e)}")
+            finally:
+                close_old_connections()
+
+            # A full batch means more rows are probably due
+            if processed < self.batch_size:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(POLL_INTERVAL_SECONDS)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher():
+    """The process-wide dispatcher, created on first use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+        return _dispatcher
+
+
+def is_serving_process(argv=None, environ=None):
+    """
+    True for a web server process: anything but a management command, a
+    pytest run or an interactive/-c interpreter, or runserver in its reloaded
+    child (the autoreloader parent serves nothing).
+    """
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    if not argv or argv[0] in ('', '-c'):
+        # Interactive interpreter or python -c
+        return False
+    program = os.path.normpath(argv[0])
+    if os.path.basename(program) == 'pytest' or program.endswith(os.path.join('pytest', '__main__.py')):
+        return False
+    management = (
+        os.path.basename(program) in ('manage.py', 'django-admin', 'django-admin.py')
+        or program.endswith(os.path.join('django', '__main__.py'))
+    )
+    if not management:
+        return True
+    if len(argv) < 2 or argv[1] not in SERVING_COMMANDS:
+        return False
+    return '--noreload' in argv or environ.get('RUN_MAIN') == 'true'
+
+
+def start_in_process_dispatcher():
+    """Start the process-wide dispatcher in web processes when NOTIFICATION_OUTBOX_IN_PROCESS is set"""
+    if NOTIFICATION_OUTBOX_IN_PROCESS and is_serving_process():
+        get_notification_dispatcher().start()
@@ -2,7 +2,11 @@ import smtplib
 import requests
 import json
 import mysql.connector
+from mysql.connector import pooling
 import os
+import threading
+import time
+import atexit
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
@@ -24,6 +28,141 @@ logging.basicConfig(
 )
 logger = logging.getLogger("notification_service")
 
+# Connection reuse settings
+NOTIFICATION_DB_POOL_SIZE = int(os.getenv('NOTIFICATION_DB_POOL_SIZE', 5))
+SMTP_TIMEOUT_SECONDS = int(os.getenv('SMTP_TIMEOUT_SECONDS', 30))
+SMTP_HEALTHCHECK_SECONDS = int(os.getenv('SMTP_HEALTHCHECK_SECONDS', 30))      # NOOP before reuse after this much idle time
+SMTP_IDLE_TIMEOUT_SECONDS = int(os.getenv('SMTP_IDLE_TIMEOUT_SECONDS', 240))   # reconnect instead of reusing after this much idle time
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100))
+
+# MySQL connection pool shared by all NotificationService instances, created on first use
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+def get_notification_db_pool(db_config):
+    """Get the shared notification connection pool"""
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is None:
+            _db_pool = pooling.MySQLConnectionPool(
+                pool_name="notification_pool",
+                pool_size=NOTIFICATION_DB_POOL_SIZE,
+                **db_config
+            )
+        return _db_pool
+
+
+class SMTPConnection:
+    """
+    Persistent SMTP session for one email config.
+    
+    Sends are serialized on a lock. Before reuse the session is checked with
+    NOOP if it has been idle, and it is re-established when the server has
+    dropped it, after SMTP_IDLE_TIMEOUT_SECONDS of inactivity, or after
+    SMTP_MAX_MESSAGES_PER_CONNECTION messages.
+    """
+    
+    def __init__(self, host, port, username, password, timeout=SMTP_TIMEOUT_SECONDS):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._server = None
+        self._lock = threading.Lock()
+        self._last_used = 0
+        self._sent_on_connection = 0
+        self.connects = 0
+        self.messages_sent = 0
+    
+    def _connect(self):
+        logger.info(f"Connecting to SMTP server {self.host}:{self.port}")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            server.starttls()
+            server.ehlo()
+            logger.info(f"Attempting SMTP auth with username: {self.username}")
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self._sent_on_connection = 0
+        self._last_used = time.monotonic()
+        self.connects += 1
+    
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        self._server = None
+    
+    def _is_usable(self):
+        if self._server is None:
+            return False
+        if self._sent_on_connection >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+            return False
+        idle = time.monotonic() - self._last_used
+        if idle > SMTP_IDLE_TIMEOUT_SECONDS:
+            return False
+        if idle > SMTP_HEALTHCHECK_SECONDS:
+            try:
+                return self._server.noop()[0] == 250
+            except OSError:
+                return False
+        return True
+    
+    def send_message(self, msg):
+        with self._lock:
+            if not self._is_usable():
+                self._disconnect()
+                self._connect()
+            try:
+                self._server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                logger.warning(f"SMTP connection to {self.host} dropped ({str(e)}), reconnecting")
+                self._disconnect()
+                self._connect()
+                self._server.send_message(msg)
+            self._sent_on_connection += 1
+            self.messages_sent += 1
+            self._last_used = time.monotonic()
+    
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+# One persistent SMTP session per (host, port, user)
+_smtp_connections = {}
+_smtp_connections_lock = threading.Lock()
+
+def get_smtp_connection(config):
+    """Get the shared SMTP session for an email config"""
+    username = config['auth']['user']
+    password = config['auth']['pass']
+    key = (config['host'], config['port'], username)
+    with _smtp_connections_lock:
+        connection = _smtp_connections.get(key)
+        if connection is None or connection.password != password:
+            if connection is not None:
+                connection.close()
+            connection = SMTPConnection(config['host'], config['port'], username, password)
+            _smtp_connections[key] = connection
+        return connection
+
+@atexit.register
+def close_smtp_connections():
+    """Quit all open SMTP sessions"""
+    with _smtp_connections_lock:
+        for connection in _smtp_connections.values():
+            connection.close()
+        _smtp_connections.clear()
+
 class NotificationService:
     def __init__(self):
         # Database connection
@@ -103,33 +242,33 @@ class NotificationService:
         }
     
     def get_db_connection(self):
-        """Establish database connection"""
+        """Get a pooled database connection; close() returns it to the pool"""
         try:
-            conn = mysql.connector.connect(**self.db_config)
+            conn = get_notification_db_pool(self.db_config).get_connection()
+            # Pooled connections can be dropped by the server's wait_timeout
+            conn.ping(reconnect=True, attempts=1)
             return conn
+        except mysql.connector.errors.PoolError:
+            logger.warning("Notification connection pool exhausted, opening a direct connection")
+            return mysql.connector.connect(**self.db_config)
         except mysql.connector.Error as err:
             logger.error(f"Database connection error: {err}")
             raise
     
+    def resolve_users(self, user_ids):
+        """Map user ids to (UserId, UserName, Email) entries with one query for all uncached ids"""
+        from .user_directory import resolve_users
+        return resolve_users(user_ids)
+    
     def get_user_email(self, user_id):
         """Get user email by user ID"""
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            # Query using the correct field name 'Email' (capital E)
-            query = "SELECT Email FROM users WHERE UserId = %s"
-            cursor.execute(query, (user_id,))
-            
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
-            if result:
-                return result[0]
-            else:
-                logger.warning(f"No user found with ID: {user_id}")
-                return None
+            from .user_directory import resolve_user
+            entry = resolve_user(user_id)
+            if entry:
+                return entry.Email
+            logger.warning(f"No user found with ID: {user_id}")
+            return None
                 
         except Exception as e:
             logger.error(f"Error fetching user email for ID {user_id}: {str(e)}")
@@ -138,22 +277,12 @@ class NotificationService:
     def get_user_name(self, user_id):
         """Get user name by user ID"""
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            # Query using the correct field name 'UserName' 
-            query = "SELECT UserName FROM users WHERE UserId = %s"
-            cursor.execute(query, (user_id,))
-            
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
-            if result:
-                return result[0]
-            else:
-                logger.warning(f"No user found with ID: {user_id}")
-                return None
+            from .user_directory import resolve_user
+            entry = resolve_user(user_id)
+            if entry:
+                return entry.UserName
+            logger.warning(f"No user found with ID: {user_id}")
+            return None
                 
         except Exception as e:
             logger.error(f"Error fetching user name for ID {user_id}: {str(e)}")
@@ -1145,39 +1274,13 @@ class NotificationService:
             html_content = template['template'](*template_data)
             msg.attach(MIMEText(html_content, 'html'))
             
-            logger.info(f"Connecting to SMTP server {config['host']}:{config['port']}")
-            
-            # Connect to SMTP server and send email - handling Microsoft differently
-            if email_type.lower() == 'microsoft':
-                with smtplib.SMTP(config['host'], config['port']) as server:
-                    server.ehlo()
-                    server.starttls()
-                    server.ehlo()
-                    username = config['auth']['user']
-                    password = config['auth']['pass']
-                    logger.info(f"Attempting Microsoft SMTP auth with username: {username}")
-                    server.login(username, password)
-                    server.send_message(msg)
-                    logger.info(f"Microsoft email sent successfully to {to}")
-            else:
-                with smtplib.SMTP(config['host'], config['port']) as server:
-                    server.ehlo()
-                    server.starttls()
-                    server.ehlo()
-                    username = config['auth']['user']
-                    password = config['auth']['pass']
-                    logger.info(f"Attempting SMTP auth with username: {username}")
-                    try:
-                        server.login(username, password)
-                        logger.info("SMTP login successful")
-                        server.send_message(msg)
-                        logger.info(f"Email sent successfully to {to}")
-                    except smtplib.SMTPAuthenticationError as auth_error:
-                        logger.error(f"SMTP Authentication failed: {str(auth_error)}")
-                        raise
-                    except Exception as smtp_error:
-                        logger.error(f"SMTP error: {str(smtp_error)}")
-                        raise
+            # Send over the shared session for this email config
+            try:
+                get_smtp_connection(config).send_message(msg)
+                logger.info(f"Email sent successfully to {to}")
+            except smtplib.SMTPAuthenticationError as auth_error:
+                logger.error(f"SMTP Authentication failed: {str(auth_error)}")
+                raise
             
             # Log notification in database
             self.log_notification(to, notification_type, 'email', True)
@@ -1277,6 +1380,14 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Error logging notification: {str(e)}")
     
+    def queue_multi_channel_notification(self, notification_data):
+        """
+        Queue a notification for background delivery through the outbox.
+        Takes the same notification_data as send_multi_channel_notification.
+        """
+        from .notification_outbox import enqueue_notification
+        return enqueue_notification(notification_data)
+    
     def send_multi_channel_notification(self, notification_data):
         """Send notification through multiple channels"""
         results = {
@@ -0,0 +1,94 @@
+"""
+Process-local cache of RBAC records for permission checks
+
+Every decorated view and every DRF permission class used to load the user's
+RBAC row from the database. Records are now kept in a small LRU cache with a
+TTL, keyed by user_id. Writes to the RBAC model invalidate the user's entry
+through the post_save/post_delete receivers in signals.py; the TTL bounds
+staleness for bulk queryset updates, which do not send signals.
+
+Settings:
+    RBAC_CACHE_MAX_ENTRIES  - maximum cached users per process (default 1024)
+    RBAC_CACHE_TTL_SECONDS  - seconds an entry stays valid (default 300)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+# Stored for users without an active RBAC record so denied checks are cached too
+NO_RECORD = object()
+
+
+class RBACPermissionCache:
+    """Thread-safe LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id):
+        """Return the cached value for user_id, or None on a miss"""
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, user_id, value):
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(str(user_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+permission_cache = RBACPermissionCache(
+    max_entries=getattr(settings, 'RBAC_CACHE_MAX_ENTRIES', 1024),
+    ttl_seconds=getattr(settings, 'RBAC_CACHE_TTL_SECONDS', 300),
+)
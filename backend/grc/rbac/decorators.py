@@ -59,7 +59,7 @@ def rbac_required(required_permission=None, endpoint_name=None):
                     }, status=403)
                 
                 # Log successful access
-                logger.info(f"[RBAC DECORATOR] Access granted to {check_endpoint_name} for user {permission_result['user_id']}")
+                logger.debug(f"[RBAC DECORATOR] Access granted to {check_endpoint_name} for user {permission_result['user_id']}")
                 
                 # Call the original view function
                 return view_func(request, *args, **kwargs)
@@ -162,8 +162,7 @@ def require_any_permission(*required_permissions):
                         'message': 'No user ID found in session'
                     }, status=401)
                 
-                from ..models import RBAC
-                rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+                rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
                 if not rbac_record:
                     return JsonResponse({
                         'error': 'Authorization failed',
@@ -175,7 +174,7 @@ def require_any_permission(*required_permissions):
                 granted_permissions = []
                 
                 for permission in required_permissions:
-                    if getattr(rbac_record, permission, False):
+                    if rbac_record.permission_set.has(permission):
                         has_permission = True
                         granted_permissions.append(permission)
                 
@@ -236,8 +235,7 @@ def require_all_permissions(*required_permissions):
                         'message': 'No user ID found in session'
                     }, status=401)
                 
-                from ..models import RBAC
-                rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+                rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
                 if not rbac_record:
                     return JsonResponse({
                         'error': 'Authorization failed',
@@ -248,7 +246,7 @@ def require_all_permissions(*required_permissions):
                 missing_permissions = []
                 
                 for permission in required_permissions:
-                    if not getattr(rbac_record, permission, False):
+                    if not rbac_record.permission_set.has(permission):
                         missing_permissions.append(permission)
                 
                 if missing_permissions:
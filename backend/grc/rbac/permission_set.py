@@ -0,0 +1,138 @@
+"""
+Packed bitmask representation of the RBAC permission columns
+
+Each boolean permission column of the RBAC model owns one bit of
+RBAC.permission_mask. The bit positions are part of the stored data:
+only ever append to PERMISSION_FIELDS, never reorder or remove entries.
+"""
+
+PERMISSION_FIELDS = (
+    # Compliance
+    'create_compliance',
+    'edit_compliance',
+    'approve_compliance',
+    'view_all_compliance',
+    'compliance_performance_analytics',
+    # Policy
+    'create_policy',
+    'edit_policy',
+    'approve_policy',
+    'create_framework',
+    'approve_framework',
+    'view_all_policy',
+    'policy_performance_analytics',
+    # Audit
+    'assign_audit',
+    'conduct_audit',
+    'review_audit',
+    'view_audit_reports',
+    'audit_performance_analytics',
+    # Risk
+    'create_risk',
+    'edit_risk',
+    'approve_risk',
+    'assign_risk',
+    'evaluate_assigned_risk',
+    'view_all_risk',
+    'risk_performance_analytics',
+    # Incident
+    'create_incident',
+    'edit_incident',
+    'assign_incident',
+    'evaluate_assigned_incident',
+    'escalate_to_risk',
+    'view_all_incident',
+    'incident_performance_analytics',
+)
+
+PERMISSION_BITS = {field: 1 << position for position, field in enumerate(PERMISSION_FIELDS)}
+
+# Database column of each permission field (the db_column of the RBAC model field)
+PERMISSION_COLUMNS = {field: ''.join(part.capitalize() for part in field.split('_')) for field in PERMISSION_FIELDS}
+
+MODULE_FIELDS = {
+    'compliance': PERMISSION_FIELDS[0:5],
+    'policy': PERMISSION_FIELDS[5:12],
+    'audit': PERMISSION_FIELDS[12:17],
+    'risk': PERMISSION_FIELDS[17:24],
+    'incident': PERMISSION_FIELDS[24:31],
+}
+
+MODULE_MASKS = {
+    module: sum(PERMISSION_BITS[field] for field in fields)
+    for module, fields in MODULE_FIELDS.items()
+}
+
+
+def compute_permission_mask(record):
+    """Pack the boolean permission columns of an RBAC record into an int"""
+    mask = 0
+    for field, bit in PERMISSION_BITS.items():
+        if getattr(record, field, False):
+            mask |= bit
+    return mask
+
+
+def permission_mask_sql(quote_name=lambda name: name):
+    """SQL expression computing the permission mask of an rbac row from its columns"""
+    return ' + '.join(
+        f"(CASE WHEN {quote_name(PERMISSION_COLUMNS[field])} <> 0 THEN {bit} ELSE 0 END)"
+        for field, bit in PERMISSION_BITS.items()
+    )
+
+
+def module_mask(module):
+    """Mask with every permission bit of a module set, 0 for unknown modules"""
+    return MODULE_MASKS.get(module.lower(), 0)
+
+
+class PermissionSet:
+    """Immutable set of RBAC permissions backed by a packed bitmask"""
+
+    __slots__ = ('mask',)
+
+    def __init__(self, mask=0):
+        object.__setattr__(self, 'mask', int(mask or 0))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PermissionSet is immutable')
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(compute_permission_mask(record))
+
+    @classmethod
+    def from_fields(cls, fields):
+        return cls(sum(PERMISSION_BITS[field] for field in set(fields)))
+
+    def has(self, permission):
+        """True if the permission field is granted; unknown fields are never granted"""
+        return bool(self.mask & PERMISSION_BITS.get(permission, 0))
+
+    def any_of(self, module):
+        """True if any permission of the module is granted"""
+        return bool(self.mask & module_mask(module))
+
+    def all_of(self, permissions):
+        """True if every listed permission field is granted"""
+        permissions = set(permissions)
+        if not permissions or not permissions.issubset(PERMISSION_BITS):
+            return False
+        required = sum(PERMISSION_BITS[permission] for permission in permissions)
+        return self.mask & required == required
+
+    def granted(self):
+        """Granted permission fields, in column order"""
+        return [field for field in PERMISSION_FIELDS if self.mask & PERMISSION_BITS[field]]
+
+    def __contains__(self, permission):
+        return self.has(permission)
+
+    def __eq__(self, other):
+        return isinstance(other, PermissionSet) and self.mask == other.mask
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __repr__(self):
+        return f"PermissionSet({', '.join(self.granted())})"
@@ -34,7 +34,8 @@ class BaseIncidentPermission(BasePermission):
             print(f"[DEBUG PERMISSION] RBACUtils.has_incident_permission returned: {has_permission}")
             
             # Debug log the permission check
-            RBACUtils.debug_permission_check(user_id, f"INCIDENT_{permission_type.upper()}", 'incident')
+            if logger.isEnabledFor(logging.DEBUG):
+                RBACUtils.debug_permission_check(user_id, f"INCIDENT_{permission_type.upper()}", 'incident')
             
             return has_permission
             
@@ -105,14 +106,13 @@ class AuditViewPermission(BaseIncidentPermission):
             if not user_id:
                 return False
             
-            from ..models import RBAC
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 return False
             
             # Check if user has audit view permission - use correct field name
             has_permission = rbac_record.view_audit_reports
-            logger.info(f"[RBAC] User {user_id} audit.view = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} audit.view = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -129,14 +129,13 @@ class AuditConductPermission(BaseIncidentPermission):
             if not user_id:
                 return False
             
-            from ..models import RBAC
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 return False
             
             # Check if user has audit conduct permission - use correct field name
             has_permission = rbac_record.conduct_audit
-            logger.info(f"[RBAC] User {user_id} audit.conduct = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} audit.conduct = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -153,14 +152,13 @@ class AuditReviewPermission(BaseIncidentPermission):
             if not user_id:
                 return False
         
-            from ..models import RBAC
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 return False
             
             # Check if user has audit review permission - use correct field name
             has_permission = rbac_record.review_audit
-            logger.info(f"[RBAC] User {user_id} audit.review = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} audit.review = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -177,14 +175,13 @@ class AuditAssignPermission(BaseIncidentPermission):
             if not user_id:
                 return False
             
-            from ..models import RBAC
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 return False
             
             # Check if user has audit assign permission - use correct field name
             has_permission = rbac_record.assign_audit
-            logger.info(f"[RBAC] User {user_id} audit.assign = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} audit.assign = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -201,14 +198,13 @@ class AuditAnalyticsPermission(BaseIncidentPermission):
             if not user_id:
                 return False
         
-            from ..models import RBAC
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 return False
             
             # Check if user has audit analytics permission - use correct field name
             has_permission = rbac_record.audit_performance_analytics
-            logger.info(f"[RBAC] User {user_id} audit.analytics = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} audit.analytics = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -236,8 +232,7 @@ class BasePolicyPermission(BasePermission):
                 logger.warning(f"[RBAC POLICY] No user_id found for {permission_type} permission check")
                 return False
         
-            from ..models import RBAC
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 logger.warning(f"[RBAC POLICY] No RBAC record found for user {user_id}")
                 return False
@@ -258,11 +253,11 @@ class BasePolicyPermission(BasePermission):
                 logger.error(f"[RBAC POLICY] Invalid permission type: {permission_type}")
                 return False
             
-            has_permission = getattr(rbac_record, permission_field, False)
+            has_permission = rbac_record.permission_set.has(permission_field)
             
             # Debug log the permission check
-            logger.info(f"[RBAC POLICY] User {user_id} policy.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
-            logger.info(f"[RBAC POLICY] User Details - Role: {rbac_record.role}, Field Checked: {permission_field}")
+            logger.debug(f"[RBAC POLICY] User {user_id} policy.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC POLICY] User Details - Role: {rbac_record.role}, Field Checked: {permission_field}")
             
             return has_permission
             
@@ -275,7 +270,7 @@ class PolicyViewPermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'view')
-        logger.info(f"[RBAC POLICY] PolicyViewPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyViewPermission check result: {result}")
         return result
 
 class PolicyListPermission(BasePolicyPermission):
@@ -283,7 +278,7 @@ class PolicyListPermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'view')
-        logger.info(f"[RBAC POLICY] PolicyListPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyListPermission check result: {result}")
         return result
 
 class PolicyCreatePermission(BasePolicyPermission):
@@ -291,7 +286,7 @@ class PolicyCreatePermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'create')
-        logger.info(f"[RBAC POLICY] PolicyCreatePermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyCreatePermission check result: {result}")
         return result
 
 class PolicyEditPermission(BasePolicyPermission):
@@ -299,7 +294,7 @@ class PolicyEditPermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'edit')
-        logger.info(f"[RBAC POLICY] PolicyEditPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyEditPermission check result: {result}")
         return result
 
 class PolicyApprovePermission(BasePolicyPermission):
@@ -307,7 +302,7 @@ class PolicyApprovePermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'approve')
-        logger.info(f"[RBAC POLICY] PolicyApprovePermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyApprovePermission check result: {result}")
         return result
 
 class PolicyDeletePermission(BasePolicyPermission):
@@ -315,7 +310,7 @@ class PolicyDeletePermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'edit')
-        logger.info(f"[RBAC POLICY] PolicyDeletePermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyDeletePermission check result: {result}")
         return result
 
 class PolicyAssignPermission(BasePolicyPermission):
@@ -323,7 +318,7 @@ class PolicyAssignPermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'edit')
-        logger.info(f"[RBAC POLICY] PolicyAssignPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyAssignPermission check result: {result}")
         return result
 
 class PolicyExportPermission(BasePolicyPermission):
@@ -332,7 +327,7 @@ class PolicyExportPermission(BasePolicyPermission):
     def has_permission(self, request, view):
         # Export typically requires view permission
         result = self.check_policy_permission(request, 'view')
-        logger.info(f"[RBAC POLICY] PolicyExportPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyExportPermission check result: {result}")
         return result
 
 class PolicyAnalyticsPermission(BasePolicyPermission):
@@ -340,7 +335,7 @@ class PolicyAnalyticsPermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'analytics')
-        logger.info(f"[RBAC POLICY] PolicyAnalyticsPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyAnalyticsPermission check result: {result}")
         return result
 
 class PolicyKPIPermission(BasePolicyPermission):
@@ -349,21 +344,21 @@ class PolicyKPIPermission(BasePolicyPermission):
     def has_permission(self, request, view):
         try:
             # Enhanced debugging for session issues
-            logger.info(f"[RBAC POLICY KPI] ===== DEBUGGING SESSION ISSUE =====")
-            logger.info(f"[RBAC POLICY KPI] Request path: {request.path}")
-            logger.info(f"[RBAC POLICY KPI] Request method: {request.method}")
-            logger.info(f"[RBAC POLICY KPI] Request META keys: {list(request.META.keys())[:10]}...")  # Show first 10 keys
+            logger.debug(f"[RBAC POLICY KPI] ===== DEBUGGING SESSION ISSUE =====")
+            logger.debug(f"[RBAC POLICY KPI] Request path: {request.path}")
+            logger.debug(f"[RBAC POLICY KPI] Request method: {request.method}")
+            logger.debug(f"[RBAC POLICY KPI] Request META keys: {list(request.META.keys())[:10]}...")  # Show first 10 keys
             
             # Check for session middleware
             middleware_classes = getattr(request, '_get_response', None)
-            logger.info(f"[RBAC POLICY KPI] Middleware available: {middleware_classes is not None}")
+            logger.debug(f"[RBAC POLICY KPI] Middleware available: {middleware_classes is not None}")
             
             # Check session status
             if hasattr(request, 'session'):
-                logger.info(f"[RBAC POLICY KPI] Session exists: YES")
-                logger.info(f"[RBAC POLICY KPI] Session modified: {request.session.modified}")
-                logger.info(f"[RBAC POLICY KPI] Session accessed: {request.session.accessed}")
-                logger.info(f"[RBAC POLICY KPI] Session empty: {request.session.is_empty()}")
+                logger.debug(f"[RBAC POLICY KPI] Session exists: YES")
+                logger.debug(f"[RBAC POLICY KPI] Session modified: {request.session.modified}")
+                logger.debug(f"[RBAC POLICY KPI] Session accessed: {request.session.accessed}")
+                logger.debug(f"[RBAC POLICY KPI] Session empty: {request.session.is_empty()}")
             else:
                 logger.error(f"[RBAC POLICY KPI] Session exists: NO - Session middleware not loaded!")
             
@@ -371,34 +366,33 @@ class PolicyKPIPermission(BasePolicyPermission):
             user_id = RBACUtils.get_user_id_from_request(request)
             if not user_id:
                 logger.warning(f"[RBAC POLICY KPI] No user_id found for KPI permission check")
-                logger.info(f"[RBAC POLICY KPI] === TROUBLESHOOTING SUGGESTIONS ===")
-                logger.info(f"[RBAC POLICY KPI] 1. Check if session cookie 'grc_sessionid' is set in browser")
-                logger.info(f"[RBAC POLICY KPI] 2. Run: python test_rbac_sessions.py to create test sessions")
-                logger.info(f"[RBAC POLICY KPI] 3. Verify Django session middleware is enabled")
-                logger.info(f"[RBAC POLICY KPI] 4. Check if user is properly authenticated")
-                logger.info(f"[RBAC POLICY KPI] =======================================")
+                logger.debug(f"[RBAC POLICY KPI] === TROUBLESHOOTING SUGGESTIONS ===")
+                logger.debug(f"[RBAC POLICY KPI] 1. Check if session cookie 'grc_sessionid' is set in browser")
+                logger.debug(f"[RBAC POLICY KPI] 2. Run: python test_rbac_sessions.py to create test sessions")
+                logger.debug(f"[RBAC POLICY KPI] 3. Verify Django session middleware is enabled")
+                logger.debug(f"[RBAC POLICY KPI] 4. Check if user is properly authenticated")
+                logger.debug(f"[RBAC POLICY KPI] =======================================")
                 return False
         
-            from ..models import RBAC
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 logger.warning(f"[RBAC POLICY KPI] No RBAC record found for user {user_id}")
-                logger.info(f"[RBAC POLICY KPI] Run: mysql -u root -p grc < test_rbac_data.sql")
+                logger.debug(f"[RBAC POLICY KPI] Run: mysql -u root -p grc < test_rbac_data.sql")
                 return False
             
             # For KPIs, user needs policy view permission - use correct field name
             has_permission = rbac_record.view_all_policy
             
             # Detailed debug logging for KPI access
-            logger.info(f"[RBAC POLICY KPI] ==================== KPI ACCESS CHECK ====================")
-            logger.info(f"[RBAC POLICY KPI] User ID: {user_id}")
-            logger.info(f"[RBAC POLICY KPI] User Role: {rbac_record.role}")
-            logger.info(f"[RBAC POLICY KPI] User Username: {rbac_record.username}")
-            logger.info(f"[RBAC POLICY KPI] Policy View Permission: {rbac_record.view_all_policy}")
-            logger.info(f"[RBAC POLICY KPI] Policy Analytics Permission: {rbac_record.policy_performance_analytics}")
-            logger.info(f"[RBAC POLICY KPI] Is Active: {rbac_record.is_active}")
-            logger.info(f"[RBAC POLICY KPI] FINAL RESULT: {'ALLOWED' if has_permission else 'DENIED'}")
-            logger.info(f"[RBAC POLICY KPI] ===============================================================")
+            logger.debug(f"[RBAC POLICY KPI] ==================== KPI ACCESS CHECK ====================")
+            logger.debug(f"[RBAC POLICY KPI] User ID: {user_id}")
+            logger.debug(f"[RBAC POLICY KPI] User Role: {rbac_record.role}")
+            logger.debug(f"[RBAC POLICY KPI] User Username: {rbac_record.username}")
+            logger.debug(f"[RBAC POLICY KPI] Policy View Permission: {rbac_record.view_all_policy}")
+            logger.debug(f"[RBAC POLICY KPI] Policy Analytics Permission: {rbac_record.policy_performance_analytics}")
+            logger.debug(f"[RBAC POLICY KPI] Is Active: {rbac_record.is_active}")
+            logger.debug(f"[RBAC POLICY KPI] FINAL RESULT: {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC POLICY KPI] ===============================================================")
             
             return has_permission
             
@@ -413,7 +407,7 @@ class PolicyDashboardPermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'view')
-        logger.info(f"[RBAC POLICY] PolicyDashboardPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyDashboardPermission check result: {result}")
         return result
 
 class PolicyFrameworkPermission(BasePolicyPermission):
@@ -431,7 +425,7 @@ class PolicyFrameworkPermission(BasePolicyPermission):
         else:
             result = False
         
-        logger.info(f"[RBAC POLICY] PolicyFrameworkPermission ({request.method}) check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyFrameworkPermission ({request.method}) check result: {result}")
         return result
 
 class PolicyTailoringPermission(BasePolicyPermission):
@@ -439,7 +433,7 @@ class PolicyTailoringPermission(BasePolicyPermission):
     
     def has_permission(self, request, view):
         result = self.check_policy_permission(request, 'create')
-        logger.info(f"[RBAC POLICY] PolicyTailoringPermission check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyTailoringPermission check result: {result}")
         return result
 
 class PolicyVersioningPermission(BasePolicyPermission):
@@ -451,7 +445,7 @@ class PolicyVersioningPermission(BasePolicyPermission):
         else:
             result = self.check_policy_permission(request, 'edit')
         
-        logger.info(f"[RBAC POLICY] PolicyVersioningPermission ({request.method}) check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyVersioningPermission ({request.method}) check result: {result}")
         return result
 
 class PolicyApprovalWorkflowPermission(BasePolicyPermission):
@@ -463,7 +457,7 @@ class PolicyApprovalWorkflowPermission(BasePolicyPermission):
         else:
             result = self.check_policy_permission(request, 'approve')
         
-        logger.info(f"[RBAC POLICY] PolicyApprovalWorkflowPermission ({request.method}) check result: {result}")
+        logger.debug(f"[RBAC POLICY] PolicyApprovalWorkflowPermission ({request.method}) check result: {result}")
         return result 
 
 # =====================================================
@@ -488,7 +482,8 @@ class BaseRiskPermission(BasePermission):
             has_permission = RBACUtils.has_risk_permission(user_id, permission_type)
             
             # Debug log the permission check
-            RBACUtils.debug_permission_check(user_id, f"RISK_{permission_type.upper()}", 'risk')
+            if logger.isEnabledFor(logging.DEBUG):
+                RBACUtils.debug_permission_check(user_id, f"RISK_{permission_type.upper()}", 'risk')
             
             return has_permission
             
@@ -560,7 +555,8 @@ class BaseCompliancePermission(BasePermission):
             has_permission = RBACUtils.has_compliance_permission(user_id, permission_type)
             
             # Debug log the permission check
-            RBACUtils.debug_permission_check(user_id, f"COMPLIANCE_{permission_type.upper()}", 'compliance')
+            if logger.isEnabledFor(logging.DEBUG):
+                RBACUtils.debug_permission_check(user_id, f"COMPLIANCE_{permission_type.upper()}", 'compliance')
             
             return has_permission
             
@@ -0,0 +1,20 @@
+"""
+Keep the RBAC permission cache in sync with writes to the RBAC table
+"""
+
+import logging
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import RBAC
+from .cache import permission_cache
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=RBAC)
+@receiver(post_delete, sender=RBAC)
+def invalidate_rbac_cache(sender, instance, **kwargs):
+    logger.debug(f"[RBAC] Invalidating cached permissions for user {instance.user_id}")
+    permission_cache.invalidate(instance.user_id)
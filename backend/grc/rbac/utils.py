@@ -8,8 +8,173 @@ Supports all modules: Policy, Compliance, Audit, Risk, and Incident.
 import logging
 from django.utils import timezone
 
+from .cache import permission_cache, NO_RECORD
+
 logger = logging.getLogger(__name__)
 
+# Endpoint name -> RBAC permission field, used by check_endpoint_permission / @rbac_required
+ENDPOINT_PERMISSIONS = {
+    # ===== INCIDENT MODULE ENDPOINTS =====
+    'list_incidents': 'view_all_incident',
+    'create_incident': 'create_incident', 
+    'update_incident_status': 'edit_incident',
+    'assign_incident': 'assign_incident',
+    'incident_dashboard': 'view_all_incident',
+    'incident_analytics': 'incident_performance_analytics',
+    'export_incidents': 'view_all_incident',
+    'get_recent_incidents': 'view_all_incident',
+    'get_audit_findings': 'view_all_incident',
+    'audit_findings_list': 'view_all_incident',
+    'audit_finding_detail': 'view_all_incident',
+    'audit_finding_incident_detail': 'view_all_incident',
+    'export_audit_findings': 'view_all_incident',
+    'schedule_manual_incident': 'create_incident',
+    'reject_incident': 'edit_incident',
+    'escalate_incident': 'escalate_to_risk',
+    'user_incidents': 'view_all_incident',
+    'incident_reviewer_tasks': 'evaluate_assigned_incident',
+    'incident_mitigations': 'view_all_incident',
+    'assign_incident_reviewer': 'assign_incident',
+    'incident_review_data': 'evaluate_assigned_incident',
+    'complete_incident_review': 'evaluate_assigned_incident',
+    'submit_incident_assessment': 'edit_incident',
+    'incident_approval_data': 'view_all_incident',
+
+    # ===== POLICY MODULE ENDPOINTS =====
+    'framework_list': 'view_all_policy',
+    'framework_detail': 'view_all_policy',
+    'create_framework_version': 'create_framework',
+    'export_policies_to_excel': 'view_all_policy',
+    'policy_list': 'view_all_policy',
+    'policy_detail': 'view_all_policy',
+    'add_policy_to_framework': 'create_policy',
+    'add_subpolicy_to_policy': 'create_policy',
+    'get_policies_by_framework': 'view_all_policy',
+    'get_subpolicies_by_policy': 'view_all_policy',
+    'update_policy_approval': 'approve_policy',
+    'submit_policy_review': 'approve_policy',
+    'submit_policy_approval_review': 'approve_policy',
+    'resubmit_policy_approval': 'approve_policy',
+    'list_policy_approvals_for_reviewer': 'approve_policy',
+    'subpolicy_detail': 'view_all_policy',
+    'submit_subpolicy_review': 'approve_policy',
+    'resubmit_subpolicy': 'approve_policy',
+    'get_policy_kpis': 'policy_performance_analytics',
+    'get_policy_analytics': 'policy_performance_analytics',
+    'get_policy_dashboard_summary': 'view_all_policy',
+    'get_policy_status_distribution': 'policy_performance_analytics',
+    'get_reviewer_workload': 'policy_performance_analytics',
+    'get_recent_policy_activity': 'view_all_policy',
+    'get_avg_policy_approval_time': 'policy_performance_analytics',
+    'get_framework_explorer_data': 'view_all_policy',
+    'get_framework_policies': 'view_all_policy',
+    'toggle_framework_status': 'edit_policy',
+    'toggle_policy_status': 'edit_policy',
+    'get_framework_details': 'view_all_policy',
+    'get_policy_details': 'view_all_policy',
+    'create_tailored_framework': 'create_framework',
+    'create_tailored_policy': 'create_policy',
+    'get_policy_version': 'view_all_policy',
+    'get_subpolicy_version': 'view_all_policy',
+    'get_policy_version_history': 'view_all_policy',
+    'all_policies_get_frameworks': 'view_all_policy',
+    'all_policies_get_policies': 'view_all_policy',
+    'all_policies_get_subpolicies': 'view_all_policy',
+    'all_policies_get_policy_versions': 'view_all_policy',
+    'all_policies_get_framework_versions': 'view_all_policy',
+    'get_policy_categories': 'view_all_policy',
+    'save_policy_category': 'create_policy',
+    'acknowledge_policy': 'view_all_policy',
+    'list_users': 'view_all_policy',
+
+    # ===== AUDIT MODULE ENDPOINTS =====
+    'get_all_audits': 'view_audit_reports',
+    'get_my_audits': 'conduct_audit',
+    'get_my_reviews': 'review_audit',
+    'get_audit_details': 'view_audit_reports',
+    'update_audit_status': 'conduct_audit',
+    'submit_audit_findings': 'conduct_audit',
+    'get_audit_versions': 'view_audit_reports',
+    'save_audit_version': 'conduct_audit',
+    'send_audit_for_review': 'conduct_audit',
+    'update_audit_finding': 'conduct_audit',
+    'upload_evidence': 'conduct_audit',
+    'get_compliance_by_subpolicy': 'view_audit_reports',
+    'add_compliance_to_audit': 'assign_audit',
+    'save_review_progress': 'review_audit',
+    'load_review_data': 'review_audit',
+    'generate_audit_report': 'view_audit_reports',
+    'get_audit_reports': 'view_audit_reports',
+
+    # ===== RISK MODULE ENDPOINTS =====
+    'risk_workflow': 'view_all_risk',
+    'assign_risk_instance': 'assign_risk',
+    'update_risk_status': 'edit_risk',
+    'get_risk_mitigations': 'view_all_risk',
+    'update_risk_mitigation': 'edit_risk',
+    'assign_reviewer': 'assign_risk',
+    'get_reviewer_tasks': 'evaluate_assigned_risk',
+    'complete_review': 'evaluate_assigned_risk',
+    'get_reviewer_comments': 'view_all_risk',
+    'update_mitigation_status': 'edit_risk',
+    'analyze_incident': 'create_risk',
+
+    # ===== COMPLIANCE MODULE ENDPOINTS =====
+    'create_compliance': 'create_compliance',
+    'edit_compliance': 'edit_compliance',
+    'get_compliance_details': 'view_all_compliance',
+    'get_compliance_dashboard': 'view_all_compliance',
+    'get_compliance_analytics': 'compliance_performance_analytics',
+    'submit_compliance_review': 'approve_compliance',
+    'resubmit_compliance_approval': 'approve_compliance',
+    'export_compliances': 'view_all_compliance',
+}
+
+# Permission type -> RBAC permission field for each module, used by has_<module>_permission
+MODULE_PERMISSION_FIELDS = {
+    'incident': {
+        'create': 'create_incident',
+        'view': 'view_all_incident',
+        'edit': 'edit_incident',
+        'assign': 'assign_incident',
+        'evaluate': 'evaluate_assigned_incident',
+        'escalate': 'escalate_to_risk',
+        'analytics': 'incident_performance_analytics'
+    },
+    'policy': {
+        'create': 'create_policy',
+        'view': 'view_all_policy',
+        'edit': 'edit_policy',
+        'approve': 'approve_policy',
+        'create_framework': 'create_framework',
+        'approve_framework': 'approve_framework',
+        'analytics': 'policy_performance_analytics'
+    },
+    'audit': {
+        'assign': 'assign_audit',
+        'conduct': 'conduct_audit',
+        'review': 'review_audit',
+        'view_reports': 'view_audit_reports',
+        'analytics': 'audit_performance_analytics'
+    },
+    'risk': {
+        'create': 'create_risk',
+        'view': 'view_all_risk',
+        'edit': 'edit_risk',
+        'approve': 'approve_risk',
+        'assign': 'assign_risk',
+        'evaluate': 'evaluate_assigned_risk',
+        'analytics': 'risk_performance_analytics'
+    },
+    'compliance': {
+        'create': 'create_compliance',
+        'view': 'view_all_compliance',
+        'edit': 'edit_compliance',
+        'approve': 'approve_compliance',
+        'analytics': 'compliance_performance_analytics'
+    },
+}
+
 class RBACUtils:
     """
     Enhanced RBAC Utility class for permission checking using the new RBAC table schema
@@ -20,7 +185,6 @@ class RBACUtils:
         """
         Get user_id from the request session with extensive debugging
         """
-        print(f"[DEBUG RBAC] get_user_id_from_request called")
         logger.debug("[RBAC] Starting get_user_id_from_request")
         
         # Check if session exists
@@ -29,16 +193,11 @@ class RBACUtils:
             print(f"[DEBUG RBAC] Session middleware not available")
             return None
         
-        print(f"[DEBUG RBAC] Session available, checking for user_id")
-        print(f"[DEBUG RBAC] Session keys: {list(request.session.keys())}")
-        
         # Get user_id from session  
         user_id = request.session.get('user_id')
-        print(f"[DEBUG RBAC] request.session.get('user_id') returned: {user_id}")
         
         if user_id:
-            logger.info(f"[RBAC] Successfully retrieved user_id from session: {user_id}")
-            print(f"[DEBUG RBAC] Successfully retrieved user_id: {user_id}")
+            logger.debug(f"[RBAC] Successfully retrieved user_id from session: {user_id}")
             return user_id
         else:
             logger.warning("[RBAC] No user_id found in session")
@@ -49,33 +208,56 @@ class RBACUtils:
     
     @staticmethod
     def get_user_rbac_record(user_id):
-        """Get the RBAC record for a user with extensive debugging"""
+        """
+        Get the active RBAC record for a user.
+        Served from the process-local permission cache; see rbac/cache.py.
+        """
         try:
-            from ..models import RBAC
-            
-            logger.debug(f"[RBAC] Looking up RBAC record for user_id: {user_id}")
-            
-            rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
-            
-            if not rbac_record:
-                logger.warning(f"[RBAC] No active RBAC record found for user {user_id}")
-                # Try to find any record for debugging
-                all_records = RBAC.objects.filter(user_id=user_id)
-                if all_records.exists():
-                    logger.debug(f"[RBAC] Found {all_records.count()} inactive records for user {user_id}")
-                else:
-                    logger.debug(f"[RBAC] No RBAC records at all for user {user_id}")
-                return None
-            
-            logger.info(f"[RBAC] Found active RBAC record for user {user_id}: role={rbac_record.role}")
-            logger.debug(f"[RBAC] User details - username: {rbac_record.username}, role: {rbac_record.role}")
+            cached = permission_cache.get(user_id)
+            if cached is not None:
+                return None if cached is NO_RECORD else cached
             
+            rbac_record = RBACUtils.load_user_rbac_record(user_id)
+            permission_cache.set(user_id, rbac_record if rbac_record else NO_RECORD)
             return rbac_record
             
         except Exception as e:
             logger.error(f"[RBAC] Error getting RBAC record for user {user_id}: {e}")
             return None
     
+    @staticmethod
+    def load_user_rbac_record(user_id):
+        """Load the RBAC record for a user from the database, bypassing the cache"""
+        from ..models import RBAC
+        
+        logger.debug(f"[RBAC] Looking up RBAC record for user_id: {user_id}")
+        
+        rbac_record = RBAC.objects.filter(user_id=user_id, is_active='Y').first()
+        
+        if not rbac_record:
+            logger.warning(f"[RBAC] No active RBAC record found for user {user_id}")
+            return None
+        
+        logger.debug(f"[RBAC] Found active RBAC record for user {user_id}: role={rbac_record.role}")
+        return rbac_record
+    
+    @staticmethod
+    def get_request_rbac_record(request, user_id):
+        """
+        Get the RBAC record for the user of this request, memoized on the request
+        so a view guarded by several permission classes looks it up only once
+        """
+        memo = getattr(request, '_rbac_record_memo', None)
+        if memo is not None and memo[0] == user_id:
+            return memo[1]
+        
+        rbac_record = RBACUtils.get_user_rbac_record(user_id)
+        try:
+            request._rbac_record_memo = (user_id, rbac_record)
+        except AttributeError:
+            pass
+        return rbac_record
+    
     @staticmethod
     def check_endpoint_permission(request, endpoint_name, required_permission=None):
         """
@@ -97,11 +279,7 @@ class RBACUtils:
             }
         """
         try:
-            logger.info(f"[RBAC] ===== ENDPOINT PERMISSION CHECK =====")
-            logger.info(f"[RBAC] Endpoint: {endpoint_name}")
-            logger.info(f"[RBAC] Required Permission: {required_permission}")
-            logger.info(f"[RBAC] Request Path: {request.path}")
-            logger.info(f"[RBAC] Request Method: {request.method}")
+            logger.debug(f"[RBAC] Endpoint permission check: {endpoint_name} ({request.method} {request.path}), required={required_permission}")
             
             user_id = RBACUtils.get_user_id_from_request(request)
             if not user_id:
@@ -115,7 +293,7 @@ class RBACUtils:
                     'debug_info': {'session_available': hasattr(request, 'session')}
                 }
             
-            rbac_record = RBACUtils.get_user_rbac_record(user_id)
+            rbac_record = RBACUtils.get_request_rbac_record(request, user_id)
             if not rbac_record:
                 logger.warning(f"[RBAC] Access DENIED - No RBAC record for user {user_id} on endpoint: {endpoint_name}")
                 return {
@@ -127,150 +305,25 @@ class RBACUtils:
                     'debug_info': {'user_id': user_id}
                 }
             
-            # Define endpoint permission mappings for all modules
-            endpoint_permissions = {
-                # ===== INCIDENT MODULE ENDPOINTS =====
-                'list_incidents': 'view_all_incident',
-                'create_incident': 'create_incident', 
-                'update_incident_status': 'edit_incident',
-                'assign_incident': 'assign_incident',
-                'incident_dashboard': 'view_all_incident',
-                'incident_analytics': 'incident_performance_analytics',
-                'export_incidents': 'view_all_incident',
-                'get_recent_incidents': 'view_all_incident',
-                'get_audit_findings': 'view_all_incident',
-                'audit_findings_list': 'view_all_incident',
-                'audit_finding_detail': 'view_all_incident',
-                'audit_finding_incident_detail': 'view_all_incident',
-                'export_audit_findings': 'view_all_incident',
-                'schedule_manual_incident': 'create_incident',
-                'reject_incident': 'edit_incident',
-                'escalate_incident': 'escalate_to_risk',
-                'user_incidents': 'view_all_incident',
-                'incident_reviewer_tasks': 'evaluate_assigned_incident',
-                'incident_mitigations': 'view_all_incident',
-                'assign_incident_reviewer': 'assign_incident',
-                'incident_review_data': 'evaluate_assigned_incident',
-                'complete_incident_review': 'evaluate_assigned_incident',
-                'submit_incident_assessment': 'edit_incident',
-                'incident_approval_data': 'view_all_incident',
-                
-                # ===== POLICY MODULE ENDPOINTS =====
-                'framework_list': 'view_all_policy',
-                'framework_detail': 'view_all_policy',
-                'create_framework_version': 'create_framework',
-                'export_policies_to_excel': 'view_all_policy',
-                'policy_list': 'view_all_policy',
-                'policy_detail': 'view_all_policy',
-                'add_policy_to_framework': 'create_policy',
-                'add_subpolicy_to_policy': 'create_policy',
-                'get_policies_by_framework': 'view_all_policy',
-                'get_subpolicies_by_policy': 'view_all_policy',
-                'update_policy_approval': 'approve_policy',
-                'submit_policy_review': 'approve_policy',
-                'submit_policy_approval_review': 'approve_policy',
-                'resubmit_policy_approval': 'approve_policy',
-                'list_policy_approvals_for_reviewer': 'approve_policy',
-                'subpolicy_detail': 'view_all_policy',
-                'submit_subpolicy_review': 'approve_policy',
-                'resubmit_subpolicy': 'approve_policy',
-                'get_policy_kpis': 'policy_performance_analytics',
-                'get_policy_analytics': 'policy_performance_analytics',
-                'get_policy_dashboard_summary': 'view_all_policy',
-                'get_policy_status_distribution': 'policy_performance_analytics',
-                'get_reviewer_workload': 'policy_performance_analytics',
-                'get_recent_policy_activity': 'view_all_policy',
-                'get_avg_policy_approval_time': 'policy_performance_analytics',
-                'get_framework_explorer_data': 'view_all_policy',
-                'get_framework_policies': 'view_all_policy',
-                'toggle_framework_status': 'edit_policy',
-                'toggle_policy_status': 'edit_policy',
-                'get_framework_details': 'view_all_policy',
-                'get_policy_details': 'view_all_policy',
-                'create_tailored_framework': 'create_framework',
-                'create_tailored_policy': 'create_policy',
-                'get_policy_version': 'view_all_policy',
-                'get_subpolicy_version': 'view_all_policy',
-                'get_policy_version_history': 'view_all_policy',
-                'all_policies_get_frameworks': 'view_all_policy',
-                'all_policies_get_policies': 'view_all_policy',
-                'all_policies_get_subpolicies': 'view_all_policy',
-                'all_policies_get_policy_versions': 'view_all_policy',
-                'all_policies_get_framework_versions': 'view_all_policy',
-                'get_policy_categories': 'view_all_policy',
-                'save_policy_category': 'create_policy',
-                'acknowledge_policy': 'view_all_policy',
-                'list_users': 'view_all_policy',
-                
-                # ===== AUDIT MODULE ENDPOINTS =====
-                'get_all_audits': 'view_audit_reports',
-                'get_my_audits': 'conduct_audit',
-                'get_my_reviews': 'review_audit',
-                'get_audit_details': 'view_audit_reports',
-                'update_audit_status': 'conduct_audit',
-                'submit_audit_findings': 'conduct_audit',
-                'get_audit_versions': 'view_audit_reports',
-                'save_audit_version': 'conduct_audit',
-                'send_audit_for_review': 'conduct_audit',
-                'update_audit_finding': 'conduct_audit',
-                'upload_evidence': 'conduct_audit',
-                'get_compliance_by_subpolicy': 'view_audit_reports',
-                'add_compliance_to_audit': 'assign_audit',
-                'save_review_progress': 'review_audit',
-                'load_review_data': 'review_audit',
-                'generate_audit_report': 'view_audit_reports',
-                'get_audit_reports': 'view_audit_reports',
-                
-                # ===== RISK MODULE ENDPOINTS =====
-                'risk_workflow': 'view_all_risk',
-                'assign_risk_instance': 'assign_risk',
-                'update_risk_status': 'edit_risk',
-                'get_risk_mitigations': 'view_all_risk',
-                'update_risk_mitigation': 'edit_risk',
-                'assign_reviewer': 'assign_risk',
-                'get_reviewer_tasks': 'evaluate_assigned_risk',
-                'complete_review': 'evaluate_assigned_risk',
-                'get_reviewer_comments': 'view_all_risk',
-                'update_mitigation_status': 'edit_risk',
-                'analyze_incident': 'create_risk',
-                
-                # ===== COMPLIANCE MODULE ENDPOINTS =====
-                'create_compliance': 'create_compliance',
-                'edit_compliance': 'edit_compliance',
-                'get_compliance_details': 'view_all_compliance',
-                'get_compliance_dashboard': 'view_all_compliance',
-                'get_compliance_analytics': 'compliance_performance_analytics',
-                'submit_compliance_review': 'approve_compliance',
-                'resubmit_compliance_approval': 'approve_compliance',
-                'export_compliances': 'view_all_compliance',
-            }
-            
             # Use provided permission or look up from mapping
-            permission_to_check = required_permission or endpoint_permissions.get(endpoint_name)
+            permission_to_check = required_permission or ENDPOINT_PERMISSIONS.get(endpoint_name)
             
             if not permission_to_check:
                 logger.warning(f"[RBAC] No permission mapping found for endpoint: {endpoint_name}")
-                logger.info(f"[RBAC] Available endpoints: {list(endpoint_permissions.keys())[:10]}...") # Show first 10
+                logger.info(f"[RBAC] Available endpoints: {list(ENDPOINT_PERMISSIONS.keys())[:10]}...") # Show first 10
                 return {
                     'allowed': False,
                     'user_id': user_id,
                     'user_role': rbac_record.role,
                     'user_username': rbac_record.username,
                     'message': f'No permission mapping found for endpoint: {endpoint_name}',
-                    'debug_info': {'endpoint_name': endpoint_name, 'available_mappings_count': len(endpoint_permissions)}
+                    'debug_info': {'endpoint_name': endpoint_name, 'available_mappings_count': len(ENDPOINT_PERMISSIONS)}
                 }
             
             # Check the permission
-            has_permission = getattr(rbac_record, permission_to_check, False)
+            has_permission = rbac_record.permission_set.has(permission_to_check)
             
-            logger.info(f"[RBAC] ===== PERMISSION CHECK DETAILS =====")
-            logger.info(f"[RBAC] User: {user_id} ({rbac_record.username})")
-            logger.info(f"[RBAC] Role: {rbac_record.role}")
-            logger.info(f"[RBAC] Endpoint: {endpoint_name}")
-            logger.info(f"[RBAC] Required Permission: {permission_to_check}")
-            logger.info(f"[RBAC] Permission Value: {has_permission}")
-            logger.info(f"[RBAC] Result: {'ACCESS GRANTED' if has_permission else 'ACCESS DENIED'}")
-            logger.info(f"[RBAC] =====================================")
+            logger.debug(f"[RBAC] User {user_id} ({rbac_record.role}) {endpoint_name} requires {permission_to_check}: {'ACCESS GRANTED' if has_permission else 'ACCESS DENIED'}")
             
             # Log all user permissions for debugging
             if not has_permission:
@@ -314,39 +367,26 @@ class RBACUtils:
         Check if user has specific incident permission with detailed debugging
         permission_type: 'create', 'view', 'edit', 'assign', 'evaluate', 'escalate', 'analytics'
         """
-        print(f"[DEBUG RBAC] has_incident_permission called with user_id: {user_id}, permission_type: {permission_type}")
         try:
             logger.debug(f"[RBAC] Checking incident permission: {permission_type} for user {user_id}")
             
             rbac_record = RBACUtils.get_user_rbac_record(user_id)
-            print(f"[DEBUG RBAC] get_user_rbac_record returned: {rbac_record}")
             if not rbac_record:
                 logger.warning(f"[RBAC] Incident permission check failed - no RBAC record for user {user_id}")
                 print(f"[DEBUG RBAC] No RBAC record found, returning False")
                 return False
             
-            # Map permission types to model fields
-            permission_field_map = {
-                'create': 'create_incident',
-                'view': 'view_all_incident',
-                'edit': 'edit_incident',
-                'assign': 'assign_incident',
-                'evaluate': 'evaluate_assigned_incident',
-                'escalate': 'escalate_to_risk',
-                'analytics': 'incident_performance_analytics'
-            }
+            permission_field_map = MODULE_PERMISSION_FIELDS['incident']
             
             field_name = permission_field_map.get(permission_type)
-            print(f"[DEBUG RBAC] Mapped permission_type '{permission_type}' to field_name: {field_name}")
             if not field_name:
                 logger.error(f"[RBAC] Invalid incident permission type: {permission_type}")
                 print(f"[DEBUG RBAC] Invalid permission type, returning False")
                 return False
             
-            has_permission = getattr(rbac_record, field_name, False)
-            print(f"[DEBUG RBAC] getattr(rbac_record, '{field_name}', False) returned: {has_permission}")
+            has_permission = rbac_record.permission_set.has(field_name)
             
-            logger.info(f"[RBAC] User {user_id} ({rbac_record.role}) incident.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} ({rbac_record.role}) incident.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -369,25 +409,16 @@ class RBACUtils:
                 logger.warning(f"[RBAC] Policy permission check failed - no RBAC record for user {user_id}")
                 return False
             
-            # Map permission types to model fields
-            permission_field_map = {
-                'create': 'create_policy',
-                'view': 'view_all_policy',
-                'edit': 'edit_policy',
-                'approve': 'approve_policy',
-                'create_framework': 'create_framework',
-                'approve_framework': 'approve_framework',
-                'analytics': 'policy_performance_analytics'
-            }
+            permission_field_map = MODULE_PERMISSION_FIELDS['policy']
             
             field_name = permission_field_map.get(permission_type)
             if not field_name:
                 logger.error(f"[RBAC] Invalid policy permission type: {permission_type}")
                 return False
             
-            has_permission = getattr(rbac_record, field_name, False)
+            has_permission = rbac_record.permission_set.has(field_name)
             
-            logger.info(f"[RBAC] User {user_id} ({rbac_record.role}) policy.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} ({rbac_record.role}) policy.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -409,23 +440,16 @@ class RBACUtils:
                 logger.warning(f"[RBAC] Audit permission check failed - no RBAC record for user {user_id}")
                 return False
             
-            # Map permission types to model fields
-            permission_field_map = {
-                'assign': 'assign_audit',
-                'conduct': 'conduct_audit',
-                'review': 'review_audit',
-                'view_reports': 'view_audit_reports',
-                'analytics': 'audit_performance_analytics'
-            }
+            permission_field_map = MODULE_PERMISSION_FIELDS['audit']
             
             field_name = permission_field_map.get(permission_type)
             if not field_name:
                 logger.error(f"[RBAC] Invalid audit permission type: {permission_type}")
                 return False
             
-            has_permission = getattr(rbac_record, field_name, False)
+            has_permission = rbac_record.permission_set.has(field_name)
             
-            logger.info(f"[RBAC] User {user_id} ({rbac_record.role}) audit.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} ({rbac_record.role}) audit.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -447,25 +471,16 @@ class RBACUtils:
                 logger.warning(f"[RBAC] Risk permission check failed - no RBAC record for user {user_id}")
                 return False
             
-            # Map permission types to model fields
-            permission_field_map = {
-                'create': 'create_risk',
-                'view': 'view_all_risk',
-                'edit': 'edit_risk',
-                'approve': 'approve_risk',
-                'assign': 'assign_risk',
-                'evaluate': 'evaluate_assigned_risk',
-                'analytics': 'risk_performance_analytics'
-            }
+            permission_field_map = MODULE_PERMISSION_FIELDS['risk']
             
             field_name = permission_field_map.get(permission_type)
             if not field_name:
                 logger.error(f"[RBAC] Invalid risk permission type: {permission_type}")
                 return False
             
-            has_permission = getattr(rbac_record, field_name, False)
+            has_permission = rbac_record.permission_set.has(field_name)
             
-            logger.info(f"[RBAC] User {user_id} ({rbac_record.role}) risk.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} ({rbac_record.role}) risk.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -487,23 +502,16 @@ class RBACUtils:
                 logger.warning(f"[RBAC] Compliance permission check failed - no RBAC record for user {user_id}")
                 return False
             
-            # Map permission types to model fields
-            permission_field_map = {
-                'create': 'create_compliance',
-                'view': 'view_all_compliance',
-                'edit': 'edit_compliance',
-                'approve': 'approve_compliance',
-                'analytics': 'compliance_performance_analytics'
-            }
+            permission_field_map = MODULE_PERMISSION_FIELDS['compliance']
             
             field_name = permission_field_map.get(permission_type)
             if not field_name:
                 logger.error(f"[RBAC] Invalid compliance permission type: {permission_type}")
                 return False
             
-            has_permission = getattr(rbac_record, field_name, False)
+            has_permission = rbac_record.permission_set.has(field_name)
             
-            logger.info(f"[RBAC] User {user_id} ({rbac_record.role}) compliance.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
+            logger.debug(f"[RBAC] User {user_id} ({rbac_record.role}) compliance.{permission_type} = {'ALLOWED' if has_permission else 'DENIED'}")
             
             return has_permission
             
@@ -356,4 +356,22 @@ def test_endpoint_permission(request):
         return JsonResponse({
             'error': 'Failed to test endpoint permission',
             'details': str(e)
-        }, status=500) 
\ No newline at end of file
+        }, status=500) 
+
+
+@require_http_methods(["GET"])
+def rbac_cache_stats(request):
+    """Hit/miss counters of the process-local RBAC permission cache"""
+    try:
+        from .cache import permission_cache
+        return JsonResponse({
+            'success': True,
+            'cache': permission_cache.stats()
+        })
+        
+    except Exception as e:
+        logger.error(f"[RBAC] Error getting cache stats: {e}")
+        return JsonResponse({
+            'error': 'Failed to get RBAC cache stats',
+            'details': str(e)
+        }, status=500)
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from .checklist_utils import update_lastchecklistitem_verified
 import html
 from .logging_service import send_log
+from .audit_version_store import decode_extracted_info
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -437,7 +438,7 @@ def generate_report_file(audit_id, output_file_path, version=None):
                     import json
                     # Parse JSON data
                     try:
-                        version_data = json.loads(extracted_info)
+                        version_data = decode_extracted_info(audit_id, extracted_info)
                         
                         # Extract finding data from the version
                         for compliance_id, finding_data in version_data.items():
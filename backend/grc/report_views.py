@@ -15,6 +15,7 @@ from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from .notification_service import NotificationService
+from .kpi_rollups import refresh_audit_rollups
 import json
 from typing import Optional, Dict, Any
 from django.views.decorators.csrf import csrf_exempt
@@ -407,6 +408,7 @@ def approve_audit_and_create_incidents(request, audit_id):
                 SET LastChecklistItemVerified = %s
                 WHERE AuditId = %s
             """, [datetime.datetime.now(), audit_id])
+            refresh_audit_rollups(audit_id)
             
             # Create incidents for non-compliant and partially compliant findings
             create_incidents_for_findings(audit_id)
@@ -16,6 +16,9 @@ from .models import Audit
 from .checklist_utils import update_lastchecklistitem_verified
 from .report_views import generate_report_file
 from .logging_service import send_log
+from .audit_summary import findings_changed
+from .user_directory import resolve_users, resolve_user
+from .audit_version_head import latest_version
 
 # Load environment variables
 load_dotenv()
@@ -180,15 +183,16 @@ def get_latest_version(audit_id: int) -> Optional[Dict[str, Any]]:
     Get the latest version of an audit, regardless of whether it's a review or audit version.
     """
     try:
+        version = latest_version(audit_id)
+        if version is None:
+            return None
         with connection.cursor() as cursor:
-            # Updated query to sort by datetime (created_at) and get the most recent
+            # The audit's version head names the most recent version
             cursor.execute("""
                 SELECT Version, ExtractedInfo, Date, UserId, ApprovedRejected
                 FROM audit_version 
-                WHERE AuditId = %s
-                ORDER BY Date DESC, Version DESC
-                LIMIT 1
-            """, [audit_id])
+                WHERE AuditId = %s AND Version = %s
+            """, [audit_id, version])
             result = cursor.fetchone()
             if result:
                 return {
@@ -455,6 +459,7 @@ def update_audit_review_status(request, audit_id):
                         current_time,
                         audit_id
                     ])
+                findings_changed([audit_id])
                     
                 # Update version data to indicate rejection
                 cursor.execute("""
@@ -500,33 +505,32 @@ def update_audit_review_status(request, audit_id):
                 with connection.cursor() as cursor:
                     # Get audit and user details
                     cursor.execute("""
-                        SELECT a.Title, a.Auditor, a.Assignee, u1.Email as auditor_email, 
-                               u1.UserName as auditor_name, u2.Email as assignee_email,
-                               u2.UserName as assignee_name
+                        SELECT a.Title, a.Auditor, a.Assignee
                         FROM audit a
-                        LEFT JOIN users u1 ON a.Auditor = u1.UserId
-                        LEFT JOIN users u2 ON a.Assignee = u2.UserId
                         WHERE a.AuditId = %s
                     """, [audit_id])
                     
                     audit_data = cursor.fetchone()
                     if audit_data:
                         audit_title = audit_data[0] or f"Audit #{audit_id}"
-                        auditor_email = audit_data[3]
-                        auditor_name = audit_data[4]
-                        assignee_email = audit_data[5]
-                        assignee_name = audit_data[6]
+                        # Auditor, assignee and reviewer in one directory lookup
+                        audit_users = resolve_users([audit_data[1], audit_data[2], user_id])
+                        auditor = audit_users.get(audit_data[1])
+                        assignee = audit_users.get(audit_data[2])
+                        auditor_email = auditor.Email if auditor else None
+                        auditor_name = auditor.UserName if auditor else None
+                        assignee_email = assignee.Email if assignee else None
+                        assignee_name = assignee.UserName if assignee else None
                         
                         reviewer_name = "System"
                         if user_id:
-                            cursor.execute("SELECT UserName FROM users WHERE UserId = %s", [user_id])
-                            reviewer_row = cursor.fetchone()
-                            if reviewer_row:
-                                reviewer_name = reviewer_row[0] or f"User {user_id}"
+                            reviewer = resolve_user(user_id)
+                            if reviewer:
+                                reviewer_name = reviewer.UserName or f"User {user_id}"
                         
                         # Send notification to auditor
                         if auditor_email:
-                            notification_service.send_multi_channel_notification({
+                            notification_service.queue_multi_channel_notification({
                                 'notification_type': 'auditReviewed',
                                 'email': auditor_email,
                                 'email_type': 'gmail',
@@ -541,7 +545,7 @@ def update_audit_review_status(request, audit_id):
                         
                         # Send notification to assignee if different from auditor
                         if assignee_email and assignee_email != auditor_email:
-                            notification_service.send_multi_channel_notification({
+                            notification_service.queue_multi_channel_notification({
                                 'notification_type': 'auditReviewed',
                                 'email': assignee_email,
                                 'email_type': 'gmail',
@@ -694,6 +698,7 @@ def update_audit_review_status(request, audit_id):
                             compliance_id
                         ])
                         print(f"DEBUG: Updated audit_finding for compliance_id {compliance_id} with check_value {check_value}")
+                findings_changed([audit_id])
                 
                 # Update version data to indicate acceptance
                 cursor.execute("""
@@ -889,33 +894,32 @@ def update_audit_review_status(request, audit_id):
                 with connection.cursor() as cursor:
                     # Get audit and user details
                     cursor.execute("""
-                        SELECT a.Title, a.Auditor, a.Assignee, u1.Email as auditor_email, 
-                               u1.UserName as auditor_name, u2.Email as assignee_email,
-                               u2.UserName as assignee_name
+                        SELECT a.Title, a.Auditor, a.Assignee
                         FROM audit a
-                        LEFT JOIN users u1 ON a.Auditor = u1.UserId
-                        LEFT JOIN users u2 ON a.Assignee = u2.UserId
                         WHERE a.AuditId = %s
                     """, [audit_id])
                     
                     audit_data = cursor.fetchone()
                     if audit_data:
                         audit_title = audit_data[0] or f"Audit #{audit_id}"
-                        auditor_email = audit_data[3]
-                        auditor_name = audit_data[4]
-                        assignee_email = audit_data[5]
-                        assignee_name = audit_data[6]
+                        # Auditor, assignee and reviewer in one directory lookup
+                        audit_users = resolve_users([audit_data[1], audit_data[2], user_id])
+                        auditor = audit_users.get(audit_data[1])
+                        assignee = audit_users.get(audit_data[2])
+                        auditor_email = auditor.Email if auditor else None
+                        auditor_name = auditor.UserName if auditor else None
+                        assignee_email = assignee.Email if assignee else None
+                        assignee_name = assignee.UserName if assignee else None
                         
                         reviewer_name = "System"
                         if user_id:
-                            cursor.execute("SELECT UserName FROM users WHERE UserId = %s", [user_id])
-                            reviewer_row = cursor.fetchone()
-                            if reviewer_row:
-                                reviewer_name = reviewer_row[0] or f"User {user_id}"
+                            reviewer = resolve_user(user_id)
+                            if reviewer:
+                                reviewer_name = reviewer.UserName or f"User {user_id}"
                         
                         # Send notification to auditor
                         if auditor_email:
-                            notification_service.send_multi_channel_notification({
+                            notification_service.queue_multi_channel_notification({
                                 'notification_type': 'auditReviewed',
                                 'email': auditor_email,
                                 'email_type': 'gmail',
@@ -930,7 +934,7 @@ def update_audit_review_status(request, audit_id):
                         
                         # Send notification to assignee if different from auditor
                         if assignee_email and assignee_email != auditor_email:
-                            notification_service.send_multi_channel_notification({
+                            notification_service.queue_multi_channel_notification({
                                 'notification_type': 'auditReviewed',
                                 'email': assignee_email,
                                 'email_type': 'gmail',
@@ -2834,4 +2834,525 @@ def risk_appetite(request):
                 'medium': 'Balanced (4-7)',
                 'high': 'Risk Seeking (8-10)'
             }
-        }, status=200)  # Still return 200 for fallback data
\ No newline at end of file
+        }, status=200)  # Still return 200 for fallback data
+
+
+# =====================================================
+# BATCHED RISK KPI ENGINE
+# =====================================================
+# The risk dashboard renders ~10 KPI cards, and each endpoint above re-queries
+# risk_instance (most of them once per month of trend data). risk_kpi_batch
+# loads one projection of risk_instance into a pandas frame and computes every
+# requested KPI from it, returning the same payload as the matching endpoint.
+
+BATCH_KPI_COLUMNS = [
+    'RiskInstanceId', 'RiskStatus', 'Criticality', 'RiskPriority', 'Category',
+    'RiskExposureRating', 'RecurrenceCount', 'RiskDescription', 'RiskOwner',
+    'CreatedAt', 'MitigationStatus', 'MitigationDueDate', 'MitigationCompletedDate',
+]
+
+CATEGORY_MAP = {
+    'operational': 'Operational',
+    'financial': 'Financial',
+    'strategic': 'Strategic',
+    'compliance': 'Compliance',
+    'it-security': 'IT Security'
+}
+
+TIME_RANGE_DAYS = {
+    '7days': 7,
+    '30days': 30,
+    '90days': 90,
+    '6months': 180,
+    '1year': 365,
+}
+
+
+def load_risk_instance_frame():
+    """Load the risk_instance projection used by every batched KPI in one query"""
+    return risk_instance_frame(RiskInstance.objects.values(*BATCH_KPI_COLUMNS))
+
+
+def risk_instance_frame(rows):
+    """Frame of BATCH_KPI_COLUMNS rows (dicts) with the derived columns the KPIs read"""
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(list(rows), columns=BATCH_KPI_COLUMNS)
+
+    for column in ('CreatedAt', 'MitigationDueDate', 'MitigationCompletedDate'):
+        frame[column] = pd.to_datetime(frame[column], errors='coerce')
+    frame['RiskExposureRating'] = pd.to_numeric(frame['RiskExposureRating'], errors='coerce').fillna(0)
+    frame['RecurrenceCount'] = pd.to_numeric(frame['RecurrenceCount'], errors='coerce')
+
+    # Lower-cased copies for the __iexact filters of the individual endpoints
+    for column in ('Criticality', 'RiskPriority', 'Category', 'MitigationStatus'):
+        frame[column + 'Lower'] = frame[column].fillna('').astype(str).str.lower()
+
+    # Calendar month buckets shared by all monthly trends
+    frame['CreatedMonth'] = frame['CreatedAt'].dt.to_period('M')
+    frame['CompletedMonth'] = frame['MitigationCompletedDate'].dt.to_period('M')
+    frame['DaysToMitigate'] = (frame['MitigationCompletedDate'] - frame['CreatedAt']).dt.days
+    return frame
+
+
+def _between(series, start, end):
+    import pandas as pd
+    return (series >= pd.Timestamp(start)) & (series <= pd.Timestamp(end))
+
+
+def _last_months(today, count):
+    """First days of the last `count` calendar months, oldest first, including the current one"""
+    first = today.replace(day=1)
+    return [first - relativedelta(months=i) for i in range(count - 1, -1, -1)]
+
+
+def _monthly_values(frame, month_column, months, value_column=None, how='sum'):
+    """Group `frame` by calendar month once and read the values for `months` in order"""
+    import pandas as pd
+
+    if value_column is None:
+        grouped = frame.groupby(month_column).size()
+    else:
+        grouped = frame.groupby(month_column)[value_column].agg(how)
+    values = []
+    for month in months:
+        value = grouped.get(pd.Period(month, 'M'))
+        values.append(None if value is None or pd.isna(value) else value)
+    return values
+
+
+def _percentage_change(trend_data):
+    if len(trend_data) >= 2 and trend_data[-2] > 0:
+        return round(((trend_data[-1] - trend_data[-2]) / trend_data[-2]) * 100, 1)
+    return 0
+
+
+def _category_filter(frame, category):
+    if category and category.lower() != 'all':
+        db_category = CATEGORY_MAP.get(category.lower(), category)
+        return frame[frame['CategoryLower'] == db_category.lower()]
+    return frame
+
+
+def _previous_period(today, time_range):
+    days = TIME_RANGE_DAYS.get(time_range, 30)
+    prev_period_end = today - timedelta(days=days)
+    return prev_period_end - timedelta(days=days), prev_period_end
+
+
+def _batch_active_risks_kpi(frame, params, today):
+    active = frame[frame['RiskStatus'] == 'Assigned']
+    months = _last_months(today, 6)
+    trend_data = [int(v or 0) for v in _monthly_values(active, 'CreatedMonth', months)]
+    min_value = min(trend_data) if trend_data else 0
+    max_value = max(trend_data) if trend_data else 0
+    return {
+        'current': int(len(active)),
+        'months': [m.strftime('%b') for m in months],
+        'trendData': trend_data,
+        'percentageChange': _percentage_change(trend_data),
+        'minValue': min_value,
+        'maxValue': max_value,
+        'range': max_value - min_value if trend_data else 0
+    }
+
+
+def _batch_risk_exposure_trend(frame, params, today):
+    months = _last_months(today, int(params.get('months', 6)))
+    trend_data = [
+        round(float(v or 0), 1)
+        for v in _monthly_values(frame, 'CreatedMonth', months, 'RiskExposureRating')
+    ]
+    min_value = min(trend_data) if trend_data else 0
+    max_value = max(trend_data) if trend_data else 0
+    return {
+        'current': round(float(frame['RiskExposureRating'].sum()), 1),
+        'months': [m.strftime('%b') for m in months],
+        'trendData': trend_data,
+        'percentageChange': _percentage_change(trend_data),
+        'minValue': min_value,
+        'maxValue': max_value,
+        'range': max_value - min_value if trend_data else 0
+    }
+
+
+def _batch_risk_reduction_trend(frame, params, today):
+    if params.get('period', 'month') == 'month':
+        current_start = today.replace(day=1)
+    else:
+        current_start = today - timedelta(days=30)
+    current_end = today
+
+    import pandas as pd
+    created = frame['CreatedAt']
+    completed_date = frame['MitigationCompletedDate']
+    is_completed = frame['MitigationStatusLower'] == 'completed'
+    exposure = frame['RiskExposureRating']
+
+    start_exposure = float(exposure[
+        (created < pd.Timestamp(current_start)) & ~(is_completed & (completed_date < pd.Timestamp(current_start)))
+    ].sum())
+    new_exposure = float(exposure[_between(created, current_start, current_end)].sum())
+    mitigated_exposure = float(exposure[is_completed & _between(completed_date, current_start, current_end)].sum())
+    end_exposure = float(exposure[
+        (created <= pd.Timestamp(current_end)) & ~(is_completed & (completed_date <= pd.Timestamp(current_end)))
+    ].sum())
+
+    total_initial_exposure = start_exposure + new_exposure
+    if total_initial_exposure > 0:
+        reduction_percentage = round(((total_initial_exposure - end_exposure) / total_initial_exposure) * 100, 1)
+    else:
+        reduction_percentage = 0
+
+    return {
+        'startCount': round(start_exposure),
+        'newCount': round(new_exposure),
+        'mitigatedCount': round(mitigated_exposure),
+        'endCount': round(end_exposure),
+        'reductionPercentage': max(reduction_percentage, 0)
+    }
+
+
+def _batch_high_criticality_risks(frame, params, today):
+    high = frame['CriticalityLower'] == 'high'
+    critical = frame['CriticalityLower'] == 'critical'
+    high_count = int(high.sum())
+    critical_count = int(critical.sum())
+    total_count = high_count + critical_count
+    total_risks = len(frame)
+
+    months = _last_months(today, 6)
+    trend_data = [int(v or 0) for v in _monthly_values(frame[high | critical], 'CreatedMonth', months)]
+    return {
+        'count': total_count,
+        'highCount': high_count,
+        'criticalCount': critical_count,
+        'percentage': round((total_count / total_risks) * 100, 1) if total_risks > 0 else 0,
+        'months': [m.strftime('%b') for m in months],
+        'trendData': trend_data
+    }
+
+
+def _batch_mitigation_completion_rate(frame, params, today):
+    start_date = today - timedelta(days=TIME_RANGE_DAYS.get(params.get('timeRange', '30days'), 30))
+    in_range = frame[_between(frame['CreatedAt'], start_date, today)]
+
+    has_due_date = in_range['MitigationDueDate'].notna()
+    completed = (in_range['MitigationStatus'] == 'Completed') & in_range['MitigationCompletedDate'].notna()
+    total_mitigations = int(has_due_date.sum())
+    completed_mitigations = int(completed.sum())
+    completion_percentage = (completed_mitigations / total_mitigations) * 100 if total_mitigations > 0 else 0
+
+    avg_days = in_range.loc[completed, 'DaysToMitigate'].mean()
+    avg_days = float(avg_days) if avg_days == avg_days else 0
+
+    import pandas as pd
+    overdue_mitigations = int((
+        (in_range['MitigationDueDate'] < pd.Timestamp(today)) &
+        in_range['MitigationStatus'].isin(['Planned', 'In Progress'])
+    ).sum())
+    overdue_percentage = (overdue_mitigations / total_mitigations) * 100 if total_mitigations > 0 else 0
+
+    # Trend covers the six full months before the current one
+    months = [today.replace(day=1) - relativedelta(months=i) for i in range(6, 0, -1)]
+    month_totals = _monthly_values(frame[frame['MitigationDueDate'].notna()], 'CreatedMonth', months)
+    month_completed = _monthly_values(
+        frame[(frame['MitigationStatus'] == 'Completed') & frame['MitigationCompletedDate'].notna()],
+        'CreatedMonth', months
+    )
+    trend_data = [
+        round((done or 0) / total * 100) if total else 0
+        for total, done in zip(month_totals, month_completed)
+    ]
+
+    percentage_change = 0
+    if len(trend_data) >= 2 and trend_data[-2] != 0:
+        percentage_change = ((trend_data[-1] - trend_data[-2]) / trend_data[-2]) * 100
+
+    return {
+        'completionRate': round(completion_percentage),
+        'totalTasks': total_mitigations,
+        'completedTasks': completed_mitigations,
+        'avgDaysToMitigate': round(avg_days, 1),
+        'overdueTasks': overdue_mitigations,
+        'overduePercentage': round(overdue_percentage),
+        'percentageChange': round(percentage_change, 1),
+        'trendData': trend_data,
+        'months': [m.strftime('%b') for m in months],
+        'slaTarget': 30
+    }
+
+
+def _batch_avg_remediation_time(frame, params, today):
+    priority = params.get('priority', 'Critical').lower()
+    sla_days = 30
+    prioritized = frame[frame['RiskPriorityLower'] == priority]
+    remediated = prioritized[
+        (prioritized['MitigationStatus'] == 'Completed') &
+        prioritized['CreatedAt'].notna() & prioritized['MitigationCompletedDate'].notna()
+    ]
+
+    avg_days = remediated['DaysToMitigate'].mean()
+    avg_days = round(float(avg_days)) if avg_days == avg_days else 0
+
+    # Same month windows as avg_remediation_time
+    last_month_end = today.replace(day=1) - timedelta(days=1)
+    months = []
+    for i in range(5, -1, -1):
+        month_end = last_month_end if i == 0 else last_month_end - relativedelta(months=i - 1)
+        months.append(month_end.replace(day=1))
+    trend_data = [
+        round(float(v)) if v is not None else 0
+        for v in _monthly_values(remediated, 'CompletedMonth', months, 'DaysToMitigate', how='mean')
+    ]
+
+    import pandas as pd
+    open_risks = prioritized[prioritized['MitigationStatus'].isin(['Work in Progress', 'Not Started'])]
+    overdue_risks = int((open_risks['CreatedAt'] < pd.Timestamp(today - timedelta(days=sla_days))).sum())
+    total_active = int(len(open_risks))
+
+    min_value = min(trend_data) if trend_data else 0
+    max_value = max(trend_data) if trend_data else 0
+    return {
+        'current': trend_data[-1] if trend_data else avg_days,
+        'months': [m.strftime('%b') for m in months],
+        'trendData': trend_data,
+        'percentageChange': _percentage_change(trend_data),
+        'slaDays': sla_days,
+        'overdueCount': overdue_risks,
+        'overduePercentage': round((overdue_risks / total_active * 100) if total_active > 0 else 0),
+        'totalActive': total_active,
+        'minValue': min_value,
+        'maxValue': max(max_value, sla_days)
+    }
+
+
+def _batch_mitigation_cost(frame, params, today):
+    time_range = params.get('timeRange', 'all')
+    category = params.get('category', 'all')
+    cost_factor = 1000
+
+    completed = frame[frame['MitigationStatus'] == 'Completed']
+    in_period = completed
+    if time_range != 'all':
+        start_date = today - timedelta(days=TIME_RANGE_DAYS.get(time_range, 30))
+        in_period = completed[_between(completed['MitigationCompletedDate'], start_date, today)]
+
+    filtered = _category_filter(in_period, category)
+    total_mitigated = int(len(filtered))
+    total_cost = round(float(filtered['RiskExposureRating'].sum()) * cost_factor / 1000)
+    avg_cost = round(total_cost / total_mitigated) if total_mitigated > 0 else 0
+
+    last_month_end = today.replace(day=1) - timedelta(days=1)
+    months = []
+    for i in range(5, -1, -1):
+        month_end = last_month_end if i == 0 else last_month_end - relativedelta(months=i - 1)
+        months.append(month_end.replace(day=1))
+    monthly_data = [
+        {'month': month.strftime('%b'), 'cost': round(float(v or 0) * cost_factor / 1000)}
+        for month, v in zip(months, _monthly_values(completed, 'CompletedMonth', months, 'RiskExposureRating'))
+    ]
+
+    highest_category = {'category': 'None', 'cost': 0}
+    category_costs = in_period[in_period['Category'].fillna('') != ''].groupby('Category')['RiskExposureRating'].sum()
+    for cat, exposure in category_costs.items():
+        cat_cost = round(float(exposure) * cost_factor / 1000)
+        if cat_cost > highest_category['cost']:
+            highest_category = {'category': cat, 'cost': cat_cost}
+
+    prev_period_start, prev_period_end = _previous_period(today, time_range)
+    prev_exposure = _category_filter(
+        completed[_between(completed['MitigationCompletedDate'], prev_period_start, prev_period_end)], category
+    )['RiskExposureRating'].sum()
+    prev_cost = round(float(prev_exposure) * cost_factor / 1000)
+    percentage_change = round(((total_cost - prev_cost) / prev_cost) * 100, 1) if prev_cost > 0 else 0
+
+    return {
+        'totalCost': total_cost,
+        'avgCost': avg_cost,
+        'highestCost': max([item['cost'] for item in monthly_data]) if monthly_data else 0,
+        'highestCategory': highest_category['category'],
+        'percentageChange': percentage_change,
+        'monthlyData': monthly_data,
+        'totalMitigated': total_mitigated
+    }
+
+
+def _batch_due_mitigation(frame, params, today):
+    import pandas as pd
+
+    time_range = params.get('timeRange', 'all')
+    category = params.get('category', 'all')
+
+    with_due_date = _category_filter(frame[frame['MitigationDueDate'].notna()], category)
+    scoped = with_due_date
+    if time_range != 'all':
+        start_date = today - timedelta(days=TIME_RANGE_DAYS.get(time_range, 30))
+        scoped = with_due_date[with_due_date['CreatedAt'] >= pd.Timestamp(start_date)]
+
+    total_count = int(len(scoped))
+    is_completed = scoped['MitigationStatus'] == 'Completed'
+    completed_count = int(is_completed.sum())
+    overdue_count = int(((scoped['MitigationDueDate'] < pd.Timestamp(today)) & ~is_completed).sum())
+    completed_percentage = round((completed_count / total_count) * 100) if total_count > 0 else 0
+    overdue_percentage = round((overdue_count / total_count) * 100) if total_count > 0 else 0
+
+    prev_period_start, prev_period_end = _previous_period(today, time_range)
+    prev_scoped = with_due_date[_between(with_due_date['CreatedAt'], prev_period_start, prev_period_end)]
+    prev_total = int(len(prev_scoped))
+    prev_overdue_count = int((
+        (prev_scoped['MitigationDueDate'] < pd.Timestamp(prev_period_end)) &
+        (prev_scoped['MitigationStatus'] != 'Completed')
+    ).sum())
+    prev_overdue_percentage = round((prev_overdue_count / prev_total) * 100) if prev_total > 0 else 0
+
+    return {
+        'overduePercentage': overdue_percentage,
+        'completedPercentage': completed_percentage,
+        'pendingPercentage': 100 - completed_percentage - overdue_percentage,
+        'overdueCount': overdue_count,
+        'completedCount': completed_count,
+        'pendingCount': total_count - completed_count - overdue_count,
+        'totalCount': total_count,
+        'percentageChange': overdue_percentage - prev_overdue_percentage
+    }
+
+
+def _batch_recurrence_rate(frame, params, today):
+    import pandas as pd
+
+    time_range = params.get('timeRange', 'all')
+    scoped = frame[frame['RiskStatus'].notna() & frame['RecurrenceCount'].notna()]
+    if time_range in ('7days', '30days', '90days', '1year'):
+        start_date = today - timedelta(days=TIME_RANGE_DAYS[time_range])
+        scoped = scoped[scoped['CreatedAt'] >= pd.Timestamp(start_date)]
+    scoped = _category_filter(scoped, params.get('category', 'all'))
+
+    recurring = scoped[scoped['RecurrenceCount'] > 1]
+    total_risks = int(len(scoped))
+    recurring_risks = int(len(recurring))
+    recurring_percentage = round((recurring_risks / total_risks) * 100, 1) if total_risks > 0 else 0
+
+    months = _last_months(today, 6)
+    month_totals = _monthly_values(scoped, 'CreatedMonth', months)
+    month_recurring = _monthly_values(recurring, 'CreatedMonth', months)
+    trend_data = [
+        round((rec or 0) / total * 100, 1) if total else 0
+        for total, rec in zip(month_totals, month_recurring)
+    ]
+
+    breakdown = {}
+    categorized = scoped[scoped['Category'].fillna('') != '']
+    category_totals = categorized.groupby('Category').size()
+    category_recurring = categorized[categorized['RecurrenceCount'] > 1].groupby('Category').size()
+    for cat, cat_total in category_totals.items():
+        breakdown[cat] = round(int(category_recurring.get(cat, 0)) / int(cat_total) * 100, 1)
+
+    top_recurring_risks = []
+    for risk in recurring.sort_values('RecurrenceCount', ascending=False).head(5).itertuples():
+        description = risk.RiskDescription
+        if description and len(description) > 50:
+            title = description[:47] + "..."
+        else:
+            title = description or f"Risk {risk.RiskInstanceId}"
+        top_recurring_risks.append({
+            'id': int(risk.RiskInstanceId),
+            'title': title,
+            'category': risk.Category or "Unknown",
+            'count': int(risk.RecurrenceCount),
+            'owner': risk.RiskOwner
+        })
+
+    return {
+        'recurrenceRate': recurring_percentage,
+        'oneTimeRate': 100 - recurring_percentage,
+        'totalRisks': total_risks,
+        'recurringRisks': recurring_risks,
+        'oneTimeRisks': total_risks - recurring_risks,
+        'months': [m.strftime('%b') for m in months],
+        'trendData': trend_data,
+        'percentageChange': _percentage_change(trend_data),
+        'breakdown': breakdown,
+        'topRecurringRisks': top_recurring_risks
+    }
+
+
+BATCH_KPI_HANDLERS = {
+    'active_risks_kpi': _batch_active_risks_kpi,
+    'risk_exposure_trend': _batch_risk_exposure_trend,
+    'risk_reduction_trend': _batch_risk_reduction_trend,
+    'high_criticality_risks': _batch_high_criticality_risks,
+    'mitigation_completion_rate': _batch_mitigation_completion_rate,
+    'avg_remediation_time': _batch_avg_remediation_time,
+    'mitigation_cost': _batch_mitigation_cost,
+    'due_mitigation': _batch_due_mitigation,
+    'recurrence_rate': _batch_recurrence_rate,
+}
+
+
+def compute_risk_kpis(kpi_names, params, frame=None, today=None):
+    """
+    Compute the requested KPIs from a single risk_instance frame.
+    Returns (results, errors); a failing KPI does not affect the others.
+    """
+    if frame is None:
+        frame = load_risk_instance_frame()
+    if today is None:
+        today = timezone.now().date()
+
+    results = {}
+    errors = {}
+    for name in kpi_names:
+        try:
+            results[name] = BATCH_KPI_HANDLERS[name](frame, params, today)
+        except Exception as e:
+            print(f"ERROR computing batched KPI {name}: {str(e)}")
+            errors[name] = str(e)
+    return results, errors
+
+
+@api_view(['GET', 'POST'])
+def risk_kpi_batch(request):
+    """
+    Return several risk KPIs computed from one risk_instance load.
+
+    GET  /risk/kpi-batch/?kpis=risk_exposure_trend,mitigation_cost&timeRange=90days
+    POST /risk/kpi-batch/  {"kpis": [...], "filters": {"timeRange": "90days", "category": "all"}}
+
+    Filters are shared by every KPI and use the same names and defaults as the
+    individual endpoints (timeRange, category, months, period, priority).
+    Omitting kpis returns all supported KPIs.
+    """
+    try:
+        if request.method == 'POST':
+            kpi_names = request.data.get('kpis') or []
+            params = request.data.get('filters') or {}
+        else:
+            kpi_names = [name for name in request.GET.get('kpis', '').split(',') if name]
+            params = {key: value for key, value in request.GET.items() if key != 'kpis'}
+
+        if not kpi_names:
+            kpi_names = list(BATCH_KPI_HANDLERS.keys())
+
+        unknown = [name for name in kpi_names if name not in BATCH_KPI_HANDLERS]
+        kpi_names = [name for name in kpi_names if name in BATCH_KPI_HANDLERS]
+
+        results, errors = compute_risk_kpis(kpi_names, params)
+
+        return JsonResponse(decimal_to_float({
+            'results': results,
+            'errors': errors,
+            'unknownKpis': unknown,
+            'availableKpis': list(BATCH_KPI_HANDLERS.keys())
+        }), status=status.HTTP_200_OK)
+
+    except Exception as e:
+        print(f"ERROR in risk_kpi_batch: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return JsonResponse({
+            'error': str(e),
+            'results': {},
+            'errors': {},
+            'unknownKpis': []
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
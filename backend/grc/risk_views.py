@@ -19,7 +19,8 @@ from .models import Compliance
 from .serializers import ComplianceSerializer
 from .models import RiskInstance
 from .serializers import RiskInstanceSerializer
-from .slm_service import analyze_security_incident
+from .slm_service import analyze_security_incident, request_security_analysis
+from .incident_inference import get_inference_service, is_analysis_key
 from django.http import JsonResponse
 from django.db.models import Count, Q, Avg, F, ExpressionWrapper, DurationField, FloatField, Sum
 from .slm_service import analyze_security_incident
@@ -31,6 +32,7 @@ import traceback
 from rest_framework import generics
 from .models import GRCLog
 from .serializers import GRCLogSerializer
+from .log_store import filter_logs, paginate_logs, InvalidLogCursor, LOG_PAGE_SIZE, LOG_MAX_PAGE_SIZE
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.db import connection
@@ -58,75 +60,9 @@ def decimal_to_float(obj):
         return obj
 
 
-LOGGING_SERVICE_URL = None  # Disabled external logging service
 
-def send_log(module, actionType, description=None, userId=None, userName=None,
-             userRole=None, entityType=None, logLevel='INFO', ipAddress=None,
-             additionalInfo=None, entityId=None):
-    
-    # Create log entry in database
-    try:
-        # Prepare data for GRCLog model
-        log_data = {
-            'Module': module,
-            'ActionType': actionType,
-            'Description': description,
-            'UserId': userId,
-            'UserName': userName,
-            'EntityType': entityType,
-            'EntityId': entityId,
-            'LogLevel': logLevel,
-            'IPAddress': ipAddress,
-            'AdditionalInfo': additionalInfo
-        }
-        
-        # Remove None values
-        log_data = {k: v for k, v in log_data.items() if v is not None}
-        
-        # Create and save the log entry
-        log_entry = GRCLog(**log_data)
-        log_entry.save()
-        
-        # Optionally still send to logging service if needed
-        try:
-            if LOGGING_SERVICE_URL:
-                # Format for external service (matches expected format in loggingservice.js)
-                api_log_data = {
-                    "module": module,
-                    "actionType": actionType,  # This is exactly what the service expects
-                    "description": description,
-                    "userId": userId,
-                    "userName": userName,
-                    "userRole": userRole,
-                    "entityType": entityType,
-                    "logLevel": logLevel,
-                    "ipAddress": ipAddress,
-                    "additionalInfo": additionalInfo
-                }
-                # Clean out None values
-                api_log_data = {k: v for k, v in api_log_data.items() if v is not None}
-                
-                response = requests.post(LOGGING_SERVICE_URL, json=api_log_data)
-                if response.status_code != 200:
-                    print(f"Failed to send log to service: {response.text}")
-        except Exception as e:
-            print(f"Error sending log to service: {str(e)}")
-            
-        return log_entry.LogId  # Return the ID of the created log
-    except Exception as e:
-        print(f"Error saving log to database: {str(e)}")
-        # Try to capture the error itself
-        try:
-            error_log = GRCLog(
-                Module=module,
-                ActionType='LOG_ERROR',
-                Description=f"Error logging {actionType} on {module}: {str(e)}",
-                LogLevel='ERROR'
-            )
-            error_log.save()
-        except:
-            pass  # If we can't even log the error, just continue
-        return None
+# Audit logging goes through the buffered writer in logging_service
+from .logging_service import send_log
 
 
 @api_view(['POST'])
@@ -674,10 +610,19 @@ def analyze_incident(request):
         print(f"Analyzing incident - Title: {incident_title}")
         print(f"Analyzing incident - Description: {incident_description}")
         
-        # Call the SLM function
-        analysis_result = analyze_security_incident(full_incident)
+        # By default answer immediately: the cached model result, or the rule-based
+        # analysis while the model runs in the background (poll analysisKey for it).
+        # wait=true blocks for the model as before.
+        if str(request.data.get('wait', '')).lower() == 'true':
+            analysis_result = analyze_security_incident(full_incident)
+            analysis_status, analysis_key = 'completed', None
+        else:
+            analysis_result, analysis_status, analysis_key = request_security_analysis(
+                full_incident, request.data.get('incident_id')
+            )
+        analysis_result = dict(analysis_result) if isinstance(analysis_result, dict) else analysis_result
         
-        print(f"Analysis result: {analysis_result}")
+        print(f"Analysis result ({analysis_status}): {analysis_result}")
         
         # Validate the analysis result
         if not analysis_result or not isinstance(analysis_result, dict):
@@ -698,6 +643,8 @@ def analyze_incident(request):
         if not isinstance(analysis_result.get('riskMitigation'), list):
             analysis_result['riskMitigation'] = []
         
+        analysis_result['analysisStatus'] = analysis_status
+        analysis_result['analysisKey'] = analysis_key
         return Response(analysis_result)
         
     except Exception as e:
@@ -709,6 +656,20 @@ def analyze_incident(request):
             "error": f"An error occurred during analysis: {str(e)}. Please try again or use manual mode."
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def incident_analysis_result(request, analysis_key):
+    """Model result of a queued analyze_incident request, once it is ready"""
+    if not is_analysis_key(analysis_key):
+        return Response({'error': 'Invalid analysis key'}, status=status.HTTP_400_BAD_REQUEST)
+    analysis_status, analysis_result = get_inference_service().lookup(analysis_key)
+    if analysis_status == 'completed':
+        return Response({**analysis_result, 'analysisStatus': 'completed', 'analysisKey': analysis_key})
+    if analysis_status == 'failed':
+        return Response({'analysisStatus': 'failed', 'analysisKey': analysis_key})
+    if analysis_status == 'pending':
+        return Response({'analysisStatus': 'pending', 'analysisKey': analysis_key}, status=status.HTTP_202_ACCEPTED)
+    return Response({'error': 'Unknown or expired analysis'}, status=status.HTTP_404_NOT_FOUND)
+
 @api_view(['GET'])
 def risk_metrics(request):
     """
@@ -2557,45 +2518,38 @@ def get_risk_form_details(request, risk_id):
         return Response({"error": str(e)}, status=500)
 
 class GRCLogList(generics.ListCreateAPIView):
-    queryset = GRCLog.objects.all().order_by('-Timestamp')
+    """
+    Audit trail, newest first. Filters (module, action_type, entity_type,
+    log_level, user_id, entity_id) are exact matches and accept comma
+    separated values; start_date/end_date bound the Timestamp. Pages are
+    fetched with `limit` and the `next_cursor` of the previous page.
+    """
+    queryset = GRCLog.objects.all().order_by('-Timestamp', '-LogId')
     serializer_class = GRCLogSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        queryset = GRCLog.objects.all().order_by('-Timestamp')
-        
-        # Filter by module if provided
-        module = self.request.query_params.get('module')
-        if module:
-            queryset = queryset.filter(Module__icontains=module)
-            
-        # Filter by action type if provided
-        action_type = self.request.query_params.get('action_type')
-        if action_type:
-            queryset = queryset.filter(ActionType__icontains=action_type)
-            
-        # Filter by entity type if provided
-        entity_type = self.request.query_params.get('entity_type')
-        if entity_type:
-            queryset = queryset.filter(EntityType__icontains=entity_type)
-            
-        # Filter by log level if provided
-        log_level = self.request.query_params.get('log_level')
-        if log_level:
-            queryset = queryset.filter(LogLevel__iexact=log_level)
-            
-        # Filter by user if provided
-        user_id = self.request.query_params.get('user_id')
-        if user_id:
-            queryset = queryset.filter(UserId=user_id)
-            
-        # Filter by date range if provided
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        if start_date and end_date:
-            queryset = queryset.filter(Timestamp__range=[start_date, end_date])
-            
-        return queryset
+        return filter_logs(self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', LOG_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, LOG_MAX_PAGE_SIZE))
+
+        try:
+            logs, next_cursor = paginate_logs(
+                self.get_queryset(), request.query_params.get('cursor'), limit
+            )
+        except InvalidLogCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': self.get_serializer(logs, many=True).data,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+        })
 
 class GRCLogDetail(generics.RetrieveAPIView):
     queryset = GRCLog.objects.all()
@@ -10,6 +10,7 @@ import traceback
 import sys
 from datetime import datetime, date, timedelta
 from ..export_service import export_data, save_export_record, update_export_status, update_export_url, update_export_metadata
+from ..export_jobs import submit_export_job, is_async_request, parse_priority, get_export_job_status_url, export_job_owner
 import re
 from django.utils import timezone
 from datetime import timedelta
@@ -631,7 +632,7 @@ def framework_list(request):
                                         framework.CreatedByName,
                                     ]
                                 }
-                                notification_result = notification_service.send_multi_channel_notification(notification_data)
+                                notification_result = notification_service.queue_multi_channel_notification(notification_data)
                                 logger.info("Notification sent successfully")
                             except Exception as notification_error:
                                 logger.error(f"Notification error: {type(notification_error).__name__}")
@@ -1624,7 +1625,7 @@ def add_policy_to_framework(request, framework_id):
                                     policy_list_html  # Already escaped above
                                 ]
                             }
-                            notification_service.send_multi_channel_notification(notification_data)
+                            notification_service.queue_multi_channel_notification(notification_data)
                         else:
                             notification_data = {
                                 'notification_type': 'policySubmitted',
@@ -1637,7 +1638,7 @@ def add_policy_to_framework(request, framework_id):
                                     date.today().strftime('%Y-%m-%d')  # Date is safe
                                 ]
                             }
-                            notification_service.send_multi_channel_notification(notification_data)
+                            notification_service.queue_multi_channel_notification(notification_data)
                         logger.info("Notification sent successfully")
                     except Exception as notification_error:
                         logger.error(f"Error sending notification: {type(notification_error).__name__}")
@@ -1976,8 +1977,9 @@ def submit_policy_review(request, approval_id):
         try:
             from ..notification_service import NotificationService
             notification_service = NotificationService()
-            submitter = Users.objects.get(UserId=new_approval.UserId)
-            reviewer = Users.objects.get(UserId=new_approval.ReviewerId)
+            policy_users = notification_service.resolve_users([new_approval.UserId, new_approval.ReviewerId])
+            submitter = policy_users[int(new_approval.UserId)]
+            reviewer = policy_users[int(new_approval.ReviewerId)]
             now_str = date.today().isoformat()
             if is_approved:
                 notification_data = {
@@ -2004,7 +2006,7 @@ def submit_policy_review(request, approval_id):
                         rejection_reason
                     ]
                 }
-            notification_service.send_multi_channel_notification(notification_data)
+            notification_service.queue_multi_channel_notification(notification_data)
         except Exception as notify_ex:
             print(f"DEBUG: Error sending policy approval/rejection notification: {notify_ex}")
         
@@ -2500,12 +2502,9 @@ def submit_subpolicy_review(request, pk):
     try:
         from ..notification_service import NotificationService
         notification_service = NotificationService()
-        reviewer = None
-        submitter = None
-        if new_approval.ReviewerId:
-            reviewer = Users.objects.get(UserId=new_approval.ReviewerId)
-        if new_approval.UserId:
-            submitter = Users.objects.get(UserId=new_approval.UserId)
+        policy_users = notification_service.resolve_users([new_approval.ReviewerId, new_approval.UserId])
+        reviewer = policy_users.get(new_approval.ReviewerId)
+        submitter = policy_users.get(new_approval.UserId)
         if reviewer and reviewer.Email:
             # Security: XSS Protection - Escape HTML content before building email template
             notification_data = {
@@ -2518,7 +2517,7 @@ def submit_subpolicy_review(request, pk):
                     escape_html(submitter.UserName if submitter else '')  # Escape submitter name for HTML context
                 ]
             }
-            notification_service.send_multi_channel_notification(notification_data)
+            notification_service.queue_multi_channel_notification(notification_data)
     except Exception as notify_ex:
         print(f"DEBUG: Error sending subpolicy resubmission notification: {notify_ex}")
     
@@ -2656,12 +2655,9 @@ def resubmit_subpolicy(request, pk):
             try:
                 from ..notification_service import NotificationService
                 notification_service = NotificationService()
-                reviewer = None
-                submitter = None
-                if new_approval.ReviewerId:
-                    reviewer = Users.objects.get(UserId=new_approval.ReviewerId)
-                if new_approval.UserId:
-                    submitter = Users.objects.get(UserId=new_approval.UserId)
+                policy_users = notification_service.resolve_users([new_approval.ReviewerId, new_approval.UserId])
+                reviewer = policy_users.get(new_approval.ReviewerId)
+                submitter = policy_users.get(new_approval.UserId)
                 if reviewer and reviewer.Email:
                     # Security: XSS Protection - Escape HTML content before building email template
                     notification_data = {
@@ -2674,7 +2670,7 @@ def resubmit_subpolicy(request, pk):
                             escape_html(submitter.UserName if submitter else '')  # Escape submitter name for HTML context
                         ]
                     }
-                    notification_service.send_multi_channel_notification(notification_data)
+                    notification_service.queue_multi_channel_notification(notification_data)
             except Exception as notify_ex:
                 print(f"DEBUG: Error sending subpolicy resubmission notification: {notify_ex}")
 
@@ -3396,8 +3392,9 @@ def submit_policy_approval_review(request, policy_id):
         try:
             from ..notification_service import NotificationService
             notification_service = NotificationService()
-            submitter = Users.objects.get(UserId=new_approval.UserId)
-            reviewer = Users.objects.get(UserId=new_approval.ReviewerId)
+            policy_users = notification_service.resolve_users([new_approval.UserId, new_approval.ReviewerId])
+            submitter = policy_users[int(new_approval.UserId)]
+            reviewer = policy_users[int(new_approval.ReviewerId)]
             now_str = date.today().isoformat()
             if is_approved:
                 notification_data = {
@@ -3424,7 +3421,7 @@ def submit_policy_approval_review(request, policy_id):
                         rejection_reason
                     ]
                 }
-            notification_service.send_multi_channel_notification(notification_data)
+            notification_service.queue_multi_channel_notification(notification_data)
         except Exception as notify_ex:
             print(f"DEBUG: Error sending policy approval/rejection notification: {notify_ex}")
         
@@ -3646,6 +3643,102 @@ def list_rejected_policy_approvals_for_user(request, user_id):
     serializer = PolicyApprovalSerializer(unique_approvals, many=True)
     return Response(serializer.data)
 
+def build_policy_export_rows(policies):
+    """
+    Rows for the framework policy export: one row per subpolicy, or one row
+    per policy if it has no subpolicies
+    """
+    export_data_list = []
+    for policy in policies:
+        print(f"[EXPORT] Processing policy: {policy.PolicyName}")
+        subpolicies = policy.subpolicy_set.all()
+        if subpolicies.exists():
+            for sub in subpolicies:
+                row = {
+                    'Policy ID': policy.PolicyId,
+                    'Policy Name': policy.PolicyName,
+                    'Version': policy.CurrentVersion,
+                    'Status': policy.Status,
+                    'Description': policy.PolicyDescription,
+                    'Department': policy.Department,
+                    'Created By': policy.CreatedByName,
+                    'Created Date': policy.CreatedByDate.isoformat() if policy.CreatedByDate else None,
+                    'Start Date': policy.StartDate.isoformat() if policy.StartDate else None,
+                    'End Date': policy.EndDate.isoformat() if policy.EndDate else None,
+                    'Applicability': policy.Applicability,
+                    'Scope': policy.Scope,
+                    'Objective': policy.Objective,
+                    'Identifier': policy.Identifier,
+                    'Active/Inactive': policy.ActiveInactive,
+                    # Subpolicy fields
+                    'Subpolicy ID': sub.SubPolicyId,
+                    'Subpolicy Name': sub.SubPolicyName,
+                    'Subpolicy Identifier': sub.Identifier,
+                    'Subpolicy Description': sub.Description,
+                    'Subpolicy Status': sub.Status,
+                    'Subpolicy Permanent/Temporary': sub.PermanentTemporary,
+                    'Subpolicy Control': sub.Control,
+                    'Subpolicy Created By': sub.CreatedByName,
+                    'Subpolicy Created Date': sub.CreatedByDate.isoformat() if sub.CreatedByDate else None,
+                }
+                export_data_list.append(row)
+        else:
+            # Policy with no subpolicies: still include a row
+            row = {
+                'Policy ID': policy.PolicyId,
+                'Policy Name': policy.PolicyName,
+                'Version': policy.CurrentVersion,
+                'Status': policy.Status,
+                'Description': policy.PolicyDescription,
+                'Department': policy.Department,
+                'Created By': policy.CreatedByName,
+                'Created Date': policy.CreatedByDate.isoformat() if policy.CreatedByDate else None,
+                'Start Date': policy.StartDate.isoformat() if policy.StartDate else None,
+                'End Date': policy.EndDate.isoformat() if policy.EndDate else None,
+                'Applicability': policy.Applicability,
+                'Scope': policy.Scope,
+                'Objective': policy.Objective,
+                'Identifier': policy.Identifier,
+                'Active/Inactive': policy.ActiveInactive,
+                # Subpolicy fields (empty)
+                'Subpolicy ID': None,
+                'Subpolicy Name': None,
+                'Subpolicy Identifier': None,
+                'Subpolicy Description': None,
+                'Subpolicy Status': None,
+                'Subpolicy Permanent/Temporary': None,
+                'Subpolicy Control': None,
+                'Subpolicy Created By': None,
+                'Subpolicy Created Date': None,
+            }
+            export_data_list.append(row)
+    return export_data_list
+
+def run_policy_export_job(task, progress):
+    """export_jobs handler for 'policies' jobs"""
+    params = task.export_data or {}
+    framework_id = params.get('framework_id')
+    framework = Framework.objects.get(FrameworkId=framework_id)
+    
+    policies = Policy.objects.filter(FrameworkId=framework_id)
+    if params.get('policy_id'):
+        policies = policies.filter(PolicyId=params['policy_id'])
+    progress(0)
+    
+    export_data_list = build_policy_export_rows(policies)
+    progress(len(export_data_list), len(export_data_list))
+    
+    return export_data(
+        data=export_data_list,
+        file_format=task.file_type,
+        user_id=task.user_id,
+        options={
+            'framework_id': framework_id,
+            'framework_name': framework.FrameworkName
+        },
+        export_id=task.id
+    )
+
 """
 @api GET /api/frameworks/{framework_id}/export/
 Exports all policies and their subpolicies for a specific framework to an Excel file in the following format:
@@ -3687,76 +3780,34 @@ def export_policies_to_excel(request, framework_id):
             policies = Policy.objects.filter(FrameworkId=framework_id)
         print(f"[EXPORT] Found {policies.count()} policies under framework {framework_id}")
 
-        # Prepare data for export (one row per subpolicy, or one row per policy if no subpolicies)
-        export_data_list = []
-        for policy in policies:
-            print(f"[EXPORT] Processing policy: {policy.PolicyName}")
-            subpolicies = policy.subpolicy_set.all()
-            if subpolicies.exists():
-                for sub in subpolicies:
-                    row = {
-                        'Policy ID': policy.PolicyId,
-                        'Policy Name': policy.PolicyName,
-                        'Version': policy.CurrentVersion,
-                        'Status': policy.Status,
-                        'Description': policy.PolicyDescription,
-                        'Department': policy.Department,
-                        'Created By': policy.CreatedByName,
-                        'Created Date': policy.CreatedByDate.isoformat() if policy.CreatedByDate else None,
-                        'Start Date': policy.StartDate.isoformat() if policy.StartDate else None,
-                        'End Date': policy.EndDate.isoformat() if policy.EndDate else None,
-                        'Applicability': policy.Applicability,
-                        'Scope': policy.Scope,
-                        'Objective': policy.Objective,
-                        'Identifier': policy.Identifier,
-                        'Active/Inactive': policy.ActiveInactive,
-                        # Subpolicy fields
-                        'Subpolicy ID': sub.SubPolicyId,
-                        'Subpolicy Name': sub.SubPolicyName,
-                        'Subpolicy Identifier': sub.Identifier,
-                        'Subpolicy Description': sub.Description,
-                        'Subpolicy Status': sub.Status,
-                        'Subpolicy Permanent/Temporary': sub.PermanentTemporary,
-                        'Subpolicy Control': sub.Control,
-                        'Subpolicy Created By': sub.CreatedByName,
-                        'Subpolicy Created Date': sub.CreatedByDate.isoformat() if sub.CreatedByDate else None,
-                    }
-                    export_data_list.append(row)
-            else:
-                # Policy with no subpolicies: still include a row
-                row = {
-                    'Policy ID': policy.PolicyId,
-                    'Policy Name': policy.PolicyName,
-                    'Version': policy.CurrentVersion,
-                    'Status': policy.Status,
-                    'Description': policy.PolicyDescription,
-                    'Department': policy.Department,
-                    'Created By': policy.CreatedByName,
-                    'Created Date': policy.CreatedByDate.isoformat() if policy.CreatedByDate else None,
-                    'Start Date': policy.StartDate.isoformat() if policy.StartDate else None,
-                    'End Date': policy.EndDate.isoformat() if policy.EndDate else None,
-                    'Applicability': policy.Applicability,
-                    'Scope': policy.Scope,
-                    'Objective': policy.Objective,
-                    'Identifier': policy.Identifier,
-                    'Active/Inactive': policy.ActiveInactive,
-                    # Subpolicy fields (empty)
-                    'Subpolicy ID': None,
-                    'Subpolicy Name': None,
-                    'Subpolicy Identifier': None,
-                    'Subpolicy Description': None,
-                    'Subpolicy Status': None,
-                    'Subpolicy Permanent/Temporary': None,
-                    'Subpolicy Control': None,
-                    'Subpolicy Created By': None,
-                    'Subpolicy Created Date': None,
-                }
-                export_data_list.append(row)
-
         # Get export format from request
         export_format = request.data.get('format', 'xlsx')
         print(f"[EXPORT] Export format requested: {export_format}")
 
+        # Large exports can run as a background job; poll export-jobs/<task_id>/
+        if is_async_request(request):
+            job_owner = export_job_owner(request)
+            if job_owner is None:
+                return Response({'error': 'Login required for background exports'}, status=status.HTTP_403_FORBIDDEN)
+            export_task = submit_export_job(
+                'policies',
+                user_id=job_owner,
+                file_format=export_format,
+                params={'framework_id': framework_id, 'policy_id': policy_id},
+                priority=parse_priority(request.data.get('priority', 'normal'))
+            )
+            print(f"[EXPORT] Queued export job {export_task.id}")
+            return Response({
+                'success': True,
+                'message': 'Export queued',
+                'task_id': export_task.id,
+                'status': export_task.status,
+                'status_url': get_export_job_status_url(export_task.id)
+            }, status=status.HTTP_202_ACCEPTED)
+
+        # Prepare data for export (one row per subpolicy, or one row per policy if no subpolicies)
+        export_data_list = build_policy_export_rows(policies)
+
         # Export the data
         print("[EXPORT] Initiating export_data process...")
         result = export_data(
@@ -6637,7 +6688,7 @@ def create_tailored_framework(request):
                         escape_html(framework.CreatedByName),  # Escape submitter name for HTML context
                     ]
                 }
-                notification_result = notification_service.send_multi_channel_notification(notification_data)
+                notification_result = notification_service.queue_multi_channel_notification(notification_data)
                 print(f"Notification result: {notification_result}")  # Debug log
             else:
                 print("No reviewer email available to send notification")  # Debug log
@@ -6955,7 +7006,7 @@ def create_tailored_policy(request):
                         (new_policy.EndDate.isoformat() if new_policy.EndDate else '')  # Date is safe
                     ]
                 }
-                notification_result = notification_service.send_multi_channel_notification(notification_data)
+                notification_result = notification_service.queue_multi_channel_notification(notification_data)
                 print(f"Policy notification result: {notification_result}")
             
             # Create policy version record
@@ -7261,12 +7312,9 @@ def resubmit_policy_approval(request, policy_id):
         try:
             from ..notification_service import NotificationService
             notification_service = NotificationService()
-            reviewer = None
-            submitter = None
-            if new_policy_approval.ReviewerId:
-                reviewer = Users.objects.get(UserId=new_policy_approval.ReviewerId)
-            if new_policy_approval.UserId:
-                submitter = Users.objects.get(UserId=new_policy_approval.UserId)
+            policy_users = notification_service.resolve_users([new_policy_approval.ReviewerId, new_policy_approval.UserId])
+            reviewer = policy_users.get(new_policy_approval.ReviewerId)
+            submitter = policy_users.get(new_policy_approval.UserId)
             if reviewer and reviewer.Email:
                 # Security: XSS Protection - Escape HTML content before building email template
                 notification_data = {
@@ -7279,7 +7327,7 @@ def resubmit_policy_approval(request, policy_id):
                         escape_html(submitter.UserName if submitter else '')  # Escape submitter name for HTML context
                     ]
                 }
-                notification_service.send_multi_channel_notification(notification_data)
+                notification_service.queue_multi_channel_notification(notification_data)
         except Exception as notify_ex:
             print(f"DEBUG: Error sending policy resubmission notification: {notify_ex}")
         
@@ -7763,7 +7811,7 @@ def _handle_policy_status_change_request(request, policy_id, reason, reviewer_id
                         reason
                     ]
                 }
-                notification_result = notification_service.send_multi_channel_notification(notification_data)
+                notification_result = notification_service.queue_multi_channel_notification(notification_data)
                 print(f"Policy inactivation notification result: {notification_result}")
             except Exception as notify_ex:
                 print(f"Error sending policy inactivation notification: {notify_ex}")
@@ -7941,7 +7989,7 @@ def approve_policy_status_change(request, approval_id):
                                 remarks or 'Status change rejected'  # Already escaped above
                             ]
                         }
-                    notification_result = notification_service.send_multi_channel_notification(notification_data)
+                    notification_result = notification_service.queue_multi_channel_notification(notification_data)
                     print(f"Policy inactivation approval notification result: {notification_result}")
                 except Exception as notify_ex:
                     print(f"Error sending policy inactivation approval notification: {notify_ex}")
@@ -8212,26 +8260,34 @@ from django.http import JsonResponse
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_policy_extraction_progress(request, task_id):
-    """Get the progress of policy extraction for a specific task"""
+    """
+    Get the progress of policy extraction for a specific task. With
+    ?since=<version>&wait=<seconds> the request is held until it changes.
+    """
     try:
-        from grc.routes.policy_text_extract import get_progress
+        from grc.task_progress import (
+            wait_for_task_progress, parse_since_version, parse_wait_seconds, InvalidTaskProgressQuery,
+            POLICY_EXTRACTION_TASK, FRAMEWORK_TASK
+        )
         
-        # Get progress from the extraction module
-        progress_data = get_progress(task_id)
+        try:
+            since = parse_since_version(request.GET.get('since'))
+            wait = parse_wait_seconds(request.GET.get('wait'))
+        except InvalidTaskProgressQuery as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        # Fall back to the general processing status before extraction starts
+        progress_data = wait_for_task_progress(
+            task_id, [POLICY_EXTRACTION_TASK, FRAMEWORK_TASK], since=since, timeout=wait
+        )
         
         if not progress_data:
-            # If no specific progress is available, check general processing status
-            from grc.routes.upload_framework import processing_status
-            
-            if task_id in processing_status:
-                return JsonResponse(processing_status[task_id])
-            else:
-                # Provide a default response if no data is available
-                return JsonResponse({
-                    'progress': 0,
-                    'message': 'Initializing extraction...',
-                    'status': 'waiting'
-                })
+            # Provide a default response if no data is available
+            return JsonResponse({
+                'progress': 0,
+                'message': 'Initializing extraction...',
+                'status': 'waiting'
+            })
         
         return JsonResponse(progress_data)
     
@@ -1,42 +1,35 @@
 import re
 import json
+import hashlib
 import os
 import pandas as pd
 import shutil
+import threading
 import time
-from langchain_ollama import OllamaLLM
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.conf import settings
 
-# Global progress tracking
-progress_tracker = {}
+from grc.llm_backend import get_llm_backend
+from grc.task_progress import update_task_progress, get_task_progress, POLICY_EXTRACTION_TASK
 
 def update_progress(task_id, progress, message):
     """Update progress for a specific task"""
-    progress_tracker[task_id] = {
-        'progress': progress,
-        'message': message,
-        'timestamp': time.time()
-    }
+    update_task_progress(task_id, POLICY_EXTRACTION_TASK, progress, message)
 
 def get_progress(task_id):
     """Get progress for a specific task"""
-    return progress_tracker.get(task_id, {'progress': 0, 'message': 'Starting...'})
-
-def extract_policy_sections(input_text, task_id=None):
-    if task_id:
-        update_progress(task_id, 10, "Initializing AI model...")
-    
-    llm = OllamaLLM(model="llama3.2:3b", temperature=0)
+    return get_task_progress(task_id, [POLICY_EXTRACTION_TASK]) or {'progress': 0, 'message': 'Starting...'}
 
-    if task_id:
-        update_progress(task_id, 20, "Preparing extraction template...")
+EXTRACTION_MODEL = "llama3.2:3b"
+# Bump whenever POLICY_EXTRACTION_PROMPT or the parsing changes, so cached results are not reused
+EXTRACTION_PROMPT_VERSION = "1"
+POLICY_EXTRACTION_CONCURRENCY = getattr(settings, 'POLICY_EXTRACTION_CONCURRENCY', 4)
+POLICY_EXTRACTION_CACHE_DIR = getattr(
+    settings, 'POLICY_EXTRACTION_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'extraction_cache')
+)
 
-    # Enhanced prompt template with specific focus on control requirements
-    prompt_template = PromptTemplate(
-        input_variables=["text"],
-        template="""
+# Enhanced prompt template with specific focus on control requirements
+POLICY_EXTRACTION_PROMPT = """
 You are an AI assistant trained to extract specific sections from policy documents.
 
 From the following policy text, extract these exact fields:
@@ -80,48 +73,143 @@ Policy text:
 
 {text}
 """
-    )
 
-    if task_id:
-        update_progress(task_id, 30, "Creating processing chain...")
 
-    chain = LLMChain(llm=llm, prompt=prompt_template)
+def parse_dynamic_headings(text):
+    """Split an LLM response into (heading, content) pairs on lines ending with a colon"""
+    pattern = re.compile(r'^(.*?):\s*$', re.MULTILINE)
+    splits = pattern.split(text)
+
+    parsed = []
+    for i in range(1, len(splits), 2):
+        heading = splits[i].strip()
+        content = splits[i + 1].strip() if (i + 1) < len(splits) else ""
+        parsed.append((heading, content))
+    return parsed
+
+
+class PolicyExtractionEngine:
+    """
+    Extracts policy fields from text chunks with one shared model client from
+    the configured LLM backend.
+    At most `concurrency` LLM requests are in flight, and results are cached
+    on disk under (model, prompt version, sha256 of the chunk), so unchanged
+    chunks are never sent to the model twice.
+    """
+
+    def __init__(self, model=EXTRACTION_MODEL, prompt_version=EXTRACTION_PROMPT_VERSION,
+                 concurrency=POLICY_EXTRACTION_CONCURRENCY, cache_dir=POLICY_EXTRACTION_CACHE_DIR, backend=None):
+        self.model = model
+        self.backend = backend or get_llm_backend()
+        self.prompt_version = prompt_version
+        self.concurrency = max(1, concurrency)
+        self.cache_dir = cache_dir
+        self._chain = None
+        self._chain_lock = threading.Lock()
+
+    @property
+    def chain(self):
+        with self._chain_lock:
+            if self._chain is None:
+                self._chain = self.backend.chain('policy_extraction', POLICY_EXTRACTION_PROMPT, self.model, temperature=0)
+            return self._chain
+
+    def cache_path(self, text):
+        chunk_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        model_dir = re.sub(r'[^A-Za-z0-9_.-]', '_', self.model)
+        return os.path.join(self.cache_dir, model_dir, f"v{self.prompt_version}", chunk_hash[:2], f"{chunk_hash}.json")
+
+    def _read_cache(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, path, result):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+
+    def extract(self, text):
+        """Returns (fields, cached, latency_seconds) for one chunk"""
+        started = time.time()
+        path = self.cache_path(text)
+        cached = self._read_cache(path)
+        if cached is not None:
+            return cached, True, time.time() - started
+
+        response = self.chain.invoke({"text": text})["text"]
+        result = {}
+        for heading, content in parse_dynamic_headings(response):
+            result[heading] = content
+        try:
+            self._write_cache(path, result)
+        except OSError as e:
+            print(f"Could not cache extraction result: {e}")
+        return result, False, time.time() - started
+
+    def extract_many(self, texts, on_done=None):
+        """
+        Extract every text with at most `concurrency` requests in flight.
+        Returns one (fields, cached, latency, error) tuple per text, in input
+        order; on_done(index, outcome) is called as each one finishes.
+        """
+        outcomes = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="policy-extract") as pool:
+            futures = {pool.submit(self.extract, text): index for index, text in enumerate(texts)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    fields, cached, latency = future.result()
+                    outcome = (fields, cached, latency, None)
+                except Exception as e:
+                    outcome = (None, False, None, e)
+                outcomes[index] = outcome
+                if on_done:
+                    on_done(index, outcome)
+        return outcomes
+
+
+_engine = None
+_engine_lock = threading.Lock()
 
+
+def get_extraction_engine():
+    """The process-wide extraction engine, created on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PolicyExtractionEngine()
+        return _engine
+
+
+def latency_summary(latencies):
+    """count/mean/p50/p95/max of a list of seconds"""
+    if not latencies:
+        return {'count': 0}
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 3),
+        'p50': round(ordered[len(ordered) // 2], 3),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def extract_policy_sections(input_text, task_id=None):
     if task_id:
         update_progress(task_id, 50, "Processing document with AI...")
 
     print("Processing document...")
-    response = chain.invoke({"text": input_text})["text"]
+    result, cached, latency = get_extraction_engine().extract(input_text)
 
-    if task_id:
-        update_progress(task_id, 70, "Parsing extracted content...")
-
-    # Parse response by dynamically detecting headings (lines that end with colon)
-    def parse_dynamic_headings(text):
-        # Split text by lines that look like headings (any line ending with colon)
-        pattern = re.compile(r'^(.*?):\s*$', re.MULTILINE)
-        splits = pattern.split(text)
-
-        parsed = []
-        for i in range(1, len(splits), 2):
-            heading = splits[i].strip()
-            content = splits[i + 1].strip() if (i + 1) < len(splits) else ""
-            parsed.append((heading, content))
-        return parsed
-
-    parsed_data = parse_dynamic_headings(response)
-    
-    if task_id:
-        update_progress(task_id, 85, "Structuring extracted data...")
-    
-    # Convert to JSON
-    result = {}
-    for heading, content in parsed_data:
-        result[heading] = content
-    
     if task_id:
         update_progress(task_id, 95, "Finalizing extraction...")
-    
+
     return result
 
 def process_checked_sections(task_id):
@@ -172,58 +260,92 @@ def process_checked_sections(task_id):
         update_progress(task_id, 100, "No text files found to process.")
         return None
     
-    processed_files = 0
-    
-    # Walk through all subdirectories in the checked_sections folder
+    # Read every non-empty file first, then extract them concurrently
+    chunks = []
     for root, dirs, files in os.walk(checked_sections_dir):
         for file in files:
             if file.endswith('.txt'):
-                processed_files += 1
-                progress_percent = 15 + (processed_files / total_files) * 70  # 15% to 85%
-                
                 # Get the section name from the directory structure
                 section_name = os.path.basename(root)
                 if section_name == 'txt_chunks':
                     section_name = os.path.basename(os.path.dirname(root))
                 
                 file_path = os.path.join(root, file)
-                update_progress(task_id, int(progress_percent), f"Processing file {processed_files}/{total_files}: {file}")
-                print(f"Processing file: {file_path}")
-                
                 try:
-                    # Read the text file
                     with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                         file_content = f.read()
-                    
-                    # Skip empty files
-                    if not file_content.strip():
-                        print(f"Skipping empty file: {file_path}")
-                        continue
-                    
-                    # Extract policy sections with progress tracking
-                    extracted_data = extract_policy_sections(file_content, f"{task_id}_file_{processed_files}")
-                    
-                    # Add section name and file name to the extracted data
-                    extracted_data['section_name'] = section_name
-                    extracted_data['file_name'] = file
-                    
-                    # Add to the list of all extracted data
-                    all_extracted_data.append(extracted_data)
-                    
                 except Exception as e:
-                    print(f"Error processing file {file_path}: {e}")
-                    # Add error entry to maintain record
-                    all_extracted_data.append({
-                        'section_name': section_name,
-                        'file_name': file,
-                        'Sub_policy_id': f'ERROR: {str(e)}',
-                        'sub_policy_name': '',
-                        'control': '',
-                        'discussion': '',
-                        'related_controls': '',
-                        'control_enhancements': '',
-                        'references': ''
-                    })
+                    print(f"Error reading file {file_path}: {e}")
+                    file_content = None
+                
+                # Skip empty files
+                if file_content is not None and not file_content.strip():
+                    print(f"Skipping empty file: {file_path}")
+                    continue
+                chunks.append({'section_name': section_name, 'file_name': file, 'content': file_content})
+    
+    engine = get_extraction_engine()
+    readable = [chunk for chunk in chunks if chunk['content'] is not None]
+    completed = [0]
+    progress_lock = threading.Lock()
+    
+    def on_done(index, outcome):
+        with progress_lock:
+            completed[0] += 1
+            done = completed[0]
+        progress_percent = 15 + (done / len(readable)) * 70  # 15% to 85%
+        source = "cache" if outcome[1] else "model"
+        update_progress(task_id, int(progress_percent),
+                        f"Processed file {done}/{len(readable)} from {source}: {readable[index]['file_name']}")
+    
+    outcomes = engine.extract_many([chunk['content'] for chunk in readable], on_done)
+    for chunk, outcome in zip(readable, outcomes):
+        chunk['outcome'] = outcome
+    
+    chunk_metrics = []
+    for chunk in chunks:
+        fields, cached, latency, error = chunk.get('outcome') or (None, False, None, IOError("File could not be read"))
+        if error is None:
+            extracted_data = dict(fields)
+            # Add section name and file name to the extracted data
+            extracted_data['section_name'] = chunk['section_name']
+            extracted_data['file_name'] = chunk['file_name']
+            all_extracted_data.append(extracted_data)
+        else:
+            print(f"Error processing file {chunk['file_name']}: {error}")
+            # Add error entry to maintain record
+            all_extracted_data.append({
+                'section_name': chunk['section_name'],
+                'file_name': chunk['file_name'],
+                'Sub_policy_id': f'ERROR: {str(error)}',
+                'sub_policy_name': '',
+                'control': '',
+                'discussion': '',
+                'related_controls': '',
+                'control_enhancements': '',
+                'references': ''
+            })
+        chunk_metrics.append({
+            'section_name': chunk['section_name'],
+            'file_name': chunk['file_name'],
+            'cached': cached,
+            'latency_seconds': round(latency, 3) if latency is not None else None,
+            'error': str(error) if error else None,
+        })
+    
+    model_latencies = [m['latency_seconds'] for m in chunk_metrics if not m['cached'] and m['latency_seconds'] is not None]
+    metrics = {
+        'model': engine.model,
+        'prompt_version': engine.prompt_version,
+        'concurrency': engine.concurrency,
+        'cache_hits': sum(1 for m in chunk_metrics if m['cached']),
+        'model_calls': len(model_latencies),
+        'model_latency': latency_summary(model_latencies),
+        'chunks': chunk_metrics,
+    }
+    with open(os.path.join(extracted_policies_dir, f"extraction_metrics_{task_id}.json"), 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
+    print(f"Extraction: {metrics['cache_hits']} cached, {metrics['model_calls']} model calls, latency {metrics['model_latency']}")
     
     update_progress(task_id, 90, "Compiling extracted policies...")
     
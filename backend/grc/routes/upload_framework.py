@@ -24,17 +24,14 @@ from grc.models import Framework, Policy, SubPolicy, Compliance
 from grc.routes.final_adithya import extract_document_sections
 from grc.routes.policy_text_extract import process_checked_sections
 
-# Global progress tracking
-processing_status = {}
+from grc.task_progress import (
+    update_task_progress, wait_for_task_progress, stream_task_progress, FRAMEWORK_TASK,
+    parse_since_version, parse_wait_seconds, InvalidTaskProgressQuery,
+)
 
 def update_progress(task_id, progress, message):
     """Update processing progress"""
-    processing_status[task_id] = {
-        'progress': progress,
-        'message': message,
-        'timestamp': time.time()
-    }
-    cache.set(f'processing_{task_id}', processing_status[task_id], timeout=3600)
+    update_task_progress(task_id, FRAMEWORK_TASK, progress, message)
 
 def process_pdf_framework(pdf_path, task_id, output_dir):
     """Main PDF processing function with progress tracking"""
@@ -47,7 +44,7 @@ def process_pdf_framework(pdf_path, task_id, output_dir):
         
         # Process the PDF using the extract_document_sections function with custom output directory
         update_progress(task_id, 10, "Extracting document sections...")
-        result_output_dir = extract_document_sections(pdf_path, output_dir)
+        result_output_dir = extract_document_sections(pdf_path, output_dir, progress_callback=progress_callback)
         
         if not result_output_dir:
             update_progress(task_id, 100, "Error: Failed to extract document sections")
@@ -187,9 +184,17 @@ def upload_framework_file(request):
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_processing_status(request, task_id):
-    """Get processing status for a task"""
+    """
+    Get processing status for a task. With ?since=<version>&wait=<seconds> the
+    request is held until the task moves past that version or finishes.
+    """
     try:
-        status = cache.get(f'processing_{task_id}')
+        try:
+            since = parse_since_version(request.GET.get('since'))
+            wait = parse_wait_seconds(request.GET.get('wait'))
+        except InvalidTaskProgressQuery as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        status = wait_for_task_progress(task_id, [FRAMEWORK_TASK], since=since, timeout=wait)
         if status:
             return JsonResponse(status)
         else:
@@ -201,6 +206,18 @@ def get_processing_status(request, task_id):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@csrf_exempt
+@require_http_methods(["GET"])
+def stream_processing_status(request, task_id):
+    """Server-sent events with the progress of a task until it finishes"""
+    response = StreamingHttpResponse(
+        stream_task_progress(task_id, [FRAMEWORK_TASK]),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_sections(request, task_id):
@@ -1,20 +1,180 @@
+"""
+Client for the S3 microservice
+
+Every S3Client shares one requests.Session per process, so uploads and
+downloads reuse keep-alive connections instead of opening one per call.
+Uploads are retried with exponential backoff on connection errors, timeouts
+and 429/5xx answers. Files of S3_STREAM_THRESHOLD_BYTES or more are sent as a
+multipart body streamed from disk in chunks instead of being read into memory.
+upload_multiple_evidence and upload_multiple_audit_evidence upload their
+files concurrently.
+
+Uploads are deduplicated by content: s3_files.content_sha256 records the
+SHA-256 of every uploaded file, and a file whose content the same user has
+already uploaded is not sent again. That user's S3File row is reused instead,
+and evidence uploads append its URL to the finding or audit like the
+microservice would.
+Downloads are read through the content-addressed BlobCache (blob_cache.py),
+and pre-signed download URLs are reused for most of their lifetime.
+
+Settings:
+    S3_UPLOAD_CONCURRENCY          - files uploaded at once by the upload_multiple_* methods (default 8)
+    S3_UPLOAD_MAX_RETRIES          - retries of a failed upload (default 3)
+    S3_UPLOAD_RETRY_BASE_SECONDS   - first retry delay, doubled for each further retry (default 0.5)
+    S3_STREAM_THRESHOLD_BYTES      - files at least this large are streamed (default 8MB)
+    S3_REQUEST_TIMEOUT_SECONDS     - connect/read timeout of a request (default 300)
+    S3_UPLOAD_DEDUP                - skip uploading content the same user already has in S3 (default True)
+"""
+
+import hashlib
 import requests
 import os
 import mimetypes
-from typing import Dict, List, Optional, Union, BinaryIO
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Union, BinaryIO
 import json
 
+from django.conf import settings
+from django.db import connection
+
+from .blob_cache import file_sha256, get_blob_cache
+from .rbac.cache import RBACPermissionCache
+
+S3_UPLOAD_CONCURRENCY = getattr(settings, 'S3_UPLOAD_CONCURRENCY', 8)
+S3_UPLOAD_MAX_RETRIES = getattr(settings, 'S3_UPLOAD_MAX_RETRIES', 3)
+S3_UPLOAD_RETRY_BASE_SECONDS = getattr(settings, 'S3_UPLOAD_RETRY_BASE_SECONDS', 0.5)
+S3_STREAM_THRESHOLD_BYTES = getattr(settings, 'S3_STREAM_THRESHOLD_BYTES', 8 * 1024 * 1024)
+S3_REQUEST_TIMEOUT_SECONDS = getattr(settings, 'S3_REQUEST_TIMEOUT_SECONDS', 300)
+S3_UPLOAD_DEDUP = getattr(settings, 'S3_UPLOAD_DEDUP', True)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+STREAM_CHUNK_SIZE = 1024 * 1024
+EVIDENCE_DOCUMENT_TYPES = ('evidence', 'audit_evidence')
+# (table_name, storage_column) pairs an evidence URL may be linked into, keyed by documentType
+EVIDENCE_STORAGE = {
+    'evidence': ('audit_findings', 'Evidence'),
+    'audit_evidence': ('audit', 'Evidence'),
+}
+# Placeholder owner of uploads made without a user; never deduplicated
+ANONYMOUS_UPLOAD_USER = "default-user"
+
+# Pre-signed URLs are reused until this share of their lifetime has passed
+DOWNLOAD_URL_REUSE_FRACTION = 0.8
+# (file id, expires_in) -> (reuse until, download info); entries also check their own deadline
+download_url_cache = RBACPermissionCache(max_entries=2048, ttl_seconds=24 * 60 * 60)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """The process-wide keep-alive session; a forked worker gets its own"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(10, S3_UPLOAD_CONCURRENCY))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+def retry_delay_seconds(attempt: int) -> float:
+    """Exponential backoff with jitter for retry number attempt (0-based)"""
+    return S3_UPLOAD_RETRY_BASE_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class MultipartFileStream:
+    """
+    multipart/form-data body of some form fields and one file, read from disk
+    in chunks as requests sends it. The length is known up front, so the
+    request carries a Content-Length and the file is never held in memory.
+    """
+
+    def __init__(self, fields: Dict, file_field: str, file_name: str, file_path: str, content_type: str):
+        self.boundary = uuid.uuid4().hex
+        head = []
+        for name, value in fields.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for item in values:
+                if item is None:
+                    continue
+                head.append(
+                    f'--{self.boundary}\r\nContent-Disposition: form-data; name="{self._quote(name)}"\r\n\r\n'.encode('utf-8')
+                    + str(item).encode('utf-8') + b'\r\n'
+                )
+        head.append(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{self._quote(file_field)}"; '
+            f'filename="{self._quote(file_name)}"\r\nContent-Type: {content_type}\r\n\r\n'.encode('utf-8')
+        )
+        self._segments = [b''.join(head), None, f'\r\n--{self.boundary}--\r\n'.encode('utf-8')]
+        self._file = open(file_path, 'rb')
+        self.len = len(self._segments[0]) + os.path.getsize(file_path) + len(self._segments[2])
+        self._index = 0
+        self._offset = 0
+
+    @staticmethod
+    def _quote(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\r', ' ').replace('\n', ' ')
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self.len
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.len
+        out = []
+        while size > 0 and self._index < len(self._segments):
+            if self._index == 1:
+                data = self._file.read(size)
+            else:
+                segment = self._segments[self._index]
+                data = segment[self._offset:self._offset + size]
+                self._offset += len(data)
+            if not data:
+                self._index += 1
+                self._offset = 0
+                continue
+            out.append(data)
+            size -= len(data)
+        return b''.join(out)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 class S3Client:
     """Client for interacting with the S3 microservice API."""
     
-    def __init__(self, base_url: str = "http://localhost:3001"):
+    def __init__(self, base_url: str = "http://localhost:3001", session: Optional[requests.Session] = None,
+                 blob_cache=None):
         """
         Initialize the S3 client.
         
         Args:
             base_url: Base URL of the S3 microservice API
+            session: HTTP session to use (defaults to the shared keep-alive session)
+            blob_cache: BlobCache for downloads (defaults to the shared cache)
         """
         self.base_url = base_url.rstrip('/')
+        self.session = session or get_http_session()
+        self.blob_cache = blob_cache or get_blob_cache()
         
         # Initialize mimetypes
         mimetypes.init()
@@ -118,8 +278,9 @@ class S3Client:
     
     def upload_file(self, 
                    file_path: str, 
-                   user_id: str = "default-user", 
+                   user_id: str = ANONYMOUS_UPLOAD_USER, 
                    file_name: Optional[str] = None, 
+                   dedupe: bool = S3_UPLOAD_DEDUP,
                    **params) -> Dict:
         """
         Upload a file to S3 via the microservice.
@@ -128,6 +289,7 @@ class S3Client:
             file_path: Path to the file to upload
             user_id: User ID for file ownership
             file_name: Custom file name (defaults to original file name)
+            dedupe: Reuse the user's earlier upload of identical content instead of uploading again
             **params: Additional parameters to include in the file metadata
             
         Returns:
@@ -175,15 +337,18 @@ class S3Client:
         # Add additional parameters
         form_data.update(params)
         
-        # Prepare file data
-        with open(file_path, 'rb') as file:
-            files = {'file': (file_name, file, file_info['content_type'])}
-            response = requests.post(url, data=form_data, files=files)
-            
-        # Check if request was successful
-        response.raise_for_status()
+        content_sha256 = file_sha256(file_path)
+        if dedupe:
+            reused = self._reuse_upload(content_sha256, user_id, params)
+            if reused:
+                return reused
+        
+        # Send the file, retrying transient failures
+        response = self._post_file(url, form_data, file_path, file_name, file_info['content_type'])
         
         result = response.json()
+        if result.get('success'):
+            self._record_upload(result, content_sha256, file_name, file_info, user_id, params)
         
         # Additional logging for evidence uploads
         if is_evidence and result.get('success'):
@@ -197,6 +362,132 @@ class S3Client:
         
         return result
     
+    def _reuse_upload(self, content_sha256: str, user_id: str, params: Dict) -> Optional[Dict]:
+        """
+        Upload response built from the same user's earlier upload of this content,
+        or None to upload. Other users' files are never handed out.
+        """
+        from .models import S3File
+        if not user_id or str(user_id) == ANONYMOUS_UPLOAD_USER:
+            return None
+        try:
+            existing = S3File.objects.filter(
+                content_sha256=content_sha256, user_id=str(user_id)
+            ).order_by('id').first()
+            if existing is None:
+                return None
+            if params.get('documentType') in EVIDENCE_DOCUMENT_TYPES and not self._link_evidence(existing.url, params):
+                # No finding or audit row to attach to; let the microservice create it
+                return None
+        except Exception as e:
+            print(f"Upload deduplication skipped: {str(e)}")
+            return None
+        
+        print(f"Identical content already uploaded as file {existing.id}, reusing {existing.url}")
+        return {
+            'success': True,
+            'file': {
+                'id': existing.id,
+                'url': existing.url,
+                'fileType': existing.file_type,
+                'fileName': existing.file_name,
+                'uploadedAt': existing.uploaded_at.isoformat() if existing.uploaded_at else None,
+                'metadata': params,
+                's3_location': existing.url,
+                'file_id': existing.id
+            },
+            'deduplicated': True
+        }
+    
+    def _link_evidence(self, url: str, params: Dict) -> bool:
+        """
+        Append an evidence URL to the table_name / storage_column of its finding
+        (evidence) or audit (audit_evidence) the way the microservice does.
+        Returns False if there is no row to update or the target is not one of
+        EVIDENCE_STORAGE, in which case the file is uploaded normally.
+        """
+        document_type = params.get('documentType')
+        table, column = EVIDENCE_STORAGE[document_type]
+        if (params.get('table_name', table), params.get('storage_column', column)) != (table, column):
+            return False
+        
+        if document_type == 'evidence':
+            if not params.get('compliance_id'):
+                return False
+            if params.get('audit_id'):
+                where, args = "AuditId = %s AND ComplianceId = %s", [params['audit_id'], params['compliance_id']]
+            else:
+                where, args = "ComplianceId = %s", [params['compliance_id']]
+        else:
+            if not params.get('audit_id'):
+                return False
+            where, args = "AuditId = %s", [params['audit_id']]
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {column} FROM {table} WHERE {where} LIMIT 1", args)
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            urls = [existing for existing in (row[0] or '').split(',') if existing]
+            # Re-submitting identical evidence does not list it twice
+            if url not in urls:
+                cursor.execute(f"UPDATE {table} SET {column} = %s WHERE {where}", [','.join(urls + [url])] + args)
+        return True
+    
+    def _record_upload(self, result: Dict, content_sha256: str, file_name: str, file_info: Dict,
+                       user_id: str, params: Dict):
+        """Remember the content hash of a new upload so identical files are not uploaded again"""
+        from .models import S3File
+        uploaded = result.get('file') or {}
+        try:
+            if isinstance(uploaded.get('id'), int):
+                S3File.objects.filter(id=uploaded['id']).update(content_sha256=content_sha256)
+            elif uploaded.get('url'):
+                # Evidence uploads are stored on the finding, not in s3_files
+                S3File.objects.create(
+                    url=uploaded['url'],
+                    file_type=file_info['file_type'],
+                    file_name=file_name,
+                    user_id=user_id,
+                    metadata=params,
+                    content_sha256=content_sha256
+                )
+        except Exception as e:
+            print(f"Could not record content hash of {file_name}: {str(e)}")
+    
+    def _post_file(self, url: str, form_data: Dict, file_path: str, file_name: str, content_type: str) -> requests.Response:
+        """
+        POST a file as multipart/form-data, streaming large files from disk.
+        Connection errors, timeouts and 429/5xx answers are retried with
+        exponential backoff; any other error status raises immediately.
+        """
+        attempt = 0
+        while True:
+            try:
+                if os.path.getsize(file_path) >= S3_STREAM_THRESHOLD_BYTES:
+                    with MultipartFileStream(form_data, 'file', file_name, file_path, content_type) as body:
+                        response = self.session.post(
+                            url, data=body, headers={'Content-Type': body.content_type},
+                            timeout=S3_REQUEST_TIMEOUT_SECONDS
+                        )
+                else:
+                    with open(file_path, 'rb') as file:
+                        files = {'file': (file_name, file, content_type)}
+                        response = self.session.post(url, data=form_data, files=files, timeout=S3_REQUEST_TIMEOUT_SECONDS)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= S3_UPLOAD_MAX_RETRIES:
+                    response.raise_for_status()
+                    return response
+                reason = f"status {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= S3_UPLOAD_MAX_RETRIES:
+                    raise
+                reason = str(e)
+            
+            delay = retry_delay_seconds(attempt)
+            attempt += 1
+            print(f"Upload of {file_name} failed ({reason}), retry {attempt}/{S3_UPLOAD_MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+    
     def get_user_files(self, user_id: str, **filters) -> Dict:
         """
         Get all files uploaded by a user, with optional filtering.
@@ -211,7 +502,7 @@ class S3Client:
         url = f"{self.base_url}/api/files/{user_id}"
         
         # Add filters as query parameters
-        response = requests.get(url, params=filters)
+        response = self.session.get(url, params=filters)
         response.raise_for_status()
         
         return response.json()
@@ -228,7 +519,7 @@ class S3Client:
         """
         url = f"{self.base_url}/api/file/{file_id}"
         
-        response = requests.get(url)
+        response = self.session.get(url)
         response.raise_for_status()
         
         return response.json()
@@ -244,13 +535,65 @@ class S3Client:
         Returns:
             Download URL information
         """
+        cache_key = (str(file_id), expires_in)
+        cached = download_url_cache.get(cache_key)
+        if cached is not None and time.time() < cached[0]:
+            return cached[1]
+        
         url = f"{self.base_url}/api/download/{file_id}"
         
         params = {"expiresIn": expires_in}
-        response = requests.get(url, params=params)
+        response = self.session.get(url, params=params)
         response.raise_for_status()
         
-        return response.json()
+        download_info = response.json()
+        if download_info.get('success'):
+            download_url_cache.set(cache_key, (time.time() + expires_in * DOWNLOAD_URL_REUSE_FRACTION, download_info))
+        return download_info
+    
+    def _download_destination(self, destination_path: str, file_name: str) -> str:
+        # If destination_path is a directory, append the filename
+        if os.path.isdir(destination_path):
+            return os.path.join(destination_path, file_name)
+        return destination_path
+    
+    def _download_from_cache(self, file_id: str, destination_path: str) -> Optional[str]:
+        """Copy a file from the local blob cache if its content is there. Returns the path or None."""
+        ref = self.blob_cache.ref(file_id)
+        if ref is None and str(file_id).isdigit():
+            from .models import S3File
+            try:
+                row = (
+                    S3File.objects.filter(id=int(file_id), content_sha256__isnull=False)
+                    .values_list('content_sha256', 'file_name').first()
+                )
+            except Exception as e:
+                print(f"Blob cache lookup skipped: {str(e)}")
+                row = None
+            if row and self.blob_cache.get(row[0]):
+                ref = row
+        if ref is None:
+            return None
+        
+        content_sha256, file_name = ref
+        full_path = self._download_destination(destination_path, file_name or f"download_{file_id}")
+        if self.blob_cache.copy_to(content_sha256, full_path):
+            print(f"File {file_id} served from local blob cache: {full_path}")
+            return full_path
+        return None
+    
+    def _save_download(self, response: requests.Response, file_id: str, full_path: str, file_name: str):
+        """Stream a download to full_path and add it to the blob cache"""
+        digest = hashlib.sha256()
+        with open(full_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+        try:
+            content_sha256 = self.blob_cache.put_file(full_path, digest.hexdigest())
+            self.blob_cache.set_ref(file_id, content_sha256, file_name)
+        except OSError as e:
+            print(f"Could not cache downloaded file {file_id}: {str(e)}")
     
     def download_file(self, file_id: str, destination_path: str) -> str:
         """
@@ -264,6 +607,10 @@ class S3Client:
             Path to the downloaded file
         """
         try:
+            cached_path = self._download_from_cache(file_id, destination_path)
+            if cached_path:
+                return cached_path
+            
             # Get the download URL
             download_info = self.get_download_url(file_id)
             
@@ -275,21 +622,15 @@ class S3Client:
             print(f"Attempting to download from: {download_url}")
             
             # Simple direct download attempt using the pre-signed URL directly
-            response = requests.get(download_url)
+            response = self.session.get(download_url, stream=True)
             
             if response.status_code == 200:
                 # Determine the filename
                 file_name = download_info.get('fileName', f"download_{file_id}")
-                
-                # If destination_path is a directory, append the filename
-                if os.path.isdir(destination_path):
-                    full_path = os.path.join(destination_path, file_name)
-                else:
-                    full_path = destination_path
+                full_path = self._download_destination(destination_path, file_name)
                 
                 # Write the file
-                with open(full_path, 'wb') as f:
-                    f.write(response.content)
+                self._save_download(response, file_id, full_path, file_name)
                 
                 print(f"File successfully downloaded to: {full_path}")
                 return full_path
@@ -301,19 +642,15 @@ class S3Client:
                 print(f"Pre-signed URL download failed with status {response.status_code}, trying direct URL")
                 print(f"Attempting direct download from: {original_url}")
                 
-                direct_response = requests.get(original_url)
+                response.close()
+                direct_response = self.session.get(original_url, stream=True)
                 
                 if direct_response.status_code == 200:
-                    # If destination_path is a directory, append the filename
                     file_name = download_info.get('fileName', f"download_{file_id}")
-                    if os.path.isdir(destination_path):
-                        full_path = os.path.join(destination_path, file_name)
-                    else:
-                        full_path = destination_path
+                    full_path = self._download_destination(destination_path, file_name)
                     
                     # Write the file
-                    with open(full_path, 'wb') as f:
-                        f.write(direct_response.content)
+                    self._save_download(direct_response, file_id, full_path, file_name)
                     
                     print(f"File successfully downloaded to: {full_path}")
                     return full_path
@@ -409,7 +746,7 @@ class S3Client:
         """
         url = f"{self.base_url}/api/file/{file_id}"
         
-        response = requests.delete(url)
+        response = self.session.delete(url)
         response.raise_for_status()
         
         return response.json()
@@ -500,22 +837,24 @@ class S3Client:
         
         return result
 
-    def upload_multiple_evidence(self, 
-                                file_paths: List[str], 
-                                compliance_id: str, 
-                                audit_id: Optional[str] = None, 
-                                user_id: str = "default-user") -> Dict:
+    def _upload_many(self,
+                     file_paths: List[str],
+                     upload_one: Callable[[str], Dict],
+                     max_workers: Optional[int] = None,
+                     progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
-        Upload multiple compliance evidence files at once.
+        Upload files concurrently with upload_one(file_path).
         
         Args:
-            file_paths: List of paths to evidence files to upload
-            compliance_id: Compliance ID to associate with the evidence
-            audit_id: Audit ID to associate with the evidence (optional but recommended)
-            user_id: User ID for file ownership
+            file_paths: Paths of the files to upload
+            upload_one: Uploads one file and returns the API response
+            max_workers: Files uploaded at once (defaults to S3_UPLOAD_CONCURRENCY; 1 uploads one by one)
+            progress_callback: Called in the calling thread after each file with the
+                aggregate progress: total, completed, failed, bytes_total, bytes_done
+                and the file_path and ok flag of the file that just finished
             
         Returns:
-            Dictionary containing results for all uploads
+            Dictionary containing results for all uploads, in the order of file_paths
         """
         results = {
             'success': True,
@@ -523,27 +862,55 @@ class S3Client:
             'failed_files': [],
             'urls': []
         }
+        sizes = [os.path.getsize(path) if os.path.exists(path) else 0 for path in file_paths]
+        progress = {
+            'total': len(file_paths),
+            'completed': 0,
+            'failed': 0,
+            'bytes_total': sum(sizes),
+            'bytes_done': 0,
+        }
+        outcomes = [None] * len(file_paths)
         
-        for file_path in file_paths:
+        def run(index):
             try:
-                result = self.upload_evidence(file_path, compliance_id, audit_id, user_id)
-                if result.get('success'):
-                    results['uploaded_files'].append({
-                        'file_path': file_path,
-                        'url': result.get('file', {}).get('url'),
-                        'result': result
-                    })
-                    results['urls'].append(result.get('file', {}).get('url'))
-                else:
-                    results['failed_files'].append({
-                        'file_path': file_path,
-                        'error': result.get('error', 'Unknown error')
-                    })
-                    results['success'] = False
+                return index, upload_one(file_paths[index]), None
             except Exception as e:
+                return index, None, e
+        
+        workers = max(1, min(max_workers or S3_UPLOAD_CONCURRENCY, len(file_paths) or 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s3-upload") as pool:
+            futures = [pool.submit(run, index) for index in range(len(file_paths))]
+            for future in as_completed(futures):
+                index, result, error = future.result()
+                outcomes[index] = (result, error)
+                ok = error is None and bool(result.get('success'))
+                progress['completed' if ok else 'failed'] += 1
+                progress['bytes_done'] += sizes[index]
+                if progress_callback:
+                    try:
+                        progress_callback({**progress, 'file_path': file_paths[index], 'ok': ok})
+                    except Exception as e:
+                        print(f"Upload progress callback error: {str(e)}")
+        
+        for file_path, (result, error) in zip(file_paths, outcomes):
+            if error is not None:
+                results['failed_files'].append({
+                    'file_path': file_path,
+                    'error': str(error)
+                })
+                results['success'] = False
+            elif result.get('success'):
+                results['uploaded_files'].append({
+                    'file_path': file_path,
+                    'url': result.get('file', {}).get('url'),
+                    'result': result
+                })
+                results['urls'].append(result.get('file', {}).get('url'))
+            else:
                 results['failed_files'].append({
                     'file_path': file_path,
-                    'error': str(e)
+                    'error': result.get('error', 'Unknown error')
                 })
                 results['success'] = False
         
@@ -552,52 +919,56 @@ class S3Client:
         
         return results
 
+    def upload_multiple_evidence(self, 
+                                file_paths: List[str], 
+                                compliance_id: str, 
+                                audit_id: Optional[str] = None, 
+                                user_id: str = "default-user",
+                                max_workers: Optional[int] = None,
+                                progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Upload multiple compliance evidence files at once, several concurrently.
+        
+        Args:
+            file_paths: List of paths to evidence files to upload
+            compliance_id: Compliance ID to associate with the evidence
+            audit_id: Audit ID to associate with the evidence (optional but recommended)
+            user_id: User ID for file ownership
+            max_workers: Files uploaded at once (defaults to S3_UPLOAD_CONCURRENCY)
+            progress_callback: Receives the aggregate progress after each file (see _upload_many)
+            
+        Returns:
+            Dictionary containing results for all uploads
+        """
+        return self._upload_many(
+            file_paths,
+            lambda file_path: self.upload_evidence(file_path, compliance_id, audit_id, user_id),
+            max_workers=max_workers,
+            progress_callback=progress_callback,
+        )
+
     def upload_multiple_audit_evidence(self, 
                                      file_paths: List[str], 
                                      audit_id: str, 
-                                     user_id: str = "default-user") -> Dict:
+                                     user_id: str = "default-user",
+                                     max_workers: Optional[int] = None,
+                                     progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
-        Upload multiple audit evidence files at once.
+        Upload multiple audit evidence files at once, several concurrently.
         
         Args:
             file_paths: List of paths to audit evidence files to upload
             audit_id: Audit ID to associate with the evidence
             user_id: User ID for file ownership
+            max_workers: Files uploaded at once (defaults to S3_UPLOAD_CONCURRENCY)
+            progress_callback: Receives the aggregate progress after each file (see _upload_many)
             
         Returns:
             Dictionary containing results for all uploads
         """
-        results = {
-            'success': True,
-            'uploaded_files': [],
-            'failed_files': [],
-            'urls': []
-        }
-        
-        for file_path in file_paths:
-            try:
-                result = self.upload_audit_evidence(file_path, audit_id, user_id)
-                if result.get('success'):
-                    results['uploaded_files'].append({
-                        'file_path': file_path,
-                        'url': result.get('file', {}).get('url'),
-                        'result': result
-                    })
-                    results['urls'].append(result.get('file', {}).get('url'))
-                else:
-                    results['failed_files'].append({
-                        'file_path': file_path,
-                        'error': result.get('error', 'Unknown error')
-                    })
-                    results['success'] = False
-            except Exception as e:
-                results['failed_files'].append({
-                    'file_path': file_path,
-                    'error': str(e)
-                })
-                results['success'] = False
-        
-        # Create comma-separated URL string
-        results['urls_string'] = ','.join(results['urls'])
-        
-        return results
\ No newline at end of file
+        return self._upload_many(
+            file_paths,
+            lambda file_path: self.upload_audit_evidence(file_path, audit_id, user_id),
+            max_workers=max_workers,
+            progress_callback=progress_callback,
+        )
@@ -1,26 +1,15 @@
 import json
-try:
-    from langchain_ollama import OllamaLLM
-    from langchain.prompts import PromptTemplate
-    from langchain.chains import LLMChain
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
-    print("Warning: langchain_ollama not available, falling back to mock analysis")
 import random
 import traceback
 
-def analyze_security_incident(incident_description):
-    try:
-        # Check if Ollama is available
-        if not OLLAMA_AVAILABLE:
-            print("Ollama not available, using fallback analysis")
-            return generate_fallback_analysis(incident_description)
-            
-        # Initialize the local SLM model
-        llm = OllamaLLM(model="llama3.2:3b", temperature=0.7)
-       
-        prompt_template = PromptTemplate.from_template("""
+from .incident_inference import AnalysisKind, get_inference_service
+from .llm_backend import llm_backend_available
+
+LLM_AVAILABLE = llm_backend_available()
+if not LLM_AVAILABLE:
+    print("Warning: LLM backend not available, falling back to mock analysis")
+
+SECURITY_ANALYSIS_PROMPT = """
         You are a cybersecurity expert specializing in analyzing security incidents for a bank's Governance, Risk, and Compliance (GRC) system.
        
         Analyze the following security incident and provide a comprehensive risk assessment in JSON format with these fields:
@@ -63,77 +52,107 @@ def analyze_security_incident(incident_description):
         {incident}
        
         Respond ONLY with a valid JSON object containing the fields above.
-        """)
-       
-        chain = LLMChain(llm=llm, prompt=prompt_template)
-       
-        # Process the incident
-        print(f"Sending incident to AI: {incident_description}")
-        response = chain.invoke({"incident": incident_description})["text"]
-        print(f"Raw AI response: {response}")
-       
-        # Clean and parse the JSON from the response
-        try:
-            # Remove any extra text before or after the JSON
-            json_text = response.strip()
-            
-            # Handle different response formats
-            if json_text.startswith("```json") and json_text.endswith("```"):
-                json_text = json_text[7:-3].strip()
-            elif json_text.startswith("```") and json_text.endswith("```"):
-                json_text = json_text[3:-3].strip()
-            elif "```json" in json_text:
-                # Extract JSON from markdown code block
-                start_idx = json_text.find("```json") + 7
-                end_idx = json_text.find("```", start_idx)
-                if end_idx != -1:
-                    json_text = json_text[start_idx:end_idx].strip()
-            elif "{" in json_text and "}" in json_text:
-                # Extract JSON object from response
-                start_idx = json_text.find("{")
-                end_idx = json_text.rfind("}") + 1
-                json_text = json_text[start_idx:end_idx]
-            
-            print(f"Cleaned JSON text: {json_text}")
-            incident_analysis = json.loads(json_text)
-            
-            # Validate that we have the required fields
-            required_fields = ['riskLikelihood', 'riskImpact', 'riskLikelihoodJustification', 'riskImpactJustification']
-            missing_fields = [field for field in required_fields if field not in incident_analysis]
-            
-            if missing_fields:
-                print(f"Missing required fields in AI response: {missing_fields}")
-                print("Falling back to generated analysis")
-                return generate_fallback_analysis(incident_description)
-            
-            # Ensure likelihood and impact are integers
-            if 'riskLikelihood' in incident_analysis:
-                try:
-                    incident_analysis['riskLikelihood'] = int(incident_analysis['riskLikelihood'])
-                except (ValueError, TypeError):
-                    incident_analysis['riskLikelihood'] = 5
-            
-            if 'riskImpact' in incident_analysis:
-                try:
-                    incident_analysis['riskImpact'] = int(incident_analysis['riskImpact'])
-                except (ValueError, TypeError):
-                    incident_analysis['riskImpact'] = 5
-            
-            print(f"Successfully parsed AI analysis: {incident_analysis}")
-            return incident_analysis
-            
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Failed to parse JSON from: {json_text}")
-            # If JSON parsing fails, fall back to the generated response
+        """
+
+
+def _extract_json_text(response):
+    """The JSON object in a model response that may wrap it in prose or a code fence"""
+    # Remove any extra text before or after the JSON
+    json_text = response.strip()
+    
+    # Handle different response formats
+    if json_text.startswith("```json") and json_text.endswith("```"):
+        json_text = json_text[7:-3].strip()
+    elif json_text.startswith("```") and json_text.endswith("```"):
+        json_text = json_text[3:-3].strip()
+    elif "```json" in json_text:
+        # Extract JSON from markdown code block
+        start_idx = json_text.find("```json") + 7
+        end_idx = json_text.find("```", start_idx)
+        if end_idx != -1:
+            json_text = json_text[start_idx:end_idx].strip()
+    elif "{" in json_text and "}" in json_text:
+        # Extract JSON object from response
+        start_idx = json_text.find("{")
+        end_idx = json_text.rfind("}") + 1
+        json_text = json_text[start_idx:end_idx]
+    return json_text
+
+
+def parse_security_analysis(response, inputs):
+    """Analysis dict from a model response; raises ValueError if it is unusable"""
+    print(f"Raw AI response: {response}")
+    json_text = _extract_json_text(response)
+    print(f"Cleaned JSON text: {json_text}")
+    # json.JSONDecodeError is a ValueError
+    incident_analysis = json.loads(json_text)
+    
+    # Validate that we have the required fields
+    required_fields = ['riskLikelihood', 'riskImpact', 'riskLikelihoodJustification', 'riskImpactJustification']
+    missing_fields = [field for field in required_fields if field not in incident_analysis]
+    if missing_fields:
+        raise ValueError(f"Missing required fields in AI response: {missing_fields}")
+    
+    # Ensure likelihood and impact are integers
+    try:
+        incident_analysis['riskLikelihood'] = int(incident_analysis['riskLikelihood'])
+    except (ValueError, TypeError):
+        incident_analysis['riskLikelihood'] = 5
+    
+    try:
+        incident_analysis['riskImpact'] = int(incident_analysis['riskImpact'])
+    except (ValueError, TypeError):
+        incident_analysis['riskImpact'] = 5
+    
+    print(f"Successfully parsed AI analysis: {incident_analysis}")
+    return incident_analysis
+
+
+def security_analysis_incident_fields(result):
+    """Incident fields filled in from a security analysis"""
+    return {
+        'RiskCategory': str(result.get('category') or '')[:100],
+        'RiskPriority': str(result.get('riskPriority') or '')[:20],
+        'PossibleDamage': result.get('possibleDamage'),
+    }
+
+
+SECURITY_ANALYSIS = AnalysisKind(
+    'security',
+    SECURITY_ANALYSIS_PROMPT,
+    parse=parse_security_analysis,
+    fallback=lambda inputs: generate_fallback_analysis(inputs['incident']),
+    incident_fields=security_analysis_incident_fields,
+)
+
+
+def analyze_security_incident(incident_description):
+    """Model analysis of an incident, waiting for the model if it is not cached"""
+    try:
+        # Check if the LLM backend is available
+        if not LLM_AVAILABLE:
+            print("LLM backend not available, using fallback analysis")
             return generate_fallback_analysis(incident_description)
-            
+        
+        print(f"Sending incident to AI: {incident_description}")
+        return get_inference_service().analyze(SECURITY_ANALYSIS, {"incident": incident_description})
     except Exception as e:
-        print(f"Error using Ollama model: {e}")
+        print(f"Error using LLM model: {e}")
         traceback.print_exc()
         # Fall back to a generated response if the model fails
         return generate_fallback_analysis(incident_description)
 
+
+def request_security_analysis(incident_description, incident_id=None):
+    """
+    Analysis without waiting for the model: the cached model result, or the
+    fallback analysis while the model runs in the background.
+    Returns (analysis, status, key); status is 'completed', 'pending' or 'fallback'.
+    """
+    if not LLM_AVAILABLE:
+        return generate_fallback_analysis(incident_description), 'fallback', None
+    return get_inference_service().submit(SECURITY_ANALYSIS, {"incident": incident_description}, incident_id)
+
 def generate_fallback_analysis(incident_description):
     """Generate a fallback analysis when the AI model is unavailable."""
     # Extract some keywords from the incident for basic categorization
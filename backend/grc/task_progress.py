@@ -0,0 +1,184 @@
+"""
+Database-backed progress of background ingestion tasks
+
+Framework uploads and policy extraction run in a background thread of
+whichever worker process received the upload, while status requests can land
+on any worker. Progress is therefore stored in the task_progress table, one
+row per (task_id, kind), instead of in module-level dicts.
+
+Every update is a single UPDATE that also increments `version`, so readers
+can wait for something newer than what they have:
+    wait_for_task_progress  - long-poll until the version moves past `since`
+    stream_task_progress    - server-sent events, one per new version
+
+Both hold the request for up to TASK_PROGRESS_MAX_WAIT_SECONDS, and with sync
+gunicorn workers every waiting client occupies a whole worker for that long.
+Keep the limit well below the worker timeout and size the worker pool for the
+number of clients expected to wait at once. Request parameters go through
+parse_wait_seconds / parse_since_version, which reject anything but finite
+numbers.
+
+Rows expire TASK_PROGRESS_TTL_SECONDS after their last update and are removed
+by purge_expired_task_progress (`python manage.py purge_task_progress`).
+
+Settings:
+    TASK_PROGRESS_TTL_SECONDS        - lifetime of a row after its last update (default 3600)
+    TASK_PROGRESS_POLL_SECONDS       - how often waiting readers re-check the row (default 0.5)
+    TASK_PROGRESS_MAX_WAIT_SECONDS   - longest long-poll or stream (default 60)
+"""
+
+import json
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TaskProgress
+
+TASK_PROGRESS_TTL_SECONDS = getattr(settings, 'TASK_PROGRESS_TTL_SECONDS', 3600)
+TASK_PROGRESS_POLL_SECONDS = getattr(settings, 'TASK_PROGRESS_POLL_SECONDS', 0.5)
+TASK_PROGRESS_MAX_WAIT_SECONDS = getattr(settings, 'TASK_PROGRESS_MAX_WAIT_SECONDS', 60)
+
+FRAMEWORK_TASK = 'framework'
+POLICY_EXTRACTION_TASK = 'policy_extraction'
+
+TERMINAL_STATUSES = ('completed', 'failed')
+HEARTBEAT_SECONDS = 15
+
+
+class InvalidTaskProgressQuery(ValueError):
+    pass
+
+
+def _clamp_wait(seconds):
+    """Wait in seconds limited to 0..TASK_PROGRESS_MAX_WAIT_SECONDS; non-finite values count as 0"""
+    try:
+        seconds = float(seconds)
+    except (TypeError, ValueError):
+        return 0
+    if not math.isfinite(seconds):
+        return 0
+    return min(max(seconds, 0), TASK_PROGRESS_MAX_WAIT_SECONDS)
+
+
+def parse_wait_seconds(value):
+    """The `wait` request parameter as seconds within 0..TASK_PROGRESS_MAX_WAIT_SECONDS"""
+    if value in (None, ''):
+        return 0
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise InvalidTaskProgressQuery(f"wait must be a number of seconds: {value}")
+    if not math.isfinite(seconds):
+        raise InvalidTaskProgressQuery(f"wait must be a finite number of seconds: {value}")
+    return _clamp_wait(seconds)
+
+
+def parse_since_version(value):
+    """The `since` request parameter as a version number, or None"""
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidTaskProgressQuery(f"since must be an integer version: {value}")
+
+
+def _status_for(progress, message):
+    if progress < 100:
+        return 'running'
+    return 'failed' if (message or '').startswith('Error') else 'completed'
+
+
+def update_task_progress(task_id, kind, progress, message):
+    """Record the latest progress of a task; visible to every process immediately"""
+    now = timezone.now()
+    values = {
+        'progress': int(progress),
+        'message': message,
+        'status': _status_for(progress, message),
+        'updated_at': now,
+        'expires_at': now + timedelta(seconds=TASK_PROGRESS_TTL_SECONDS),
+    }
+    # Background threads write outside any request transaction
+    updated = TaskProgress.objects.filter(task_id=task_id, kind=kind).update(version=F('version') + 1, **values)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            TaskProgress.objects.create(task_id=task_id, kind=kind, version=1, **values)
+    except IntegrityError:
+        # Another process created the row first
+        TaskProgress.objects.filter(task_id=task_id, kind=kind).update(version=F('version') + 1, **values)
+
+
+def _as_dict(row):
+    return {
+        'task_id': row.task_id,
+        'progress': row.progress,
+        'message': row.message,
+        'status': row.status,
+        'version': row.version,
+        'timestamp': row.updated_at.timestamp(),
+    }
+
+
+def get_task_progress(task_id, kinds):
+    """Progress dict of the first of `kinds` that has a live row, or None"""
+    rows = {
+        row.kind: row
+        for row in TaskProgress.objects.filter(task_id=task_id, kind__in=kinds, expires_at__gt=timezone.now())
+    }
+    for kind in kinds:
+        if kind in rows:
+            return _as_dict(rows[kind])
+    return None
+
+
+def wait_for_task_progress(task_id, kinds, since=None, timeout=0):
+    """
+    Long-poll: the task's progress once its version is newer than `since` or it
+    has finished, or whatever is current after `timeout` seconds.
+    """
+    deadline = time.monotonic() + _clamp_wait(timeout)
+    while True:
+        current = get_task_progress(task_id, kinds)
+        if since is None or (current and (current['version'] > since or current['status'] in TERMINAL_STATUSES)):
+            return current
+        if time.monotonic() >= deadline:
+            return current
+        time.sleep(TASK_PROGRESS_POLL_SECONDS)
+
+
+def stream_task_progress(task_id, kinds, timeout=TASK_PROGRESS_MAX_WAIT_SECONDS):
+    """Server-sent events for a task: one `progress` event per new version, ending when it finishes"""
+    deadline = time.monotonic() + _clamp_wait(timeout)
+    last_version = None
+    last_sent = time.monotonic()
+    try:
+        while time.monotonic() < deadline:
+            current = get_task_progress(task_id, kinds)
+            if current and current['version'] != last_version:
+                last_version = current['version']
+                last_sent = time.monotonic()
+                yield f"id: {current['version']}\nevent: progress\ndata: {json.dumps(current)}\n\n"
+                if current['status'] in TERMINAL_STATUSES:
+                    return
+            elif time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                # Comment line keeps proxies from closing an idle stream
+                last_sent = time.monotonic()
+                yield ": waiting\n\n"
+            time.sleep(TASK_PROGRESS_POLL_SECONDS)
+        yield "event: timeout\ndata: {}\n\n"
+    finally:
+        close_old_connections()
+
+
+def purge_expired_task_progress(now=None):
+    """Delete expired progress rows. Returns the number deleted."""
+    deleted, _ = TaskProgress.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
@@ -1,6 +1,28 @@
-from django.test import TestCase
+from django.test import TestCase, SimpleTestCase
 from rest_framework.test import APIClient
 from .models import Audit, AuditFinding
+from .rbac.cache import RBACPermissionCache
+from .rbac.permission_set import PermissionSet, PERMISSION_FIELDS, MODULE_MASKS
+from .export_cache import export_fingerprint
+from .export_jobs import ExportWorkerPool, cancel_export_job, retry_export_job, parse_priority, submit_export_job
+from .models import ExportTask
+from .notification_outbox import notification_dedupe_key, retry_delay_seconds, NOTIFICATION_RETRY_BASE_SECONDS
+from .logging_service import AuditLogWriter
+from .log_store import add_months, partition_name, decode_log_cursor, encode_log_cursor, InvalidLogCursor
+from .models import GRCLog
+from .incident_inference import AnalysisKind, analysis_cache_key
+from .llm_backend import FakeLLMBackend, FakeLLMError
+from .llm_benchmark import run_benchmark
+from .upload_scanning import basic_scan, EICAR_SIGNATURE, HASH_CHUNK_SIZE
+from .s3_functions import MultipartFileStream
+from .blob_cache import BlobCache
+from . import task_progress
+from .audit_version_store import apply_patch, make_patch, is_snapshot_number
+from .audit_version_head import leading_version_number
+from .audit_summary import (
+    InvalidAuditListQuery, build_audit_list_query, decode_audit_cursor, encode_audit_cursor, findings_status
+)
+from datetime import datetime
 from django.utils import timezone
 
 # Create your tests here.
@@ -84,3 +106,954 @@ class AuditVersioningTests(TestCase):
         # Verify initial version remains unchanged
         response = self.client.get(f'/audits/{self.audit.AuditId}/versions/{initial_version}/')
         self.assertEqual(response.data['findings'], initial_data)
+
+
+class RBACPermissionCacheTests(SimpleTestCase):
+    def test_lru_eviction(self):
+        cache = RBACPermissionCache(max_entries=2, ttl_seconds=60)
+        cache.set(1, 'first')
+        cache.set(2, 'second')
+        cache.get(1)
+        cache.set(3, 'third')
+
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), 'first')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_expired_entry_is_a_miss(self):
+        cache = RBACPermissionCache(max_entries=2, ttl_seconds=0)
+        cache.set(1, 'first')
+
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_invalidate(self):
+        cache = RBACPermissionCache()
+        cache.set('7', 'record')
+        cache.invalidate(7)
+
+        self.assertIsNone(cache.get(7))
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+
+class PermissionSetTests(SimpleTestCase):
+    def test_has_and_module_access(self):
+        permissions = PermissionSet.from_fields(['create_risk', 'view_all_policy'])
+
+        self.assertTrue(permissions.has('create_risk'))
+        self.assertFalse(permissions.has('approve_risk'))
+        self.assertFalse(permissions.has('not_a_permission'))
+        self.assertTrue(permissions.any_of('risk'))
+        self.assertTrue(permissions.any_of('Policy'))
+        self.assertFalse(permissions.any_of('audit'))
+        self.assertTrue(permissions.all_of(['create_risk', 'view_all_policy']))
+        self.assertFalse(permissions.all_of(['create_risk', 'edit_risk']))
+
+    def test_module_masks_cover_every_permission_once(self):
+        combined = 0
+        for mask in MODULE_MASKS.values():
+            self.assertEqual(combined & mask, 0)
+            combined |= mask
+        self.assertEqual(combined, (1 << len(PERMISSION_FIELDS)) - 1)
+
+
+class PermissionMaskBackfillTests(TestCase):
+    def test_backfill_computes_mask_from_the_columns(self):
+        import importlib
+        from types import SimpleNamespace
+        from django.apps import apps
+        from django.db import connection
+        from .models import RBAC, Users
+        from .rbac.permission_set import PERMISSION_COLUMNS, PERMISSION_BITS
+
+        self.assertEqual(PERMISSION_COLUMNS, {field: RBAC._meta.get_field(field).db_column for field in PERMISSION_FIELDS})
+        user = Users.objects.create(UserName='bob', Password='x', Email='bob@example.com')
+        record = RBAC.objects.create(user=user, username='bob', role='Auditor', conduct_audit=True, view_all_risk=True)
+        RBAC.objects.filter(pk=record.pk).update(permission_mask=0)
+
+        migration = importlib.import_module('grc.migrations.0008_rbac_permission_mask')
+        migration.backfill_permission_mask(apps, SimpleNamespace(connection=connection))
+
+        record.refresh_from_db()
+        self.assertEqual(record.permission_mask, PERMISSION_BITS['conduct_audit'] | PERMISSION_BITS['view_all_risk'])
+        self.assertEqual(list(RBAC.objects.get_users_by_module_access('audit')), [record])
+
+
+class RiskKpiBatchTests(SimpleTestCase):
+    def setUp(self):
+        from datetime import date
+        from .risk_kpi import risk_instance_frame
+        self.frame = risk_instance_frame([
+            {'RiskInstanceId': 1, 'RiskStatus': 'Assigned', 'Criticality': 'High',
+             'RiskExposureRating': 10, 'CreatedAt': date(2026, 3, 2)},
+            {'RiskInstanceId': 2, 'RiskStatus': 'Assigned', 'Criticality': 'Critical',
+             'RiskExposureRating': 20, 'CreatedAt': date(2026, 2, 10)},
+            {'RiskInstanceId': 3, 'RiskStatus': 'Approved', 'Criticality': 'Low',
+             'RiskExposureRating': 5, 'CreatedAt': date(2026, 3, 5)},
+        ])
+        self.today = date(2026, 3, 15)
+
+    def test_kpis_share_one_frame(self):
+        from .risk_kpi import compute_risk_kpis
+        results, errors = compute_risk_kpis(
+            ['active_risks_kpi', 'high_criticality_risks', 'risk_exposure_trend'], {}, self.frame, self.today
+        )
+
+        self.assertEqual(errors, {})
+        self.assertEqual(results['active_risks_kpi']['current'], 2)
+        self.assertEqual(results['active_risks_kpi']['months'], ['Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar'])
+        self.assertEqual(results['active_risks_kpi']['trendData'], [0, 0, 0, 0, 1, 1])
+        self.assertEqual(results['high_criticality_risks']['highCount'], 1)
+        self.assertEqual(results['high_criticality_risks']['criticalCount'], 1)
+        self.assertEqual(results['high_criticality_risks']['percentage'], 66.7)
+        self.assertEqual(results['risk_exposure_trend']['trendData'], [0, 0, 0, 0, 20.0, 15.0])
+        self.assertEqual(results['risk_exposure_trend']['current'], 35.0)
+
+    def test_failing_kpi_does_not_affect_the_others(self):
+        from .risk_kpi import compute_risk_kpis
+        results, errors = compute_risk_kpis(
+            ['risk_exposure_trend', 'active_risks_kpi'], {'months': 'six'}, self.frame, self.today
+        )
+        self.assertIn('risk_exposure_trend', errors)
+        self.assertEqual(results['active_risks_kpi']['current'], 2)
+
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        from .models import Users
+        from .user_directory import user_cache
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = Users.objects.create(UserName='alice', Password='x', Email='alice@example.com')
+
+    def test_raw_ids_are_normalized(self):
+        from .user_directory import resolve_users
+        with self.assertNumQueries(1):
+            users = resolve_users([str(self.user.UserId), self.user.UserId, None, 'abc', 99999])
+
+        self.assertEqual(list(users), [self.user.UserId])
+        self.assertEqual(users.get(str(self.user.UserId)).Email, 'alice@example.com')
+        self.assertEqual(users[self.user.UserId].UserName, 'alice')
+        self.assertIn(str(self.user.UserId), users)
+        self.assertIsNone(users.get(None))
+
+    def test_cached_entries_are_invalidated_on_save(self):
+        from .user_directory import resolve_user
+        self.assertEqual(resolve_user(self.user.UserId).Email, 'alice@example.com')
+        with self.assertNumQueries(0):
+            resolve_user(self.user.UserId)
+        self.user.Email = 'alice@corp.example.com'
+        self.user.save()
+        self.assertEqual(resolve_user(self.user.UserId).Email, 'alice@corp.example.com')
+
+
+class ExportFingerprintTests(SimpleTestCase):
+    def test_fingerprint_is_stable(self):
+        watermark = {'row_count': 10, 'max_id': 42, 'max_updated': timezone.now()}
+        first = export_fingerprint('compliance', 'csv', {'item_type': 'policy', 'item_id': 3}, ['A', 'B'], watermark)
+        second = export_fingerprint('compliance', 'csv', {'item_id': 3, 'item_type': 'policy'}, ('A', 'B'), dict(watermark))
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 64)
+
+    def test_fingerprint_changes_with_data_version(self):
+        filters = {'item_type': 'framework', 'item_id': 1}
+        before = export_fingerprint('compliance', 'xlsx', filters, ['A'], {'row_count': 10, 'max_id': 42})
+        after = export_fingerprint('compliance', 'xlsx', filters, ['A'], {'row_count': 11, 'max_id': 43})
+        other_format = export_fingerprint('compliance', 'csv', filters, ['A'], {'row_count': 10, 'max_id': 42})
+
+        self.assertNotEqual(before, after)
+        self.assertNotEqual(before, other_format)
+
+
+class IncidentExportFilterTests(TestCase):
+    def setUp(self):
+        from .models import Incident
+        for n, status in enumerate(['Open', 'Closed']):
+            Incident.objects.create(IncidentTitle=f'Incident {n}', Description='d', Date=datetime(2025, 1, n + 1).date(),
+                                    Time=datetime(2025, 1, 1, 9).time(), Origin='Manual', Status=status)
+
+    def test_filters_select_rows(self):
+        from .incident_export import get_incident_export_rows, incident_export_filters
+        self.assertEqual(len(get_incident_export_rows(incident_export_filters({}))), 2)
+        closed = get_incident_export_rows(incident_export_filters({'status': 'Closed'}))
+        self.assertEqual([row['Status'] for row in closed], ['Closed'])
+
+    def test_empty_selection_exports_nothing(self):
+        from .incident_export import get_incident_export_rows, incident_export_filters
+        for request_data, provided_data in (({'incident_ids': []}, None), ({}, []), ({}, [{'IncidentId': None}])):
+            filters = incident_export_filters(request_data, provided_data)
+            self.assertEqual(filters, {'incident_ids': []})
+            self.assertEqual(get_incident_export_rows(filters), [])
+
+
+class ExportStreamingTests(SimpleTestCase):
+    rows = [
+        {'id': 1, 'name': 'Access review', 'due': datetime(2026, 1, 5).date(), 'owner': None},
+        {'id': 2, 'name': 'Backups, offsite', 'due': None, 'owner': 'ops'},
+        {'id': 3, 'name': 'Patching', 'due': None, 'owner': 'it'},
+    ]
+
+    def encode(self, file_format, rows_per_chunk=2):
+        from .export_streaming import iter_export_chunks
+        chunks = list(iter_export_chunks(iter(self.rows), file_format, rows_per_chunk=rows_per_chunk))
+        return chunks, b''.join(chunks).decode('utf-8')
+
+    def test_rows_are_encoded_in_bounded_chunks(self):
+        import csv
+        import io
+        chunks, text = self.encode('csv')
+        self.assertEqual(len(chunks), 2)
+        parsed = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual([row['name'] for row in parsed], ['Access review', 'Backups, offsite', 'Patching'])
+        self.assertEqual(parsed[0]['due'], '2026-01-05')
+        self.assertEqual(parsed[0]['owner'], '')
+
+    def test_json_and_jsonl_parse(self):
+        import json
+        _, text = self.encode('json')
+        self.assertEqual([row['id'] for row in json.loads(text)], [1, 2, 3])
+        _, text = self.encode('jsonl')
+        self.assertEqual([json.loads(line)['id'] for line in text.splitlines()], [1, 2, 3])
+        from .export_streaming import iter_export_chunks
+        self.assertEqual(b''.join(iter_export_chunks(iter([]), 'json')), b'[]')
+
+    def test_xml_wraps_items(self):
+        import xml.etree.ElementTree as ET
+        _, text = self.encode('xml')
+        root = ET.fromstring(text.encode('utf-8'))
+        self.assertEqual([item.findtext('name') for item in root.findall('item')],
+                         ['Access review', 'Backups, offsite', 'Patching'])
+
+    def test_unsupported_format_is_rejected(self):
+        from .export_streaming import iter_export_chunks
+        with self.assertRaises(ValueError):
+            list(iter_export_chunks(iter(self.rows), 'xlsx'))
+
+
+class ExportWatermarkTests(TestCase):
+    def test_renaming_a_related_row_changes_the_watermark(self):
+        from .export_cache import queryset_watermark
+        from .models import Compliance, Framework, Policy, SubPolicy
+        framework = Framework.objects.create(
+            FrameworkName='ISO', FrameworkDescription='', CreatedByName='a',
+            CreatedByDate=timezone.now().date(), Reviewer='r'
+        )
+        policy = Policy.objects.create(
+            FrameworkId=framework, Status='Approved', PolicyDescription='', PolicyName='Access',
+            StartDate=timezone.now().date()
+        )
+        subpolicy = SubPolicy.objects.create(
+            PolicyId=policy, SubPolicyName='Passwords', CreatedByName='a',
+            CreatedByDate=timezone.now().date(), Identifier='SP1', Description=''
+        )
+        Compliance.objects.create(SubPolicy=subpolicy, ComplianceVersion='1.0')
+        related = ('SubPolicy', 'SubPolicy__SubPolicyName', 'SubPolicy__PolicyId__FrameworkId__FrameworkName')
+
+        before = queryset_watermark(Compliance.objects.all(), 'ComplianceId', 'UpdatedAt', related)
+        self.assertEqual(before, queryset_watermark(Compliance.objects.all(), 'ComplianceId', 'UpdatedAt', related))
+        Framework.objects.filter(pk=framework.pk).update(FrameworkName='ISO 27001')
+        after = queryset_watermark(Compliance.objects.all(), 'ComplianceId', 'UpdatedAt', related)
+
+        self.assertEqual(before['max_updated'], after['max_updated'])
+        self.assertNotEqual(before['related'], after['related'])
+
+
+class NotificationOutboxTests(SimpleTestCase):
+    def test_dedupe_key_ignores_recipient_case(self):
+        first = notification_dedupe_key('email', 'User@Example.com', 'auditReviewed', ['A', 'Audit 1'])
+        second = notification_dedupe_key('email', 'user@example.com ', 'auditReviewed', ['A', 'Audit 1'])
+        other = notification_dedupe_key('email', 'user@example.com', 'auditReviewed', ['A', 'Audit 2'])
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_retry_delay_doubles(self):
+        self.assertEqual(retry_delay_seconds(1), NOTIFICATION_RETRY_BASE_SECONDS)
+        self.assertEqual(retry_delay_seconds(3), NOTIFICATION_RETRY_BASE_SECONDS * 4)
+
+    def test_dispatcher_only_starts_in_serving_processes(self):
+        from .notification_outbox import is_serving_process
+        self.assertTrue(is_serving_process(['/venv/bin/gunicorn', 'backend.wsgi'], {}))
+        self.assertTrue(is_serving_process(['manage.py', 'runserver'], {'RUN_MAIN': 'true'}))
+        self.assertTrue(is_serving_process(['manage.py', 'runserver', '--noreload'], {}))
+        self.assertFalse(is_serving_process(['manage.py', 'runserver'], {}))
+        self.assertFalse(is_serving_process(['manage.py', 'migrate'], {}))
+        self.assertFalse(is_serving_process(['/usr/lib/python3/site-packages/django/__main__.py', 'test'], {}))
+        self.assertFalse(is_serving_process(['/venv/bin/pytest', '-q'], {}))
+        self.assertFalse(is_serving_process(['-c'], {}))
+
+
+class NotificationOutboxClaimTests(TestCase):
+    def queue(self, **fields):
+        from .models import NotificationOutbox
+        return NotificationOutbox.objects.create(
+            notification_type='auditReviewed', channel='email', recipient='user@example.com',
+            email_type='gmail', dedupe_key=f"key-{NotificationOutbox.objects.count()}", **fields
+        )
+
+    def test_expired_claim_is_reclaimed(self):
+        from datetime import timedelta
+        from .notification_outbox import NotificationDispatcher, NOTIFICATION_MAX_ATTEMPTS
+        dispatcher = NotificationDispatcher(batch_size=10)
+        row = self.queue()
+        exhausted = self.queue(status='processing', attempts=NOTIFICATION_MAX_ATTEMPTS,
+                               next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        first = dispatcher.claim_batch()
+        self.assertEqual([r.id for r in first], [row.id])
+        # Still leased: a second dispatcher does not take it
+        self.assertEqual(dispatcher.claim_batch(), [])
+
+        # The dispatcher dies; once the lease runs out the row is claimed again
+        type(row).objects.filter(id=row.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        second = dispatcher.claim_batch()
+        self.assertEqual([(r.id, r.attempts) for r in second], [(row.id, 2)])
+        self.assertNotEqual(second[0].claim_token, first[0].claim_token)
+
+        # A late result of the dead dispatcher's claim is ignored
+        dispatcher._record_result(first[0], {'success': False, 'error': 'late'})
+        second[0].refresh_from_db()
+        self.assertEqual(second[0].status, 'processing')
+
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, 'failed')
+
+
+class AuditLogWriterTests(SimpleTestCase):
+    def make_writer(self, policy):
+        writer = AuditLogWriter(capacity=2, batch_size=10, flush_interval=3600, overflow_policy=policy)
+
+        def stop():
+            writer._buffer.clear()
+            writer.shutdown()
+        self.addCleanup(stop)
+        return writer
+
+    def test_drop_oldest_keeps_newest_entries(self):
+        writer = self.make_writer('drop_oldest')
+        for entry in ('a', 'b', 'c', 'd'):
+            self.assertTrue(writer.submit(entry))
+
+        self.assertEqual(list(writer._buffer), ['c', 'd'])
+        self.assertEqual(writer.stats()['dropped'], 2)
+
+    def test_drop_newest_rejects_entries_when_full(self):
+        writer = self.make_writer('drop_newest')
+        results = [writer.submit(entry) for entry in ('a', 'b', 'c')]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(list(writer._buffer), ['a', 'b'])
+
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            AuditLogWriter(overflow_policy='block')
+
+
+class LogStoreTests(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        log = GRCLog(LogId=42, Timestamp=datetime(2025, 3, 4, 5, 6, 7, 890))
+        self.assertEqual(decode_log_cursor(encode_log_cursor(log)), (log.Timestamp, 42))
+
+    def test_invalid_cursor_is_rejected(self):
+        with self.assertRaises(InvalidLogCursor):
+            decode_log_cursor('not-a-cursor')
+
+    def test_monthly_partition_names(self):
+        self.assertEqual(add_months(datetime(2025, 11, 15), 3), datetime(2026, 2, 1))
+        self.assertEqual(partition_name(datetime(2026, 2, 1)), 'p202602')
+
+
+class PolicyExtractionEngineTests(SimpleTestCase):
+    def setUp(self):
+        import tempfile
+        from .routes.policy_text_extract import PolicyExtractionEngine
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.backend = FakeLLMBackend(latency_seconds=0, jitter_seconds=0, failure_rate=0)
+        self.engine = PolicyExtractionEngine(concurrency=2, cache_dir=self.directory.name, backend=self.backend)
+
+    def test_parse_dynamic_headings(self):
+        from .routes.policy_text_extract import parse_dynamic_headings
+        response = "Sub_policy_id:\nAC-2\n\ncontrol:\na. Manage accounts\nb. Review access\n\nreferences:\n"
+        self.assertEqual(parse_dynamic_headings(response), [
+            ('Sub_policy_id', 'AC-2'),
+            ('control', 'a. Manage accounts\nb. Review access'),
+            ('references', ''),
+        ])
+
+    def test_unchanged_chunks_are_served_from_the_cache(self):
+        first, cached, _ = self.engine.extract('AC-2 Account Management')
+        again, cached_again, _ = self.engine.extract('AC-2 Account Management')
+
+        self.assertFalse(cached)
+        self.assertTrue(cached_again)
+        self.assertEqual(first, again)
+        self.assertEqual(self.backend.stats()['calls'], 1)
+
+    def test_extract_many_keeps_input_order_and_reports_failures(self):
+        from .routes.policy_text_extract import PolicyExtractionEngine
+        outcomes = self.engine.extract_many(['a', 'b', 'c'])
+        self.assertEqual([outcome[3] for outcome in outcomes], [None, None, None])
+        self.assertEqual([outcome[0] for outcome in outcomes], [self.engine.extract(text)[0] for text in 'abc'])
+
+        failing = PolicyExtractionEngine(
+            concurrency=2, cache_dir=self.directory.name + '/failing',
+            backend=FakeLLMBackend(latency_seconds=0, jitter_seconds=0, failure_rate=1),
+        )
+        done = []
+        outcomes = failing.extract_many(['a', 'b', 'c'], on_done=lambda index, outcome: done.append(index))
+        self.assertEqual(sorted(done), [0, 1, 2])
+        self.assertTrue(all(isinstance(outcome[3], FakeLLMError) for outcome in outcomes))
+
+    def test_latency_summary(self):
+        from .routes.policy_text_extract import latency_summary
+        self.assertEqual(latency_summary([]), {'count': 0})
+        summary = latency_summary([0.4, 0.1, 0.2, 0.3])
+        self.assertEqual((summary['count'], summary['p50'], summary['max'], summary['mean']), (4, 0.3, 0.4, 0.25))
+
+
+class IncidentAnalysisCacheKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.kind = AnalysisKind('test', '{incident}', parse=None, fallback=None)
+
+    def test_whitespace_and_case_do_not_change_the_key(self):
+        self.assertEqual(
+            analysis_cache_key(self.kind, {'incident': 'Phishing  email\nreported'}),
+            analysis_cache_key(self.kind, {'incident': 'phishing email reported'}),
+        )
+
+    def test_prompt_version_changes_the_key(self):
+        newer = AnalysisKind('test', '{incident}', parse=None, fallback=None, version='2')
+        self.assertNotEqual(
+            analysis_cache_key(self.kind, {'incident': 'x'}),
+            analysis_cache_key(newer, {'incident': 'x'}),
+        )
+
+
+class IncidentAnalysisPendingTests(SimpleTestCase):
+    def setUp(self):
+        import tempfile
+        from .incident_inference import IncidentInferenceService
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.kind = AnalysisKind('test', '{incident}', parse=lambda response, inputs: {'text': response},
+                                 fallback=lambda inputs: {'text': 'fallback'})
+        self.service = IncidentInferenceService(cache_dir=self.directory.name, backend=FakeLLMBackend(latency_seconds=0))
+        # Keep the job queued instead of running it
+        self.service.start = lambda: None
+
+    def test_other_processes_see_a_queued_analysis_as_pending(self):
+        from .incident_inference import IncidentInferenceService
+        _, status, key = self.service.submit(self.kind, {'incident': 'x'})
+        other_worker = IncidentInferenceService(cache_dir=self.directory.name, backend=FakeLLMBackend(latency_seconds=0))
+
+        self.assertEqual(status, 'pending')
+        self.assertEqual(other_worker.lookup(key), ('pending', None))
+
+    def test_malformed_keys_are_unknown(self):
+        self.assertEqual(self.service.lookup('../../settings'), (None, None))
+        with self.assertRaises(ValueError):
+            self.service._path('../' + 'a' * 61)
+
+
+class FakeLLMBackendTests(SimpleTestCase):
+    def test_canned_responses_parse(self):
+        from .slm_service import SECURITY_ANALYSIS
+        from .incident_slm import COMPREHENSIVE_ANALYSIS
+        backend = FakeLLMBackend(latency_seconds=0)
+        for kind, inputs in ((SECURITY_ANALYSIS, {'incident': 'x'}),
+                             (COMPREHENSIVE_ANALYSIS, {'title': 't', 'description': 'd'})):
+            response = backend.chain(kind.name, kind.prompt, 'model').invoke(inputs)['text']
+            self.assertIsInstance(kind.parse(response, inputs), dict)
+
+    def test_failures_depend_only_on_the_prompt(self):
+        backend = FakeLLMBackend(latency_seconds=0, failure_rate=0.5)
+        chain = backend.chain('security', '{incident}', 'model')
+        inputs = [{'incident': str(n)} for n in range(20)]
+        first = [isinstance(r, FakeLLMError) for r in chain.batch(inputs, return_exceptions=True)]
+        second = [isinstance(r, FakeLLMError) for r in chain.batch(inputs, return_exceptions=True)]
+        self.assertEqual(first, second)
+        self.assertTrue(any(first) and not all(first))
+
+    def test_benchmark_reports_latency_percentiles(self):
+        results = run_benchmark(['policy_extraction'], requests=5, concurrency_levels=(2,),
+                                backend=FakeLLMBackend(latency_seconds=0))
+        self.assertEqual(results[0]['requests'], 5)
+        self.assertEqual(results[0]['model_calls'], 5)
+        self.assertIn('p95', results[0]['latency'])
+
+    def test_benchmark_counts_incident_fallbacks(self):
+        results = run_benchmark(['incident_comprehensive'], requests=10, concurrency_levels=(2,),
+                                backend=FakeLLMBackend(latency_seconds=0, failure_rate=1))
+        self.assertEqual(results[0]['errors'], 0)
+        self.assertEqual(results[0]['fallbacks'], 10)
+        self.assertEqual(results[0]['model_failures'], 10)
+
+
+class UploadBasicScanTests(SimpleTestCase):
+    def scan(self, content, name='evidence.txt'):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'upload.txt')
+            with open(path, 'wb') as f:
+                f.write(content)
+            return basic_scan(path, name)
+
+    def test_clean_file_passes(self):
+        self.assertEqual(self.scan(b'quarterly access review'), (True, None))
+
+    def test_signature_split_across_chunks_is_found(self):
+        content = b'a' * (HASH_CHUNK_SIZE - 10) + EICAR_SIGNATURE
+        clean, reason = self.scan(content)
+        self.assertFalse(clean)
+        self.assertIn('EICAR', reason)
+
+    def test_executable_extension_in_original_name_fails(self):
+        self.assertFalse(self.scan(b'data', name='invoice.pdf.EXE')[0])
+
+    def test_only_final_extension_is_checked(self):
+        for name in ('report.json', 'q1.batch.pdf', 'invoice.exe.pdf'):
+            self.assertEqual(self.scan(b'data', name=name), (True, None), name)
+
+
+class UploadScanVerdictAccessTests(SimpleTestCase):
+    def test_uploader_or_incident_viewer_only(self):
+        from .upload_scanning import can_view_scan_verdict
+        verdict = {'metadata': {'uploader_id': 7}}
+        self.assertTrue(can_view_scan_verdict('7', verdict, False))
+        self.assertFalse(can_view_scan_verdict(8, verdict, False))
+        self.assertTrue(can_view_scan_verdict(8, verdict, True))
+        self.assertFalse(can_view_scan_verdict(8, {'metadata': {}}, False))
+
+
+class KnownGoodScanTests(TestCase):
+    def submit(self, pipeline, directory, name, content=b'evidence'):
+        import hashlib
+        import os
+        quarantine = os.path.join(directory, 'quarantine')
+        os.makedirs(quarantine, exist_ok=True)
+        path = os.path.join(quarantine, f"{len(os.listdir(directory))}-{name}")
+        with open(path, 'wb') as f:
+            f.write(content)
+        verdict, future = pipeline.submit(path, hashlib.sha256(content).hexdigest(), len(content), name, directory)
+        return future.result(timeout=5)
+
+    def test_hash_match_needs_same_scanner_and_policy(self):
+        import tempfile
+        from .upload_scanning import UploadScanPipeline
+        calls = []
+
+        def scanner(path, name):
+            calls.append(name)
+            return True, None
+
+        basic = UploadScanPipeline(workers=1, queue_size=1, scanner=scanner, scanner_name='basic')
+        clamav = UploadScanPipeline(workers=1, queue_size=1, scanner=scanner, scanner_name='clamav')
+        # A saturated queue makes every scan run inline, inside the test transaction
+        basic._slots.acquire()
+        clamav._slots.acquire()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                self.assertEqual(self.submit(basic, directory, 'a.txt')['status'], 'clean')
+                # A clean basic verdict does not stand in for a ClamAV scan
+                self.assertEqual(self.submit(clamav, directory, 'b.txt')['scanner'], 'clamav')
+                self.assertEqual(calls, ['a.txt', 'b.txt'])
+
+                reused = self.submit(clamav, directory, 'c.txt')
+                self.assertEqual((reused['status'], calls), ('clean', ['a.txt', 'b.txt']))
+                self.assertIn('matches clean scan', reused['reason'])
+                # The name policy still applies to content that is known to be clean
+                self.assertEqual(self.submit(clamav, directory, 'd.exe')['status'], 'infected')
+        finally:
+            basic.shutdown()
+            clamav.shutdown()
+
+
+class MultipartFileStreamTests(SimpleTestCase):
+    def test_streamed_body_is_valid_multipart(self):
+        import os
+        import tempfile
+        from email import policy
+        from email.parser import BytesParser
+
+        content = os.urandom(50000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'evidence.png')
+            with open(path, 'wb') as f:
+                f.write(content)
+            with MultipartFileStream({'userId': 7, 'audit_id': None}, 'file', 'evidence.png', path, 'image/png') as body:
+                chunks = []
+                while True:
+                    chunk = body.read(8192)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                raw = b''.join(chunks)
+                self.assertEqual(len(raw), len(body))
+                header = f"Content-Type: {body.content_type}\r\n\r\n".encode()
+
+        parts = list(BytesParser(policy=policy.HTTP).parsebytes(header + raw).iter_parts())
+        self.assertEqual([p.get_param('name', header='content-disposition') for p in parts], ['userId', 'file'])
+        self.assertEqual(parts[1].get_payload(decode=True), content)
+
+
+class S3UploadDedupTests(TestCase):
+    def setUp(self):
+        from .models import S3File
+        from .s3_functions import S3Client
+        self.client_s3 = S3Client()
+        self.existing = S3File.objects.create(
+            url='https://bucket/report.pdf', file_type='pdf', file_name='report.pdf',
+            user_id='7', content_sha256='ab' * 32,
+        )
+
+    def test_same_user_reuses_upload(self):
+        reused = self.client_s3._reuse_upload('ab' * 32, 7, {'documentType': 'general'})
+        self.assertEqual(reused['file']['id'], self.existing.id)
+
+    def test_other_users_upload_is_not_reused(self):
+        self.assertIsNone(self.client_s3._reuse_upload('ab' * 32, 8, {'documentType': 'general'}))
+        self.assertIsNone(self.client_s3._reuse_upload('ab' * 32, 'default-user', {'documentType': 'general'}))
+
+    def test_evidence_only_links_into_allowed_storage(self):
+        params = {'documentType': 'evidence', 'compliance_id': 1, 'table_name': 'users', 'storage_column': 'Password'}
+        self.assertFalse(self.client_s3._link_evidence(self.existing.url, params))
+
+
+class FrameworkTocTests(SimpleTestCase):
+    def test_parse_toc(self):
+        from .routes.final_adithya import parse_toc
+        toc = parse_toc("Table of Contents\n1 Introduction .... 5\n  1.2 Scope 7\nAppendix A 40\nNo page number here")
+        self.assertEqual(toc, [
+            {'Section': '1', 'Section Name': 'Introduction', 'Page Number': 5},
+            {'Section': '1.2', 'Section Name': 'Scope', 'Page Number': 7},
+            {'Section': '', 'Section Name': 'Appendix A', 'Page Number': 40},
+        ])
+
+    def test_build_section_metadata_keeps_repeated_titles_apart(self):
+        import tempfile
+        from .routes.final_adithya import build_section_metadata, section_key
+        toc = [
+            {'Section': '', 'Section Name': 'Overview', 'Page Number': 9},
+            {'Section': '', 'Section Name': 'Overview', 'Page Number': 3},
+            {'Section': '2', 'Section Name': 'Access/Control', 'Page Number': 5},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            sections = build_section_metadata(toc, 2, 20, directory)
+
+        self.assertEqual([(s['folder_name'], s['start_page'], s['end_page']) for s in sections], [
+            ('Overview', 4, 6), ('2 Access-Control', 6, 10), ('Overview', 10, 21),
+        ])
+        self.assertEqual(len({section_key(s) for s in sections}), 3)
+
+    def test_fallback_runs_sections_with_a_repeated_title(self):
+        from concurrent.futures import Future
+        from unittest import mock
+        from .routes import final_adithya
+
+        class BrokenPool:
+            """Completes the first section, then the pool dies"""
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def submit(self, fn, *args):
+                future = Future()
+                future.set_result(fn(*args))
+                return future
+
+        def first_then_fail(futures):
+            yield futures[0]
+            raise RuntimeError('worker died')
+
+        sections = [
+            {'folder_name': 'Overview', 'start_page': 4, 'end_page': 6},
+            {'folder_name': 'Overview', 'start_page': 10, 'end_page': 21},
+        ]
+        with mock.patch.object(final_adithya, 'extract_section',
+                               side_effect=lambda path, meta: {**meta, 'chunks': 1, 'error': None}), \
+                mock.patch.object(final_adithya, 'ProcessPoolExecutor', BrokenPool), \
+                mock.patch.object(final_adithya, 'as_completed', first_then_fail):
+            results = final_adithya.extract_sections_parallel('doc.pdf', sections, max_workers=2)
+        self.assertEqual(sorted(r['start_page'] for r in results), [4, 10])
+
+
+class BlobCacheTests(SimpleTestCase):
+    def test_least_recently_used_blob_is_evicted(self):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = BlobCache(os.path.join(directory, 'cache'), max_bytes=250)
+            hashes = []
+            for n, content in enumerate([b'a' * 100, b'b' * 100, b'c' * 100]):
+                path = os.path.join(directory, f'file{n}')
+                with open(path, 'wb') as f:
+                    f.write(content)
+                hashes.append(cache.put_file(path))
+                cache.set_ref(n, hashes[-1], f'file{n}')
+                # The first blob was used after the second, so the second goes first
+                os.utime(cache.blob_path(hashes[-1]), (n, n))
+                if n == 1:
+                    cache.get(hashes[0])
+
+            self.assertIsNone(cache.get(hashes[1]))
+            self.assertIsNone(cache.ref(1))
+            self.assertEqual(cache.ref(0), (hashes[0], 'file0'))
+            destination = os.path.join(directory, 'copy')
+            self.assertEqual(cache.copy_to(hashes[2], destination), destination)
+            with open(destination, 'rb') as f:
+                self.assertEqual(f.read(), b'c' * 100)
+
+
+class MaterializeAuditFindingsTests(SimpleTestCase):
+    def test_findings_are_inserted_in_multi_row_chunks(self):
+        from types import SimpleNamespace
+        from unittest import mock
+        from .assign_audit import materialize_audit_findings, AUDIT_FINDING_INSERT_COLUMNS
+
+        audits = [SimpleNamespace(AuditId=n, Auditor_id=10 + n, AssignedDate=None) for n in (1, 2)]
+        cursor = mock.MagicMock()
+        with mock.patch('grc.assign_audit.connection') as connection:
+            connection.cursor.return_value.__enter__.return_value = cursor
+            created = materialize_audit_findings(audits, [101, 102, 103], chunk_size=4)
+
+        self.assertEqual(created, 6)
+        chunk_rows = [len(params) // len(AUDIT_FINDING_INSERT_COLUMNS) for _, params in
+                      (call.args for call in cursor.execute.call_args_list)]
+        self.assertEqual(chunk_rows, [4, 2])
+        last_params = cursor.execute.call_args_list[-1].args[1]
+        self.assertEqual(last_params[:3], [2, 102, 12])
+
+
+class PlanFindingUpdatesTests(SimpleTestCase):
+    def test_only_changed_rows_are_written_and_stale_rows_conflict(self):
+        from types import SimpleNamespace
+        from .assign_audit import plan_finding_updates, validate_finding_updates
+
+        def finding(finding_id, check):
+            return SimpleNamespace(AuditFindingsId=finding_id, Check=check, Evidence='', Comments='', MajorMinor=None)
+
+        findings_by_id = {1: finding(1, '2'), 2: finding(2, '1'), 3: finding(3, '1')}
+        updates, errors = validate_finding_updates([
+            {'finding_id': 1, 'check': 1},
+            {'finding_id': '2', 'check': '1'},
+            {'finding_id': 3, 'check': '0', 'expected': {'check': '2'}},
+        ])
+        self.assertEqual(errors, [])
+
+        changed, fields, conflicts = plan_finding_updates(findings_by_id, updates)
+        self.assertEqual([f.AuditFindingsId for f in changed], [1])
+        self.assertEqual(findings_by_id[1].Check, '1')
+        self.assertEqual(fields, {'Check'})
+        self.assertEqual([c['finding_id'] for c in conflicts], [3])
+
+
+class AuditVersionPatchTests(SimpleTestCase):
+    def test_patch_round_trip(self):
+        source = {
+            '12': {'Check': '0', 'flag': 1, 'Comments': ''},
+            '13': {'Check': '1'},
+            'a/b~c': [1, 2],
+            '__metadata__': {'auditor_id': 4},
+        }
+        target = {
+            '12': {'Check': '2', 'flag': True, 'Comments': 'Evidence reviewed'},
+            'a/b~c': [1, 2, 3],
+            '14': {'Check': '0'},
+            '__metadata__': {'auditor_id': 4},
+        }
+        patch = make_patch(source, target)
+        self.assertEqual(apply_patch(source, patch), target)
+        self.assertIs(apply_patch(source, patch)['12']['flag'], True)
+        self.assertEqual(source['12']['Check'], '0')
+        self.assertEqual(make_patch(target, target), [])
+
+    def test_snapshot_numbers(self):
+        self.assertEqual([n for n in range(1, 25) if is_snapshot_number(n)], [1, 11, 21])
+
+    def test_delta_is_counted_after_applying_its_patch(self):
+        import json
+        from .audit_version_store import DELTA_KEY, canonical_sha256, extracted_info_length
+
+        base = {'12': {'Check': '0'}, '__metadata__': {}}
+        target = {'12': {'Check': '2'}, '13': {'Check': '0'}, '14': {'Check': '1'}, '__metadata__': {}}
+        delta = {DELTA_KEY: {'base': 'A1', 'base_sha256': canonical_sha256(base), 'patch': make_patch(base, target)}}
+
+        class SnapshotCursor:
+            def execute(self, sql, params):
+                self.params = params
+
+            def fetchone(self):
+                return [json.dumps(base)] if self.params == [5, 'A1'] else None
+
+        self.assertEqual(extracted_info_length(5, json.dumps(delta), SnapshotCursor()), len(target))
+        self.assertEqual(extracted_info_length(5, json.dumps(base), SnapshotCursor()), len(base))
+
+
+class AuditVersionHeadTests(SimpleTestCase):
+    def test_leading_version_number(self):
+        self.assertEqual(leading_version_number('A12'), 12)
+        self.assertEqual(leading_version_number('R3_101502'), 3)
+        self.assertIsNone(leading_version_number('B2'))
+        self.assertIsNone(leading_version_number(None))
+
+
+class AuditListQueryTests(SimpleTestCase):
+    def test_findings_status(self):
+        self.assertEqual(findings_status(0, 0), 'Yet to Start')
+        self.assertEqual(findings_status(3, 3), 'Completed')
+        self.assertEqual(findings_status(3, 1), 'Work In progress')
+
+    def test_cursor_round_trip(self):
+        cursor = encode_audit_cursor(datetime(2025, 3, 1).date(), 42)
+        self.assertEqual(decode_audit_cursor(cursor), ('2025-03-01', 42))
+        with self.assertRaises(InvalidAuditListQuery):
+            decode_audit_cursor('not-a-cursor')
+
+    def test_keyset_condition_follows_order(self):
+        cursor = encode_audit_cursor('Completed', 7)
+        sql, params, sort_key = build_audit_list_query(
+            {'sort': 'status', 'order': 'asc', 'audit_type': 'Internal,E'}, cursor, 10
+        )
+        self.assertEqual(sort_key, 'status')
+        self.assertIn("a.AuditId > %s", sql)
+        self.assertEqual(params, ['I', 'E', 'Completed', 'Completed', 7, 11])
+        with self.assertRaises(InvalidAuditListQuery):
+            build_audit_list_query({'sort': 'title'})
+
+    def test_search_and_due_dates(self):
+        sql, params, _ = build_audit_list_query({'search': '100%_a!', 'due_from': '2025-01-31'})
+        self.assertIn("a.Title LIKE %s ESCAPE '!'", sql)
+        self.assertEqual(params[0], datetime(2025, 1, 31).date())
+        self.assertEqual(params[1:5], ['%100!%!_a!!%'] * 4)
+        for bad in ({'due_from': '31/01/2025'}, {'due_to': '2025-02-30'}):
+            with self.assertRaises(InvalidAuditListQuery):
+                build_audit_list_query(bad)
+
+    def test_findings_changed_refreshes_summary_and_rollups(self):
+        from unittest import mock
+        from . import audit_summary
+        with mock.patch.object(audit_summary, 'refresh_findings_summaries', return_value={}) as summaries, \
+                mock.patch.object(audit_summary, 'refresh_audit_rollups') as rollups:
+            audit_summary.findings_changed(['4', 2, None, 4])
+        summaries.assert_called_once_with([2, 4])
+        self.assertEqual([c.args for c in rollups.call_args_list], [(2,), (4,)])
+
+
+class TaskProgressWaitTests(SimpleTestCase):
+    def progress(self, version, status='running'):
+        return {'task_id': 't', 'progress': 50, 'message': '', 'status': status, 'version': version, 'timestamp': 0}
+
+    def test_parse_wait_seconds(self):
+        self.assertEqual(task_progress.parse_wait_seconds(None), 0)
+        self.assertEqual(task_progress.parse_wait_seconds('-5'), 0)
+        self.assertEqual(task_progress.parse_wait_seconds('2.5'), 2.5)
+        self.assertEqual(task_progress.parse_wait_seconds('1e9'), task_progress.TASK_PROGRESS_MAX_WAIT_SECONDS)
+        for value in ('nan', 'inf', '-inf', 'soon'):
+            with self.assertRaises(task_progress.InvalidTaskProgressQuery):
+                task_progress.parse_wait_seconds(value)
+        self.assertIsNone(task_progress.parse_since_version(''))
+        with self.assertRaises(task_progress.InvalidTaskProgressQuery):
+            task_progress.parse_since_version('1.5')
+
+    def test_long_poll_returns_newer_version(self):
+        from unittest import mock
+        versions = iter([self.progress(3), self.progress(3), self.progress(4)])
+        with mock.patch.object(task_progress, 'get_task_progress', side_effect=lambda *args: next(versions)), \
+                mock.patch.object(task_progress, 'TASK_PROGRESS_POLL_SECONDS', 0):
+            result = task_progress.wait_for_task_progress('t', ['framework'], since=3, timeout=5)
+        self.assertEqual(result['version'], 4)
+
+    def test_long_poll_gives_up_on_nan_timeout(self):
+        from unittest import mock
+        with mock.patch.object(task_progress, 'get_task_progress', return_value=self.progress(3)), \
+                mock.patch.object(task_progress, 'TASK_PROGRESS_POLL_SECONDS', 0):
+            result = task_progress.wait_for_task_progress('t', ['framework'], since=3, timeout=float('nan'))
+        self.assertEqual(result['version'], 3)
+
+    def test_stream_ends_on_terminal_status(self):
+        from unittest import mock
+        versions = iter([self.progress(1), self.progress(1), self.progress(2, 'completed')])
+        with mock.patch.object(task_progress, 'get_task_progress', side_effect=lambda *args: next(versions)), \
+                mock.patch.object(task_progress, 'TASK_PROGRESS_POLL_SECONDS', 0), \
+                mock.patch.object(task_progress, 'close_old_connections'):
+            events = list(task_progress.stream_task_progress('t', ['framework']))
+        self.assertEqual([event.split('\n')[0] for event in events], ['id: 1', 'id: 2'])
+        self.assertIn('"status": "completed"', events[-1])
+
+    def test_stream_times_out(self):
+        from unittest import mock
+        with mock.patch.object(task_progress, 'get_task_progress', return_value=None), \
+                mock.patch.object(task_progress, 'TASK_PROGRESS_POLL_SECONDS', 0), \
+                mock.patch.object(task_progress, 'close_old_connections'):
+            events = list(task_progress.stream_task_progress('t', ['framework'], timeout=float('nan')))
+        self.assertEqual(events, ["event: timeout\ndata: {}\n\n"])
+
+
+class ExportJobQueueTests(TestCase):
+    def queue(self, user_id, priority=0):
+        return submit_export_job('compliance', user_id, 'csv', params={}, priority=priority)
+
+    def test_parse_priority_is_clamped(self):
+        self.assertEqual(parse_priority('high'), 10)
+        self.assertEqual(parse_priority('1000000'), 10)
+        self.assertEqual(parse_priority(-50), -10)
+        self.assertEqual(parse_priority('urgent'), 0)
+
+    def test_claim_respects_priority_and_user_limit(self):
+        pool = ExportWorkerPool(worker_count=1, max_jobs_per_user=1)
+        first = self.queue('7')
+        second = self.queue('7', priority=10)
+        other = self.queue('8')
+
+        self.assertEqual(pool.claim_next_job().id, second.id)
+        # User 7 is at the limit, so user 8's job goes next
+        self.assertEqual(pool.claim_next_job().id, other.id)
+        self.assertIsNone(pool.claim_next_job())
+
+        ExportTask.objects.filter(id=second.id).update(status='completed')
+        claimed = pool.claim_next_job()
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual((claimed.status, claimed.attempts), ('processing', 1))
+
+    def test_cancel_and_retry_are_scoped_to_the_owner(self):
+        task = self.queue('7')
+        self.assertIsNone(cancel_export_job(task.id, '8'))
+        self.assertEqual(cancel_export_job(task.id, '7').status, 'cancelled')
+
+        with self.assertRaises(ExportTask.DoesNotExist):
+            retry_export_job(task.id, '8')
+        retried = retry_export_job(task.id, '7')
+        self.assertEqual((retried.status, retried.cancel_requested), ('queued', False))
+        with self.assertRaises(ValueError):
+            retry_export_job(task.id, '7')
+
+    def test_cancel_running_job_requests_stop(self):
+        task = self.queue('7')
+        ExportWorkerPool(worker_count=1).claim_next_job()
+        cancelled = cancel_export_job(task.id, '7')
+        self.assertEqual((cancelled.status, cancelled.cancel_requested), ('processing', True))
+
+    def test_job_endpoints_hide_other_users_jobs(self):
+        from .export_job_views import export_job_status, list_export_jobs
+        from rest_framework.test import APIRequestFactory
+        task = self.queue('7')
+        factory = APIRequestFactory()
+
+        def get(view, user_id, *args):
+            request = factory.get('/export-jobs/')
+            request.session = {'user_id': user_id} if user_id else {}
+            return view(request, *args)
+
+        self.assertEqual(get(list_export_jobs, None).status_code, 403)
+        self.assertEqual(get(list_export_jobs, 8).data['jobs'], [])
+        self.assertEqual(get(export_job_status, 8, task.id).status_code, 404)
+        self.assertEqual(get(export_job_status, 7, task.id).data['task_id'], task.id)
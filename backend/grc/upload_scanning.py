@@ -0,0 +1,283 @@
+"""
+Quarantine and malware-scan pipeline for uploaded files
+
+Uploads are written to the quarantine directory first, hashing the content
+with SHA-256 while the chunks stream to disk. UploadScanPipeline then records
+a FileScanVerdict and scans the file on a bounded pool of worker threads:
+
+- content whose SHA-256 already has a clean verdict from the same scanner
+  is not scanned again; the size and file name policy still applies
+- a clean file is moved from quarantine to the upload directory and handed to
+  the on_clean callback (e.g. the S3 upload)
+- an infected file, or one the scanner failed on, stays in quarantine
+
+At most UPLOAD_SCAN_QUEUE_SIZE scans wait for or occupy a worker; beyond that
+the upload is scanned in the calling thread, so a burst of uploads slows down
+instead of piling up threads. Verdicts stay in file_scan_verdicts and can be
+queried by scan id or hash.
+
+Settings:
+    UPLOAD_SCAN_WORKERS       - concurrent scans per process (default 4)
+    UPLOAD_SCAN_QUEUE_SIZE    - scans queued or running before callers scan themselves (default 100)
+    UPLOAD_SCAN_WAIT_SECONDS  - how long an upload request waits for its verdict (default 20)
+    UPLOAD_SCAN_ENGINE        - 'basic' or 'clamav' (default 'basic')
+    UPLOAD_SCAN_MAX_FILE_SIZE - larger files fail the scan (default 10MB)
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import FileScanVerdict
+
+UPLOAD_SCAN_WORKERS = getattr(settings, 'UPLOAD_SCAN_WORKERS', 4)
+UPLOAD_SCAN_QUEUE_SIZE = getattr(settings, 'UPLOAD_SCAN_QUEUE_SIZE', 100)
+UPLOAD_SCAN_WAIT_SECONDS = getattr(settings, 'UPLOAD_SCAN_WAIT_SECONDS', 20)
+UPLOAD_SCAN_ENGINE = getattr(settings, 'UPLOAD_SCAN_ENGINE', 'basic')
+UPLOAD_SCAN_MAX_FILE_SIZE = getattr(settings, 'UPLOAD_SCAN_MAX_FILE_SIZE', 10 * 1024 * 1024)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+CLAMAV_TIMEOUT_SECONDS = 30
+
+# Standard anti-virus test file, detected by the basic scanner
+EICAR_SIGNATURE = b'X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*'
+SUSPICIOUS_EXTENSIONS = ['.exe', '.bat', '.cmd', '.scr', '.vbs', '.js']
+
+
+def quarantine_upload(uploaded_file, quarantine_dir, stored_filename):
+    """
+    Stream a Django UploadedFile into quarantine, hashing it on the way.
+    Returns (path, sha256, size).
+    """
+    path = os.path.join(quarantine_dir, stored_filename)
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in uploaded_file.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+    os.chmod(path, 0o644)
+    return path, digest.hexdigest(), size
+
+
+def policy_check(path, original_filename=None):
+    """Size and file extension checks, no content is read. Returns (clean, reason)."""
+    if not os.path.exists(path):
+        return False, "File not found for scanning"
+    size = os.path.getsize(path)
+    if size > UPLOAD_SCAN_MAX_FILE_SIZE:
+        return False, f"File too large: {size} bytes"
+
+    # Only the final extension decides; report.json or q1.batch.pdf are fine
+    names = {os.path.basename(path), original_filename or ''}
+    for name in names:
+        extension = os.path.splitext(name.strip().lower())[1]
+        if extension in SUSPICIOUS_EXTENSIONS:
+            return False, f"Suspicious file extension: {extension}"
+    return True, None
+
+
+def basic_scan(path, original_filename=None):
+    """Policy and signature checks, reading the file in chunks. Returns (clean, reason)."""
+    clean, reason = policy_check(path, original_filename)
+    if not clean:
+        return clean, reason
+
+    # Keep the tail of the previous chunk so a signature across a boundary is found
+    overlap = len(EICAR_SIGNATURE) - 1
+    tail = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            if EICAR_SIGNATURE in tail + chunk:
+                return False, "Malware signature detected: EICAR test file"
+            tail = chunk[-overlap:]
+    return True, None
+
+
+def clamav_scan(path, original_filename=None):
+    """Scan with clamscan, falling back to basic_scan where ClamAV is not installed. Returns (clean, reason)."""
+    try:
+        # Arguments are passed as a list, never through a shell
+        result = subprocess.run(
+            ['clamscan', '--no-summary', path],
+            capture_output=True,
+            text=True,
+            timeout=CLAMAV_TIMEOUT_SECONDS,
+            check=False
+        )
+    except FileNotFoundError:
+        print("[SECURITY] ClamAV not found, falling back to basic scan")
+        return basic_scan(path, original_filename)
+    except subprocess.TimeoutExpired:
+        return False, "ClamAV scan timed out"
+
+    # ClamAV returns 0 for clean files, 1 for infected files
+    if result.returncode == 0:
+        return True, None
+    if result.returncode == 1:
+        return False, f"ClamAV: {result.stdout.strip()}"
+    return False, f"ClamAV error: {result.stderr.strip() or result.returncode}"
+
+
+SCAN_ENGINES = {
+    'basic': basic_scan,
+    'clamav': clamav_scan,
+}
+
+
+def verdict_as_dict(verdict):
+    return {
+        'scan_id': verdict.scan_id,
+        'status': verdict.status,
+        'reason': verdict.reason,
+        'scanner': verdict.scanner,
+        'sha256': verdict.sha256,
+        'original_filename': verdict.original_filename,
+        'stored_filename': verdict.stored_filename,
+        'file_size': verdict.file_size,
+        'metadata': verdict.metadata,
+        'created_at': verdict.created_at.isoformat() if verdict.created_at else None,
+        'scanned_at': verdict.scanned_at.isoformat() if verdict.scanned_at else None,
+    }
+
+
+class UploadScanPipeline:
+    def __init__(self, workers=UPLOAD_SCAN_WORKERS, queue_size=UPLOAD_SCAN_QUEUE_SIZE, scanner=None, scanner_name=None):
+        self.scanner = scanner or SCAN_ENGINES[UPLOAD_SCAN_ENGINE]
+        self.scanner_name = scanner_name or (UPLOAD_SCAN_ENGINE if scanner is None else 'custom')
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="upload-scan")
+        self._slots = threading.BoundedSemaphore(max(1, queue_size))
+        self.pid = os.getpid()
+
+    def submit(self, quarantine_path, sha256, size, original_filename, upload_dir, metadata=None, on_clean=None):
+        """
+        Record a pending verdict for a quarantined file and scan it.
+        Returns (verdict, future); the future resolves to the final verdict dict.
+        on_clean(promoted_path) runs after a clean file leaves quarantine; its
+        return value is stored under metadata['delivery'].
+        """
+        verdict = FileScanVerdict.objects.create(
+            scan_id=uuid.uuid4().hex,
+            sha256=sha256,
+            original_filename=original_filename[:255],
+            stored_filename=os.path.basename(quarantine_path),
+            file_size=size,
+            metadata=metadata or {},
+        )
+        job = (verdict, quarantine_path, upload_dir, on_clean)
+
+        # Only a clean verdict of the engine this pipeline would use counts
+        known_good = (
+            FileScanVerdict.objects.filter(sha256=sha256, status='clean', scanner=self.scanner_name)
+            .exclude(scan_id=verdict.scan_id).values_list('scan_id', flat=True).first()
+        )
+        if known_good:
+            return verdict, self._completed(self._process, *job, known_good=known_good)
+
+        if not self._slots.acquire(blocking=False):
+            # Pipeline saturated: scan in the caller instead of queueing without bound
+            print(f"[SECURITY] Scan queue full, scanning {verdict.scan_id} inline")
+            return verdict, self._completed(self._process, *job)
+
+        try:
+            future = self._executor.submit(self._run_queued, *job)
+        except RuntimeError:
+            self._slots.release()
+            raise
+        return verdict, future
+
+    def _completed(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _run_queued(self, verdict, quarantine_path, upload_dir, on_clean):
+        try:
+            close_old_connections()
+            return self._process(verdict, quarantine_path, upload_dir, on_clean)
+        finally:
+            self._slots.release()
+            close_old_connections()
+
+    def _process(self, verdict, quarantine_path, upload_dir, on_clean, known_good=None):
+        scanner = self.scanner_name
+        try:
+            if known_good:
+                clean, reason = policy_check(quarantine_path, verdict.original_filename)
+                if clean:
+                    reason = f"Content matches clean scan {known_good}"
+            else:
+                clean, reason = self.scanner(quarantine_path, verdict.original_filename)
+        except Exception as e:
+            print(f"[SECURITY] Malware scan error for {quarantine_path}: {e}")
+            clean, reason = None, f"Scan error: {e}"
+
+        verdict.scanner = scanner
+        verdict.reason = reason
+        verdict.scanned_at = timezone.now()
+        if not clean:
+            # Infected or unscannable files stay in quarantine
+            verdict.status = 'infected' if clean is False else 'error'
+            verdict.save(update_fields=['status', 'reason', 'scanner', 'scanned_at'])
+            print(f"[SECURITY] File kept in quarantine ({verdict.status}): {quarantine_path} - {reason}")
+            return verdict_as_dict(verdict)
+
+        promoted_path = os.path.join(upload_dir, verdict.stored_filename)
+        os.replace(quarantine_path, promoted_path)
+        verdict.status = 'clean'
+        verdict.save(update_fields=['status', 'reason', 'scanner', 'scanned_at'])
+        print(f"[SECURITY] File passed scan ({scanner}) and was promoted: {promoted_path}")
+
+        if on_clean:
+            try:
+                verdict.metadata = {**(verdict.metadata or {}), 'delivery': on_clean(promoted_path)}
+            except Exception as e:
+                print(f"[SECURITY] Delivery of scanned file failed: {e}")
+                verdict.metadata = {**(verdict.metadata or {}), 'delivery_error': str(e)}
+            verdict.save(update_fields=['metadata'])
+        return verdict_as_dict(verdict)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_scan_pipeline():
+    """The process-wide scan pipeline; a forked worker gets its own pool"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None or _pipeline.pid != os.getpid():
+            _pipeline = UploadScanPipeline()
+        return _pipeline
+
+
+def get_verdict(scan_id):
+    verdict = FileScanVerdict.objects.filter(scan_id=scan_id).first()
+    return verdict_as_dict(verdict) if verdict else None
+
+
+def can_view_scan_verdict(user_id, verdict, may_view_incidents):
+    """The uploader sees their own verdicts; users with incident view permission see all"""
+    uploader_id = (verdict.get('metadata') or {}).get('uploader_id')
+    return may_view_incidents or (uploader_id is not None and str(uploader_id) == str(user_id))
+
+
+def verdicts_for_hash(sha256):
+    return [verdict_as_dict(v) for v in FileScanVerdict.objects.filter(sha256=sha256).order_by('-created_at')]
@@ -6,6 +6,7 @@ from rest_framework.routers import DefaultRouter
 from .incident_views import create_workflow, create_incident_from_audit_finding
 from .incident_views import FileUploadView
 from . import compliance_views
+from . import export_job_views
 from . import views
 
 
@@ -99,6 +100,7 @@ from .routes.policy import (
 from .routes.upload_framework import (
     upload_framework_file, 
     get_processing_status, 
+    stream_processing_status,
     get_sections, 
     update_section, 
     create_checked_structure,
@@ -151,6 +153,7 @@ from .routes.policy_version import (
 )
 from django.urls import path, include
 from . import risk_views
+from . import risk_kpi
 from rest_framework.routers import DefaultRouter
 from .risk_views import RiskViewSet, IncidentViewSet, ComplianceViewSet, RiskInstanceViewSet
 from .routes import previous_version
@@ -210,6 +213,7 @@ risk_urlpatterns = [
     path('compliances-for-dropdown/', risk_views.get_all_compliances_for_dropdown, name='compliances-for-dropdown'),
     path('users-for-dropdown/', risk_views.get_users_for_dropdown, name='users-for-dropdown'),
     path('analyze-incident/', risk_views.analyze_incident, name='analyze-incident'),
+    path('analyze-incident/<str:analysis_key>/', risk_views.incident_analysis_result, name='incident-analysis-result'),
 ]
 
 # Risk reviewer URLs
@@ -243,6 +247,7 @@ log_urlpatterns = [
 # Risk KPI URLs
 risk_kpi_urlpatterns = [
     path('risk/kpi-data/', risk_views.risk_kpi_data, name='risk_kpi_data'),
+    path('risk/kpi-batch/', risk_kpi.risk_kpi_batch, name='risk_kpi_batch'),
     path('risk/active-risks-kpi/', risk_views.active_risks_kpi, name='active_risks_kpi'),
     path('risk/exposure-trend/', risk_views.risk_exposure_trend, name='risk_exposure_trend'),
     path('risk/reduction-trend/', risk_views.risk_reduction_trend, name='risk_reduction_trend'),
@@ -310,6 +315,7 @@ urlpatterns = [
     path('api/debug-permissions/', rbac_views.debug_user_permissions, name='api-debug-permissions'),
     path('api/debug-rbac-data/', rbac_views.debug_rbac_data, name='api-debug-rbac-data'),
     path('api/debug-auth-status/', rbac_views.debug_auth_status, name='api-debug-auth-status'),
+    path('api/rbac-cache-stats/', rbac_views.rbac_cache_stats, name='api-rbac-cache-stats'),
     path('api/debug-user-permissions/', incident_views.debug_user_permissions_endpoint, name='api-debug-user-permissions'),
     path('api/test-user-permissions/', incident_views.test_user_permissions_comprehensive, name='api-test-user-permissions'),
     
@@ -417,6 +423,8 @@ urlpatterns = [
     path('api/test-logging/', incident_views.test_logging, name='test-logging'),
     path('upload-incident-file/', FileUploadView.as_view(), name='upload-file'),
     path('upload-file/', FileUploadView.as_view(), name='api-upload-file'),
+    path('upload-scans/', incident_views.list_upload_scan_verdicts, name='upload-scan-verdicts'),
+    path('upload-scans/<str:scan_id>/', incident_views.get_upload_scan_verdict, name='upload-scan-verdict'),
     
     # Category and Business Unit endpoints
     path('categories/', incident_views.get_categories, name='get-categories'),
@@ -594,6 +602,12 @@ urlpatterns = [
     path('api/compliance/export/all-compliances/<str:export_format>/',
          compliance_views.export_compliances,
          name='export-all-compliances-legacy'),
+
+    # Background export jobs (export endpoints called with async=true)
+    path('export-jobs/', export_job_views.list_export_jobs, name='list-export-jobs'),
+    path('export-jobs/<int:task_id>/', export_job_views.export_job_status, name='export-job-status'),
+    path('export-jobs/<int:task_id>/cancel/', export_job_views.cancel_export_job_view, name='cancel-export-job'),
+    path('export-jobs/<int:task_id>/retry/', export_job_views.retry_export_job_view, name='retry-export-job'),
    
     path('compliances/framework/<int:framework_id>/', compliance_views.get_framework_compliances, name='get-framework-compliances'),
     path('compliances/policy/<int:policy_id>/', compliance_views.get_policy_compliances, name='get-policy-compliances'),
@@ -827,6 +841,7 @@ urlpatterns = [
     path('upload-framework/', upload_framework_file, name='upload-framework'),
     path('load-default-data/', load_default_data, name='load-default-data'),
     path('processing-status/<str:task_id>/', get_processing_status, name='processing-status'),
+    path('processing-status/<str:task_id>/stream/', stream_processing_status, name='processing-status-stream'),
     path('get-sections/<str:task_id>/', get_sections, name='get-sections'),
     path('update-section/', update_section, name='update-section'),
     path('create-checked-structure/', create_checked_structure, name='create-checked-structure'),
@@ -0,0 +1,103 @@
+"""
+Batched, cached lookup of user names and email addresses
+
+Notification code resolves the users it notifies through resolve_users(ids),
+which answers from a process-local LRU cache and loads all misses with a
+single UserId IN (...) query. The result is keyed by int UserId but can be
+indexed with the raw ids the caller has ('7', 7, None), as they are
+normalized the same way. Saving or deleting a Users row invalidates its
+entry through the post_save/post_delete receivers below; the TTL bounds
+staleness for queryset updates, which do not send signals.
+
+Settings:
+    USER_DIRECTORY_CACHE_MAX_ENTRIES  - maximum cached users per process (default 4096)
+    USER_DIRECTORY_CACHE_TTL_SECONDS  - seconds an entry stays valid (default 300)
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Users
+from .rbac.cache import RBACPermissionCache, NO_RECORD
+
+# Field names match the Users model, so entries can stand in for Users instances
+UserDirectoryEntry = namedtuple('UserDirectoryEntry', ['UserId', 'UserName', 'Email'])
+
+user_cache = RBACPermissionCache(
+    max_entries=getattr(settings, 'USER_DIRECTORY_CACHE_MAX_ENTRIES', 4096),
+    ttl_seconds=getattr(settings, 'USER_DIRECTORY_CACHE_TTL_SECONDS', 300),
+)
+
+
+def _normalize_user_id(user_id):
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResolvedUsers(dict):
+    """UserId -> UserDirectoryEntry; lookups normalize the id like resolve_users does"""
+
+    def __getitem__(self, user_id):
+        return super().__getitem__(_normalize_user_id(user_id))
+
+    def __contains__(self, user_id):
+        return super().__contains__(_normalize_user_id(user_id))
+
+    def get(self, user_id, default=None):
+        return super().get(_normalize_user_id(user_id), default)
+
+
+def resolve_users(user_ids):
+    """
+    Map each known user id to a UserDirectoryEntry with one query for all
+    uncached ids. Unknown, empty or non-numeric ids are left out.
+    """
+    resolved = ResolvedUsers()
+    missing = set()
+    for user_id in user_ids:
+        user_id = _normalize_user_id(user_id)
+        if user_id is None or user_id in resolved:
+            continue
+        entry = user_cache.get(user_id)
+        if entry is None:
+            missing.add(user_id)
+        elif entry is not NO_RECORD:
+            resolved[user_id] = entry
+
+    if missing:
+        rows = Users.objects.filter(UserId__in=missing).values_list('UserId', 'UserName', 'Email')
+        for user_id, user_name, email in rows:
+            entry = UserDirectoryEntry(user_id, user_name, email)
+            user_cache.set(user_id, entry)
+            resolved[user_id] = entry
+            missing.discard(user_id)
+        for user_id in missing:
+            user_cache.set(user_id, NO_RECORD)
+
+    return resolved
+
+
+def resolve_user(user_id):
+    """UserDirectoryEntry for one user, or None"""
+    return resolve_users([user_id]).get(user_id)
+
+
+def get_user_email(user_id):
+    entry = resolve_user(user_id)
+    return entry.Email if entry else None
+
+
+def get_user_name(user_id):
+    entry = resolve_user(user_id)
+    return entry.UserName if entry else None
+
+
+@receiver(post_save, sender=Users)
+@receiver(post_delete, sender=Users)
+def invalidate_user_directory_entry(sender, instance, **kwargs):
+    user_cache.invalidate(instance.UserId)